@@ -0,0 +1,117 @@
+"""
+Batches of autonomous workflows.
+
+A batch starts one autonomous workflow per item, at most `max_concurrency` at
+a time, in this process so that the items share its warm clients and caches.
+Each item is run and reported on its own: a failure ends that item only. The
+progress of the batch is reported as a stream of updates, ending with the
+results of every item.
+"""
+
+import asyncio
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+from .graph import graph
+from ..utils.event_broker import EventBroker, event_broker
+from ..utils.metrics import BATCH_ITEMS_TOTAL
+
+from ..utils.logging_config import setup_logging, ctext
+logger = setup_logging()
+
+
+def item_result(index: int, thread_id: Optional[str], values: Dict[str, Any], error: Optional[str]) -> Dict[str, Any]:
+    """Summarizes the outcome of a batch item from the final state of its workflow."""
+    selected_topic = values.get("selected_topic")
+    if selected_topic:
+        topic = selected_topic["name"] if isinstance(selected_topic, dict) else selected_topic.name
+    else:
+        topic = values.get("user_provided_topic")
+    error = error or values.get("error_message")
+    return {
+        "index": index,
+        "thread_id": thread_id,
+        "status": "failed" if error else "completed",
+        "error": error,
+        "topic": topic,
+        "final_content": values.get("final_content"),
+        "publication_id": values.get("publication_id"),
+    }
+
+
+async def _run_item(index: int, item: Any, launch: Callable[[Any], Awaitable[Tuple[str, Any]]],
+                    slots: asyncio.Semaphore, broker: EventBroker, progress: asyncio.Queue):
+    thread_id, values, error = None, {}, None
+    try:
+        async with slots:
+            # The run is submitted last in the launch: subscribing before yielding to the event loop again,
+            # so its end is not missed
+            thread_id, _ = await launch(item)
+            with broker.subscription(thread_id) as events:
+                await progress.put({"event": "item_started", "index": index, "thread_id": thread_id})
+                while not (event := await events.get()).end:
+                    pass
+            error = event.error
+            state = await graph.aget_state({"configurable": {"thread_id": thread_id}})
+            values = state.values if state else {}
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        logger.error(f"Batch item {index} failed: {e}")
+        error = str(e) or type(e).__name__
+
+    result = item_result(index, thread_id, values, error)
+    BATCH_ITEMS_TOTAL.labels(status=result["status"]).inc()
+    await progress.put({"event": "item_finished", "index": index, "thread_id": thread_id, "result": result})
+
+
+async def run_batch(items: Sequence[Any], launch: Callable[[Any], Awaitable[Tuple[str, Any]]], max_concurrency: int,
+                    broker: EventBroker = event_broker) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Runs a batch of workflows and yields its progress.
+
+    Args:
+        items: The start payloads of the workflows.
+        launch: Saves the initial state of a workflow from its payload and
+            submits its first run, returning its thread ID and initial state.
+        max_concurrency: The maximum number of items run at once.
+        broker: Where the runs of the workflows publish their events.
+
+    Yields:
+        "item_started" and "item_finished" updates, the latter with the result
+        of the item and the progress of the batch, then a "batch_finished"
+        update with the results of every item. Items not finished when the
+        consumer stops are not started; workflows already started go on.
+    """
+    slots = asyncio.Semaphore(max(1, max_concurrency))
+    progress: asyncio.Queue = asyncio.Queue()
+    tasks = [
+        asyncio.create_task(_run_item(index, item, launch, slots, broker, progress))
+        for index, item in enumerate(items)
+    ]
+    results: List[Optional[Dict[str, Any]]] = [None] * len(tasks)
+    finished = failed = 0
+    logger.info(ctext(f"Running a batch of {len(tasks)} workflows, {max(1, max_concurrency)} at a time.", color='white'))
+
+    try:
+        while finished < len(tasks):
+            update = await progress.get()
+            if update["event"] == "item_finished":
+                result = update["result"]
+                results[result["index"]] = result
+                finished += 1
+                failed += result["status"] == "failed"
+                update["progress"] = {"finished": finished, "failed": failed, "total": len(tasks)}
+            yield update
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    logger.info(ctext(f"Batch finished: {finished - failed} completed, {failed} failed.", color='white'))
+    yield {
+        "event": "batch_finished",
+        "total": len(tasks),
+        "completed": finished - failed,
+        "failed": failed,
+        "results": results,
+    }
@@ -1,5 +1,5 @@
 import os
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 from langgraph.types import Send
 from langchain_core.runnables import RunnableConfig
 from google.genai import Client
@@ -209,16 +209,22 @@ def get_gemini_client():
 
 # --- Research Loop Nodes ---
 
-def generate_query(state: OverallState, config: RunnableConfig) -> QueryGenerationState:
+def get_raw_topic(state: OverallState) -> Optional[str]:
     """
-    Generates a list of search queries based on the research topic from the state.
+    Get the selected or user-provided topic, as known before opinion analysis refines it.
     """
-    logger.info("GENERATING QUERIES FOR DEEP RESEARCH...")
+    selected_topic = state.get("selected_topic")
+    if selected_topic:
+        return selected_topic["name"] if isinstance(selected_topic, dict) else selected_topic.name
+    return state.get("user_provided_topic")
+
 
+def write_queries(state: OverallState, config: RunnableConfig, topic: Optional[str]) -> QueryGenerationState:
+    """
+    Writes the initial search queries of the deep research on a topic.
+    """
     configurable = Configuration.from_runnable_config(config)
 
-    # Determine the topic from the state, prioritizing the analysis result
-    topic = state.get("topic_from_opinion_analysis") or state.get("user_provided_topic")
     if not topic:
         raise ValueError("No topic found in the state for deep research.")
     
@@ -243,7 +249,28 @@ def generate_query(state: OverallState, config: RunnableConfig) -> QueryGenerati
         number_queries=state["initial_search_query_count"],
     )
     result = structured_llm.invoke(formatted_prompt)
-    return {"query_list": result.query}
+    # The research wave must not be empty, as the graph may be waiting for it
+    return {"query_list": result.query or [topic]}
+
+
+def generate_query(state: OverallState, config: RunnableConfig) -> QueryGenerationState:
+    """
+    Generates a list of search queries based on the research topic from the state.
+    """
+    logger.info("GENERATING QUERIES FOR DEEP RESEARCH...")
+
+    # Determine the topic from the state, prioritizing the analysis result
+    topic = state.get("topic_from_opinion_analysis") or state.get("user_provided_topic")
+    return write_queries(state, config, topic)
+
+
+def generate_initial_query(state: OverallState, config: RunnableConfig) -> QueryGenerationState:
+    """
+    Generates the search queries of the initial research wave from the raw topic,
+    while tweet search and opinion analysis run (parallel research topology).
+    """
+    logger.info("GENERATING INITIAL QUERIES FOR DEEP RESEARCH...")
+    return write_queries(state, config, get_raw_topic(state))
 
 
 def continue_to_web_research(state: QueryGenerationState):
@@ -256,6 +283,16 @@ def continue_to_web_research(state: QueryGenerationState):
     ]
 
 
+def continue_to_initial_web_research(state: QueryGenerationState):
+    """
+    Sends the queries of the initial research wave to the initial web research node.
+    """
+    return [
+        Send("initial_web_research", {"search_query": search_query, "id": int(idx)})
+        for idx, search_query in enumerate(state["query_list"])
+    ]
+
+
 def web_research(state: WebSearchState) -> OverallState:
     """
     Performs web research for a single query using the Google Search API tool.
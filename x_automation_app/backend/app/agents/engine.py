@@ -0,0 +1,210 @@
+"""
+Server-side execution of workflow runs.
+
+Runs used to advance only while a client held the workflow WebSocket open. The
+engine runs them as background tasks instead, at most `WORKFLOW_MAX_CONCURRENT_RUNS`
+at a time, and publishes their events to the event broker, which WebSockets
+subscribe to. A run goes on until the graph ends or is interrupted for a human
+validation; `/workflow/validate` submits the next one. The broker is
+in-process: WebSockets of other workers follow a run through its checkpoints.
+"""
+
+import asyncio
+import json
+from typing import Any, AsyncIterator, Dict, Optional
+
+from .graph import graph
+from .speculation import speculate
+from ..config import settings
+from ..utils.checkpointer import mark_thread_finished, thread_lease, thread_leased, ThreadBusyError
+from ..utils.event_broker import EventBroker, event_broker
+from ..utils.json_encoder import CustomJSONEncoder
+from ..utils.metrics import WORKFLOW_COMPLETIONS_TOTAL, ERRORS_TOTAL, QUEUED_WORKFLOW_RUNS
+from ..utils.metrics_manager import metrics_manager
+from ..utils.presigned_urls import resolve_image_urls
+from ..utils.speculation import speculation_manager
+from langgraph.types import Send
+
+from ..utils.logging_config import setup_logging, ctext, remove_file_handler
+logger = setup_logging()
+
+
+# Events forwarded to the frontend
+ALLOWED_EVENTS = ["on_chain_start", "on_chain_end"]
+ALLOWED_NAMES = [
+    "trend_harvester", "tweet_searcher", "opinion_analyzer",
+    "query_generator", "initial_query_generator", "web_research", "initial_web_research", "reflection", "finalize_answer",
+    "writer", "quality_assurer", "image_generator", "publicator",
+    "await_topic_selection", "await_content_validation",
+    "await_image_validation"
+]
+
+
+class WorkflowEngine:
+    """
+    Runs workflow threads in the background, one run per thread at a time.
+
+    Args:
+        graph: The compiled workflow graph.
+        broker: Where the events of the runs are published.
+        max_concurrency: The maximum number of runs executing at once; others wait.
+    """
+
+    def __init__(self, graph, broker: EventBroker, max_concurrency: int):
+        self.graph = graph
+        self.broker = broker
+        self.max_concurrency = max(1, max_concurrency)
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._queued = 0
+        self._runs: Dict[str, asyncio.Task] = {}
+
+    def is_running(self, thread_id: str) -> bool:
+        """Whether a run of the thread is queued or executing in this process."""
+        return thread_id in self._runs
+
+    def submit(self, thread_id: str) -> bool:
+        """
+        Schedules a run of a thread from its latest checkpoint.
+        Must be called from the event loop.
+
+        Returns:
+            bool: False if the thread already has a run in progress.
+        """
+        if thread_id in self._runs:
+            return False
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+        self._runs[thread_id] = asyncio.create_task(self._run(thread_id), name=f"workflow-{thread_id}")
+        return True
+
+    async def resume(self, thread_id: str) -> bool:
+        """
+        Submits a run of a thread that has pending steps and is not awaiting
+        a human validation, e.g. after a restart.
+
+        Returns:
+            bool: Whether a run is in progress for the thread.
+        """
+        if thread_id in self._runs:
+            return True
+        state = await self.graph.aget_state({"configurable": {"thread_id": thread_id}})
+        if not state or not state.next or state.values.get("next_human_input_step"):
+            return False
+        return self.submit(thread_id)
+
+    async def follow(self, thread_id: str, interval: Optional[float] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Yields the state of a thread run by another worker each time it is
+        checkpointed, until that worker releases the thread. The event broker
+        is in-process, so this is how the other WebSockets follow such runs.
+
+        Args:
+            thread_id: The workflow thread.
+            interval: How often the checkpoints are read, defaults to `WORKFLOW_RELAY_POLL_SECONDS`.
+        """
+        interval = float(settings.WORKFLOW_RELAY_POLL_SECONDS) if interval is None else interval
+        config = {"configurable": {"thread_id": thread_id}}
+        last_checkpoint_id = None
+        while True:
+            leased = await asyncio.to_thread(thread_leased, self.graph.checkpointer, thread_id)
+            state = await self.graph.aget_state(config)
+            checkpoint_id = state.config["configurable"].get("checkpoint_id") if state else None
+            if checkpoint_id != last_checkpoint_id:
+                last_checkpoint_id = checkpoint_id
+                yield state.values
+            if not leased:
+                return
+            await asyncio.sleep(interval)
+
+    async def cancel(self, thread_id: str):
+        """Cancels the run of a thread, if any, and waits for it to stop."""
+        task = self._runs.get(thread_id)
+        if task is None:
+            return
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    async def shutdown(self):
+        """Cancels every run. Their progress is kept in their checkpoints."""
+        tasks = list(self._runs.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _run(self, thread_id: str):
+        config = {"configurable": {"thread_id": thread_id}}
+        error, busy = None, False
+        QUEUED_WORKFLOW_RUNS.inc()
+        self._queued += 1
+        queued = True
+        try:
+            async with self._slots:
+                QUEUED_WORKFLOW_RUNS.dec()
+                self._queued -= 1
+                queued = False
+                # Only one worker runs a workflow at a time
+                async with thread_lease(self.graph.checkpointer, thread_id):
+                    # Another worker may have run the thread up to a human validation, or to its end, while
+                    # this one waited for the lease: running it from there would skip the validation
+                    state = await self.graph.aget_state(config)
+                    if not state or not state.next or state.values.get("next_human_input_step"):
+                        if state:
+                            self.broker.publish(thread_id, json.dumps(resolve_image_urls(state.values), cls=CustomJSONEncoder))
+                        return
+
+                    async for event in self.graph.astream_events(None, config, version="v2"):
+                        data = event.get("data", {})
+                        if isinstance(data.get("input"), Send) or isinstance(data.get("output"), Send):
+                            continue  # not sending this event
+                        if event.get("event") in ALLOWED_EVENTS and event.get("name") in ALLOWED_NAMES:
+                            self.broker.publish(thread_id, json.dumps(event, cls=CustomJSONEncoder))
+
+                    # Sending the final state.
+                    final_state_of_run = await self.graph.aget_state(config)
+                    if final_state_of_run:
+                        self.broker.publish(
+                            thread_id,
+                            json.dumps(resolve_image_urls(final_state_of_run.values), cls=CustomJSONEncoder)
+                        )
+
+                        # Track workflow completion
+                        error_msg = final_state_of_run.values.get("error_message")
+                        WORKFLOW_COMPLETIONS_TOTAL.labels(
+                            status="error" if error_msg else "success",
+                            autonomous_mode=str(final_state_of_run.values.get("is_autonomous_mode", False))
+                        ).inc()
+                        metrics_manager.stop_workflow(thread_id)
+                        if not final_state_of_run.next:
+                            await asyncio.to_thread(mark_thread_finished, self.graph.checkpointer, thread_id)
+                            remove_file_handler(thread_id)
+                            speculation_manager.discard(thread_id)
+                        elif not self._queued:
+                            # Working ahead of the pending human validation, unless runs are waiting
+                            speculate(thread_id, final_state_of_run.values)
+
+        except ThreadBusyError as e:
+            logger.warning(ctext(f"{e}", color='yellow'))
+            error, busy = str(e), True
+        except asyncio.CancelledError:
+            logger.info(ctext(f"Run of workflow {thread_id} cancelled.", color='white'))
+            raise
+        except Exception as e:
+            logger.error(f"Run of workflow {thread_id} failed: {e}", exc_info=True)
+            metrics_manager.stop_workflow(thread_id)
+            ERRORS_TOTAL.labels(error_type=type(e).__name__, component="workflow_engine").inc()
+            error = str(e)
+        finally:
+            if queued:
+                QUEUED_WORKFLOW_RUNS.dec()
+                self._queued -= 1
+            if self._runs.get(thread_id) is asyncio.current_task():
+                del self._runs[thread_id]
+            self.broker.close(thread_id, error=error, busy=busy)
+
+
+# Global instance
+workflow_engine = WorkflowEngine(
+    graph,
+    event_broker,
+    max_concurrency=int(settings.WORKFLOW_MAX_CONCURRENT_RUNS)
+)
@@ -1,5 +1,6 @@
 from .trend_harvester import trend_harvester_node
 from .tweet_search import tweet_search_node
+from .tweet_ranking import tweet_ranking_node
 from .opinion_analysis import opinion_analysis_node
 from .writer import writer_node
 from .quality_assurance import quality_assurance_node
@@ -7,7 +8,9 @@ from .image_generator import image_generator_node
 from .publicator import publicator_node
 from .deep_research_nodes import (
     generate_query,
+    generate_initial_query,
     continue_to_web_research,
+    continue_to_initial_web_research,
     web_research,
     reflection,
     evaluate_research,
@@ -15,7 +18,9 @@ from .deep_research_nodes import (
 )
 
 from langgraph.graph import StateGraph, END
-from langgraph.checkpoint.memory import MemorySaver
+from ..config import settings
+from ..utils.checkpointer import create_checkpointer
+from ..utils.node_cache import memoize_node
 
 from .state import OverallState
 from ..utils.metrics import VALIDATION_REQUESTS_TOTAL, TOPICS_SELECTED_TOTAL
@@ -105,84 +110,133 @@ def route_after_validation(state: OverallState) -> str:
 
     return "END"
 
+def with_initial_research(route):
+    """
+    Wraps a routing function so that the tweet search also starts the initial
+    research wave (parallel research topology).
+    """
+    def route_with_initial_research(state: OverallState):
+        destination = route(state)
+        if destination == "tweet_searcher":
+            return ["tweet_searcher", "initial_query_generator"]
+        return destination
+    route_with_initial_research.__name__ = route.__name__
+    return route_with_initial_research
+
+
+def build_workflow(parallel_research: bool = False) -> StateGraph:
+    """
+    Builds the workflow graph.
+
+    Args:
+        parallel_research: Whether deep research starts from the raw topic while
+            tweets are searched and analyzed, reflection then following up on the
+            topic refined by the opinion analysis. Otherwise it starts once the
+            opinion analysis is done.
+    """
+    workflow = StateGraph(OverallState)
+
+    workflow.add_node("trend_harvester", trend_harvester_node)
+    workflow.add_node("tweet_searcher", tweet_search_node)
+    workflow.add_node("tweet_ranker", tweet_ranking_node)
+    workflow.add_node("opinion_analyzer", memoize_node(
+        "opinion_analyzer", opinion_analysis_node, reads=["tweet_search_results"]
+    ))
+    if parallel_research:
+        workflow.add_node("initial_query_generator", generate_initial_query)
+        workflow.add_node("initial_web_research", web_research)
+    else:
+        workflow.add_node("query_generator", generate_query)
+    workflow.add_node("web_research", web_research)
+    workflow.add_node("reflection", reflection)
+    workflow.add_node("finalize_answer", finalize_answer)
+    workflow.add_node("writer", memoize_node("writer", writer_node, reads=[
+        "final_deep_research_report", "opinion_summary", "overall_sentiment", "x_content_type",
+        "content_length", "content_draft", "brand_voice", "target_audience", "user_config",
+        "validation_result",
+    ]))
+    workflow.add_node("quality_assurer", memoize_node(
+        "quality_assurer", quality_assurance_node, reads=["content_draft", "content_length", "image_prompts"]
+    ))
+    workflow.add_node("image_generator", image_generator_node)
+    workflow.add_node("publicator", publicator_node)
+
+    # HiTL interrupt nodes
+    workflow.add_node("await_topic_selection", await_topic_selection)
+    workflow.add_node("await_content_validation", await_content_validation)
+    workflow.add_node("await_image_validation", await_image_validation)
+
+    # Autonomous node
+    workflow.add_node("auto_select_topic", auto_select_topic)
+
+
+    # Workflow Edges & Routing
+    route_to_topic = with_initial_research if parallel_research else (lambda route: route)
+    workflow.set_conditional_entry_point(route_to_topic(initial_routing))
+
+    workflow.add_conditional_edges("trend_harvester", route_after_trend_harvester)
+    workflow.add_edge("auto_select_topic", "tweet_searcher")
+
+    # Continuation from the HiTL topic selection
+    workflow.add_conditional_edges(
+        "await_topic_selection", 
+        route_to_topic(route_after_validation), 
+        ["tweet_searcher", "initial_query_generator"] if parallel_research else {"tweet_searcher": "tweet_searcher"}
+    )
+
+    workflow.add_edge("tweet_searcher", "tweet_ranker")
+    workflow.add_edge("tweet_ranker", "opinion_analyzer")
+
+    # Deep Research Sub-Graph
+    if parallel_research:
+        workflow.add_edge("auto_select_topic", "initial_query_generator")
+        workflow.add_conditional_edges(
+            "initial_query_generator", continue_to_initial_web_research, ["initial_web_research"]
+        )
+        # Reflection waits for both the initial research wave and the opinion analysis
+        workflow.add_edge(["opinion_analyzer", "initial_web_research"], "reflection")
+    else:
+        workflow.add_edge("opinion_analyzer", "query_generator")
+        workflow.add_conditional_edges(
+            "query_generator", continue_to_web_research, ["web_research"]
+        )
+
+    workflow.add_edge("web_research", "reflection")
+    workflow.add_conditional_edges(
+        "reflection", evaluate_research, ["web_research", "finalize_answer"]
+    )
+
+    workflow.add_edge("finalize_answer", "writer")
+
+    workflow.add_edge("writer", "quality_assurer")
+    workflow.add_conditional_edges("quality_assurer", route_after_qa)
+
+    # Continuation from the HiTL content validation
+    workflow.add_conditional_edges(
+        "await_content_validation",
+        route_after_validation,
+        {"writer": "writer", "image_generator": "image_generator", "publicator": "publicator"},
+    )
 
-# Initialize the StateGraph
-workflow = StateGraph(OverallState)
-memory = MemorySaver()
-
-workflow.add_node("trend_harvester", trend_harvester_node)
-workflow.add_node("tweet_searcher", tweet_search_node)
-workflow.add_node("opinion_analyzer", opinion_analysis_node)
-workflow.add_node("query_generator", generate_query)
-workflow.add_node("web_research", web_research)
-workflow.add_node("reflection", reflection)
-workflow.add_node("finalize_answer", finalize_answer)
-workflow.add_node("writer", writer_node)
-workflow.add_node("quality_assurer", quality_assurance_node)
-workflow.add_node("image_generator", image_generator_node)
-workflow.add_node("publicator", publicator_node)
-
-# HiTL interrupt nodes
-workflow.add_node("await_topic_selection", await_topic_selection)
-workflow.add_node("await_content_validation", await_content_validation)
-workflow.add_node("await_image_validation", await_image_validation)
-
-# Autonomous node
-workflow.add_node("auto_select_topic", auto_select_topic)
-
-
-# Workflow Edges & Routing
-workflow.set_conditional_entry_point(initial_routing)
-
-workflow.add_conditional_edges("trend_harvester", route_after_trend_harvester)
-workflow.add_edge("auto_select_topic", "tweet_searcher")
-
-# Continuation from the HiTL topic selection
-workflow.add_conditional_edges(
-    "await_topic_selection", 
-    route_after_validation, 
-    {"tweet_searcher": "tweet_searcher"}
-)
-
-workflow.add_edge("tweet_searcher", "opinion_analyzer")
-workflow.add_edge("opinion_analyzer", "query_generator")
-
-# Deep Research Sub-Graph
-workflow.add_conditional_edges(
-    "query_generator", continue_to_web_research, ["web_research"]
-)
-
-workflow.add_edge("web_research", "reflection")
-workflow.add_conditional_edges(
-    "reflection", evaluate_research, ["web_research", "finalize_answer"]
-)
-
-workflow.add_edge("finalize_answer", "writer")
-
-workflow.add_edge("writer", "quality_assurer")
-workflow.add_conditional_edges("quality_assurer", route_after_qa)
-
-# Continuation from the HiTL content validation
-workflow.add_conditional_edges(
-    "await_content_validation",
-    route_after_validation,
-    {"writer": "writer", "image_generator": "image_generator", "publicator": "publicator"},
-)
+    workflow.add_conditional_edges("image_generator", route_after_image_generation)
 
-workflow.add_conditional_edges("image_generator", route_after_image_generation)
+    # Continuation from the HiTL image validation
+    workflow.add_conditional_edges(
+        "await_image_validation",
+        route_after_validation,
+        {"image_generator": "image_generator", "publicator": "publicator"},
+    )
 
-# Continuation from the HiTL image validation
-workflow.add_conditional_edges(
-    "await_image_validation",
-    route_after_validation,
-    {"image_generator": "image_generator", "publicator": "publicator"},
-)
+    workflow.add_edge("publicator", END)
+    return workflow
 
-workflow.add_edge("publicator", END)
 
+# Initialize the StateGraph
+workflow = build_workflow(parallel_research=settings.DEEP_RESEARCH_TOPOLOGY.lower() == "parallel")
+checkpointer = create_checkpointer()
 
 graph = workflow.compile(
-    checkpointer=memory,
+    checkpointer=checkpointer,
     interrupt_after=[
         "await_topic_selection",
         "await_content_validation",
@@ -191,4 +245,3 @@ graph = workflow.compile(
 )
 
 
-
@@ -2,38 +2,174 @@ from langchain.agents import create_agent
 from langchain.chat_models import init_chat_model
 
 from ..utils.prompts import image_generator_prompt, get_current_time
-from typing import Dict, List
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from langchain_core.runnables import RunnableConfig
 from .state import OverallState
 from ..utils.schemas import (
     GeneratedImage,
+    ImageDecision,
+    ImageDecisionAction,
     ValidationAction,
     ImageGeneratorOutput
 )
-from ..utils.image import generate_and_upload_image
+from ..utils.image import generate_and_upload_image, edit_and_upload_image
+from ..utils.image_cache import image_cache
+from ..utils.speculation import speculation_manager
 from ..config import settings
 
 from ..utils.logging_config import setup_logging, ctext
 from ..utils.metrics import IMAGES_GENERATED_TOTAL, AGENT_EXECUTION_TIME, AGENT_INVOCATIONS_TOTAL, ERRORS_TOTAL
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+import hashlib
+import re
 import time
 
 logger = setup_logging()
 
 
-def image_generator_node(state: OverallState) -> Dict[str, List[GeneratedImage]]:
+def image_file_name(prompt: str, variant: str = "") -> str:
     """
-    Generates images based on a list of prompts using a ReAct agent.
+    Derives a stable file name from an image prompt: a short slug of its first
+    words followed by a hash of the whole prompt. A `variant` gives a new name
+    to another image of the same prompt.
+    """
+    slug = "_".join(re.findall(r"[a-z0-9]+", prompt.lower())[:6])[:40] or "image"
+    digest = hashlib.sha256(f"{prompt}{variant}".encode("utf-8")).hexdigest()[:12]
+    return f"{slug}_{digest}.jpeg"
+
+
+def _generate(prompt: str, image_name: str) -> Optional[GeneratedImage]:
+    return generate_and_upload_image.invoke({"prompt": prompt, "image_name": image_name})
+
+
+def _run_concurrently(jobs: List[Tuple[str, Callable[[], Optional[GeneratedImage]]]]) -> List[Optional[GeneratedImage]]:
+    """
+    Runs (prompt, image job) pairs with at most `IMAGE_GENERATION_CONCURRENCY`
+    images in flight. Results are returned in job order, None for failed jobs.
+    """
+    if not jobs:
+        return []
 
-    This node invokes an agent that iteratively calls an image generation tool.
-    It then inspects the agent's message history to extract the results of
-    those tool calls and updates the state.
+    def run(job: Tuple[str, Callable[[], Optional[GeneratedImage]]]) -> Optional[GeneratedImage]:
+        prompt, image_job = job
+        try:
+            return image_job()
+        except Exception as e:
+            logger.error(ctext(f"Image generation failed for prompt '{prompt[:60]}': {e}", color='red'))
+            return None
+
+    max_workers = max(1, min(int(settings.IMAGE_GENERATION_CONCURRENCY), len(jobs)))
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="image-generator") as executor:
+        return list(executor.map(run, jobs))
+
+
+def generate_images_directly(final_image_prompts: List[str]) -> List[GeneratedImage]:
+    """
+    Generates an image for every prompt concurrently. Images are returned in
+    prompt order; failed generations are logged and left out.
+    """
+    prompts = list(dict.fromkeys(p for p in final_image_prompts if p and p.strip()))
+    results = _run_concurrently([
+        (prompt, partial(_generate, prompt, image_file_name(prompt))) for prompt in prompts
+    ])
+
+    images = []
+    for prompt, image in zip(prompts, results):
+        if image is not None and image.is_generated:
+            images.append(image)
+        else:
+            IMAGES_GENERATED_TOTAL.labels(status="failure").inc()
+            logger.warning(ctext(f"No image generated for prompt '{prompt[:60]}'.", color='yellow'))
+    return images
+
+
+def regenerate_selected_images(
+        generated_images: List[Any],
+        image_decisions: List[Any],
+        final_image_prompts: List[str]
+    ) -> Tuple[List[GeneratedImage], List[str]]:
+    """
+    Re-runs only the images the user marked for change and keeps the others as
+    they are, in their original order.
+
+    Images marked "regenerate" are generated again from the same prompt, images
+    marked "edit_prompt" from the prompt given with the decision, and images
+    marked "edit" are edited according to the decision's feedback (regenerated
+    from their prompt revised with the feedback when `IMAGE_FEEDBACK_MODE` is
+    "regenerate"); images without a decision are kept. The cached copies of
+    rejected images are invalidated so that they are not served again. When a
+    regeneration fails, the previous image is kept.
 
     Args:
-        state: The current state of the LangGraph.
+        generated_images: The images shown to the user.
+        image_decisions: The user's decisions, by image name.
+        final_image_prompts: The image prompts of the content.
 
     Returns:
-        A dictionary to update the 'generated_images' key in the state.
+        The merged images and the image prompts, with edited prompts replaced.
     """
+    images = [GeneratedImage.model_validate(image) for image in generated_images]
+    decisions = {
+        decision.image_name: decision
+        for decision in (ImageDecision.model_validate(d) for d in image_decisions)
+    }
+    prompts = list(final_image_prompts or [])
+
+    edit_mode = str(settings.IMAGE_FEEDBACK_MODE).lower() == "edit"
+
+    jobs: Dict[int, Tuple[str, Callable[[], Optional[GeneratedImage]]]] = {}
+    for index, image in enumerate(images):
+        decision = decisions.get(image.image_name)
+        if decision is None or decision.action == ImageDecisionAction.KEEP:
+            continue
+
+        feedback = (decision.feedback or "").strip()
+        if decision.action == ImageDecisionAction.EDIT and feedback:
+            if image.prompt:
+                image_cache.invalidate(image.prompt)
+            image_name = image_file_name(image.prompt or image.image_name, variant=f"{image.image_name}{feedback}")
+            if edit_mode:
+                jobs[index] = (image.prompt or image.image_name, partial(edit_and_upload_image, image, feedback, image_name))
+                continue
+            if image.prompt:
+                revised_prompt = f"{image.prompt}\n\nRevision requested by the user: {feedback}"
+                jobs[index] = (revised_prompt, partial(_generate, revised_prompt, image_name))
+                continue
+
+        if decision.action == ImageDecisionAction.EDIT_PROMPT:
+            new_prompt = (decision.prompt or "").strip()
+        else:
+            new_prompt = image.prompt
+        if not new_prompt:
+            logger.warning(ctext(f"No prompt to regenerate image '{image.image_name}', keeping it.", color='yellow'))
+            continue
+
+        if image.prompt:
+            image_cache.invalidate(image.prompt)
+            if new_prompt != image.prompt and image.prompt in prompts:
+                prompts[prompts.index(image.prompt)] = new_prompt
+        jobs[index] = (new_prompt, partial(_generate, new_prompt, image_file_name(new_prompt, variant=image.image_name)))
+
+    logger.info(ctext(f"Regenerating {len(jobs)} of {len(images)} images.", color='white'))
+    results = _run_concurrently(list(jobs.values()))
 
+    for index, image in zip(jobs, results):
+        if image is not None and image.is_generated:
+            images[index] = image
+            IMAGES_GENERATED_TOTAL.labels(status="success").inc()
+        else:
+            IMAGES_GENERATED_TOTAL.labels(status="failure").inc()
+            logger.warning(ctext(f"Image '{images[index].image_name}' could not be regenerated, keeping it.", color='yellow'))
+
+    return images, prompts
+
+
+def generate_images_with_agent(final_image_prompts: List[str], feedback: str) -> List[GeneratedImage]:
+    """
+    Generates images with a ReAct agent that first rewrites the prompts
+    according to the feedback, then calls `generate_and_upload_image` for each.
+    """
     try:
         llm = f"google_genai:{settings.GEMINI_MODEL}"
         model = init_chat_model(llm, api_key=settings.GEMINI_API_KEY)
@@ -51,48 +187,94 @@ def image_generator_node(state: OverallState) -> Dict[str, List[GeneratedImage]]
         response_format=ImageGeneratorOutput
     )
 
+    prompt = image_generator_prompt.format(
+        final_image_prompts=final_image_prompts,
+        feedback=feedback,
+        current_timestamp=get_current_time()
+    )
+
+    response = image_generating_agent.invoke({"messages": [("user", prompt)]})
+    return response["structured_response"].images
+
+
+def image_generator_node(state: OverallState, config: Optional[RunnableConfig] = None) -> Dict[str, List[GeneratedImage]]:
+    """
+    Generates images based on a list of prompts.
+
+    By default, all prompts are generated concurrently without any LLM round-trip.
+    When the user rejected the previous images with per-image decisions, only
+    the images marked for change are generated again. Free-text feedback is
+    applied by editing the previous images when `IMAGE_FEEDBACK_MODE` is "edit";
+    otherwise the ReAct agent rewrites the prompts according to it. The agent is
+    also used when `IMAGE_GENERATION_MODE` is set to "agent". Images generated
+    speculatively while the content validation was pending are reused from the
+    image cache.
+
+    Args:
+        state: The current state of the LangGraph.
+        config: The run configuration, giving the thread of the workflow.
+
+    Returns:
+        A dictionary to update the 'generated_images' key in the state.
+    """
 
     logger.info("GENERATING CONTENT IMAGES...")
-    
+
     start_time = time.time()
     status = "success"
     AGENT_INVOCATIONS_TOTAL.labels(agent_name="image_generator", status="started").inc()
-    
+
     try:
         final_image_prompts = state.get("final_image_prompts")
         if not final_image_prompts:
             logger.info(ctext("No image prompts found. Skipping image generation.", color='white'))
             return {"generated_images": []}
 
+        # Waiting for the images still being generated speculatively
+        thread_id = ((config or {}).get("configurable") or {}).get("thread_id")
+        if thread_id:
+            for prompt in final_image_prompts:
+                speculation_manager.claim(thread_id, "images", prompt)
+
         # Handle feedback from the HiTL validation step
-        feedback = "No feedback provided."
+        feedback = None
         validation_result = state.get("validation_result")
 
         if isinstance(validation_result, dict) and validation_result.get("action") == ValidationAction.REJECT:
             data = validation_result.get("data")
             if isinstance(data, dict):
+                image_decisions = data.get("image_decisions")
+                generated_images = state.get("generated_images")
+                if image_decisions and generated_images:
+                    images, prompts = regenerate_selected_images(generated_images, image_decisions, final_image_prompts)
+                    return {"generated_images": images, "final_image_prompts": prompts}
+
                 feedback_from_data = data.get("feedback")
+                if feedback_from_data and generated_images and str(settings.IMAGE_FEEDBACK_MODE).lower() == "edit":
+                    logger.info(ctext(f"Editing images based on feedback: {feedback_from_data}\n", color='white'))
+                    edit_decisions = [
+                        {"image_name": image.image_name, "action": ImageDecisionAction.EDIT, "feedback": feedback_from_data}
+                        for image in (GeneratedImage.model_validate(i) for i in generated_images)
+                    ]
+                    images, prompts = regenerate_selected_images(generated_images, edit_decisions, final_image_prompts)
+                    return {"generated_images": images, "final_image_prompts": prompts}
+
                 if feedback_from_data:
                     feedback = feedback_from_data
                     logger.info(ctext(f"Revising image prompts based on feedback: {feedback}\n", color='white'))
 
+        if feedback or str(settings.IMAGE_GENERATION_MODE).lower() == "agent":
+            images = generate_images_with_agent(final_image_prompts, feedback or "No feedback provided.")
+        else:
+            images = generate_images_directly(final_image_prompts)
 
-        prompt = image_generator_prompt.format(
-            final_image_prompts=final_image_prompts,
-            feedback=feedback,
-            current_timestamp=get_current_time()
-        )
-        
-        response = image_generating_agent.invoke({"messages": [("user", prompt)]})
-        parsed_response = response["structured_response"]
-
-        logger.info(ctext(f"Successfully generated {len(parsed_response.images)} images.\n", color='white'))
+        logger.info(ctext(f"Successfully generated {len(images)} images.\n", color='white'))
 
         # Track image generation
-        for _ in parsed_response.images:
+        for _ in images:
             IMAGES_GENERATED_TOTAL.labels(status="success").inc()
 
-        return {"generated_images": parsed_response.images}
+        return {"generated_images": images}
 
     except Exception as e:
         logger.error(f"An unexpected error occurred in the image generator node: {e}\n")
@@ -100,7 +282,7 @@ def image_generator_node(state: OverallState) -> Dict[str, List[GeneratedImage]]
         IMAGES_GENERATED_TOTAL.labels(status="failure").inc()
         ERRORS_TOTAL.labels(error_type=type(e).__name__, component="agent_image_generator").inc()
         return {"error_message": f"An unexpected error occurred during image generation: {str(e)}"}
-    
+
     finally:
         duration = time.time() - start_time
         AGENT_EXECUTION_TIME.labels(agent_name="image_generator", status=status).observe(duration)
@@ -5,7 +5,7 @@ from typing import Dict, Any
 from .state import OverallState
 from ..utils.schemas import OpinionAnalysisOutput
 from ..config import settings
-from ..utils.x_utils import data_to_csv
+from ..utils.tweet_serializer import serialize_tweets_compact
 
 from ..utils.logging_config import setup_logging, ctext
 logger = setup_logging()
@@ -52,9 +52,12 @@ def opinion_analysis_node(state: OverallState) -> Dict[str, Any]:
         if not tweets:
             raise ValueError("No tweets found in the state to analyze.")
 
-        data = [tweet.model_dump() for tweet in tweets]
-        csv_data = data_to_csv(data)
-        prompt = opinion_analysis_prompt.format(tweets=csv_data)
+        tweets_data = serialize_tweets_compact(
+            tweets,
+            token_budget=int(settings.OPINION_ANALYSIS_TOKEN_BUDGET),
+            max_text_chars=int(settings.OPINION_ANALYSIS_TWEET_MAX_CHARS)
+        )
+        prompt = opinion_analysis_prompt.format(tweets=tweets_data)
 
 
         analysis_result = structured_llm.invoke(prompt)
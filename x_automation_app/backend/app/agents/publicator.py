@@ -3,6 +3,7 @@ from .state import OverallState
 from ..utils.x_utils import get_char_count, post_tweet_v2
 from ..utils.prompts import thread_composer_prompt
 from ..utils.schemas import ThreadPlan, GeneratedImage
+from ..utils.thread_composer import compose_thread
 from langchain.agents import create_agent
 from langchain.chat_models import init_chat_model
 from ..config import settings
@@ -16,20 +17,11 @@ logger = setup_logging()
 
 
 
-
-
-def publicator_node(state: OverallState) -> Dict[str, Any]:
+def compose_thread_with_llm(final_content: str, image_paths: List[str]) -> ThreadPlan:
     """
-    Handles the final output of the workflow, either by publishing the content
-    to a platform like X or by packaging it for retrieval.
-    
-    Args:
-        state: The current state of the LangGraph.
-
-    Returns:
-        A dictionary to update the 'publication_id' in the state.
+    Splits the final content into a thread with a ReAct agent that checks
+    the length of each tweet with the `get_char_count` tool.
     """
-
     try:
         llm = f"google_genai:{settings.GEMINI_MODEL}"
         model = init_chat_model(llm, api_key=settings.GEMINI_API_KEY)
@@ -47,6 +39,42 @@ def publicator_node(state: OverallState) -> Dict[str, Any]:
         response_format=ThreadPlan
     )
 
+    prompt = thread_composer_prompt.format(
+        final_content=final_content,
+        image_paths=image_paths
+    )
+
+    response = thread_composer_agent.invoke({"messages": [("user", prompt)]})
+    return response["structured_response"]
+
+
+def plan_thread(final_content: str, image_paths: List[str]) -> ThreadPlan:
+    """
+    Plans a thread with the composer selected by `THREAD_COMPOSER`.
+    The local composer falls back to the LLM composer if it fails.
+    """
+    if str(settings.THREAD_COMPOSER).lower() == "llm":
+        return compose_thread_with_llm(final_content, image_paths)
+
+    try:
+        return compose_thread(final_content, image_paths)
+    except Exception as e:
+        logger.warning(ctext(f"Local thread composition failed: {e}. Falling back to the LLM composer.", color='yellow'))
+        return compose_thread_with_llm(final_content, image_paths)
+
+
+def publicator_node(state: OverallState) -> Dict[str, Any]:
+    """
+    Handles the final output of the workflow, either by publishing the content
+    to a platform like X or by packaging it for retrieval.
+    
+    Args:
+        state: The current state of the LangGraph.
+
+    Returns:
+        A dictionary to update the 'publication_id' in the state.
+    """
+
     logger.info("PUBLISHING/DISPLAYING FINAL CONTENT...")
 
     start_time = time.time()
@@ -72,17 +100,13 @@ def publicator_node(state: OverallState) -> Dict[str, Any]:
                 raise ValueError("Authentication session is required to publish on X. Please log in.")
 
             image_paths = [img.local_file_path for img in generated_images] if generated_images else []
+            # Images may be neither in memory nor on disk in this worker, e.g. after a restart
+            image_keys = {img.local_file_path: img.s3_key for img in generated_images or [] if img.s3_key}
 
             if x_content_type == "TWEET_THREAD":
                 logger.info(ctext("Content Type: TWEET_THREAD", color='white'))
 
-                prompt = thread_composer_prompt.format(
-                    final_content=final_content,
-                    image_paths=image_paths
-                )
-
-                response = thread_composer_agent.invoke({"messages": [("user", prompt)]})
-                parsed_response = response["structured_response"]
+                parsed_response = plan_thread(final_content, image_paths)
 
                 logger.info(ctext(f"Thread plan completed\n{parsed_response}\n", color='white'))
 
@@ -98,7 +122,8 @@ def publicator_node(state: OverallState) -> Dict[str, Any]:
                         tweet_text=chunk.text,
                         proxy=proxy,
                         image_paths=chunk_image_path,
-                        reply_to_tweet_id=reply_to_id
+                        reply_to_tweet_id=reply_to_id,
+                        image_keys=image_keys
                     )
                     
                     if tweet_id:
@@ -119,7 +144,8 @@ def publicator_node(state: OverallState) -> Dict[str, Any]:
                     login_cookies=session,
                     tweet_text=final_content,
                     image_paths=image_paths,
-                    proxy=proxy
+                    proxy=proxy,
+                    image_keys=image_keys
                 )
             
             logger.info(ctext(f"Successfully posted to X: https://x.com/{settings.USER_NAME}/status/{publication_id}\n\n", color='white'))
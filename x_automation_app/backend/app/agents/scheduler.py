@@ -0,0 +1,224 @@
+"""
+Recurring autonomous workflows.
+
+The scheduler checks the schedule store every `SCHEDULER_POLL_INTERVAL_SECONDS`
+and starts the autonomous workflow of each schedule that is due, in this
+process. Each run is delayed by up to `SCHEDULER_JITTER_SECONDS` so that
+schedules sharing a cron expression don't all hit the APIs at once, and runs
+more than `SCHEDULER_MISFIRE_GRACE_SECONDS` late (e.g. while the server was
+down) are skipped rather than started in a burst.
+
+`SCHEDULER_PREWARM_LEAD_SECONDS` before a run, the trends it will fetch are put
+in the trends cache and the shared SDK clients are created, so that the run
+itself does not pay for them.
+"""
+
+import asyncio
+import random
+import time
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from ..config import settings
+from ..utils.clients import get_genai_client, get_openai_client, get_s3_client
+from ..utils.cron import CronExpression
+from ..utils.metrics import SCHEDULED_RUNS_TOTAL, SCHEDULE_PREWARMS_TOTAL
+from ..utils.schedule_store import ScheduleStore, schedule_store
+from ..utils.x_utils import fetch_trends
+from ..utils.trends_cache import trends_cache
+
+from ..utils.logging_config import setup_logging, ctext
+logger = setup_logging()
+
+
+def prewarm(payload: Dict[str, Any]):
+    """
+    Warms up what the workflow of a schedule will use first: the trends of
+    its location when it does not bring its own topic, and the shared SDK
+    clients. Each step is run and reported on its own.
+    """
+    steps: List[Tuple[str, Callable[[], Any]]] = [("llm_clients", get_genai_client)]
+    if settings.OPENAI_API_KEY:
+        steps.append(("llm_clients", get_openai_client))
+    steps.append(("s3_client", get_s3_client))
+
+    if not payload.get("has_user_provided_topic"):
+        user_config = payload.get("user_config") or {}
+        woeid = int(user_config.get("trends_woeid") or settings.TRENDS_WOEID)
+        count = int(user_config.get("trends_count") or settings.TRENDS_COUNT)
+        steps.append(("trends", lambda: trends_cache.get(woeid, count, lambda: fetch_trends(woeid, count))))
+
+    for step, warm_up in steps:
+        try:
+            warm_up()
+            SCHEDULE_PREWARMS_TOTAL.labels(step=step, status="success").inc()
+        except Exception as e:
+            logger.warning(ctext(f"Warm-up step '{step}' failed: {e}", color='yellow'))
+            SCHEDULE_PREWARMS_TOTAL.labels(step=step, status="failure").inc()
+
+
+class Scheduler:
+    """
+    Starts the runs of the schedules of a store when they are due.
+
+    Args:
+        store: Where the schedules are kept.
+        jitter_seconds: The maximum random delay added to each run.
+        misfire_grace_seconds: Runs later than this are skipped.
+        prewarm_lead_seconds: How long before a run to warm up for it (0 to disable).
+        warm_up: Warms up for the run of a workflow, from its start payload.
+    """
+
+    def __init__(
+            self,
+            store: ScheduleStore,
+            jitter_seconds: float,
+            misfire_grace_seconds: float,
+            prewarm_lead_seconds: float,
+            warm_up: Callable[[Dict[str, Any]], None] = prewarm,
+        ):
+        self.store = store
+        self.jitter_seconds = jitter_seconds
+        self.misfire_grace_seconds = misfire_grace_seconds
+        self.prewarm_lead_seconds = prewarm_lead_seconds
+        self.warm_up = warm_up
+        self.launch: Optional[Callable[[Dict[str, Any]], Awaitable[str]]] = None
+        self._prewarmed: Set[Tuple[str, float]] = set()
+        self._prewarms: Set[asyncio.Task] = set()
+        self._task: Optional[asyncio.Task] = None
+
+    def next_run_at(self, cron: str, after: float) -> float:
+        """
+        Returns the time of the next run of a cron expression after a given
+        time, with jitter.
+
+        Raises:
+            ValueError: If the expression is invalid or never matches.
+        """
+        moment = CronExpression(cron).next_after(datetime.fromtimestamp(after, timezone.utc))
+        return moment.timestamp() + random.uniform(0, max(0.0, self.jitter_seconds))
+
+    def add(self, name: str, cron: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Stores a new schedule, first run at the next match of its cron expression.
+
+        Raises:
+            ValueError: If the cron expression is invalid or never matches.
+        """
+        return self.store.add(name, cron, payload, self.next_run_at(cron, time.time()))
+
+    def set_enabled(self, schedule_id: str, enabled: bool) -> Optional[Dict[str, Any]]:
+        """
+        Pauses or resumes a schedule. A resumed schedule runs at the next match
+        of its cron expression, not at the runs missed while it was paused.
+
+        Returns:
+            The updated schedule, or None if there is none with this ID.
+        """
+        schedule = self.store.get(schedule_id)
+        if schedule is None:
+            return None
+        next_run_at = self.next_run_at(schedule["cron"], time.time()) if enabled and not schedule["enabled"] else None
+        self.store.set_enabled(schedule_id, enabled, next_run_at)
+        return self.store.get(schedule_id)
+
+    async def tick(self, now: Optional[float] = None) -> List[str]:
+        """
+        Starts the due runs and the warm-ups of the upcoming ones.
+
+        Returns:
+            List[str]: The thread IDs of the workflows started.
+        """
+        now = time.time() if now is None else now
+        # The store is a SQLite database, read and written off the event loop
+        schedules = await asyncio.to_thread(self.store.list, enabled_only=True)
+        # Forget the warm-ups of runs that were claimed, removed or paused
+        self._prewarmed &= {(schedule["schedule_id"], schedule["next_run_at"]) for schedule in schedules}
+
+        started = []
+        for schedule in schedules:
+            schedule_id, due_at = schedule["schedule_id"], schedule["next_run_at"]
+            if now < due_at:
+                if 0 < due_at - now <= self.prewarm_lead_seconds:
+                    self._start_prewarm(schedule)
+                continue
+
+            try:
+                next_run_at = self.next_run_at(schedule["cron"], now)
+            except ValueError as e:
+                logger.error(f"Pausing schedule '{schedule['name']}': {e}")
+                await asyncio.to_thread(self.store.set_enabled, schedule_id, False)
+                continue
+            # Another worker may have claimed this run
+            if not await asyncio.to_thread(self.store.claim, schedule_id, due_at, next_run_at):
+                continue
+
+            delay = now - due_at
+            if delay > self.misfire_grace_seconds:
+                logger.warning(ctext(f"Skipping the run of schedule '{schedule['name']}', {delay:.0f}s late.", color='yellow'))
+                SCHEDULED_RUNS_TOTAL.labels(outcome="misfired").inc()
+                await asyncio.to_thread(self.store.record_run, schedule_id, None, f"Skipped, {delay:.0f} seconds late.")
+                continue
+
+            thread_id, error = None, None
+            try:
+                thread_id = await self.launch(schedule["payload"])
+                started.append(thread_id)
+                SCHEDULED_RUNS_TOTAL.labels(outcome="launched").inc()
+                logger.info(ctext(f"Started the scheduled run of '{schedule['name']}' --- thread_id: {thread_id}", color='white'))
+            except Exception as e:
+                logger.error(f"Failed to start the scheduled run of '{schedule['name']}': {e}")
+                error = str(e) or type(e).__name__
+                SCHEDULED_RUNS_TOTAL.labels(outcome="failed").inc()
+            await asyncio.to_thread(self.store.record_run, schedule_id, thread_id, error)
+        return started
+
+    def _start_prewarm(self, schedule: Dict[str, Any]):
+        key = (schedule["schedule_id"], schedule["next_run_at"])
+        if key in self._prewarmed:
+            return
+        self._prewarmed.add(key)
+        logger.info(ctext(f"Warming up for the scheduled run of '{schedule['name']}'.", color='white'))
+        task = asyncio.get_running_loop().create_task(asyncio.to_thread(self.warm_up, schedule["payload"]))
+        self._prewarms.add(task)
+        task.add_done_callback(self._prewarms.discard)
+
+    async def _run(self, interval: float):
+        while True:
+            try:
+                await self.tick()
+            except Exception as e:
+                logger.error(f"Scheduler tick failed: {e}")
+            await asyncio.sleep(interval)
+
+    def start(self, launch: Callable[[Dict[str, Any]], Awaitable[str]], interval: float):
+        """
+        Checks for due runs every `interval` seconds in the background.
+        Must be called from the event loop.
+
+        Args:
+            launch: Starts an autonomous workflow from its start payload and returns its thread ID.
+            interval: The time between checks, in seconds.
+        """
+        self.launch = launch
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(interval), name="scheduler")
+            logger.info(ctext(f"Scheduler started, checking for due runs every {interval:g}s.", color='white'))
+
+    async def stop(self):
+        """Stops checking for due runs and waits for the warm-ups in progress."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._prewarms:
+            await asyncio.gather(*self._prewarms, return_exceptions=True)
+
+
+# Global instance
+scheduler = Scheduler(
+    schedule_store,
+    jitter_seconds=float(settings.SCHEDULER_JITTER_SECONDS),
+    misfire_grace_seconds=float(settings.SCHEDULER_MISFIRE_GRACE_SECONDS),
+    prewarm_lead_seconds=float(settings.SCHEDULER_PREWARM_LEAD_SECONDS),
+)
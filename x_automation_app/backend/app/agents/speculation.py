@@ -0,0 +1,89 @@
+"""
+What workflows speculate on while a human validation is pending.
+
+While the topic selection is pending, tweets are searched for the top
+`SPECULATION_TOPIC_COUNT` trending topics; the search of the selected topic is
+used by the tweet searcher and the others are discarded. While the content
+validation is pending, the images of the final image prompts are generated
+into the image cache, where the image generator finds them once the content
+is approved; rejected or edited-out prompts are dropped from the cache.
+"""
+
+from functools import partial
+from typing import Any, Dict
+
+from .tweet_search import search_tweets
+from ..config import settings
+from ..utils.image import prefetch_image
+from ..utils.image_cache import image_cache
+from ..utils.schemas import ValidationAction
+from ..utils.speculation import speculation_manager
+
+
+def _topic_name(topic: Any) -> str:
+    return topic["name"] if isinstance(topic, dict) else topic.name
+
+
+def _forget_image(prompt: str, generated: bool):
+    # Only images generated by the speculation are dropped from the cache
+    if generated:
+        image_cache.invalidate(prompt)
+
+
+def speculate(thread_id: str, values: Dict[str, Any]) -> int:
+    """
+    Starts the speculative tasks of a workflow interrupted for a human validation.
+
+    Args:
+        thread_id: The thread of the workflow.
+        values: The state of the workflow.
+
+    Returns:
+        int: The number of tasks started.
+    """
+    if not speculation_manager.enabled:
+        return 0
+
+    started = 0
+    step = values.get("next_human_input_step")
+    if step == "await_topic_selection":
+        topic_count = int(settings.SPECULATION_TOPIC_COUNT)
+        for topic in (values.get("trending_topics") or [])[:topic_count]:
+            started += speculation_manager.submit(
+                thread_id, "tweets", _topic_name(topic),
+                partial(search_tweets, {**values, "selected_topic": topic})
+            )
+    elif step == "await_content_validation":
+        for prompt in dict.fromkeys(p for p in values.get("final_image_prompts") or [] if p and p.strip()):
+            started += speculation_manager.submit(
+                thread_id, "images", prompt,
+                partial(prefetch_image, prompt),
+                undo=partial(_forget_image, prompt)
+            )
+    return started
+
+
+def settle(thread_id: str, values: Dict[str, Any]) -> int:
+    """
+    Discards the speculative tasks that a human validation made useless: the
+    searches of other topics than the selected one, and the images of prompts
+    that were rejected or edited out.
+
+    Args:
+        thread_id: The thread of the workflow.
+        values: The state of the workflow, with the validation result.
+
+    Returns:
+        int: The number of tasks discarded.
+    """
+    validation_result = values.get("validation_result") or {}
+    step = validation_result.get("validated_step")
+    if step == "await_topic_selection":
+        selected_topic = values.get("selected_topic")
+        keep = [_topic_name(selected_topic)] if selected_topic else []
+        return speculation_manager.discard(thread_id, "tweets", keep=keep)
+    if step == "await_content_validation":
+        rejected = validation_result.get("action") == ValidationAction.REJECT
+        keep = [] if rejected else values.get("final_image_prompts") or []
+        return speculation_manager.discard(thread_id, "images", keep=keep)
+    return 0
@@ -0,0 +1,58 @@
+from typing import Dict, Any
+from .state import OverallState
+from ..utils.tweet_ranking import rank_tweets, engagement_scores
+from ..utils.tweet_dedup import collapse_near_duplicates
+from ..config import settings
+
+from ..utils.logging_config import setup_logging, ctext
+logger = setup_logging()
+
+
+def tweet_ranking_node(state: OverallState) -> Dict[str, Any]:
+    """
+    Keeps the most engaging tweets that fit the opinion analysis token budget.
+
+    Near-duplicate tweets are first collapsed into one representative carrying
+    their count. The rest are scored by log-scaled engagement weighted by
+    recency and picked with a diversity penalty, so a larger
+    `MAX_TWEETS_TO_RETRIEVE` improves coverage without growing the opinion
+    analysis prompt.
+
+    Args:
+        state: The current state of the LangGraph.
+
+    Returns:
+        A dictionary to update the 'tweet_search_results' key in the state.
+    """
+
+    logger.info("RANKING TWEETS BY ENGAGEMENT...")
+
+    tweets = state.get("tweet_search_results")
+    if not tweets:
+        # Nothing to rank; the opinion analysis node reports the missing tweets
+        return {}
+
+    try:
+        half_life_hours = float(settings.TWEET_RANKING_HALF_LIFE_HOURS)
+        representatives = collapse_near_duplicates(
+            tweets,
+            engagement_scores(tweets, half_life_hours=half_life_hours),
+            threshold=float(settings.TWEET_DEDUP_SIMILARITY)
+        )
+        ranked_tweets = rank_tweets(
+            representatives,
+            token_budget=int(settings.OPINION_ANALYSIS_TOKEN_BUDGET),
+            max_text_chars=int(settings.OPINION_ANALYSIS_TWEET_MAX_CHARS),
+            half_life_hours=half_life_hours,
+            diversity=float(settings.TWEET_DIVERSITY_WEIGHT)
+        )
+        if not ranked_tweets:
+            # Nothing left to analyze once text-less tweets are dropped, so they pass through unranked
+            logger.warning(ctext("No tweet kept after ranking, keeping the tweets as fetched.\n", color='yellow'))
+            return {}
+        return {"tweet_search_results": ranked_tweets}
+
+    except Exception as e:
+        # Ranking only trims the prompt, so the unranked tweets are still usable
+        logger.warning(ctext(f"Tweet ranking failed, keeping the tweets as fetched: {e}\n", color='yellow'))
+        return {}
@@ -1,12 +1,14 @@
 from langchain.chat_models import init_chat_model
 
 from ..utils.prompts import tweet_search_prompt, get_current_date
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+from langchain_core.runnables import RunnableConfig
 from .state import OverallState
 from ..utils.x_utils import tweet_advanced_search
 # from ..utils.schemas import TweetSearched, TweetSearchResponse, TweetAuthor, TweetQuery
 from ..utils.schemas import TweetSearched, TweetQuery
 from typing import List
+from ..utils.speculation import speculation_manager
 from ..config import settings
 
 from ..utils.logging_config import setup_logging, ctext
@@ -14,11 +16,33 @@ logger = setup_logging()
 
 
 
-def tweet_search_node(state: OverallState) -> Dict[str, List[TweetSearched]]:
+def tweet_search_node(state: OverallState, config: Optional[RunnableConfig] = None) -> Dict[str, List[TweetSearched]]:
     """
-    Uses a ReAct agent to search for tweets based on the current topic and updates the state.
+    Searches for tweets about the selected or user-provided topic.
 
-    This node determines the search topic from various possible keys in the state,
+    The results of a search run speculatively while the topic selection was
+    pending are used when they are about the selected topic.
+
+    Returns:
+        A dictionary to update the 'tweet_search_results' key in the state.
+    """
+    thread_id = ((config or {}).get("configurable") or {}).get("thread_id")
+    selected_topic = state.get("selected_topic")
+    if thread_id and selected_topic:
+        topic = selected_topic["name"] if isinstance(selected_topic, dict) else selected_topic.name
+        speculated = speculation_manager.claim(thread_id, "tweets", topic)
+        if speculated and speculated.get("tweet_search_results"):
+            logger.info(ctext(f"Using the tweets found about '{topic}' while the topic selection was pending.\n", color='white'))
+            return speculated
+
+    return search_tweets(state)
+
+
+def search_tweets(state: OverallState) -> Dict[str, List[TweetSearched]]:
+    """
+    Uses a ReAct agent to search for tweets based on the current topic.
+
+    This function determines the search topic from various possible keys in the state,
     invokes an agent to generate a search query, executes the search, and returns
     the results to be saved in the state.
 
@@ -31,10 +31,62 @@ class Settings:
 
     DEMO_TOKEN=os.getenv("DEMO_TOKEN")
 
+    SESSION_VALIDATION_PROBE=os.getenv("SESSION_VALIDATION_PROBE", "like")
+    SESSION_CACHE_TTL=os.getenv("SESSION_CACHE_TTL", 900)
+    SESSION_CACHE_NEGATIVE_TTL=os.getenv("SESSION_CACHE_NEGATIVE_TTL", 60)
+
+    LOGIN_SESSION_STORE_KEY=os.getenv("LOGIN_SESSION_STORE_KEY")
+    LOGIN_SESSION_STORE_PATH=os.getenv("LOGIN_SESSION_STORE_PATH")
+    LOGIN_SESSION_TTL=os.getenv("LOGIN_SESSION_TTL", 86400)
+    LOGIN_SESSION_REFRESH_MARGIN=os.getenv("LOGIN_SESSION_REFRESH_MARGIN", 3600)
+
     AWS_ACCESS_KEY_ID=os.getenv("AWS_ACCESS_KEY_ID")
     AWS_SECRET_ACCESS_KEY=os.getenv("AWS_SECRET_ACCESS_KEY")
     AWS_DEFAULT_REGION=os.getenv("AWS_DEFAULT_REGION", "eu-west-3")
     BUCKET_NAME=os.getenv("BUCKET_NAME", "x-automation-agent")
+    SDK_MAX_POOL_CONNECTIONS=os.getenv("SDK_MAX_POOL_CONNECTIONS", 20)
+    S3_MULTIPART_THRESHOLD_MB=os.getenv("S3_MULTIPART_THRESHOLD_MB", 8)
+    PRESIGNED_URL_EXPIRES_SECONDS=os.getenv("PRESIGNED_URL_EXPIRES_SECONDS", 3600)
+    PRESIGNED_URL_RENEW_BEFORE_SECONDS=os.getenv("PRESIGNED_URL_RENEW_BEFORE_SECONDS", 600)
+    IMAGE_LOCAL_PERSISTENCE=os.getenv("IMAGE_LOCAL_PERSISTENCE", "true")
+    IMAGE_BUFFER_MAX_BYTES=os.getenv("IMAGE_BUFFER_MAX_BYTES", 256 * 1024 * 1024)
+    IMAGE_OUTPUT_FORMAT=os.getenv("IMAGE_OUTPUT_FORMAT", "jpeg")
+    IMAGE_QUALITY=os.getenv("IMAGE_QUALITY", 85)
+    IMAGE_MAX_DIMENSION=os.getenv("IMAGE_MAX_DIMENSION", 2048)
+    IMAGE_MAX_BYTES=os.getenv("IMAGE_MAX_BYTES", 5 * 1024 * 1024)
+    IMAGE_ENCODING_WORKERS=os.getenv("IMAGE_ENCODING_WORKERS", 2)
+    IMAGE_CACHE_MAX_BYTES=os.getenv("IMAGE_CACHE_MAX_BYTES", 128 * 1024 * 1024)
+    IMAGE_STORE_MAX_BYTES=os.getenv("IMAGE_STORE_MAX_BYTES", 1024 * 1024 * 1024)
+    IMAGE_STORE_MAX_AGE_HOURS=os.getenv("IMAGE_STORE_MAX_AGE_HOURS", 168)
+    IMAGE_STORE_COMPACTION_INTERVAL_SECONDS=os.getenv("IMAGE_STORE_COMPACTION_INTERVAL_SECONDS", 600)
+
+    CHECKPOINTER_BACKEND=os.getenv("CHECKPOINTER_BACKEND", "sqlite")
+    CHECKPOINT_SQLITE_PATH=os.getenv("CHECKPOINT_SQLITE_PATH")
+    CHECKPOINT_RETENTION=os.getenv("CHECKPOINT_RETENTION", 10)
+    CHECKPOINT_BATCH_SIZE=os.getenv("CHECKPOINT_BATCH_SIZE", 32)
+    CHECKPOINT_FLUSH_INTERVAL_SECONDS=os.getenv("CHECKPOINT_FLUSH_INTERVAL_SECONDS", 0.5)
+    CHECKPOINT_FINISHED_TTL_HOURS=os.getenv("CHECKPOINT_FINISHED_TTL_HOURS", 24)
+    CHECKPOINT_IDLE_TTL_HOURS=os.getenv("CHECKPOINT_IDLE_TTL_HOURS", 168)
+    CHECKPOINT_MEMORY_RETENTION=os.getenv("CHECKPOINT_MEMORY_RETENTION", 1)
+    CHECKPOINT_PURGE_INTERVAL_SECONDS=os.getenv("CHECKPOINT_PURGE_INTERVAL_SECONDS", 3600)
+    WORKFLOW_MAX_CONCURRENT_RUNS=os.getenv("WORKFLOW_MAX_CONCURRENT_RUNS", 8)
+    BATCH_MAX_CONCURRENCY=os.getenv("BATCH_MAX_CONCURRENCY", 4)
+    BATCH_MAX_ITEMS=os.getenv("BATCH_MAX_ITEMS", 50)
+    DEEP_RESEARCH_TOPOLOGY=os.getenv("DEEP_RESEARCH_TOPOLOGY", "sequential")
+    SPECULATION_MAX_CONCURRENCY=os.getenv("SPECULATION_MAX_CONCURRENCY", 0)
+    SPECULATION_TOPIC_COUNT=os.getenv("SPECULATION_TOPIC_COUNT", 3)
+    MEMOIZED_NODES=os.getenv("MEMOIZED_NODES", "opinion_analyzer,quality_assurer")
+    NODE_CACHE_MAX_ENTRIES=os.getenv("NODE_CACHE_MAX_ENTRIES", 256)
+    THREAD_LEASE_TTL_SECONDS=os.getenv("THREAD_LEASE_TTL_SECONDS", 60)
+    THREAD_LEASE_WAIT_SECONDS=os.getenv("THREAD_LEASE_WAIT_SECONDS", 10)
+    WORKFLOW_RELAY_POLL_SECONDS=os.getenv("WORKFLOW_RELAY_POLL_SECONDS", 1)
+    STATE_BLOB_THRESHOLD_BYTES=os.getenv("STATE_BLOB_THRESHOLD_BYTES", 16 * 1024)
+    STATE_BLOB_DIR=os.getenv("STATE_BLOB_DIR")
+    SCHEDULE_SQLITE_PATH=os.getenv("SCHEDULE_SQLITE_PATH")
+    SCHEDULER_POLL_INTERVAL_SECONDS=os.getenv("SCHEDULER_POLL_INTERVAL_SECONDS", 15)
+    SCHEDULER_JITTER_SECONDS=os.getenv("SCHEDULER_JITTER_SECONDS", 30)
+    SCHEDULER_MISFIRE_GRACE_SECONDS=os.getenv("SCHEDULER_MISFIRE_GRACE_SECONDS", 300)
+    SCHEDULER_PREWARM_LEAD_SECONDS=os.getenv("SCHEDULER_PREWARM_LEAD_SECONDS", 300)
 
     LANGSMITH_TRACING=os.getenv("LANGSMITH_TRACING", "false")
     LANGSMITH_ENDPOINT=os.getenv("LANGSMITH_ENDPOINT", "https://api.smith.langchain.com")
@@ -43,10 +95,22 @@ class Settings:
 
     TRENDS_COUNT=os.getenv("TRENDS_COUNT", 30)
     TRENDS_WOEID=os.getenv("TRENDS_WOEID", 23424819)
+    TRENDS_CACHE_TTL=os.getenv("TRENDS_CACHE_TTL", 600)
     MAX_TWEETS_TO_RETRIEVE=os.getenv("MAX_TWEETS_TO_RETRIEVE", 15)
     TWEETS_LANGUAGE=os.getenv("TWEETS_LANGUAGE", "english")
+    OPINION_ANALYSIS_TOKEN_BUDGET=os.getenv("OPINION_ANALYSIS_TOKEN_BUDGET", 8000)
+    OPINION_ANALYSIS_TWEET_MAX_CHARS=os.getenv("OPINION_ANALYSIS_TWEET_MAX_CHARS", 280)
+    TWEET_RANKING_HALF_LIFE_HOURS=os.getenv("TWEET_RANKING_HALF_LIFE_HOURS", 24)
+    TWEET_DEDUP_SIMILARITY=os.getenv("TWEET_DEDUP_SIMILARITY", 0.6)
+    TWEET_DIVERSITY_WEIGHT=os.getenv("TWEET_DIVERSITY_WEIGHT", 0.3)
     CONTENT_LANGUAGE=os.getenv("CONTENT_LANGUAGE", "english")
 
+    THREAD_COMPOSER=os.getenv("THREAD_COMPOSER", "local")
+
+    IMAGE_GENERATION_MODE=os.getenv("IMAGE_GENERATION_MODE", "direct")
+    IMAGE_GENERATION_CONCURRENCY=os.getenv("IMAGE_GENERATION_CONCURRENCY", 4)
+    IMAGE_FEEDBACK_MODE=os.getenv("IMAGE_FEEDBACK_MODE", "edit")
+
 
 
 settings = Settings() 
\ No newline at end of file
@@ -1,17 +1,37 @@
 from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
+from cryptography.fernet import InvalidToken
+from contextlib import asynccontextmanager, suppress
+import asyncio
 import uuid
-from typing import Optional
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 import json
 
 from .agents.graph import graph
+from .agents.engine import workflow_engine
+from .agents.batch import run_batch
+from .agents.scheduler import scheduler
+from .agents.speculation import settle
 from .utils import x_utils
 from .utils.x_utils import InvalidSessionError
+from .utils.session_cache import session_cache
+from .utils.session_store import login_session_store
+from .utils.image_store import image_store
+from .utils.presigned_urls import resolve_image_urls
+from .utils.checkpointer import (
+    latest_channel_value, leased_thread_ids, mark_thread_finished, purge_expired_threads, thread_lease,
+    unfinished_thread_ids, ThreadBusyError
+)
+from .utils.event_broker import event_broker
+from .utils.image_encoding import shutdown_encoding_pool
+from .utils.schedule_store import schedule_store
+from .utils.speculation import speculation_manager
+from functools import partial
 from .agents.state import OverallState
-from .utils.schemas import ValidationResult, Trend, UserConfigSchema, UserDetails, ValidationAction
+from .utils.schemas import ValidationResult, Trend, UserConfigSchema, UserDetails, ValidationAction, ImageDecisionAction
 from .utils.json_encoder import CustomJSONEncoder
-from langgraph.types import Send
 from .config import settings
 
 from .utils.logging_config import setup_logging, ctext, add_file_handler, remove_file_handler
@@ -30,10 +50,70 @@ from .utils.metrics import (
 from .utils.metrics_manager import metrics_manager
 
 
+def workflow_image_paths() -> Iterator[str]:
+    """
+    Yields the local paths of the images of workflows that are not finished,
+    or that any worker sharing the checkpoints is running, so that the image
+    store keeps them. Only the images of their latest checkpoint are loaded.
+    """
+    saver = graph.checkpointer
+    for thread_id in dict.fromkeys([*unfinished_thread_ids(saver), *leased_thread_ids(saver)]):
+        for image in latest_channel_value(saver, thread_id, "generated_images") or []:
+            yield image["local_file_path"] if isinstance(image, dict) else image.local_file_path
+
+
+image_store.add_pin_source(workflow_image_paths)
+
+
+async def run_periodically(interval: float, task, name: str):
+    """Runs a blocking maintenance task every `interval` seconds, off the event loop."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await asyncio.to_thread(task)
+        except Exception as e:
+            logger.error(f"{name} failed: {e}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Runs the image store compaction, the checkpoint purge and the scheduler in
+    the background, then cancels workflow runs and speculative tasks, commits
+    pending checkpoints and stops the encoding pool on shutdown.
+    """
+    maintenance = []
+    compaction_interval = float(settings.IMAGE_STORE_COMPACTION_INTERVAL_SECONDS)
+    if compaction_interval > 0:
+        maintenance.append(asyncio.create_task(
+            run_periodically(compaction_interval, image_store.compact, "Image store compaction")
+        ))
+    purge_interval = float(settings.CHECKPOINT_PURGE_INTERVAL_SECONDS)
+    if purge_interval > 0:
+        maintenance.append(asyncio.create_task(
+            run_periodically(purge_interval, partial(purge_expired_threads, graph.checkpointer), "Checkpoint purge")
+        ))
+    scheduler_interval = float(settings.SCHEDULER_POLL_INTERVAL_SECONDS)
+    if scheduler_interval > 0:
+        scheduler.start(launch_scheduled_workflow, scheduler_interval)
+    yield
+    for task in maintenance:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+    await scheduler.stop()
+    await workflow_engine.shutdown()
+    speculation_manager.shutdown()
+    if hasattr(graph.checkpointer, "close"):
+        graph.checkpointer.close()
+    shutdown_encoding_pool()
+
+
 app = FastAPI(
     title="AutoX Backend",
     description="Manages the agentic workflow for content generation and publishing.",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # Initialize Prometheus metrics
@@ -82,6 +162,21 @@ class StartWorkflowPayload(BaseModel):
     user_details: Optional[UserDetails] = None
     proxy: Optional[str] = None
 
+class AutonomousWorkflowPayload(StartWorkflowPayload):
+    is_autonomous_mode: bool = True
+
+class BatchWorkflowPayload(BaseModel):
+    items: List[AutonomousWorkflowPayload]
+    max_concurrency: Optional[int] = None
+
+class SchedulePayload(BaseModel):
+    name: str
+    cron: str
+    workflow: AutonomousWorkflowPayload
+
+class ScheduleUpdatePayload(BaseModel):
+    enabled: bool
+
 class ValidateSessionPayload(BaseModel):
     session: str
     proxy: str
@@ -118,7 +213,8 @@ def get_metrics_status():
         "active_websockets_count": metrics_manager.get_active_websockets_count(),
         "active_workflows_actual": ACTIVE_WORKFLOWS._value._value,
         "active_websockets_actual": ACTIVE_WEBSOCKETS._value._value,
-        "stale_workflows": list(metrics_manager.get_stale_workflows(max_age_seconds=300))  # 5 minutes
+        "stale_workflows": list(metrics_manager.get_stale_workflows(max_age_seconds=300)),  # 5 minutes
+        "checkpoint_thread_bytes": graph.checkpointer.thread_sizes() if hasattr(graph.checkpointer, "thread_sizes") else None
     }
 
 
@@ -158,10 +254,11 @@ async def login(payload: LoginPayload):
 
 
 @app.post("/auth/demo-login", tags=["Authentication"])
-async def demo_login(payload: DemoLoginPayload):
+async def demo_login(payload: DemoLoginPayload, background_tasks: BackgroundTasks):
     """
     Handles the demo user login process using environment variables,
     secured by a secret token.
+    A still-valid stored session is reused, and renewed in the background when close to expiry.
     """
     logger.info("STARTING DEMO LOGIN...")
 
@@ -195,14 +292,30 @@ async def demo_login(payload: DemoLoginPayload):
             detail="Demo login is not configured correctly on the server."
         )
 
+    demo_login_v2 = partial(
+        x_utils.login_v2,
+        user_name=settings.TEST_USER_NAME,
+        email=settings.TEST_USER_EMAIL,
+        password=settings.TEST_USER_PASSWORD,
+        proxy=settings.TEST_USER_PROXY,
+        totp_secret=settings.TEST_USER_TOTP_SECRET
+    )
+
     try:
-        session_details = x_utils.login_v2(
-            user_name=settings.TEST_USER_NAME,
-            email=settings.TEST_USER_EMAIL,
-            password=settings.TEST_USER_PASSWORD,
-            proxy=settings.TEST_USER_PROXY,
-            totp_secret=settings.TEST_USER_TOTP_SECRET
-        )
+        session_details = login_session_store.get(settings.TEST_USER_NAME, settings.TEST_USER_PROXY)
+        if session_details:
+            logger.info(ctext("Reusing the stored demo session.", color='white'))
+            if login_session_store.needs_refresh(settings.TEST_USER_NAME, settings.TEST_USER_PROXY):
+                background_tasks.add_task(
+                    login_session_store.refresh,
+                    settings.TEST_USER_NAME,
+                    settings.TEST_USER_PROXY,
+                    demo_login_v2
+                )
+        else:
+            session_details = demo_login_v2()
+            login_session_store.put(settings.TEST_USER_NAME, settings.TEST_USER_PROXY, session_details)
+
         username = ctext(session_details['user_details']['user_name'], italic=True)
         logger.info(ctext(f"Successfully completed demo login. Session initialized for user {username}", color='white'))
 
@@ -225,13 +338,15 @@ async def demo_login(payload: DemoLoginPayload):
 async def validate_session(payload: ValidateSessionPayload):
     """
     Validates if a session is still active.
+    Results are cached per session, so repeated page loads don't hit X each time.
     """
     try:
-        result = x_utils.verify_session(login_cookies=payload.session, proxy=payload.proxy)
+        result = session_cache.validate(login_cookies=payload.session, proxy=payload.proxy)
         SESSION_VALIDATIONS_TOTAL.labels(status="valid").inc()
         return result
     except InvalidSessionError as e:
         logger.warning(f"Session validation failed: {e}")
+        login_session_store.discard_session(payload.session)
         SESSION_VALIDATIONS_TOTAL.labels(status="invalid").inc()
         raise HTTPException(status_code=401, detail=str(e))
     except Exception as e:
@@ -242,10 +357,12 @@ async def validate_session(payload: ValidateSessionPayload):
 
 # --- Start Workflow Endpoint ---
 
-@app.post("/workflow/start", tags=["Workflow"])
-async def start_workflow(payload: StartWorkflowPayload):
+async def launch_workflow(payload: StartWorkflowPayload) -> Tuple[str, OverallState]:
     """
-    Starts the main content generation workflow with the user's specified settings.
+    Saves the initial state of a new workflow and submits its first run.
+
+    Returns:
+        The thread ID of the workflow and its initial state.
     """
     thread_id = str(uuid.uuid4())
     config = {"configurable": {"thread_id": thread_id}}
@@ -304,14 +421,14 @@ async def start_workflow(payload: StartWorkflowPayload):
             "error_message": None,
         }
 
-        # Save the initial state and start the graph by the first WebSocket connection.
-        graph.update_state(config, initial_state)
+        # Save the initial state and start the graph in the background.
+        await graph.aupdate_state(config, initial_state)
+        workflow_engine.submit(thread_id)
         autonomous_mode = True if initial_state["is_autonomous_mode"] else False
         publish_x = True if initial_state["output_destination"] == "PUBLISH_X" else False
         logger.info(ctext(f"Graph successfully updated with initial state:\nAutonomous mode: {autonomous_mode}\nPublish to X: {publish_x}\nContent type: {initial_state['x_content_type']}\nContent length: {initial_state['content_length']}\n", color='white'))
 
-        # Returning the state just constructed so the frontend can proceed.
-        return {"thread_id": thread_id, "initial_state": initial_state}
+        return thread_id, initial_state
 
     except Exception as e:
         logger.error(f"An error occurred during workflow execution: {e}")
@@ -322,8 +439,122 @@ async def start_workflow(payload: StartWorkflowPayload):
             autonomous_mode=str(payload.is_autonomous_mode)
         ).inc()
         ERRORS_TOTAL.labels(error_type=type(e).__name__, component="workflow_start").inc()
+        raise
+
+
+@app.post("/workflow/start", tags=["Workflow"])
+async def start_workflow(payload: StartWorkflowPayload):
+    """
+    Starts the main content generation workflow with the user's specified settings.
+    """
+    try:
+        thread_id, initial_state = await launch_workflow(payload)
+    except Exception as e:
         raise HTTPException(status_code=500, detail=f"An error occurred during workflow execution: {e}")
 
+    # Returning the state just constructed so the frontend can proceed.
+    return {"thread_id": thread_id, "initial_state": initial_state}
+
+
+# --- Batch Workflow Endpoint ---
+
+@app.post("/workflow/batch", tags=["Workflow"])
+async def batch_workflow(payload: BatchWorkflowPayload):
+    """
+    Runs a batch of autonomous workflows, `BATCH_MAX_CONCURRENCY` at a time at most,
+    and streams its progress as newline-delimited JSON, ending with the result of
+    every workflow. A failed workflow does not stop the others.
+    """
+    max_items = int(settings.BATCH_MAX_ITEMS)
+    if not payload.items:
+        raise HTTPException(status_code=400, detail="The batch has no workflows.")
+    if len(payload.items) > max_items:
+        raise HTTPException(status_code=400, detail=f"A batch has {max_items} workflows at most.")
+
+    # Batches run without human validations
+    items = [item.model_copy(update={"is_autonomous_mode": True}) for item in payload.items]
+    max_concurrency = int(settings.BATCH_MAX_CONCURRENCY)
+    if payload.max_concurrency:
+        max_concurrency = max(1, min(payload.max_concurrency, max_concurrency))
+
+    logger.info(f"STARTING BATCH OF {len(items)} WORKFLOWS...")
+
+    async def stream():
+        async for update in run_batch(items, launch_workflow, max_concurrency):
+            yield json.dumps(update, cls=CustomJSONEncoder) + "\n"
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
+# --- Schedule Endpoints ---
+
+async def launch_scheduled_workflow(payload: Dict[str, Any]) -> str:
+    """Starts the autonomous workflow of a schedule from its stored start payload."""
+    payload = {**payload, "is_autonomous_mode": True}
+    encrypted_session = payload.pop("encrypted_session", None)
+    if encrypted_session:
+        try:
+            payload["session"] = login_session_store.decrypt(encrypted_session)
+        except InvalidToken:
+            raise ValueError("The X session of the schedule could not be decrypted, LOGIN_SESSION_STORE_KEY changed.")
+    thread_id, _ = await launch_workflow(AutonomousWorkflowPayload(**payload))
+    return thread_id
+
+
+def schedule_response(schedule: Dict[str, Any]) -> Dict[str, Any]:
+    """Returns a schedule without the X session of its workflow."""
+    workflow = {
+        key: value for key, value in schedule["payload"].items()
+        if key not in ("session", "encrypted_session")
+    }
+    return {**{key: value for key, value in schedule.items() if key != "payload"}, "workflow": workflow}
+
+
+@app.post("/schedules", tags=["Schedules"])
+async def create_schedule(payload: SchedulePayload):
+    """
+    Schedules an autonomous workflow to run at every match of a cron expression
+    (minute, hour, day of month, month and day of week, in UTC).
+    """
+    workflow = payload.workflow.model_copy(update={"is_autonomous_mode": True}).model_dump(mode="json")
+    # The X session is kept encrypted at rest, as in the login session store
+    session = workflow.pop("session", None)
+    if session:
+        if not login_session_store.has_stable_key:
+            raise HTTPException(
+                status_code=400,
+                detail="LOGIN_SESSION_STORE_KEY must be set to schedule workflows with an X session."
+            )
+        workflow["encrypted_session"] = login_session_store.encrypt(session)
+    try:
+        schedule = await asyncio.to_thread(scheduler.add, payload.name, payload.cron, workflow)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid cron expression: {e}")
+    return schedule_response(schedule)
+
+
+@app.get("/schedules", tags=["Schedules"])
+async def list_schedules():
+    """Lists the schedules, soonest run first."""
+    return [schedule_response(schedule) for schedule in await asyncio.to_thread(schedule_store.list)]
+
+
+@app.patch("/schedules/{schedule_id}", tags=["Schedules"])
+async def update_schedule(schedule_id: str, payload: ScheduleUpdatePayload):
+    """Pauses or resumes a schedule."""
+    schedule = await asyncio.to_thread(scheduler.set_enabled, schedule_id, payload.enabled)
+    if schedule is None:
+        raise HTTPException(status_code=404, detail="Schedule not found.")
+    return schedule_response(schedule)
+
+
+@app.delete("/schedules/{schedule_id}", tags=["Schedules"])
+async def delete_schedule(schedule_id: str):
+    """Deletes a schedule. Workflows it already started go on."""
+    if not await asyncio.to_thread(schedule_store.remove, schedule_id):
+        raise HTTPException(status_code=404, detail="Schedule not found.")
+    return {"message": "Schedule deleted."}
+
 
 # --- Real-time Status Updates with WebSockets ---
 
@@ -336,55 +567,43 @@ async def workflow_ws(websocket: WebSocket, thread_id: str):
     metrics_manager.start_websocket(thread_id)
     
     config = {"configurable": {"thread_id": thread_id}}
-    ALLOWED_EVENTS = ["on_chain_start", "on_chain_end"]
-    ALLOWED_NAMES = [
-        "trend_harvester", "tweet_searcher", "opinion_analyzer", 
-        "query_generator", "web_research", "reflection", "finalize_answer", 
-        "writer", "quality_assurer", "image_generator", "publicator",
-        "await_topic_selection", "await_content_validation",
-        "await_image_validation"
-    ]
 
     try:
-        # Get the current state and send it to the client
-        current_state = graph.get_state(config)
-        if current_state:
-            await websocket.send_text(json.dumps(current_state.values, cls=CustomJSONEncoder))
-        
-        # Streaming events to the frontend
-        async for event in graph.astream_events(None, config, version="v2"):
-            data = event.get("data", {})
-            if isinstance(data.get("input"), Send) or isinstance(data.get("output"), Send):
-                continue  # not sending this event
-            if event.get("event") in ALLOWED_EVENTS and event.get("name") in ALLOWED_NAMES:
-                await websocket.send_text(json.dumps(event, cls=CustomJSONEncoder))
-
-        # Sending the final state.
-        final_state_of_run = graph.get_state(config)
-        if final_state_of_run:
-            await websocket.send_text(json.dumps(final_state_of_run.values, cls=CustomJSONEncoder))
-            
-            # Track workflow completion
-            error_msg = final_state_of_run.values.get("error_message")
-            status = "error" if error_msg else "success"
-            autonomous = final_state_of_run.values.get("is_autonomous_mode", False)
-            
-            WORKFLOW_COMPLETIONS_TOTAL.labels(
-                status=status,
-                autonomous_mode=str(autonomous)
-            ).inc()
-            metrics_manager.stop_workflow(thread_id)
+        # Runs are executed by the workflow engine, the connection only follows them
+        with event_broker.subscription(thread_id) as events:
+            # Get the current state and send it to the client
+            current_state = await graph.aget_state(config)
+            if current_state:
+                await websocket.send_text(json.dumps(resolve_image_urls(current_state.values), cls=CustomJSONEncoder))
+
+            while True:
+                # Resuming a run that no worker process is executing, e.g. after a restart
+                if not await workflow_engine.resume(thread_id):
+                    return
+
+                # Streaming events to the frontend, until the final state of the run
+                while not (event := await events.get()).end:
+                    await websocket.send_text(event.text)
+                if not event.busy:
+                    break
+
+                # Another worker is running the thread: following its checkpoints until it releases it
+                async for values in workflow_engine.follow(thread_id):
+                    await websocket.send_text(json.dumps(resolve_image_urls(values), cls=CustomJSONEncoder))
+
+        if event.error:
+            metrics_manager.stop_websocket(thread_id)
+            WEBSOCKET_DISCONNECTIONS_TOTAL.labels(reason="error").inc()
+            await websocket.close(code=1011, reason=event.error)
 
     except WebSocketDisconnect:
+        # The run goes on without the client
         print(f"WebSocket disconnected for thread: {thread_id}\n")
         metrics_manager.stop_websocket(thread_id)
-        metrics_manager.stop_workflow(thread_id)
         WEBSOCKET_DISCONNECTIONS_TOTAL.labels(reason="client").inc()
-        remove_file_handler(thread_id)
     except Exception as e:
         # print(f"Error in WebSocket for thread {thread_id}: {e}\n")
         metrics_manager.stop_websocket(thread_id)
-        metrics_manager.stop_workflow(thread_id)
         WEBSOCKET_DISCONNECTIONS_TOTAL.labels(reason="error").inc()
         ERRORS_TOTAL.labels(error_type=type(e).__name__, component="websocket").inc()
         await websocket.close(code=1011, reason=str(e))
@@ -401,61 +620,74 @@ async def validate_step(payload: ValidationPayload):
     config = {"configurable": {"thread_id": payload.thread_id}}
 
     try:
-        current_state = graph.get_state(config)
-        if not current_state:
-            raise HTTPException(status_code=404, detail="Workflow thread not found.")
-
-        # Specific step that is awaiting validation
-        next_step = current_state.values.get("next_human_input_step")
-        if not next_step:
-            raise HTTPException(status_code=400, detail="No human input is currently awaited for this workflow.")
+        async with thread_lease(graph.checkpointer, payload.thread_id):
+            current_state = await graph.aget_state(config)
+            if not current_state:
+                raise HTTPException(status_code=404, detail="Workflow thread not found.")
+
+            # Specific step that is awaiting validation
+            next_step = current_state.values.get("next_human_input_step")
+            if not next_step:
+                raise HTTPException(status_code=400, detail="No human input is currently awaited for this workflow.")
         
-        # Track validation response
-        VALIDATION_RESPONSES_TOTAL.labels(
-            validation_step=next_step,
-            action=payload.validation_result.action.value
-        ).inc()
+            # Track validation response
+            VALIDATION_RESPONSES_TOTAL.labels(
+                validation_step=next_step,
+                action=payload.validation_result.action.value
+            ).inc()
         
-        # Storing which step was validated in the result itself, then clearing the
-        # human input step to signal to the frontend that the step is "in progress".
-        update_data = {
-            "validation_result": payload.validation_result.model_dump(exclude_unset=True)
-        }
-        update_data["validation_result"]["validated_step"] = next_step
-        update_data["next_human_input_step"] = None
-
-        # Overwrite the relevant part of the state if editing or approving with data
-        if payload.validation_result.action in [ValidationAction.APPROVE, ValidationAction.EDIT]:
-            if payload.validation_result.data and payload.validation_result.data.extra_data:
-                edit_data = payload.validation_result.data.extra_data
-                if next_step == "await_topic_selection" and "selected_topic" in edit_data:
-                    # The state for selected_topic expects a dict, not a Pydantic model
-                    topic_model = Trend(**edit_data["selected_topic"])
-                    update_data["selected_topic"] = topic_model.model_dump(exclude_unset=True)
-                    logger.info(ctext(f"The user approved the topic: '{ctext(update_data['selected_topic']['name'], italic=True)}'", color='white'))
-
-                elif next_step == "await_content_validation":
-                    logger.info(ctext(f"The user edited then approved the generated content.", color='white'))
-                    if "final_content" in edit_data:
-                        update_data["final_content"] = edit_data["final_content"]
-                    if "final_image_prompts" in edit_data:
-                        update_data["final_image_prompts"] = edit_data["final_image_prompts"]
-            else:
-                logger.info(ctext(f"The user approved the generated content.", color='white'))
+            # Storing which step was validated in the result itself, then clearing the
+            # human input step to signal to the frontend that the step is "in progress".
+            update_data = {
+                "validation_result": payload.validation_result.model_dump(exclude_unset=True)
+            }
+            update_data["validation_result"]["validated_step"] = next_step
+            update_data["next_human_input_step"] = None
+
+            # Overwrite the relevant part of the state if editing or approving with data
+            if payload.validation_result.action in [ValidationAction.APPROVE, ValidationAction.EDIT]:
+                if payload.validation_result.data and payload.validation_result.data.extra_data:
+                    edit_data = payload.validation_result.data.extra_data
+                    if next_step == "await_topic_selection" and "selected_topic" in edit_data:
+                        # The state for selected_topic expects a dict, not a Pydantic model
+                        topic_model = Trend(**edit_data["selected_topic"])
+                        update_data["selected_topic"] = topic_model.model_dump(exclude_unset=True)
+                        logger.info(ctext(f"The user approved the topic: '{ctext(update_data['selected_topic']['name'], italic=True)}'", color='white'))
+
+                    elif next_step == "await_content_validation":
+                        logger.info(ctext(f"The user edited then approved the generated content.", color='white'))
+                        if "final_content" in edit_data:
+                            update_data["final_content"] = edit_data["final_content"]
+                        if "final_image_prompts" in edit_data:
+                            update_data["final_image_prompts"] = edit_data["final_image_prompts"]
+                else:
+                    logger.info(ctext(f"The user approved the generated content.", color='white'))
         
-        elif payload.validation_result.action == ValidationAction.REJECT:
-            if payload.validation_result.data and payload.validation_result.data.feedback:
-                feedback = payload.validation_result.data.feedback
-                logger.info(ctext(f"The user rejected the generated content with the following feedback: '{ctext(feedback, italic=True, color='white')}'.", color='red'))
+            elif payload.validation_result.action == ValidationAction.REJECT:
+                if payload.validation_result.data and payload.validation_result.data.feedback:
+                    feedback = payload.validation_result.data.feedback
+                    logger.info(ctext(f"The user rejected the generated content with the following feedback: '{ctext(feedback, italic=True, color='white')}'.", color='red'))
+                if payload.validation_result.data and payload.validation_result.data.image_decisions:
+                    changed = [d for d in payload.validation_result.data.image_decisions if d.action != ImageDecisionAction.KEEP]
+                    logger.info(ctext(f"The user asked to change {len(changed)} of the generated images.", color='red'))
 
-        graph.update_state(config, update_data)
-        logger.info(ctext("Graph successfully updated with validation data.\n", color='white'))
+            await graph.aupdate_state(config, update_data)
+            logger.info(ctext("Graph successfully updated with validation data.\n", color='white'))
 
+            updated_state = await graph.aget_state(config)
 
-        # Return the updated state so the frontend can re-render and open a new WebSocket
-        updated_state = graph.get_state(config)
-        return updated_state.values
+            # Discarding the work done ahead that the validation made useless
+            settle(payload.thread_id, updated_state.values)
 
+            # Resuming the workflow once the lease is released
+            workflow_engine.submit(payload.thread_id)
+
+
+            # Return the updated state so the frontend can re-render and follow the run on a new WebSocket
+            return resolve_image_urls(updated_state.values)
+
+    except ThreadBusyError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except HTTPException:
         raise
     except Exception as e:
@@ -475,32 +707,39 @@ async def stop_workflow(payload: StopWorkflowPayload):
     config = {"configurable": {"thread_id": payload.thread_id}}
 
     try:
-        # Check if workflow exists
-        current_state = graph.get_state(config)
-        if not current_state:
-            raise HTTPException(status_code=404, detail="Workflow thread not found.")
-
-        # Mark the workflow as stopped by updating the state
-        update_data = {
-            "current_step": "STOPPED",
-            "error_message": "Workflow was stopped by user"
-        }
-        graph.update_state(config, update_data)
+        # Stopping the run of this process, if any, before taking over the workflow
+        await workflow_engine.cancel(payload.thread_id)
+        async with thread_lease(graph.checkpointer, payload.thread_id):
+            # Check if workflow exists
+            current_state = await graph.aget_state(config)
+            if not current_state:
+                raise HTTPException(status_code=404, detail="Workflow thread not found.")
+
+            # Mark the workflow as stopped by updating the state
+            update_data = {
+                "current_step": "STOPPED",
+                "error_message": "Workflow was stopped by user"
+            }
+            await graph.aupdate_state(config, update_data)
+            await asyncio.to_thread(mark_thread_finished, graph.checkpointer, payload.thread_id)
+            speculation_manager.discard(payload.thread_id)
         
-        # Update metrics using metrics manager
-        autonomous = current_state.values.get("is_autonomous_mode", False)
-        WORKFLOW_COMPLETIONS_TOTAL.labels(
-            status="stopped",
-            autonomous_mode=str(autonomous)
-        ).inc()
-        metrics_manager.stop_workflow(payload.thread_id)
+            # Update metrics using metrics manager
+            autonomous = current_state.values.get("is_autonomous_mode", False)
+            WORKFLOW_COMPLETIONS_TOTAL.labels(
+                status="stopped",
+                autonomous_mode=str(autonomous)
+            ).inc()
+            metrics_manager.stop_workflow(payload.thread_id)
         
-        # Clean up file handler
-        remove_file_handler(payload.thread_id)
+            # Clean up file handler
+            remove_file_handler(payload.thread_id)
         
-        logger.info(ctext(f"Workflow {payload.thread_id} successfully stopped.", color='white'))
-        return {"success": True}
+            logger.info(ctext(f"Workflow {payload.thread_id} successfully stopped.", color='white'))
+            return {"success": True}
 
+    except ThreadBusyError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except HTTPException:
         raise
     except Exception as e:
@@ -0,0 +1,872 @@
+"""
+Durable checkpointing of the workflow graph.
+
+`MemorySaver` keeps every checkpoint of every thread in process memory and loses
+them all on restart. `SqliteCheckpointSaver` stores them in a SQLite database in
+WAL mode instead, with writes batched into a single transaction, only the last
+`CHECKPOINT_RETENTION` checkpoints kept per thread, and threads purged once
+finished for `CHECKPOINT_FINISHED_TTL_HOURS` or idle for `CHECKPOINT_IDLE_TTL_HOURS`.
+`BoundedMemorySaver` applies the same limits in memory, where history is compacted
+down to `CHECKPOINT_MEMORY_RETENTION` checkpoints per thread.
+The backend is selected with `CHECKPOINTER_BACKEND`. Either way, large state
+values are offloaded out of checkpoints (see `state_blobs`).
+
+Several workers of the same host (uvicorn processes, or containers sharing a
+local volume) can serve the same workflow: `thread_lease` holds an advisory lock
+on a thread, stored next to its checkpoints, while a worker runs or updates it,
+and the WebSockets of the other workers follow the run through its checkpoints.
+SQLite locking and WAL mode do not work across hosts on a network filesystem
+(NFS, including EFS), so the SQLite database is refused there: workers on several
+hosts, e.g. ECS tasks, need a database server instead.
+"""
+
+import asyncio
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from collections.abc import AsyncIterator, Iterator, Sequence
+from contextlib import asynccontextmanager, suppress
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+    writes_sort_key,
+)
+from langgraph.checkpoint.memory import MemorySaver
+
+from ..config import settings
+from .metrics import CHECKPOINT_MEMORY_BYTES
+from .state_blobs import BLOB_TYPE, create_state_blob_serializer, load_checkpoint_channel, sweep_state_blobs
+
+from ..utils.logging_config import setup_logging, ctext
+logger = setup_logging()
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    parent_checkpoint_id TEXT,
+    type TEXT,
+    checkpoint BLOB,
+    metadata_type TEXT,
+    metadata BLOB,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+);
+CREATE TABLE IF NOT EXISTS writes (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    channel TEXT NOT NULL,
+    type TEXT,
+    value BLOB,
+    task_path TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+);
+CREATE TABLE IF NOT EXISTS threads (
+    thread_id TEXT PRIMARY KEY,
+    updated_at REAL NOT NULL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS threads_updated_at ON threads (updated_at);
+CREATE TABLE IF NOT EXISTS thread_leases (
+    thread_id TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+"""
+
+
+NETWORK_FILESYSTEMS = {"nfs", "nfs4", "cifs", "smb3", "smbfs", "9p", "ceph", "glusterfs", "lustre", "fuse.sshfs", "efs"}
+
+
+def network_filesystem(path: str) -> Optional[str]:
+    """
+    Returns the type of the network filesystem a path is on, or None if it is
+    on a local one or the mounts cannot be read (outside Linux).
+    """
+    try:
+        with open("/proc/mounts", encoding="utf-8") as mounts:
+            entries = [line.split()[1:3] for line in mounts if len(line.split()) >= 3]
+    except OSError:
+        return None
+
+    resolved = str(Path(path).resolve())
+    fstype, longest = None, -1
+    for mount_point, mount_type in entries:
+        # Spaces in mount points are escaped as octal
+        mount_point = mount_point.replace("\\040", " ")
+        if (resolved == mount_point or resolved.startswith(mount_point.rstrip("/") + "/")) and len(mount_point) > longest:
+            fstype, longest = mount_type, len(mount_point)
+    return fstype if fstype in NETWORK_FILESYSTEMS else None
+
+
+def ensure_local_database(path: str):
+    """
+    Refuses a SQLite database on a network filesystem.
+
+    Raises:
+        ValueError: If the database path is on a network filesystem.
+    """
+    if path == ":memory:":
+        return
+    fstype = network_filesystem(path)
+    if fstype:
+        raise ValueError(
+            f"The SQLite database {path} is on a network filesystem ({fstype}), where SQLite locking "
+            "is unreliable. Use a local path: only workers of the same host can share it."
+        )
+
+
+class ThreadBusyError(Exception):
+    """Raised when a workflow thread is locked by another worker."""
+    pass
+
+
+def _config(thread_id: str, checkpoint_ns: str, checkpoint_id: Optional[str]) -> Optional[RunnableConfig]:
+    if not checkpoint_id:
+        return None
+    return {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint_id}}
+
+
+class SqliteCheckpointSaver(BaseCheckpointSaver[str]):
+    """
+    A checkpoint saver backed by SQLite.
+
+    Writes are buffered and committed together once `batch_size` of them are
+    pending, `flush_interval` seconds after the first one, or before any read,
+    so reads always see every write. Async methods run the sync ones in a worker
+    thread to keep the event loop free.
+
+    Args:
+        path: The database file, created if missing.
+        retention: The number of checkpoints kept per thread and namespace (0 keeps all).
+        batch_size: The number of buffered writes that triggers a commit.
+        flush_interval: The maximum delay, in seconds, before buffered writes are committed.
+    """
+
+    def __init__(
+            self,
+            path: str,
+            retention: int = 10,
+            batch_size: int = 32,
+            flush_interval: float = 0.5,
+            *,
+            serde=None
+        ):
+        super().__init__(serde=serde)
+        self.path = path
+        self.retention = retention
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        ensure_local_database(path)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        # Other workers of the host may be writing to the same database
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+        self._lock = threading.RLock()
+        self._pending: List[Tuple[str, tuple]] = []
+        self._touched: set = set()
+        self._flush_timer: Optional[threading.Timer] = None
+        self._closed = False
+
+    # --- Write buffering ---
+
+    def _enqueue(self, statements: List[Tuple[str, tuple]], thread_id: str, checkpoint_ns: Optional[str] = None):
+        with self._lock:
+            self._pending.extend(statements)
+            self._pending.append((
+                "INSERT INTO threads (thread_id, updated_at) VALUES (?, ?) "
+                "ON CONFLICT(thread_id) DO UPDATE SET updated_at = excluded.updated_at, finished_at = NULL",
+                (thread_id, time.time())
+            ))
+            if checkpoint_ns is not None:
+                self._touched.add((thread_id, checkpoint_ns))
+            if len(self._pending) >= self.batch_size:
+                self.flush()
+            else:
+                self._schedule_flush()
+
+    def _schedule_flush(self):
+        with self._lock:
+            if self._flush_timer is None and not self._closed:
+                self._flush_timer = threading.Timer(self.flush_interval, self._flush_in_background)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+
+    def _flush_in_background(self):
+        # Nobody would see an exception raised in the timer thread
+        try:
+            self.flush()
+        except Exception as e:
+            logger.error(ctext(f"Background checkpoint commit failed, retrying: {e}", color='red'))
+            self._schedule_flush()
+
+    def flush(self):
+        """
+        Commits the buffered writes in a single transaction, then applies retention.
+        If the commit fails, the writes stay buffered for the next flush.
+        """
+        with self._lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            if not self._pending:
+                return
+            pending, touched = self._pending, self._touched
+            self._pending, self._touched = [], set()
+            try:
+                self._conn.execute("BEGIN IMMEDIATE")
+                for statement, params in pending:
+                    self._conn.execute(statement, params)
+                if self.retention > 0:
+                    for thread_id, checkpoint_ns in touched:
+                        self._apply_retention(thread_id, checkpoint_ns)
+                self._conn.execute("COMMIT")
+            except Exception:
+                if self._conn.in_transaction:
+                    self._conn.execute("ROLLBACK")
+                # Writes already reported as saved must not be lost
+                self._pending = pending + self._pending
+                self._touched = touched | self._touched
+                logger.error(ctext(f"Failed to commit {len(pending)} checkpoint writes.", color='red'))
+                raise
+
+    def _apply_retention(self, thread_id: str, checkpoint_ns: str):
+        kept = (
+            "SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? "
+            "ORDER BY checkpoint_id DESC LIMIT ?"
+        )
+        self._conn.execute(
+            f"DELETE FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id NOT IN ({kept})",
+            (thread_id, checkpoint_ns, thread_id, checkpoint_ns, self.retention)
+        )
+        self._conn.execute(
+            "DELETE FROM writes WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id NOT IN "
+            "(SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?)",
+            (thread_id, checkpoint_ns, thread_id, checkpoint_ns)
+        )
+
+    def _query(self, statement: str, params: tuple = ()) -> List[tuple]:
+        with self._lock:
+            self.flush()
+            return self._conn.execute(statement, params).fetchall()
+
+    # --- BaseCheckpointSaver ---
+
+    def _load_writes(self, thread_id: str, checkpoint_ns: str, checkpoint_id: str) -> list:
+        rows = self._query(
+            "SELECT task_id, channel, type, value, task_path, idx FROM writes "
+            "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+            (thread_id, checkpoint_ns, checkpoint_id)
+        )
+        rows.sort(key=lambda row: writes_sort_key(row[4], row[0], row[5]))
+        return [(task_id, channel, self.serde.loads_typed((type_, value))) for task_id, channel, type_, value, _, _ in rows]
+
+    def _to_tuple(self, thread_id: str, checkpoint_ns: str, row: tuple) -> CheckpointTuple:
+        checkpoint_id, parent_checkpoint_id, type_, checkpoint, metadata_type, metadata = row
+        return CheckpointTuple(
+            config=_config(thread_id, checkpoint_ns, checkpoint_id),
+            checkpoint=self.serde.loads_typed((type_, checkpoint)),
+            metadata=self.serde.loads_typed((metadata_type, metadata)),
+            parent_config=_config(thread_id, checkpoint_ns, parent_checkpoint_id),
+            pending_writes=self._load_writes(thread_id, checkpoint_ns, checkpoint_id),
+        )
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        """Returns the checkpoint of the config, or the latest one of its thread."""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        columns = "checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata_type, metadata"
+        if checkpoint_id := get_checkpoint_id(config):
+            rows = self._query(
+                f"SELECT {columns} FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                (thread_id, checkpoint_ns, checkpoint_id)
+            )
+        else:
+            rows = self._query(
+                f"SELECT {columns} FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? "
+                "ORDER BY checkpoint_id DESC LIMIT 1",
+                (thread_id, checkpoint_ns)
+            )
+        return self._to_tuple(thread_id, checkpoint_ns, rows[0]) if rows else None
+
+    def list(
+            self,
+            config: Optional[RunnableConfig],
+            *,
+            filter: Optional[Dict[str, Any]] = None,
+            before: Optional[RunnableConfig] = None,
+            limit: Optional[int] = None
+        ) -> Iterator[CheckpointTuple]:
+        """Lists checkpoints, newest first, optionally for one thread, before a checkpoint or matching metadata."""
+        clauses, params = [], []
+        if config:
+            clauses.append("thread_id = ?")
+            params.append(config["configurable"]["thread_id"])
+            if (checkpoint_ns := config["configurable"].get("checkpoint_ns")) is not None:
+                clauses.append("checkpoint_ns = ?")
+                params.append(checkpoint_ns)
+            if checkpoint_id := get_checkpoint_id(config):
+                clauses.append("checkpoint_id = ?")
+                params.append(checkpoint_id)
+        if before and (before_id := get_checkpoint_id(before)):
+            clauses.append("checkpoint_id < ?")
+            params.append(before_id)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = self._query(
+            "SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata_type, metadata "
+            f"FROM checkpoints {where} ORDER BY checkpoint_id DESC",
+            tuple(params)
+        )
+
+        for thread_id, checkpoint_ns, *row in rows:
+            if limit is not None and limit <= 0:
+                break
+            if filter:
+                metadata = self.serde.loads_typed((row[4], row[5]))
+                if not all(metadata.get(key) == value for key, value in filter.items()):
+                    continue
+            if limit is not None:
+                limit -= 1
+            yield self._to_tuple(thread_id, checkpoint_ns, tuple(row))
+
+    def latest_channel_value(self, thread_id: str, channel: str) -> Any:
+        """
+        Returns one channel value of the latest checkpoint of a thread, without
+        loading its other offloaded values nor its pending writes.
+        """
+        rows = self._query(
+            "SELECT type, checkpoint FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = '' "
+            "ORDER BY checkpoint_id DESC LIMIT 1",
+            (thread_id,)
+        )
+        return load_checkpoint_channel(self.serde, rows[0], channel) if rows else None
+
+    def put(
+            self,
+            config: RunnableConfig,
+            checkpoint: Checkpoint,
+            metadata: CheckpointMetadata,
+            new_versions: ChannelVersions
+        ) -> RunnableConfig:
+        """Buffers a checkpoint for the next commit."""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        type_, serialized = self.serde.dumps_typed(checkpoint)
+        metadata_type, serialized_metadata = self.serde.dumps_typed(get_checkpoint_metadata(config, metadata))
+        self._enqueue([(
+            "INSERT OR REPLACE INTO checkpoints "
+            "(thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata_type, metadata) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                thread_id, checkpoint_ns, checkpoint["id"], config["configurable"].get("checkpoint_id"),
+                type_, serialized, metadata_type, serialized_metadata
+            )
+        )], thread_id, checkpoint_ns)
+        return _config(thread_id, checkpoint_ns, checkpoint["id"])
+
+    def put_writes(
+            self,
+            config: RunnableConfig,
+            writes: Sequence[Tuple[str, Any]],
+            task_id: str,
+            task_path: str = ""
+        ) -> None:
+        """Buffers the intermediate writes of a task for the next commit."""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        statements = []
+        for idx, (channel, value) in enumerate(writes):
+            write_idx = WRITES_IDX_MAP.get(channel, idx)
+            # Special writes (errors, interrupts...) replace earlier ones, regular writes are kept once
+            verb = "INSERT OR REPLACE" if write_idx < 0 else "INSERT OR IGNORE"
+            type_, serialized = self.serde.dumps_typed(value)
+            statements.append((
+                f"{verb} INTO writes "
+                "(thread_id, checkpoint_ns, checkpoint_id, task_id, idx, channel, type, value, task_path) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (thread_id, checkpoint_ns, checkpoint_id, task_id, write_idx, channel, type_, serialized, task_path)
+            ))
+        self._enqueue(statements, thread_id)
+
+    def delete_thread(self, thread_id: str) -> None:
+        """Deletes every checkpoint and write of a thread."""
+        with self._lock:
+            self.flush()
+            self._conn.execute("BEGIN IMMEDIATE")
+            for table in ("checkpoints", "writes", "threads"):
+                self._conn.execute(f"DELETE FROM {table} WHERE thread_id = ?", (thread_id,))
+            self._conn.execute("COMMIT")
+
+    def get_next_version(self, current: Optional[str], channel: None) -> str:
+        if current is None:
+            current_v = 0
+        elif isinstance(current, int):
+            current_v = current
+        else:
+            current_v = int(current.split(".")[0])
+        return f"{current_v + 1:032}.{random.random():016}"
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+            self,
+            config: Optional[RunnableConfig],
+            *,
+            filter: Optional[Dict[str, Any]] = None,
+            before: Optional[RunnableConfig] = None,
+            limit: Optional[int] = None
+        ) -> AsyncIterator[CheckpointTuple]:
+        items = await asyncio.to_thread(lambda: list(self.list(config, filter=filter, before=before, limit=limit)))
+        for item in items:
+            yield item
+
+    async def aput(
+            self,
+            config: RunnableConfig,
+            checkpoint: Checkpoint,
+            metadata: CheckpointMetadata,
+            new_versions: ChannelVersions
+        ) -> RunnableConfig:
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+            self,
+            config: RunnableConfig,
+            writes: Sequence[Tuple[str, Any]],
+            task_id: str,
+            task_path: str = ""
+        ) -> None:
+        return await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        return await asyncio.to_thread(self.delete_thread, thread_id)
+
+    # --- Thread lifecycle ---
+
+    def mark_finished(self, thread_id: str):
+        """Records that a thread has finished, starting its retention TTL."""
+        with self._lock:
+            self.flush()
+            self._conn.execute("UPDATE threads SET finished_at = ? WHERE thread_id = ?", (time.time(), thread_id))
+
+    def acquire_lease(self, thread_id: str, owner: str, ttl: float) -> bool:
+        """Takes or renews the lease of a thread, unless another owner holds an unexpired one."""
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO thread_leases (thread_id, owner, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(thread_id) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at "
+                "WHERE thread_leases.owner = excluded.owner OR thread_leases.expires_at < ?",
+                (thread_id, owner, now + ttl, now)
+            )
+            return cursor.rowcount == 1
+
+    def leased_threads(self) -> List[str]:
+        """Returns the IDs of the threads any worker holds an unexpired lease of."""
+        with self._lock:
+            rows = self._conn.execute("SELECT thread_id FROM thread_leases WHERE expires_at >= ?", (time.time(),)).fetchall()
+        return [row[0] for row in rows]
+
+    def is_leased(self, thread_id: str) -> bool:
+        """Whether any worker holds an unexpired lease of a thread."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT 1 FROM thread_leases WHERE thread_id = ? AND expires_at >= ?", (thread_id, time.time())
+            ).fetchone() is not None
+
+    def release_lease(self, thread_id: str, owner: str):
+        """Commits the buffered writes, so that the next owner sees them, then releases a lease."""
+        with self._lock:
+            self.flush()
+            self._conn.execute("DELETE FROM thread_leases WHERE thread_id = ? AND owner = ?", (thread_id, owner))
+
+    def purge_expired(self, finished_ttl: float, idle_ttl: float) -> int:
+        """
+        Deletes threads finished more than `finished_ttl` seconds ago or not
+        updated for `idle_ttl` seconds (0 disables either limit).
+
+        Returns:
+            int: The number of threads deleted.
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("DELETE FROM thread_leases WHERE expires_at < ?", (now,))
+        clauses, params = [], []
+        if finished_ttl > 0:
+            clauses.append("(finished_at IS NOT NULL AND finished_at < ?)")
+            params.append(now - finished_ttl)
+        if idle_ttl > 0:
+            clauses.append("updated_at < ?")
+            params.append(now - idle_ttl)
+        if not clauses:
+            return 0
+
+        expired = [row[0] for row in self._query(f"SELECT thread_id FROM threads WHERE {' OR '.join(clauses)}", tuple(params))]
+        for thread_id in expired:
+            self.delete_thread(thread_id)
+        if expired:
+            with self._lock:
+                self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            logger.info(ctext(f"Purged {len(expired)} expired workflow threads from the checkpointer.", color='white'))
+        return len(expired)
+
+    def unfinished_threads(self) -> List[str]:
+        """Returns the IDs of the threads not marked finished, without loading their checkpoints."""
+        return [row[0] for row in self._query("SELECT thread_id FROM threads WHERE finished_at IS NULL")]
+
+    def sweep_blobs(self) -> int:
+        """Deletes the offloaded state values no checkpoint or write references anymore."""
+        checkpoints = self._query("SELECT type, checkpoint, metadata_type, metadata FROM checkpoints")
+        writes = self._query("SELECT type, value FROM writes WHERE type = ?", (BLOB_TYPE,))
+        payloads = [((row[0], row[1]), True) for row in checkpoints]
+        payloads += [((row[2], row[3]), False) for row in checkpoints] + [(row, False) for row in writes]
+        return sweep_state_blobs(self.serde, payloads)
+
+    def close(self):
+        """Commits the buffered writes and closes the database."""
+        with self._lock:
+            self.flush()
+            self._closed = True
+            self._conn.close()
+
+
+class BoundedMemorySaver(MemorySaver):
+    """
+    An in-memory checkpoint saver that compacts history and evicts threads.
+
+    Resuming a thread, after an interrupt or not, only needs its latest checkpoint
+    and the pending writes stored against it: every older checkpoint is history.
+    After each checkpoint, a thread namespace keeps its last `retention` ones, and
+    the writes and channel values only referenced by the others are dropped.
+
+    Args:
+        retention: The number of checkpoints kept per thread and namespace (0 keeps all).
+    """
+
+    def __init__(self, retention: int = 1, *, serde=None):
+        super().__init__(serde=serde)
+        self.retention = retention
+        self._lock = threading.RLock()
+        self._versions: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+        self._threads: Dict[str, Dict[str, Optional[float]]] = {}
+        self._leases: Dict[str, Tuple[str, float]] = {}
+
+    def _touch(self, thread_id: str):
+        self._threads[thread_id] = {"updated_at": time.time(), "finished_at": None}
+
+    def put(
+            self,
+            config: RunnableConfig,
+            checkpoint: Checkpoint,
+            metadata: CheckpointMetadata,
+            new_versions: ChannelVersions
+        ) -> RunnableConfig:
+        """Saves a checkpoint, then compacts the history of its thread namespace."""
+        with self._lock:
+            saved = super().put(config, checkpoint, metadata, new_versions)
+            thread_id = saved["configurable"]["thread_id"]
+            checkpoint_ns = saved["configurable"]["checkpoint_ns"]
+            self._versions[(thread_id, checkpoint_ns, checkpoint["id"])] = dict(checkpoint["channel_versions"])
+            self._touch(thread_id)
+            if self.retention > 0:
+                self._compact(thread_id, checkpoint_ns)
+            return saved
+
+    def put_writes(
+            self,
+            config: RunnableConfig,
+            writes: Sequence[Tuple[str, Any]],
+            task_id: str,
+            task_path: str = ""
+        ) -> None:
+        """Saves the intermediate writes of a task."""
+        with self._lock:
+            super().put_writes(config, writes, task_id, task_path)
+            self._touch(config["configurable"]["thread_id"])
+
+    def _channel_versions(self, thread_id: str, checkpoint_ns: str, checkpoint_id: str) -> Dict[str, Any]:
+        key = (thread_id, checkpoint_ns, checkpoint_id)
+        if key not in self._versions:
+            checkpoint = self.serde.loads_typed(self.storage[thread_id][checkpoint_ns][checkpoint_id][0])
+            self._versions[key] = dict(checkpoint["channel_versions"])
+        return self._versions[key]
+
+    def latest_channel_value(self, thread_id: str, channel: str) -> Any:
+        """Returns one channel value of the latest checkpoint of a thread."""
+        with self._lock:
+            checkpoints = self.storage.get(thread_id, {}).get("")
+            if not checkpoints:
+                return None
+            version = self._channel_versions(thread_id, "", max(checkpoints)).get(channel)
+            blob = self.blobs.get((thread_id, "", channel, version))
+        if blob is None or blob[0] == "empty":
+            return None
+        return self.serde.loads_typed(blob)
+
+    def _compact(self, thread_id: str, checkpoint_ns: str):
+        checkpoints = self.storage[thread_id][checkpoint_ns]
+        if len(checkpoints) <= self.retention:
+            return
+        ordered = sorted(checkpoints, reverse=True)
+        for checkpoint_id in ordered[self.retention:]:
+            del checkpoints[checkpoint_id]
+            self.writes.pop((thread_id, checkpoint_ns, checkpoint_id), None)
+            self._versions.pop((thread_id, checkpoint_ns, checkpoint_id), None)
+
+        referenced = {
+            (channel, version)
+            for checkpoint_id in ordered[:self.retention]
+            for channel, version in self._channel_versions(thread_id, checkpoint_ns, checkpoint_id).items()
+        }
+        for key in [k for k in self.blobs if k[:2] == (thread_id, checkpoint_ns) and k[2:] not in referenced]:
+            del self.blobs[key]
+
+    def delete_thread(self, thread_id: str) -> None:
+        """Deletes every checkpoint, write and channel value of a thread."""
+        with self._lock:
+            super().delete_thread(thread_id)
+            for key in [k for k in self._versions if k[0] == thread_id]:
+                del self._versions[key]
+            self._threads.pop(thread_id, None)
+
+    # --- Thread lifecycle ---
+
+    def mark_finished(self, thread_id: str):
+        """Records that a thread has finished, starting its retention TTL."""
+        with self._lock:
+            if thread_id in self._threads:
+                self._threads[thread_id]["finished_at"] = time.time()
+
+    def acquire_lease(self, thread_id: str, owner: str, ttl: float) -> bool:
+        """Takes or renews the lease of a thread, unless another owner holds an unexpired one."""
+        now = time.time()
+        with self._lock:
+            current = self._leases.get(thread_id)
+            if current is not None and current[0] != owner and current[1] >= now:
+                return False
+            self._leases[thread_id] = (owner, now + ttl)
+            return True
+
+    def leased_threads(self) -> List[str]:
+        """Returns the IDs of the threads with an unexpired lease."""
+        now = time.time()
+        with self._lock:
+            return [thread_id for thread_id, (_, expires_at) in self._leases.items() if expires_at >= now]
+
+    def is_leased(self, thread_id: str) -> bool:
+        """Whether an unexpired lease of a thread is held."""
+        with self._lock:
+            lease = self._leases.get(thread_id)
+            return lease is not None and lease[1] >= time.time()
+
+    def release_lease(self, thread_id: str, owner: str):
+        """Releases the lease of a thread held by an owner."""
+        with self._lock:
+            if self._leases.get(thread_id, (None,))[0] == owner:
+                del self._leases[thread_id]
+
+    def purge_expired(self, finished_ttl: float, idle_ttl: float) -> int:
+        """
+        Deletes threads finished more than `finished_ttl` seconds ago or not
+        updated for `idle_ttl` seconds (0 disables either limit).
+
+        Returns:
+            int: The number of threads deleted.
+        """
+        now = time.time()
+        with self._lock:
+            expired = [
+                thread_id for thread_id, thread in self._threads.items()
+                if (finished_ttl > 0 and thread["finished_at"] is not None and now - thread["finished_at"] > finished_ttl)
+                or (idle_ttl > 0 and now - thread["updated_at"] > idle_ttl)
+            ]
+            for thread_id in expired:
+                self.delete_thread(thread_id)
+        if expired:
+            logger.info(ctext(f"Purged {len(expired)} expired workflow threads from memory.", color='white'))
+        CHECKPOINT_MEMORY_BYTES.set(sum(self.thread_sizes().values()))
+        return len(expired)
+
+    def unfinished_threads(self) -> List[str]:
+        """Returns the IDs of the threads not marked finished."""
+        with self._lock:
+            return [thread_id for thread_id, thread in self._threads.items() if thread["finished_at"] is None]
+
+    def sweep_blobs(self) -> int:
+        """Deletes the offloaded state values no channel value or write references anymore."""
+        with self._lock:
+            payloads = [(blob, False) for blob in self.blobs.values()]
+            payloads += [
+                (serialized, False)
+                for namespaces in self.storage.values()
+                for checkpoints in namespaces.values()
+                for checkpoint, metadata, _ in checkpoints.values()
+                for serialized in (checkpoint, metadata)
+            ]
+            payloads += [(write[2], False) for writes in self.writes.values() for write in writes.values()]
+        return sweep_state_blobs(self.serde, payloads)
+
+    def thread_sizes(self) -> Dict[str, int]:
+        """Returns the number of serialized bytes held for each thread."""
+        sizes: Dict[str, int] = {}
+        with self._lock:
+            for thread_id, namespaces in self.storage.items():
+                sizes[thread_id] = sum(
+                    len(checkpoint[1]) + len(metadata[1])
+                    for checkpoints in namespaces.values()
+                    for checkpoint, metadata, _ in checkpoints.values()
+                )
+            for (thread_id, *_), writes in self.writes.items():
+                sizes[thread_id] = sizes.get(thread_id, 0) + sum(len(write[2][1]) for write in writes.values())
+            for (thread_id, *_), blob in self.blobs.items():
+                sizes[thread_id] = sizes.get(thread_id, 0) + len(blob[1])
+        return sizes
+
+    def thread_size(self, thread_id: str) -> int:
+        """Returns the number of serialized bytes held for a thread."""
+        return self.thread_sizes().get(thread_id, 0)
+
+
+def create_checkpointer() -> BaseCheckpointSaver:
+    """
+    Builds the checkpointer selected by `CHECKPOINTER_BACKEND`: "sqlite" (default)
+    or "memory".
+    """
+    backend = str(settings.CHECKPOINTER_BACKEND).lower()
+    serde = create_state_blob_serializer()
+    if backend == "memory":
+        return BoundedMemorySaver(retention=int(settings.CHECKPOINT_MEMORY_RETENTION), serde=serde)
+    if backend != "sqlite":
+        raise ValueError(f"Unsupported checkpointer backend: {backend}")
+
+    path = settings.CHECKPOINT_SQLITE_PATH or str(Path(__file__).resolve().parents[1] / "data" / "checkpoints.sqlite")
+    logger.info(ctext(f"Using the SQLite checkpointer at {path}.", color='white'))
+    return SqliteCheckpointSaver(
+        path,
+        retention=int(settings.CHECKPOINT_RETENTION),
+        batch_size=int(settings.CHECKPOINT_BATCH_SIZE),
+        flush_interval=float(settings.CHECKPOINT_FLUSH_INTERVAL_SECONDS),
+        serde=serde
+    )
+
+
+@asynccontextmanager
+async def thread_lease(saver: BaseCheckpointSaver, thread_id: str, wait: Optional[float] = None):
+    """
+    Holds the advisory lock of a workflow thread, for savers shared between
+    workers. The lease is renewed in the background while held, and expires
+    `THREAD_LEASE_TTL_SECONDS` after a worker dies without releasing it.
+
+    Args:
+        saver: The checkpointer of the graph.
+        thread_id: The workflow thread to lock.
+        wait: How long to wait for another worker to release the thread,
+            defaults to `THREAD_LEASE_WAIT_SECONDS`.
+
+    Raises:
+        ThreadBusyError: If the thread is still locked after waiting.
+    """
+    if not hasattr(saver, "acquire_lease"):
+        yield
+        return
+
+    ttl = float(settings.THREAD_LEASE_TTL_SECONDS)
+    wait = float(settings.THREAD_LEASE_WAIT_SECONDS) if wait is None else wait
+    owner = uuid.uuid4().hex
+    deadline = time.monotonic() + wait
+    while not await asyncio.to_thread(saver.acquire_lease, thread_id, owner, ttl):
+        if time.monotonic() >= deadline:
+            raise ThreadBusyError(f"Workflow {thread_id} is being run by another worker.")
+        await asyncio.sleep(min(0.2, max(0.0, deadline - time.monotonic())))
+
+    async def renew():
+        while True:
+            await asyncio.sleep(ttl / 3)
+            if not await asyncio.to_thread(saver.acquire_lease, thread_id, owner, ttl):
+                logger.error(ctext(f"Lost the lease of workflow {thread_id}.", color='red'))
+                return
+
+    renewal = asyncio.create_task(renew())
+    try:
+        yield
+    finally:
+        renewal.cancel()
+        with suppress(asyncio.CancelledError):
+            await renewal
+        await asyncio.to_thread(saver.release_lease, thread_id, owner)
+
+
+def thread_leased(saver: BaseCheckpointSaver, thread_id: str) -> bool:
+    """Whether a worker holds the lease of a thread, for savers shared between workers."""
+    return hasattr(saver, "is_leased") and saver.is_leased(thread_id)
+
+
+def mark_thread_finished(saver: BaseCheckpointSaver, thread_id: str):
+    """Starts the retention TTL of a finished thread, for savers that track thread lifecycles."""
+    if hasattr(saver, "mark_finished"):
+        saver.mark_finished(thread_id)
+
+
+def unfinished_thread_ids(saver: BaseCheckpointSaver) -> List[str]:
+    """
+    Returns the IDs of the threads that have not finished. Savers that do not
+    track thread lifecycles list every thread of their checkpoints instead.
+    """
+    if hasattr(saver, "unfinished_threads"):
+        return saver.unfinished_threads()
+    return list(dict.fromkeys(checkpoint.config["configurable"]["thread_id"] for checkpoint in saver.list(None)))
+
+
+def leased_thread_ids(saver: BaseCheckpointSaver) -> List[str]:
+    """Returns the IDs of the threads a worker holds the lease of, for savers shared between workers."""
+    return saver.leased_threads() if hasattr(saver, "leased_threads") else []
+
+
+def latest_channel_value(saver: BaseCheckpointSaver, thread_id: str, channel: str) -> Any:
+    """
+    Returns one channel value of the latest checkpoint of a thread, loading
+    only that value from savers that support it.
+    """
+    if hasattr(saver, "latest_channel_value"):
+        return saver.latest_channel_value(thread_id, channel)
+    checkpoint = saver.get_tuple({"configurable": {"thread_id": thread_id}})
+    return checkpoint.checkpoint["channel_values"].get(channel) if checkpoint else None
+
+
+def purge_expired_threads(saver: BaseCheckpointSaver) -> int:
+    """
+    Deletes the threads past their TTL, then the state values they alone
+    referenced, for savers that track thread lifecycles.
+    """
+    if not hasattr(saver, "purge_expired"):
+        return 0
+    purged = saver.purge_expired(
+        finished_ttl=float(settings.CHECKPOINT_FINISHED_TTL_HOURS) * 3600,
+        idle_ttl=float(settings.CHECKPOINT_IDLE_TTL_HOURS) * 3600
+    )
+    saver.sweep_blobs()
+    return purged
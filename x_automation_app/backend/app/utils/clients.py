@@ -0,0 +1,94 @@
+"""
+Process-wide SDK clients.
+
+The Gemini, OpenAI and S3 clients are thread-safe and expensive to build (boto3
+alone resolves credentials and endpoints on every `boto3.client` call), so each
+one is created lazily on first use, then shared by every image and workflow of
+the process. Their HTTP connection pools are sized with `SDK_MAX_POOL_CONNECTIONS`
+so that concurrent image generations and uploads don't queue on a single socket.
+"""
+
+from threading import Lock
+from typing import Any, Callable, Dict
+
+import boto3
+import httpx
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
+from google import genai
+from openai import OpenAI, DefaultHttpxClient
+
+from ..config import settings
+
+from ..utils.logging_config import setup_logging, ctext
+logger = setup_logging()
+
+
+_clients: Dict[str, Any] = {}
+_lock = Lock()
+
+
+def _get_or_create(name: str, factory: Callable[[], Any]) -> Any:
+    client = _clients.get(name)
+    if client is None:
+        with _lock:
+            client = _clients.get(name)
+            if client is None:
+                client = factory()
+                _clients[name] = client
+                logger.info(ctext(f"{name} client created.", color='white'))
+    return client
+
+
+def get_genai_client() -> genai.Client:
+    """Returns the shared Gemini client."""
+    return _get_or_create("Gemini", lambda: genai.Client())
+
+
+def get_openai_client() -> OpenAI:
+    """Returns the shared OpenAI client."""
+    def factory() -> OpenAI:
+        pool_size = int(settings.SDK_MAX_POOL_CONNECTIONS)
+        return OpenAI(
+            api_key=settings.OPENAI_API_KEY,
+            http_client=DefaultHttpxClient(
+                limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+            )
+        )
+    return _get_or_create("OpenAI", factory)
+
+
+def get_s3_client():
+    """Returns the shared S3 client."""
+    def factory():
+        return boto3.client(
+            "s3",
+            aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
+            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+            region_name=settings.AWS_DEFAULT_REGION,
+            config=Config(
+                max_pool_connections=int(settings.SDK_MAX_POOL_CONNECTIONS),
+                retries={"max_attempts": 3, "mode": "standard"}
+            )
+        )
+    return _get_or_create("S3", factory)
+
+
+def get_transfer_config() -> TransferConfig:
+    """
+    Returns the S3 transfer settings: uploads above `S3_MULTIPART_THRESHOLD_MB`
+    are split into parts sent over the shared connection pool.
+    """
+    part_size = int(settings.S3_MULTIPART_THRESHOLD_MB) * 1024 * 1024
+    return TransferConfig(
+        multipart_threshold=part_size,
+        multipart_chunksize=part_size,
+        max_concurrency=int(settings.SDK_MAX_POOL_CONNECTIONS),
+        use_threads=True
+    )
+
+
+def reset_clients():
+    """Drops the shared clients, e.g. after a credentials change or between tests."""
+    with _lock:
+        _clients.clear()
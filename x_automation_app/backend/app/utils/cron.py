@@ -0,0 +1,143 @@
+"""
+Cron expressions for scheduled workflows.
+
+Supports the five standard fields (minute, hour, day of month, month, day of
+week) with `*`, lists, ranges, steps and month or day names, plus the
+`@hourly`, `@daily`, `@weekly`, `@monthly` and `@yearly` shortcuts. As in cron,
+a day matches when either the day of month or the day of week matches if both
+are restricted. Times are in UTC.
+"""
+
+from datetime import datetime, timedelta, timezone
+from typing import FrozenSet, List, Tuple
+
+
+ALIASES = {
+    "@yearly": "0 0 1 1 *",
+    "@annually": "0 0 1 1 *",
+    "@monthly": "0 0 1 * *",
+    "@weekly": "0 0 * * 0",
+    "@daily": "0 0 * * *",
+    "@midnight": "0 0 * * *",
+    "@hourly": "0 * * * *",
+}
+
+MONTH_NAMES = ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"]
+DAY_NAMES = ["sun", "mon", "tue", "wed", "thu", "fri", "sat"]
+
+# (name, lowest value, highest value, names of the values from the lowest)
+FIELDS: List[Tuple[str, int, int, List[str]]] = [
+    ("minute", 0, 59, []),
+    ("hour", 0, 23, []),
+    ("day of month", 1, 31, []),
+    ("month", 1, 12, MONTH_NAMES),
+    ("day of week", 0, 7, DAY_NAMES),
+]
+
+# Beyond this, an expression such as "0 0 30 2 *" never matches
+MAX_SEARCH_DAYS = 366 * 5
+
+
+def _parse_value(text: str, name: str, low: int, high: int, names: List[str]) -> int:
+    text = text.strip().lower()
+    if text in names:
+        return low + names.index(text)
+    if not text.isdigit():
+        raise ValueError(f"Invalid {name} value: '{text}'")
+    value = int(text)
+    if not low <= value <= high:
+        raise ValueError(f"The {name} must be between {low} and {high}, got {value}")
+    return value
+
+
+def _parse_field(text: str, name: str, low: int, high: int, names: List[str]) -> FrozenSet[int]:
+    values = set()
+    for part in text.split(","):
+        step = 1
+        if "/" in part:
+            part, step_text = part.split("/", 1)
+            if not step_text.isdigit() or int(step_text) == 0:
+                raise ValueError(f"Invalid {name} step: '{step_text}'")
+            step = int(step_text)
+
+        if part == "*":
+            start, end = low, high
+        elif "-" in part:
+            start_text, end_text = part.split("-", 1)
+            start = _parse_value(start_text, name, low, high, names)
+            end = _parse_value(end_text, name, low, high, names)
+            if start > end:
+                raise ValueError(f"Invalid {name} range: '{part}'")
+        else:
+            start = _parse_value(part, name, low, high, names)
+            # "5/15" means every 15 from 5
+            end = high if step > 1 else start
+
+        values.update(range(start, end + 1, step))
+    return frozenset(values)
+
+
+class CronExpression:
+    """
+    A parsed cron expression.
+
+    Raises:
+        ValueError: If the expression is invalid.
+    """
+
+    def __init__(self, expression: str):
+        self.expression = expression.strip()
+        fields = ALIASES.get(self.expression.lower(), self.expression).split()
+        if len(fields) != len(FIELDS):
+            raise ValueError(f"A cron expression has {len(FIELDS)} fields, got {len(fields)}: '{expression}'")
+
+        minutes, hours, days, months, weekdays = (
+            _parse_field(text, *field) for text, field in zip(fields, FIELDS)
+        )
+        self.minutes = minutes
+        self.hours = hours
+        self.days = days
+        self.months = months
+        # Sunday is both 0 and 7
+        self.weekdays = frozenset(day % 7 for day in weekdays)
+        # As in cron, "*/2" leaves a day field unrestricted
+        self.days_restricted = not fields[2].startswith("*")
+        self.weekdays_restricted = not fields[4].startswith("*")
+
+    def _matches_day(self, moment: datetime) -> bool:
+        in_days = moment.day in self.days
+        # Python counts week days from Monday, cron from Sunday
+        in_weekdays = (moment.weekday() + 1) % 7 in self.weekdays
+        if self.days_restricted and self.weekdays_restricted:
+            return in_days or in_weekdays
+        return in_days and in_weekdays
+
+    def next_after(self, moment: datetime) -> datetime:
+        """
+        Returns the first time strictly after `moment` matching the expression,
+        in UTC. Naive datetimes are taken as UTC.
+
+        Raises:
+            ValueError: If the expression never matches.
+        """
+        if moment.tzinfo is None:
+            moment = moment.replace(tzinfo=timezone.utc)
+        moment = moment.astimezone(timezone.utc).replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = moment + timedelta(days=MAX_SEARCH_DAYS)
+
+        while moment < limit:
+            if moment.month not in self.months:
+                # First day of the next month
+                moment = (moment.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+            elif not self._matches_day(moment):
+                moment = moment.replace(hour=0, minute=0) + timedelta(days=1)
+            elif moment.hour not in self.hours:
+                moment = moment.replace(minute=0) + timedelta(hours=1)
+            elif moment.minute not in self.minutes:
+                moment += timedelta(minutes=1)
+            else:
+                return moment
+        raise ValueError(f"The cron expression '{self.expression}' never matches")
+
+    def __repr__(self) -> str:
+        return f"CronExpression('{self.expression}')"
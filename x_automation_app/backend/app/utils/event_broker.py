@@ -0,0 +1,71 @@
+"""
+In-process publish/subscribe of workflow events.
+
+Workflow runs publish their events and states under their thread ID, and every
+WebSocket following the thread receives them through its own bounded queue. A
+slow subscriber loses its oldest pending events rather than slowing the run down.
+"""
+
+import asyncio
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, Iterator, Optional, Set
+
+from .metrics import WORKFLOW_EVENTS_DROPPED_TOTAL
+
+
+@dataclass(frozen=True)
+class WorkflowEvent:
+    """A serialized event of a run, or the end of the run when `end` is set."""
+    text: Optional[str] = None
+    end: bool = False
+    error: Optional[str] = None
+    busy: bool = False
+
+
+class EventBroker:
+    """
+    Fans out the events of workflow runs to their subscribers.
+    Must be used from the event loop.
+    """
+
+    def __init__(self, max_pending: int = 1000):
+        self.max_pending = max_pending
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+
+    @contextmanager
+    def subscription(self, thread_id: str) -> Iterator[asyncio.Queue]:
+        """Yields a queue receiving the events published for a thread until exited."""
+        queue = asyncio.Queue(maxsize=self.max_pending)
+        self._subscribers.setdefault(thread_id, set()).add(queue)
+        try:
+            yield queue
+        finally:
+            subscribers = self._subscribers.get(thread_id)
+            if subscribers is not None:
+                subscribers.discard(queue)
+                if not subscribers:
+                    del self._subscribers[thread_id]
+
+    def subscriber_count(self, thread_id: str) -> int:
+        """Returns the number of subscribers of a thread."""
+        return len(self._subscribers.get(thread_id, ()))
+
+    def _deliver(self, thread_id: str, event: WorkflowEvent):
+        for queue in self._subscribers.get(thread_id, ()):
+            if queue.full():
+                queue.get_nowait()
+                WORKFLOW_EVENTS_DROPPED_TOTAL.inc()
+            queue.put_nowait(event)
+
+    def publish(self, thread_id: str, text: str):
+        """Sends a serialized event to the subscribers of a thread."""
+        self._deliver(thread_id, WorkflowEvent(text=text))
+
+    def close(self, thread_id: str, error: Optional[str] = None, busy: bool = False):
+        """Signals the end of a run to the subscribers of a thread."""
+        self._deliver(thread_id, WorkflowEvent(end=True, error=error, busy=busy))
+
+
+# Global instance
+event_broker = EventBroker()
@@ -1,43 +1,39 @@
-# TODO:
-# * refine the logic of the image_generator node to handle image edits from user feedbacks
-
-
-from functools import cache
-import boto3
+from dataclasses import replace
+from typing import Optional, Tuple
 from botocore.exceptions import NoCredentialsError, PartialCredentialsError
 from ..config import settings
 from langchain_core.tools import tool
 from .schemas import GeneratedImage
 from pathlib import Path
 
-from google import genai
-from PIL import Image
 from io import BytesIO
 import base64
-from openai import OpenAI
+from google.genai import types
+from PIL import Image
+from .clients import get_genai_client, get_openai_client, get_s3_client, get_transfer_config
+from .image_buffers import image_buffers, load_image_bytes
+from .image_encoding import encode_image_for_x
+from .image_cache import CachedImage, image_cache, image_models
+from .image_store import image_store
+from .presigned_urls import presigned_urls
 
 from ..utils.logging_config import setup_logging, ctext
 logger = setup_logging()
 
 
 
-@tool
-def generate_and_upload_image(prompt: str, image_name: str) -> GeneratedImage:
+def _generate_image(prompt: str) -> Optional[Tuple[bytes, str, str]]:
     """
-    Generates an image using Gemini's gemini-2.5-flash-image-preview, uploads it to AWS S3,
-    and returns a presigned URL.
-    It includes a fallback to OpenAI's DALL-E 3 model if Gemini fails.
-
-    Args:
-        prompt (str): The prompt to generate the image from.
+    Generates an image with Gemini, falling back to OpenAI.
 
     Returns:
-        GeneratedImage: The generated image.
+        The raw image bytes with the (model, size) that produced them,
+        or None if both providers failed.
     """
     image_bytes = None
     try:
         # Attempt to generate image with Gemini
-        client = genai.Client()
+        client = get_genai_client()
         response = client.models.generate_content(
             model = settings.GEMINI_IMAGE_MODEL,
             contents = [prompt]
@@ -53,79 +49,129 @@ def generate_and_upload_image(prompt: str, image_name: str) -> GeneratedImage:
         if image_bytes is None:
             raise Exception("Gemini response did not contain image data.")
 
+        model, size = image_models()[0]
+        return image_bytes, model, size
+
     except Exception as e:
         logger.warning(ctext(f"Gemini image generation failed: {e}. Falling back to OpenAI.", color='yellow'))
         try:
             # Fallback to OpenAI
-            client = OpenAI(api_key=settings.OPENAI_API_KEY)
+            model, size = image_models()[1]
+            client = get_openai_client()
             result = client.images.generate(
-                model=settings.OPENAI_IMAGE_MODEL,
+                model=model,
                 prompt=prompt,
-                size="1024x1024"
+                size=size
             )
             image_b64 = result.data[0].b64_json
             image_bytes = base64.b64decode(image_b64)
             logger.info(ctext("Image successfully generated with OpenAI.", color='green'))
+            return image_bytes, model, size
         except Exception as e_openai:
             logger.error(ctext(f"OpenAI image generation also failed: {e_openai}", color='red'))
-            return GeneratedImage(
-                is_generated=False,
-                image_name="",
-                local_file_path="",
-                s3_url=""
+            return None
+
+
+def _edit_image(image_bytes: bytes, content_type: str, feedback: str) -> Optional[Tuple[bytes, str, str]]:
+    """
+    Edits an image according to the feedback with Gemini, falling back to OpenAI's image edits.
+
+    Returns:
+        The raw edited image bytes with the (model, size) that produced them,
+        or None if neither provider could edit the image.
+    """
+    instruction = f"Edit this image. Keep everything else unchanged. Requested change: {feedback}"
+    try:
+        client = get_genai_client()
+        response = client.models.generate_content(
+            model = settings.GEMINI_IMAGE_MODEL,
+            contents = [instruction, types.Part.from_bytes(data=image_bytes, mime_type=content_type)]
+        )
+
+        if response.candidates and response.candidates[0].content and response.candidates[0].content.parts:
+            for part in response.candidates[0].content.parts:
+                if part.inline_data is not None:
+                    logger.info(ctext("Image successfully edited with Gemini.", color='green'))
+                    model, size = image_models()[0]
+                    return part.inline_data.data, model, size
+
+        raise Exception("Gemini response did not contain image data.")
+
+    except Exception as e:
+        logger.warning(ctext(f"Gemini image edit failed: {e}. Falling back to OpenAI.", color='yellow'))
+        try:
+            model, size = image_models()[1]
+            client = get_openai_client()
+            result = client.images.edit(
+                model=model,
+                image=(f"image.{content_type.split('/')[-1]}", image_bytes, content_type),
+                prompt=instruction,
+                size=size
             )
+            image_bytes = base64.b64decode(result.data[0].b64_json)
+            logger.info(ctext("Image successfully edited with OpenAI.", color='green'))
+            return image_bytes, model, size
+        except Exception as e_openai:
+            logger.error(ctext(f"OpenAI image edit also failed: {e_openai}", color='red'))
+            return None
+
 
+def _store_image(prompt: str, image_name: str, image: CachedImage, cache: bool = True) -> Optional[GeneratedImage]:
+    """
+    Keeps an encoded image in memory (and on disk if enabled), uploads it to AWS S3
+    unless it is already there, and returns it with a presigned URL.
+    With `cache`, the S3 key of the upload is recorded in the image cache.
+    """
     try:
-        images_dir = Path(__file__).resolve().parents[0] / "images"
-        images_dir.mkdir(parents=True, exist_ok=True)
-        image_path = images_dir / image_name
+        encoded_bytes = image.data
+        image_name = str(Path(image_name).with_suffix(image.extension))
 
-        image = Image.open(BytesIO(image_bytes))
-        image.save(image_path, 'JPEG', optimize=True, quality=95)
+        image_path = image_store.path_for(image_name)
+        image_buffers.put(str(image_path), encoded_bytes)
 
-        relative_path = image_path.relative_to(Path(__file__).resolve().parents[0])
-        logger.info(ctext(f"Image saved to {str(relative_path)}", color='white'))
+        aws_configured = all([settings.AWS_ACCESS_KEY_ID, settings.AWS_SECRET_ACCESS_KEY,
+                              settings.AWS_DEFAULT_REGION, settings.BUCKET_NAME])
+        # Without S3, the disk is the only copy that outlives this process
+        if str(settings.IMAGE_LOCAL_PERSISTENCE).lower() == "true" or not aws_configured:
+            image_store.write(image_name, encoded_bytes)
+            relative_path = image_path.relative_to(Path(__file__).resolve().parents[0])
+            logger.info(ctext(f"Image saved to {str(relative_path)}", color='white'))
         
 
-        if not all([settings.AWS_ACCESS_KEY_ID, settings.AWS_SECRET_ACCESS_KEY, 
-                   settings.AWS_DEFAULT_REGION, settings.BUCKET_NAME]):
+        if not aws_configured:
             logger.warning(ctext("AWS credentials not fully configured. Skipping S3 upload.", color='yellow'))
             return GeneratedImage(
                 is_generated=True,
                 image_name=image_name,
                 local_file_path=str(image_path),
-                s3_url=""
+                s3_url="",
+                prompt=prompt
             )
 
-        # Upload the image to AWS S3 to get a presigned URL
+        # Upload the image to AWS S3 to get a presigned URL, unless a cached copy is already there
         bucket_name = settings.BUCKET_NAME
-        image_key = f"images/{image_name}"
+        image_key = image.s3_key
 
-        s3_client = boto3.client(
-            "s3",
-            aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-            region_name=settings.AWS_DEFAULT_REGION
-        )
-    
-        s3_client.upload_file(
-            image_path,
-            bucket_name,
-            image_key
-        )
-        
-        presigned_url = s3_client.generate_presigned_url(
-            'get_object',
-            Params={'Bucket': bucket_name, 'Key': image_key},
-            ExpiresIn=3600
-        )
+        if image_key is None:
+            image_key = f"images/{image_name}"
+            get_s3_client().upload_fileobj(
+                BytesIO(encoded_bytes),
+                bucket_name,
+                image_key,
+                ExtraArgs={"ContentType": image.content_type},
+                Config=get_transfer_config()
+            )
+            if cache:
+                image_cache.put(prompt, replace(image, s3_key=image_key))
+            logger.info(ctext(f"Successfully uploaded image {image_name} to S3 bucket {bucket_name}.", color='white'))
         
-        logger.info(ctext(f"Successfully uploaded image {image_name} to S3 bucket {bucket_name}.", color='white'))
         return GeneratedImage(
             is_generated=True,
             image_name=image_name,
             local_file_path=str(image_path),
-            s3_url=presigned_url
+            s3_url=presigned_urls.get(image_key, bucket_name),
+            prompt=prompt,
+            s3_key=image_key
         )
 
     except (NoCredentialsError, PartialCredentialsError):
@@ -133,4 +179,108 @@ def generate_and_upload_image(prompt: str, image_name: str) -> GeneratedImage:
         return None
     except Exception as e:
         logger.error(f"An error occurred in image processing or uploading: {e}")
-        return None 
\ No newline at end of file
+        return None
+
+
+def _encode(generated: Tuple[bytes, str, str]) -> Optional[CachedImage]:
+    """Encodes a generated image once into memory, off the calling thread."""
+    image_bytes, model, size = generated
+    try:
+        encoded = encode_image_for_x(image_bytes)
+    except Exception as e:
+        logger.error(f"An error occurred in image processing or uploading: {e}")
+        return None
+    return CachedImage(encoded.data, encoded.content_type, encoded.extension, model, size)
+
+
+@tool
+def generate_and_upload_image(prompt: str, image_name: str) -> GeneratedImage:
+    """
+    Generates an image using Gemini's gemini-2.5-flash-image-preview, uploads it to AWS S3,
+    and returns a presigned URL.
+    It includes a fallback to OpenAI's DALL-E 3 model if Gemini fails.
+    Images already generated for the same prompt are reused from the image cache.
+
+    Args:
+        prompt (str): The prompt to generate the image from.
+
+    Returns:
+        GeneratedImage: The generated image.
+    """
+    cached = image_cache.get(prompt, image_models())
+    if cached is not None:
+        logger.info(ctext("Image reused from the generated image cache.", color='green'))
+    else:
+        generated = _generate_image(prompt)
+        if generated is None:
+            return GeneratedImage(
+                is_generated=False,
+                image_name="",
+                local_file_path="",
+                s3_url=""
+            )
+
+        # The S3 and X uploads both read the encoded buffer
+        cached = _encode(generated)
+        if cached is None:
+            return None
+        image_cache.put(prompt, cached)
+
+    return _store_image(prompt, image_name, cached)
+
+
+def prefetch_image(prompt: str) -> bool:
+    """
+    Generates the image of a prompt into the image cache, without storing or
+    uploading it, so that a later `generate_and_upload_image` reuses it.
+
+    Returns:
+        bool: Whether an image was generated, False if it was cached already
+        or could not be generated.
+    """
+    if image_cache.max_bytes <= 0 or image_cache.get(prompt, image_models()) is not None:
+        return False
+    generated = _generate_image(prompt)
+    cached = _encode(generated) if generated is not None else None
+    if cached is None:
+        return False
+    image_cache.put(prompt, cached)
+    return True
+
+
+def edit_and_upload_image(image: GeneratedImage, feedback: str, image_name: str) -> Optional[GeneratedImage]:
+    """
+    Applies the user's feedback to a previously generated image with the image
+    model's edit capability, then uploads the result like a generated image.
+
+    When the previous image is no longer available or cannot be edited, a new
+    image is generated from its prompt revised with the feedback instead.
+
+    Args:
+        image: The image to edit.
+        feedback: The change requested by the user.
+        image_name: The name of the edited image.
+
+    Returns:
+        The edited image, or None if neither editing nor regeneration succeeded.
+    """
+    try:
+        source = load_image_bytes(image.local_file_path, image.s3_key)
+    except Exception:
+        logger.warning(ctext(f"Image '{image.image_name}' is no longer available, regenerating it.", color='yellow'))
+        source = None
+
+    if source is not None:
+        content_type = Image.open(BytesIO(source)).get_format_mimetype() or "image/jpeg"
+        edited = _edit_image(source, content_type, feedback)
+        if edited is not None:
+            encoded = _encode(edited)
+            if encoded is not None:
+                # Edits depend on the source image, so they are not cached by prompt
+                return _store_image(image.prompt or "", image_name, encoded, cache=False)
+
+    if not image.prompt:
+        logger.error(ctext(f"Image '{image.image_name}' has no prompt to regenerate it from.", color='red'))
+        return None
+    revised_prompt = f"{image.prompt}\n\nRevision requested by the user: {feedback}"
+    return generate_and_upload_image.invoke({"prompt": revised_prompt, "image_name": image_name})
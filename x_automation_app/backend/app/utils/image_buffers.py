@@ -0,0 +1,106 @@
+"""
+In-memory buffers of encoded images.
+
+`generate_and_upload_image` keeps the JPEG it encodes here, keyed by the image's
+`local_file_path`, so that the S3 upload and the later X media upload both read
+the same bytes instead of going through the disk. Buffers are evicted least
+recently used first once `IMAGE_BUFFER_MAX_BYTES` is exceeded; callers fall back
+to the file on disk when a buffer is gone, then to the copy uploaded to S3.
+"""
+
+from collections import OrderedDict
+from pathlib import Path
+from threading import Lock
+from typing import Optional
+
+from ..config import settings
+from .clients import get_s3_client
+from .image_store import image_store
+
+
+class ImageBufferRegistry:
+    """
+    A thread-safe LRU map of image path -> encoded bytes, bounded by total size.
+    """
+
+    def __init__(self, max_bytes: int):
+        self._lock = Lock()
+        self._buffers: "OrderedDict[str, bytes]" = OrderedDict()
+        self._size = 0
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def _key(path: str) -> str:
+        return str(Path(path)) if path else ""
+
+    def put(self, path: str, data: bytes):
+        """Keeps the encoded bytes of an image."""
+        key = self._key(path)
+        with self._lock:
+            previous = self._buffers.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous)
+            self._buffers[key] = data
+            self._size += len(data)
+            # The newest buffer is kept even if it alone exceeds the limit
+            while self._size > self.max_bytes and len(self._buffers) > 1:
+                _, evicted = self._buffers.popitem(last=False)
+                self._size -= len(evicted)
+
+    def get(self, path: str) -> Optional[bytes]:
+        """Returns the encoded bytes of an image, or None if they are not in memory."""
+        key = self._key(path)
+        with self._lock:
+            data = self._buffers.get(key)
+            if data is not None:
+                self._buffers.move_to_end(key)
+            return data
+
+    def discard(self, path: str):
+        """Drops the buffer of an image, if any."""
+        with self._lock:
+            data = self._buffers.pop(self._key(path), None)
+            if data is not None:
+                self._size -= len(data)
+
+    def clear(self):
+        """Drops every buffer."""
+        with self._lock:
+            self._buffers.clear()
+            self._size = 0
+
+    @property
+    def size(self) -> int:
+        """Total number of bytes held."""
+        with self._lock:
+            return self._size
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._buffers)
+
+
+def load_image_bytes(path: str, s3_key: Optional[str] = None) -> bytes:
+    """
+    Returns the encoded bytes of an image from memory when available, from the
+    disk otherwise, and from S3 as a last resort when its key is given: without
+    local persistence, the image is only in memory in the worker that generated it.
+    """
+    data = image_buffers.get(path)
+    if data is not None:
+        return data
+    try:
+        with open(path, "rb") as file:
+            data = file.read()
+    except FileNotFoundError:
+        if not s3_key:
+            raise
+        data = get_s3_client().get_object(Bucket=settings.BUCKET_NAME, Key=s3_key)["Body"].read()
+        image_buffers.put(path, data)
+        return data
+    image_store.touch(path)
+    return data
+
+
+# Global instance
+image_buffers = ImageBufferRegistry(max_bytes=int(settings.IMAGE_BUFFER_MAX_BYTES))
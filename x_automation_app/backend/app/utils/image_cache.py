@@ -0,0 +1,128 @@
+"""
+Content-addressed cache of generated images.
+
+Image generation is the slowest and most expensive call of the workflow, and
+prompts come back unchanged whenever content is rejected for reasons unrelated
+to the images, or when workflows reuse similar prompts. Encoded images are
+cached under a hash of (normalized prompt, model, size) together with the S3
+key they were uploaded to, and evicted least recently used first once
+`IMAGE_CACHE_MAX_BYTES` is exceeded.
+"""
+
+import hashlib
+import json
+from collections import OrderedDict
+from dataclasses import dataclass
+from threading import Lock
+from typing import Iterable, Optional, Tuple
+
+from ..config import settings
+from .metrics import IMAGE_CACHE_LOOKUPS_TOTAL
+
+
+@dataclass(frozen=True)
+class CachedImage:
+    """An encoded image, the model that generated it and where it was uploaded."""
+    data: bytes
+    content_type: str
+    extension: str
+    model: str
+    size: str
+    s3_key: Optional[str] = None
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Lower-cases a prompt and collapses its whitespace."""
+    return " ".join((prompt or "").lower().split())
+
+
+class GeneratedImageCache:
+    """
+    A thread-safe LRU cache of generated images, bounded by total encoded size.
+    A `max_bytes` of 0 disables the cache.
+    """
+
+    def __init__(self, max_bytes: int):
+        self._lock = Lock()
+        self._entries: "OrderedDict[str, CachedImage]" = OrderedDict()
+        self._size = 0
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def make_key(prompt: str, model: str, size: str) -> str:
+        """Hashes the normalized prompt with the model and image size."""
+        payload = json.dumps([normalize_prompt(prompt), model, size])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, prompt: str, models: Iterable[Tuple[str, str]]) -> Optional[CachedImage]:
+        """
+        Returns the cached image of a prompt for the first (model, size) pair
+        that has one, in the given order of preference.
+        """
+        if self.max_bytes <= 0:
+            return None
+        with self._lock:
+            for model, size in models:
+                key = self.make_key(prompt, model, size)
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self._entries.move_to_end(key)
+                    IMAGE_CACHE_LOOKUPS_TOTAL.labels(result="hit").inc()
+                    return entry
+        IMAGE_CACHE_LOOKUPS_TOTAL.labels(result="miss").inc()
+        return None
+
+    def put(self, prompt: str, image: CachedImage):
+        """Caches the image generated for a prompt, under the model and size that produced it."""
+        if self.max_bytes <= 0 or len(image.data) > self.max_bytes:
+            return
+        key = self.make_key(prompt, image.model, image.size)
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous.data)
+            self._entries[key] = image
+            self._size += len(image.data)
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted.data)
+
+    def invalidate(self, prompt: str) -> int:
+        """Drops the cached images of a prompt for every model. Returns how many were dropped."""
+        keys = [self.make_key(prompt, model, size) for model, size in image_models()]
+        dropped = 0
+        with self._lock:
+            for key in keys:
+                entry = self._entries.pop(key, None)
+                if entry is not None:
+                    self._size -= len(entry.data)
+                    dropped += 1
+        return dropped
+
+    def clear(self):
+        """Drops every cached image."""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    @property
+    def size(self) -> int:
+        """Total number of bytes held."""
+        with self._lock:
+            return self._size
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+def image_models() -> Tuple[Tuple[str, str], ...]:
+    """The (model, size) pairs used to generate images, in order of preference."""
+    return (
+        (settings.GEMINI_IMAGE_MODEL, "native"),
+        (settings.OPENAI_IMAGE_MODEL, "1024x1024"),
+    )
+
+
+# Global instance
+image_cache = GeneratedImageCache(max_bytes=int(settings.IMAGE_CACHE_MAX_BYTES))
@@ -0,0 +1,179 @@
+"""
+Image encoding for X media uploads.
+
+Generated images come back as large PNGs. They are re-encoded to fit X's media
+limits (`IMAGE_MAX_DIMENSION` pixels per side, `IMAGE_MAX_BYTES` per file) as
+progressive JPEG or WebP, in a process pool so that the CPU-heavy work neither
+holds the GIL nor blocks the calling thread. JPEGs that already fit are passed
+through untouched.
+"""
+
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from io import BytesIO
+from threading import Lock
+from typing import Optional
+
+from PIL import Image
+
+from ..config import settings
+from .metrics import IMAGE_ENCODE_SECONDS, IMAGE_ENCODED_BYTES
+
+from ..utils.logging_config import setup_logging, ctext
+logger = setup_logging()
+
+
+# X accepts images up to 5 MB
+X_MAX_IMAGE_BYTES = 5 * 1024 * 1024
+
+OUTPUT_FORMATS = {
+    # format: (PIL format, content type, file extension)
+    "jpeg": ("JPEG", "image/jpeg", ".jpeg"),
+    "webp": ("WEBP", "image/webp", ".webp"),
+}
+
+_MIN_QUALITY = 40
+_QUALITY_STEP = 10
+_DOWNSCALE_FACTOR = 0.75
+
+
+@dataclass
+class EncodedImage:
+    """An image encoded for upload."""
+    data: bytes
+    format: str
+    content_type: str
+    extension: str
+    width: int
+    height: int
+    passthrough: bool = False
+
+
+def _save(image: Image.Image, output_format: str, quality: int) -> bytes:
+    buffer = BytesIO()
+    if output_format == "webp":
+        image.save(buffer, "WEBP", quality=quality, method=4)
+    else:
+        image.save(buffer, "JPEG", quality=quality, progressive=True, subsampling="4:2:0")
+    return buffer.getvalue()
+
+
+def encode_image(
+        data: bytes,
+        output_format: str = "jpeg",
+        quality: int = 85,
+        max_dimension: int = 2048,
+        max_bytes: int = X_MAX_IMAGE_BYTES
+    ) -> EncodedImage:
+    """
+    Encodes an image to fit the given dimension and size limits.
+
+    JPEG input that already fits is returned as is. Otherwise the image is
+    downscaled to `max_dimension`, encoded at `quality`, then re-encoded at
+    lower qualities and, as a last resort, smaller sizes until it fits `max_bytes`.
+
+    Args:
+        data: The encoded source image.
+        output_format: "jpeg" (progressive) or "webp".
+        quality: The initial encoder quality (1-100).
+        max_dimension: The maximum width and height, in pixels.
+        max_bytes: The maximum size of the output, in bytes.
+
+    Returns:
+        EncodedImage: The encoded image and its metadata.
+    """
+    output_format = output_format.lower()
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Unsupported image output format: {output_format}")
+    _, content_type, extension = OUTPUT_FORMATS[output_format]
+
+    image = Image.open(BytesIO(data))
+    width, height = image.size
+
+    if (
+        output_format == "jpeg"
+        and image.format == "JPEG"
+        and len(data) <= max_bytes
+        and max(width, height) <= max_dimension
+    ):
+        return EncodedImage(data, output_format, content_type, extension, width, height, passthrough=True)
+
+    if output_format == "jpeg" or image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGB")
+    if max(width, height) > max_dimension:
+        image.thumbnail((max_dimension, max_dimension), Image.Resampling.LANCZOS)
+
+    while True:
+        encoded = _save(image, output_format, quality)
+        if len(encoded) <= max_bytes:
+            break
+        if quality - _QUALITY_STEP >= _MIN_QUALITY:
+            quality -= _QUALITY_STEP
+            continue
+        if min(image.size) <= 64:
+            raise ValueError(f"Cannot encode the image under {max_bytes} bytes.")
+        image = image.resize(
+            (int(image.width * _DOWNSCALE_FACTOR), int(image.height * _DOWNSCALE_FACTOR)),
+            Image.Resampling.LANCZOS
+        )
+
+    return EncodedImage(encoded, output_format, content_type, extension, image.width, image.height)
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = Lock()
+
+
+def _get_pool() -> Optional[ProcessPoolExecutor]:
+    global _pool
+    workers = int(settings.IMAGE_ENCODING_WORKERS)
+    if workers <= 0:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            # Forking this multi-threaded process could copy locks held by other threads
+            # (logging, HTTP pools) into the workers and deadlock them
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("forkserver"))
+        return _pool
+
+
+def shutdown_encoding_pool():
+    """Stops the encoding worker processes; the next encoding starts a new pool."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True, cancel_futures=True)
+            _pool = None
+
+
+def encode_image_for_x(data: bytes) -> EncodedImage:
+    """
+    Encodes an image for X with the configured format, quality and limits, in the
+    encoding process pool (`IMAGE_ENCODING_WORKERS`, 0 to encode in the calling thread).
+    """
+    kwargs = dict(
+        output_format=str(settings.IMAGE_OUTPUT_FORMAT),
+        quality=int(settings.IMAGE_QUALITY),
+        max_dimension=int(settings.IMAGE_MAX_DIMENSION),
+        max_bytes=min(int(settings.IMAGE_MAX_BYTES), X_MAX_IMAGE_BYTES),
+    )
+
+    start_time = time.perf_counter()
+    pool = _get_pool()
+    if pool is None:
+        encoded = encode_image(data, **kwargs)
+    else:
+        try:
+            encoded = pool.submit(encode_image, data, **kwargs).result()
+        except BrokenProcessPool:
+            logger.warning(ctext("Image encoding pool is broken, restarting it and encoding in-process.", color='yellow'))
+            shutdown_encoding_pool()
+            encoded = encode_image(data, **kwargs)
+
+    mode = "passthrough" if encoded.passthrough else "encoded"
+    IMAGE_ENCODE_SECONDS.labels(format=encoded.format, mode=mode).observe(time.perf_counter() - start_time)
+    IMAGE_ENCODED_BYTES.labels(format=encoded.format, mode=mode).observe(len(encoded.data))
+    return encoded
@@ -0,0 +1,147 @@
+"""
+Lifecycle management of the local images directory.
+
+Generated images are written to `app/utils/images` (an EFS volume in production)
+and would otherwise never be deleted. The store caps the directory at
+`IMAGE_STORE_MAX_BYTES`, evicting images older than `IMAGE_STORE_MAX_AGE_HOURS`
+first, then the least recently used ones. Images referenced by active or
+interrupted workflows are pinned and never evicted; pin sources are registered
+by the application, which knows about workflows.
+"""
+
+import os
+import time
+from pathlib import Path
+from threading import Lock
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+from ..config import settings
+from .metrics import IMAGE_STORE_BYTES, IMAGE_STORE_FILES, IMAGE_STORE_EVICTIONS_TOTAL
+
+from ..utils.logging_config import setup_logging, ctext
+logger = setup_logging()
+
+
+# Images written this recently are never evicted, since the workflow that
+# generated them may not have checkpointed their path yet
+_GRACE_SECONDS = 300
+
+
+class LocalImageStore:
+    """
+    A size- and age-capped directory of images, compacted on demand.
+    A `max_bytes` or `max_age_seconds` of 0 disables the corresponding limit.
+    """
+
+    def __init__(self, directory: Path, max_bytes: int, max_age_seconds: float):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self._lock = Lock()
+        self._last_used: Dict[str, float] = {}
+        self._pin_sources: List[Callable[[], Iterable[str]]] = []
+
+    def path_for(self, image_name: str) -> Path:
+        """Returns the path of an image in the store."""
+        return self.directory / image_name
+
+    def write(self, image_name: str, data: bytes) -> Path:
+        """Writes an image to the store and returns its path."""
+        path = self.path_for(image_name)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+        self.touch(path)
+        return path
+
+    def touch(self, path: str):
+        """Records a use of an image, for least recently used eviction."""
+        with self._lock:
+            self._last_used[str(Path(path))] = time.time()
+
+    def add_pin_source(self, source: Callable[[], Iterable[str]]):
+        """Registers a callable returning the paths of images that must be kept."""
+        with self._lock:
+            self._pin_sources.append(source)
+
+    def pinned_paths(self) -> Optional[Set[str]]:
+        """
+        Collects the paths of the images referenced by every pin source,
+        or None if a source failed.
+        """
+        with self._lock:
+            sources = list(self._pin_sources)
+        pinned = set()
+        for source in sources:
+            try:
+                pinned.update(str(Path(path)) for path in source() if path)
+            except Exception as e:
+                # Without knowing which images are in use, none can be evicted safely
+                logger.error(ctext(f"Image store pin source failed, skipping compaction: {e}", color='red'))
+                return None
+        return pinned
+
+    def compact(self) -> int:
+        """
+        Evicts expired images, then the least recently used ones until the
+        directory fits `max_bytes`, leaving pinned and fresh images alone.
+
+        Returns:
+            int: The number of images evicted.
+        """
+        try:
+            entries = [entry for entry in os.scandir(self.directory) if entry.is_file()]
+        except FileNotFoundError:
+            IMAGE_STORE_BYTES.set(0)
+            IMAGE_STORE_FILES.set(0)
+            return 0
+
+        pinned = self.pinned_paths()
+        now = time.time()
+        files = []
+        total = 0
+        for entry in entries:
+            stat = entry.stat()
+            path = str(Path(entry.path))
+            with self._lock:
+                last_used = max(self._last_used.get(path, 0.0), stat.st_mtime)
+            files.append((last_used, stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+        evicted = 0
+        if pinned is not None:
+            files.sort()
+            for last_used, modified, size, path in files:
+                if path in pinned or now - modified < _GRACE_SECONDS:
+                    continue
+                if self.max_age_seconds > 0 and now - last_used > self.max_age_seconds:
+                    reason = "age"
+                elif self.max_bytes > 0 and total > self.max_bytes:
+                    reason = "size"
+                else:
+                    continue
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    logger.warning(ctext(f"Could not evict image {path}: {e}", color='yellow'))
+                    continue
+                with self._lock:
+                    self._last_used.pop(path, None)
+                total -= size
+                evicted += 1
+                IMAGE_STORE_EVICTIONS_TOTAL.labels(reason=reason).inc()
+
+        IMAGE_STORE_BYTES.set(total)
+        IMAGE_STORE_FILES.set(len(files) - evicted)
+        if evicted:
+            logger.info(ctext(f"Image store compacted: {evicted} images evicted, {total} bytes kept.", color='white'))
+        return evicted
+
+
+# Global instance
+image_store = LocalImageStore(
+    directory=Path(__file__).resolve().parents[0] / "images",
+    max_bytes=int(settings.IMAGE_STORE_MAX_BYTES),
+    max_age_seconds=float(settings.IMAGE_STORE_MAX_AGE_HOURS) * 3600
+)
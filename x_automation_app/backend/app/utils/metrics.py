@@ -43,6 +43,46 @@ ACTIVE_WORKFLOWS = Gauge(
     'Number of currently active workflow threads'
 )
 
+# Gauge: Workflow runs waiting for a free slot of the execution engine
+QUEUED_WORKFLOW_RUNS = Gauge(
+    'autox_queued_workflow_runs',
+    'Number of workflow runs waiting to be executed'
+)
+
+# Counter: Workflow events dropped for slow subscribers
+WORKFLOW_EVENTS_DROPPED_TOTAL = Counter(
+    'autox_workflow_events_dropped_total',
+    'Workflow events not delivered to a WebSocket that fell behind'
+)
+
+# Counter: Items of workflow batches
+BATCH_ITEMS_TOTAL = Counter(
+    'autox_batch_items_total',
+    'Workflows run as part of a batch, by outcome',
+    ['status']  # status: completed, failed
+)
+
+# Counter: Scheduled workflow runs
+SCHEDULED_RUNS_TOTAL = Counter(
+    'autox_scheduled_runs_total',
+    'Runs of workflow schedules, by outcome',
+    ['outcome']  # outcome: launched, failed, misfired
+)
+
+# Counter: Warm-ups ahead of scheduled runs
+SCHEDULE_PREWARMS_TOTAL = Counter(
+    'autox_schedule_prewarms_total',
+    'Warm-up steps run ahead of scheduled workflow runs, by step and status',
+    ['step', 'status']  # status: success, failure
+)
+
+# Counter: Speculative tasks run while human validations are pending
+SPECULATIVE_TASKS_TOTAL = Counter(
+    'autox_speculative_tasks_total',
+    'Work done ahead of a human validation, by outcome',
+    ['kind', 'outcome']  # kind: tweets, images; outcome: started, skipped, committed, discarded, failed
+)
+
 
 # ============================================================================
 # AGENT METRICS
@@ -82,6 +122,27 @@ SESSION_VALIDATIONS_TOTAL = Counter(
     ['status']  # status: valid, invalid, error
 )
 
+# Counter: Session validation cache lookups
+SESSION_CACHE_LOOKUPS_TOTAL = Counter(
+    'autox_session_cache_lookups_total',
+    'Total number of session validation cache lookups',
+    ['result']  # result: hit, miss
+)
+
+# Counter: Trends cache lookups
+TRENDS_CACHE_LOOKUPS_TOTAL = Counter(
+    'autox_trends_cache_lookups_total',
+    'Total number of trends cache lookups',
+    ['result']  # result: hit, miss
+)
+
+# Counter: Login session store lookups
+LOGIN_SESSION_STORE_LOOKUPS_TOTAL = Counter(
+    'autox_login_session_store_lookups_total',
+    'Total number of login session store lookups',
+    ['result']  # result: hit, miss
+)
+
 
 # ============================================================================
 # CONTENT GENERATION METRICS
@@ -108,6 +169,75 @@ IMAGES_GENERATED_TOTAL = Counter(
     ['status']  # status: success, failure
 )
 
+# Counter: Generated image cache lookups
+IMAGE_CACHE_LOOKUPS_TOTAL = Counter(
+    'autox_image_cache_lookups_total',
+    'Generated image cache lookups by prompt, model and size',
+    ['result']  # result: hit, miss
+)
+
+# Histogram: Image encoding time (including the process pool round-trip)
+IMAGE_ENCODE_SECONDS = Histogram(
+    'autox_image_encode_seconds',
+    'Time spent encoding generated images for upload',
+    ['format', 'mode'],  # mode: encoded, passthrough
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2, 5)
+)
+
+# Histogram: Encoded image size
+IMAGE_ENCODED_BYTES = Histogram(
+    'autox_image_encoded_bytes',
+    'Size of generated images after encoding',
+    ['format', 'mode'],
+    buckets=(50_000, 100_000, 250_000, 500_000, 1_000_000, 2_000_000, 5_000_000)
+)
+
+# Counter: Presigned image URLs served
+PRESIGNED_URLS_TOTAL = Counter(
+    'autox_presigned_urls_total',
+    'Presigned image URLs served',
+    ['result']  # result: cached, minted, renewed
+)
+
+# Gauge: Local image store size
+IMAGE_STORE_BYTES = Gauge(
+    'autox_image_store_bytes',
+    'Total size of the images kept in the local images directory'
+)
+
+# Gauge: Local image store file count
+IMAGE_STORE_FILES = Gauge(
+    'autox_image_store_files',
+    'Number of images kept in the local images directory'
+)
+
+# Counter: Local image store evictions
+IMAGE_STORE_EVICTIONS_TOTAL = Counter(
+    'autox_image_store_evictions_total',
+    'Images deleted from the local images directory',
+    ['reason']  # reason: age, size
+)
+
+# Gauge: In-memory checkpoint size
+CHECKPOINT_MEMORY_BYTES = Gauge(
+    'autox_checkpoint_memory_bytes',
+    'Serialized size of the workflow checkpoints held in memory'
+)
+
+# Counter: Memoized node lookups
+NODE_CACHE_LOOKUPS_TOTAL = Counter(
+    'autox_node_cache_lookups_total',
+    'Memoized graph node lookups, by node and result',
+    ['node', 'result']  # result: hit, miss
+)
+
+# Counter: State blob operations
+STATE_BLOB_OPERATIONS_TOTAL = Counter(
+    'autox_state_blob_operations_total',
+    'Large workflow state values offloaded out of checkpoints',
+    ['operation']  # operation: store, deduplicate, load, sweep
+)
+
 # Counter: Publications
 PUBLICATIONS_TOTAL = Counter(
     'autox_publications_total',
@@ -161,6 +291,12 @@ TWEET_SEARCHES_TOTAL = Counter(
     ['status']
 )
 
+# Counter: Near-duplicate tweets collapsed before opinion analysis
+TWEETS_COLLAPSED_TOTAL = Counter(
+    'autox_tweets_collapsed_total',
+    'Total number of near-duplicate tweets collapsed into a cluster representative'
+)
+
 # Gauge: Research loop depth
 RESEARCH_LOOP_DEPTH = Gauge(
     'autox_research_loop_depth',
@@ -0,0 +1,127 @@
+"""
+Memoization of graph nodes.
+
+When a rejection loops back to the writer, or a workflow is run again, nodes
+whose inputs did not change would otherwise redo the same LLM calls. A
+memoized node declares the state keys it reads; its partial state update is
+cached under a hash of those values, and returned as is when they come back
+unchanged. Nodes are memoized when listed in `MEMOIZED_NODES`, and updates
+reporting an error are never cached.
+"""
+
+import copy
+import hashlib
+import json
+from collections import OrderedDict
+from functools import wraps
+from threading import Lock
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from ..config import settings
+from .json_encoder import CustomJSONEncoder
+from .metrics import NODE_CACHE_LOOKUPS_TOTAL
+
+from ..utils.logging_config import setup_logging, ctext
+logger = setup_logging()
+
+
+class NodeCache:
+    """
+    A thread-safe LRU cache of node updates, bounded by number of entries.
+    A `max_entries` of 0 disables the cache.
+    """
+
+    def __init__(self, max_entries: int):
+        self._lock = Lock()
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.max_entries = max_entries
+
+    @staticmethod
+    def make_key(node: str, state: Dict[str, Any], reads: Iterable[str]) -> Optional[str]:
+        """
+        Hashes the node name with the values of the keys it reads, or returns
+        None if the values cannot be serialized.
+        """
+        try:
+            payload = json.dumps(
+                [node, {key: state.get(key) for key in reads}],
+                cls=CustomJSONEncoder, sort_keys=True
+            )
+        except (TypeError, ValueError):
+            return None
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Returns a copy of the update cached under a key, if any."""
+        with self._lock:
+            update = self._entries.get(key)
+            if update is None:
+                return None
+            self._entries.move_to_end(key)
+        return copy.deepcopy(update)
+
+    def put(self, key: str, update: Dict[str, Any]):
+        """Caches a copy of a node update."""
+        if self.max_entries <= 0:
+            return
+        update = copy.deepcopy(update)
+        with self._lock:
+            self._entries[key] = update
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drops every cached update."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+def memoized_nodes() -> set:
+    """The names of the nodes to memoize, from `MEMOIZED_NODES`."""
+    return {name.strip() for name in str(settings.MEMOIZED_NODES or "").split(",") if name.strip()}
+
+
+def memoize_node(name: str, node: Callable, reads: Iterable[str], cache: Optional[NodeCache] = None) -> Callable:
+    """
+    Wraps a node so that its update is reused while the state keys it reads
+    are unchanged. The node is returned as is unless listed in `MEMOIZED_NODES`.
+
+    Args:
+        name: The name of the node in the graph.
+        node: The node function, taking the state (and optionally the run configuration).
+        reads: The state keys the node reads; the update must depend on them only.
+        cache: Where updates are cached, the global node cache by default.
+    """
+    if name not in memoized_nodes():
+        return node
+    reads = tuple(reads)
+
+    @wraps(node)
+    def memoized(state, *args, **kwargs):
+        store = cache if cache is not None else node_cache
+        key = store.make_key(name, state, reads) if store.max_entries > 0 else None
+        if key is None:
+            return node(state, *args, **kwargs)
+
+        update = store.get(key)
+        if update is not None:
+            NODE_CACHE_LOOKUPS_TOTAL.labels(node=name, result="hit").inc()
+            logger.info(ctext(f"Reusing the result of {name}, as its inputs did not change.", color='white'))
+            return update
+        NODE_CACHE_LOOKUPS_TOTAL.labels(node=name, result="miss").inc()
+
+        update = node(state, *args, **kwargs)
+        if isinstance(update, dict) and not update.get("error_message"):
+            store.put(key, update)
+        return update
+
+    return memoized
+
+
+# Global instance
+node_cache = NodeCache(max_entries=int(settings.NODE_CACHE_MAX_ENTRIES))
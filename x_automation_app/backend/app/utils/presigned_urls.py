@@ -0,0 +1,95 @@
+"""
+Presigned URLs of uploaded images.
+
+A presigned URL expires `PRESIGNED_URL_EXPIRES_SECONDS` after it is minted, while
+a workflow can wait for image validation much longer than that. Images therefore
+keep their S3 key in the state, and their URL is resolved from this service
+whenever the state is sent to the frontend: URLs are cached per key and renewed
+once they get within `PRESIGNED_URL_RENEW_BEFORE_SECONDS` of expiry, so a link is
+never refreshed by generating or uploading an image again.
+"""
+
+import time
+from threading import Lock
+from typing import Any, Dict, Optional, Tuple
+
+from ..config import settings
+from .clients import get_s3_client
+from .metrics import PRESIGNED_URLS_TOTAL
+from .schemas import GeneratedImage
+
+from ..utils.logging_config import setup_logging, ctext
+logger = setup_logging()
+
+
+# Expired URLs are dropped from the cache when it grows past this many keys
+_PRUNE_THRESHOLD = 1024
+
+
+class PresignedUrlService:
+    """
+    A thread-safe cache of presigned GET URLs per S3 key, renewed before expiry.
+    """
+
+    def __init__(self, expires_in: int, renew_before: int):
+        self._lock = Lock()
+        self._urls: Dict[Tuple[str, str], Tuple[str, float]] = {}
+        self.expires_in = expires_in
+        self.renew_before = min(renew_before, expires_in // 2)
+
+    def get(self, key: str, bucket: Optional[str] = None) -> str:
+        """
+        Returns a presigned URL for an S3 key, valid for at least `renew_before` seconds.
+        """
+        bucket = bucket or settings.BUCKET_NAME
+        now = time.time()
+        with self._lock:
+            cached = self._urls.get((bucket, key))
+        if cached is not None and cached[1] - now > self.renew_before:
+            PRESIGNED_URLS_TOTAL.labels(result="cached").inc()
+            return cached[0]
+
+        url = get_s3_client().generate_presigned_url(
+            'get_object',
+            Params={'Bucket': bucket, 'Key': key},
+            ExpiresIn=self.expires_in
+        )
+        PRESIGNED_URLS_TOTAL.labels(result="renewed" if cached is not None else "minted").inc()
+        with self._lock:
+            self._urls[(bucket, key)] = (url, now + self.expires_in)
+            if len(self._urls) > _PRUNE_THRESHOLD:
+                self._urls = {k: v for k, v in self._urls.items() if v[1] > now}
+        return url
+
+    def clear(self):
+        """Drops every cached URL."""
+        with self._lock:
+            self._urls.clear()
+
+
+def resolve_image_urls(values: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Returns a copy of workflow state values whose uploaded images carry a fresh
+    presigned URL. Images without an S3 key are left as they are.
+    """
+    images = values.get("generated_images") if values else None
+    if not images:
+        return values
+
+    resolved = []
+    for image in images:
+        image = GeneratedImage.model_validate(image)
+        if image.s3_key:
+            try:
+                image = image.model_copy(update={"s3_url": presigned_urls.get(image.s3_key)})
+            except Exception as e:
+                logger.warning(ctext(f"Could not renew the URL of image {image.image_name}: {e}", color='yellow'))
+        resolved.append(image)
+    return {**values, "generated_images": resolved}
+
+
+# Global instance
+presigned_urls = PresignedUrlService(
+    expires_in=int(settings.PRESIGNED_URL_EXPIRES_SECONDS),
+    renew_before=int(settings.PRESIGNED_URL_RENEW_BEFORE_SECONDS)
+)
@@ -0,0 +1,153 @@
+"""
+Persistent store of workflow schedules.
+
+Each schedule pairs a cron expression with the start payload of an autonomous
+workflow, and records the time of its next run. Schedules are kept in SQLite
+so that they survive restarts and are shared by every worker of the host: a run is claimed by moving the next run time of its schedule forward,
+only if it was not moved already, so each run is started by one worker only.
+The X session of a payload is stored encrypted with the login session store key.
+"""
+
+import json
+import sqlite3
+import time
+import uuid
+from pathlib import Path
+from threading import Lock
+from typing import Any, Dict, List, Optional
+
+from ..config import settings
+from .checkpointer import ensure_local_database
+
+from ..utils.logging_config import setup_logging, ctext
+logger = setup_logging()
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS schedules (
+    schedule_id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    cron TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    enabled INTEGER NOT NULL DEFAULT 1,
+    next_run_at REAL NOT NULL,
+    last_run_at REAL,
+    last_thread_id TEXT,
+    last_error TEXT,
+    created_at REAL NOT NULL
+);
+"""
+
+
+class ScheduleStore:
+    """
+    Keeps workflow schedules in a SQLite database.
+
+    Args:
+        path: The database file, created if missing, or ":memory:".
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        ensure_local_database(path)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        # Other workers may be claiming runs in the same database
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self._lock = Lock()
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> Dict[str, Any]:
+        schedule = dict(row)
+        schedule["payload"] = json.loads(schedule["payload"])
+        schedule["enabled"] = bool(schedule["enabled"])
+        return schedule
+
+    def add(self, name: str, cron: str, payload: Dict[str, Any], next_run_at: float) -> Dict[str, Any]:
+        """Stores a new, enabled schedule and returns it."""
+        schedule_id = str(uuid.uuid4())
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO schedules (schedule_id, name, cron, payload, next_run_at, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (schedule_id, name, cron, json.dumps(payload), next_run_at, time.time())
+            )
+        logger.info(ctext(f"Schedule '{name}' added ({cron}).", color='white'))
+        return self.get(schedule_id)
+
+    def get(self, schedule_id: str) -> Optional[Dict[str, Any]]:
+        """Returns a schedule, or None if there is none with this ID."""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM schedules WHERE schedule_id = ?", (schedule_id,)).fetchone()
+        return self._to_dict(row) if row else None
+
+    def list(self, enabled_only: bool = False) -> List[Dict[str, Any]]:
+        """Returns the schedules, soonest run first."""
+        query = "SELECT * FROM schedules"
+        if enabled_only:
+            query += " WHERE enabled = 1"
+        with self._lock:
+            rows = self._conn.execute(query + " ORDER BY next_run_at").fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    def remove(self, schedule_id: str) -> bool:
+        """Deletes a schedule. Returns False if there was none with this ID."""
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM schedules WHERE schedule_id = ?", (schedule_id,))
+        return cursor.rowcount > 0
+
+    def set_enabled(self, schedule_id: str, enabled: bool, next_run_at: Optional[float] = None) -> bool:
+        """
+        Pauses or resumes a schedule, optionally moving its next run.
+        Returns False if there was none with this ID.
+        """
+        with self._lock:
+            if next_run_at is None:
+                cursor = self._conn.execute(
+                    "UPDATE schedules SET enabled = ? WHERE schedule_id = ?", (int(enabled), schedule_id)
+                )
+            else:
+                cursor = self._conn.execute(
+                    "UPDATE schedules SET enabled = ?, next_run_at = ? WHERE schedule_id = ?",
+                    (int(enabled), next_run_at, schedule_id)
+                )
+        return cursor.rowcount > 0
+
+    def claim(self, schedule_id: str, due_at: float, next_run_at: float) -> bool:
+        """
+        Moves the next run of a schedule from `due_at` to `next_run_at`.
+
+        Returns:
+            bool: False if another worker claimed the run due at `due_at` first,
+            or if the schedule was removed or paused.
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE schedules SET next_run_at = ? WHERE schedule_id = ? AND next_run_at = ? AND enabled = 1",
+                (next_run_at, schedule_id, due_at)
+            )
+        return cursor.rowcount > 0
+
+    def record_run(self, schedule_id: str, thread_id: Optional[str], error: Optional[str] = None):
+        """Records the outcome of the launch of a scheduled run."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE schedules SET last_run_at = ?, last_thread_id = ?, last_error = ? WHERE schedule_id = ?",
+                (time.time(), thread_id, error, schedule_id)
+            )
+
+    def close(self):
+        """Closes the database connection."""
+        with self._lock:
+            self._conn.close()
+
+
+# Global instance
+schedule_store = ScheduleStore(
+    settings.SCHEDULE_SQLITE_PATH or str(Path(__file__).resolve().parents[1] / "data" / "schedules.sqlite")
+)
@@ -12,12 +12,29 @@ class ValidationAction(str, Enum):
     REJECT = "reject"
     EDIT = "edit"
 
+class ImageDecisionAction(str, Enum):
+    """Enumeration for per-image validation decisions."""
+    KEEP = "keep"
+    REGENERATE = "regenerate"
+    EDIT_PROMPT = "edit_prompt"
+    EDIT = "edit"
+
+class ImageDecision(BaseModel):
+    """
+    The user's decision on one generated image, identified by its name.
+    """
+    image_name: str
+    action: ImageDecisionAction
+    prompt: Optional[str] = Field(default=None, description="The new prompt, for the edit_prompt action.")
+    feedback: Optional[str] = Field(default=None, description="The change to apply to the image, for the edit action.")
+
 class ValidationData(BaseModel):
     """
     Data payload for validation, which can contain feedback or other information.
     """
     feedback: Optional[str] = None
     extra_data: Optional[Dict[str, Any]] = None
+    image_decisions: Optional[List[ImageDecision]] = None
 
 class ValidationResult(BaseModel):
     """
@@ -58,6 +75,8 @@ class GeneratedImage(BaseModel):
     image_name: str
     local_file_path: str
     s3_url: str
+    prompt: Optional[str] = None
+    s3_key: Optional[str] = None
 
 
 class ImageGeneratorOutput(BaseModel):
@@ -113,6 +132,7 @@ class TweetSearched(BaseModel):
     # lang: str
     # isReply: bool
     author: TweetAuthor
+    duplicateCount: int = 1  # Number of near-duplicate tweets this one stands for
 
 class TweetSearchResponse(BaseModel):
     """
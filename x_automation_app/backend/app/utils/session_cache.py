@@ -0,0 +1,181 @@
+"""
+Session validation cache for AutoX.
+
+Validating an X session through twitterapi.io is a write call (liking a tweet),
+so the result is cached per (cookie, proxy) pair. Valid sessions are cached for
+`SESSION_CACHE_TTL` seconds, invalid ones for `SESSION_CACHE_NEGATIVE_TTL`
+seconds, and the probe used on a cache miss is pluggable.
+"""
+
+import base64
+import hashlib
+import json
+import time
+from threading import Lock
+from typing import Callable, Dict, Optional, Tuple
+
+from ..config import settings
+from . import x_utils
+from .x_utils import InvalidSessionError
+from .metrics import SESSION_CACHE_LOOKUPS_TOTAL
+
+
+SessionProbe = Callable[[str, str], dict]
+
+
+def like_tweet_probe(login_cookies: str, proxy: str) -> dict:
+    """
+    Validates a session with the twitterapi.io `like_tweet_v2` round-trip.
+    Resolved at call time so that `x_utils.verify_session` can be patched.
+    """
+    return x_utils.verify_session(login_cookies=login_cookies, proxy=proxy)
+
+
+def _decode_cookies(login_cookies: str) -> Optional[dict]:
+    """
+    Decodes a session cookie jar given as JSON, base64-encoded JSON or a
+    `name=value; name=value` header. Returns None if it is none of them.
+    """
+    for decode in (
+        lambda raw: json.loads(raw),
+        lambda raw: json.loads(base64.b64decode(raw + "=" * (-len(raw) % 4), validate=True)),
+    ):
+        try:
+            cookies = decode(login_cookies)
+        except Exception:
+            continue
+        if isinstance(cookies, dict):
+            return cookies
+
+    pairs = [pair.strip().partition("=") for pair in login_cookies.split(";") if pair.strip()]
+    if pairs and all(name.strip() and separator for name, separator, _ in pairs):
+        return {name.strip(): value.strip() for name, _, value in pairs}
+    return None
+
+
+def local_cookie_probe(login_cookies: str, proxy: str) -> dict:
+    """
+    Validates a session locally, without any network call.
+
+    The session cookie returned by `login_v2` is an encoded cookie jar, which
+    must decode and carry an `auth_token`. This probe cannot detect
+    server-side revocation.
+    """
+    if not login_cookies or not login_cookies.strip():
+        raise InvalidSessionError("Session is invalid or expired.")
+
+    cookies = _decode_cookies(login_cookies.strip())
+    if cookies is None:
+        raise InvalidSessionError("Session is invalid, the session cookie could not be decoded.")
+    if not cookies.get("auth_token"):
+        raise InvalidSessionError("Session is invalid or expired, auth token is missing.")
+
+    return {"isValid": True}
+
+
+SESSION_PROBES: Dict[str, SessionProbe] = {
+    "like": like_tweet_probe,
+    "local": local_cookie_probe,
+}
+
+
+class SessionValidationCache:
+    """
+    Caches session validation results keyed by a hash of (cookie, proxy).
+
+    Only definitive answers are cached: a valid session, or an
+    `InvalidSessionError` raised by the probe. Any other exception propagates
+    untouched and is not cached.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float,
+        negative_ttl_seconds: float,
+        probe: Optional[SessionProbe] = None,
+        max_entries: int = 10_000,
+    ):
+        self._lock = Lock()
+        self._entries: Dict[str, Tuple[float, bool, str]] = {}
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self.probe = probe
+        self.max_entries = max_entries
+
+    @staticmethod
+    def make_key(login_cookies: str, proxy: str) -> str:
+        """Hashes the session credentials so that raw cookies are never kept as keys."""
+        digest = hashlib.sha256()
+        digest.update((login_cookies or "").encode("utf-8"))
+        digest.update(b"\x00")
+        digest.update((proxy or "").encode("utf-8"))
+        return digest.hexdigest()
+
+    def _get_probe(self) -> SessionProbe:
+        if self.probe is not None:
+            return self.probe
+        probe_name = str(settings.SESSION_VALIDATION_PROBE).lower()
+        if probe_name not in SESSION_PROBES:
+            raise ValueError(f"Unknown session validation probe: {probe_name}")
+        return SESSION_PROBES[probe_name]
+
+    def validate(self, login_cookies: str, proxy: str) -> dict:
+        """
+        Returns {"isValid": True} for a valid session, raises InvalidSessionError otherwise.
+        """
+        key = self.make_key(login_cookies, proxy)
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > now:
+                SESSION_CACHE_LOOKUPS_TOTAL.labels(result="hit").inc()
+                _, is_valid, message = entry
+                if is_valid:
+                    return {"isValid": True}
+                raise InvalidSessionError(message)
+            if entry:
+                del self._entries[key]
+
+        SESSION_CACHE_LOOKUPS_TOTAL.labels(result="miss").inc()
+        try:
+            result = self._get_probe()(login_cookies, proxy)
+        except InvalidSessionError as e:
+            self._store(key, False, str(e), self.negative_ttl_seconds)
+            raise
+
+        self._store(key, True, "", self.ttl_seconds)
+        return result
+
+    def _store(self, key: str, is_valid: bool, message: str, ttl_seconds: float):
+        if ttl_seconds <= 0:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                # Drop expired entries first, then the oldest ones
+                self._entries = {k: v for k, v in self._entries.items() if v[0] > now}
+                while len(self._entries) >= self.max_entries:
+                    self._entries.pop(next(iter(self._entries)))
+            self._entries[key] = (now + ttl_seconds, is_valid, message)
+
+    def invalidate(self, login_cookies: str, proxy: str):
+        """Forgets the cached result for a session, e.g. after a failed X call."""
+        with self._lock:
+            self._entries.pop(self.make_key(login_cookies, proxy), None)
+
+    def clear(self):
+        """Drops every cached result."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+# Global instance
+session_cache = SessionValidationCache(
+    ttl_seconds=float(settings.SESSION_CACHE_TTL),
+    negative_ttl_seconds=float(settings.SESSION_CACHE_NEGATIVE_TTL),
+)
@@ -0,0 +1,212 @@
+"""
+Server-side store of X login sessions.
+
+`login_v2` is a slow multi-step round-trip (username, password and TOTP through
+twitterapi.io), while the cookies it returns stay valid for a long time. The
+store keeps the session details of each account encrypted with Fernet, expires
+them after `LOGIN_SESSION_TTL` seconds and flags them for a background refresh
+`LOGIN_SESSION_REFRESH_MARGIN` seconds before expiry.
+"""
+
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from threading import Lock
+from typing import Callable, Dict, Optional, Set
+
+from cryptography.fernet import Fernet, InvalidToken
+
+from ..config import settings
+from .metrics import LOGIN_SESSION_STORE_LOOKUPS_TOTAL
+
+from ..utils.logging_config import setup_logging, ctext
+logger = setup_logging()
+
+
+class LoginSessionStore:
+    """
+    Keeps `login_v2` session details per (user name, proxy), encrypted at rest.
+
+    Only the Fernet token is ever held in memory or written to disk; the
+    expiry time and a hash of the session cookie are kept alongside it in clear
+    so that lookups and invalidations don't need to decrypt every entry.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float,
+        refresh_margin_seconds: float,
+        secret_key: Optional[str] = None,
+        path: Optional[str] = None,
+    ):
+        self._lock = Lock()
+        self._entries: Dict[str, dict] = {}
+        self._refreshing: Set[str] = set()
+        self.ttl_seconds = ttl_seconds
+        self.refresh_margin_seconds = refresh_margin_seconds
+
+        # Without a stable key, nothing encrypted by the store can be read back after a restart
+        self.has_stable_key = bool(secret_key)
+        if secret_key:
+            self._fernet = Fernet(secret_key)
+            self.path = Path(path) if path else None
+        else:
+            # Without a stable key, entries could not be read back after a restart
+            self._fernet = Fernet(Fernet.generate_key())
+            self.path = None
+            if path:
+                logger.warning(ctext("LOGIN_SESSION_STORE_KEY is not set. Login sessions are kept in memory only.", color='yellow'))
+
+        self._load()
+
+    @staticmethod
+    def make_key(user_name: str, proxy: str) -> str:
+        """Hashes the account identity so that user names are never kept as keys."""
+        digest = hashlib.sha256()
+        digest.update((user_name or "").strip().lower().encode("utf-8"))
+        digest.update(b"\x00")
+        digest.update((proxy or "").encode("utf-8"))
+        return digest.hexdigest()
+
+    @staticmethod
+    def _cookie_digest(session_cookie: str) -> str:
+        return hashlib.sha256((session_cookie or "").encode("utf-8")).hexdigest()
+
+    def get(self, user_name: str, proxy: str) -> Optional[dict]:
+        """
+        Returns the stored session details of an account, or None if there is
+        no entry, it has expired or it cannot be decrypted.
+        """
+        key = self.make_key(user_name, proxy)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry["expires_at"] <= time.time():
+                if entry is not None:
+                    self._entries.pop(key, None)
+                    self._save()
+                LOGIN_SESSION_STORE_LOOKUPS_TOTAL.labels(result="miss").inc()
+                return None
+
+            try:
+                payload = self._fernet.decrypt(entry["token"].encode("utf-8"), ttl=int(self.ttl_seconds))
+            except InvalidToken:
+                logger.warning(ctext("Discarding a login session that could not be decrypted.", color='yellow'))
+                self._entries.pop(key, None)
+                self._save()
+                LOGIN_SESSION_STORE_LOOKUPS_TOTAL.labels(result="miss").inc()
+                return None
+
+        LOGIN_SESSION_STORE_LOOKUPS_TOTAL.labels(result="hit").inc()
+        return json.loads(payload)
+
+    def put(self, user_name: str, proxy: str, session_details: dict):
+        """Stores (or replaces) the session details of an account."""
+        key = self.make_key(user_name, proxy)
+        token = self._fernet.encrypt(json.dumps(session_details).encode("utf-8"))
+        with self._lock:
+            self._entries[key] = {
+                "token": token.decode("utf-8"),
+                "expires_at": time.time() + self.ttl_seconds,
+                "cookie_digest": self._cookie_digest(session_details.get("session_cookie", "")),
+            }
+            self._save()
+
+    def needs_refresh(self, user_name: str, proxy: str) -> bool:
+        """Whether the stored session of an account is close enough to expiry to be renewed."""
+        key = self.make_key(user_name, proxy)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return True
+            return entry["expires_at"] - time.time() <= self.refresh_margin_seconds
+
+    def refresh(self, user_name: str, proxy: str, login: Callable[[], dict]):
+        """
+        Runs `login` and stores its result. Concurrent refreshes of the same
+        account are collapsed into one; failures keep the current entry.
+        """
+        key = self.make_key(user_name, proxy)
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        try:
+            session_details = login()
+            self.put(user_name, proxy, session_details)
+            logger.info(ctext("Login session refreshed in the background.", color='white'))
+        except Exception as e:
+            logger.warning(ctext(f"Background login session refresh failed: {e}", color='yellow'))
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def discard_session(self, session_cookie: str) -> bool:
+        """
+        Drops every entry holding the given session cookie, e.g. once X has
+        reported it as invalid. Returns True if an entry was removed.
+        """
+        digest = self._cookie_digest(session_cookie)
+        with self._lock:
+            keys = [k for k, entry in self._entries.items() if entry["cookie_digest"] == digest]
+            for key in keys:
+                del self._entries[key]
+            if keys:
+                self._save()
+        return bool(keys)
+
+    def encrypt(self, value: str) -> str:
+        """Encrypts a secret with the store key, e.g. a session kept elsewhere at rest."""
+        return self._fernet.encrypt(value.encode("utf-8")).decode("utf-8")
+
+    def decrypt(self, token: str) -> str:
+        """
+        Decrypts a secret encrypted with `encrypt`.
+
+        Raises:
+            InvalidToken: If it was encrypted with another key.
+        """
+        return self._fernet.decrypt(token.encode("utf-8")).decode("utf-8")
+
+    def clear(self):
+        """Drops every stored session."""
+        with self._lock:
+            self._entries.clear()
+            self._save()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def _load(self):
+        if not self.path or not self.path.exists():
+            return
+        try:
+            entries = json.loads(self.path.read_text(encoding="utf-8"))
+            now = time.time()
+            self._entries = {k: v for k, v in entries.items() if v.get("expires_at", 0) > now}
+        except Exception as e:
+            logger.warning(ctext(f"Could not load the login session store from {self.path}: {e}", color='yellow'))
+
+    def _save(self):
+        # Must be called with the lock held
+        if not self.path:
+            return
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+            tmp_path.write_text(json.dumps(self._entries), encoding="utf-8")
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logger.warning(ctext(f"Could not persist the login session store to {self.path}: {e}", color='yellow'))
+
+
+# Global instance
+login_session_store = LoginSessionStore(
+    ttl_seconds=float(settings.LOGIN_SESSION_TTL),
+    refresh_margin_seconds=float(settings.LOGIN_SESSION_REFRESH_MARGIN),
+    secret_key=settings.LOGIN_SESSION_STORE_KEY,
+    path=settings.LOGIN_SESSION_STORE_PATH,
+)
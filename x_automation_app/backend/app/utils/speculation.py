@@ -0,0 +1,144 @@
+"""
+Speculative work done while workflows await a human validation.
+
+Tasks are keyed by thread, kind and key (e.g. a topic or an image prompt), run
+on their own small pool and never queue: once `SPECULATION_MAX_CONCURRENCY`
+tasks are in flight, new ones are skipped, so that speculation never holds up
+real work. A node claims the result of its task when the workflow goes on as
+speculated, waiting for it if it is still running; the tasks that turned out
+useless are discarded, and their side effects undone.
+"""
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from threading import RLock
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from ..config import settings
+from .metrics import SPECULATIVE_TASKS_TOTAL
+
+from ..utils.logging_config import setup_logging, ctext
+logger = setup_logging()
+
+
+@dataclass
+class _Task:
+    future: Future
+    undo: Optional[Callable[[Any], None]] = None
+
+
+class SpeculationManager:
+    """
+    Runs speculative tasks under a concurrency budget. A `max_concurrency`
+    of 0 disables speculation.
+    """
+
+    def __init__(self, max_concurrency: int):
+        self.max_concurrency = max_concurrency
+        self._lock = RLock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._in_flight = 0
+        self._tasks: Dict[str, Dict[Tuple[str, str], _Task]] = {}
+
+    @property
+    def enabled(self) -> bool:
+        """Whether speculative tasks are run at all."""
+        return self.max_concurrency > 0
+
+    def _done(self, future: Future):
+        with self._lock:
+            self._in_flight -= 1
+
+    def submit(self, thread_id: str, kind: str, key: str, fn: Callable[[], Any],
+               undo: Optional[Callable[[Any], None]] = None) -> bool:
+        """
+        Starts a speculative task, unless the same one exists or the budget is spent.
+
+        Args:
+            undo: Called with the result of the task if it is discarded.
+
+        Returns:
+            bool: Whether the task was started.
+        """
+        with self._lock:
+            tasks = self._tasks.setdefault(thread_id, {})
+            if not self.enabled or (kind, key) in tasks:
+                return False
+            if self._in_flight >= self.max_concurrency:
+                SPECULATIVE_TASKS_TOTAL.labels(kind=kind, outcome="skipped").inc()
+                return False
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="speculation")
+            self._in_flight += 1
+            future = self._executor.submit(fn)
+            future.add_done_callback(self._done)
+            tasks[(kind, key)] = _Task(future, undo)
+        SPECULATIVE_TASKS_TOTAL.labels(kind=kind, outcome="started").inc()
+        return True
+
+    def _pop(self, thread_id: str, predicate: Callable[[Tuple[str, str]], bool]) -> Dict[Tuple[str, str], _Task]:
+        with self._lock:
+            tasks = self._tasks.get(thread_id, {})
+            popped = {task_key: tasks.pop(task_key) for task_key in [k for k in tasks if predicate(k)]}
+            if not tasks:
+                self._tasks.pop(thread_id, None)
+        return popped
+
+    def claim(self, thread_id: str, kind: str, key: str) -> Optional[Any]:
+        """
+        Takes the result of a speculative task, waiting for it if needed.
+
+        Returns:
+            The result, or None if there is no such task or it failed.
+        """
+        task = self._pop(thread_id, lambda task_key: task_key == (kind, key)).get((kind, key))
+        if task is None:
+            return None
+        try:
+            result = task.future.result()
+        except Exception as e:
+            logger.warning(ctext(f"Speculative {kind} task for '{key[:60]}' failed: {e}", color='yellow'))
+            SPECULATIVE_TASKS_TOTAL.labels(kind=kind, outcome="failed").inc()
+            return None
+        SPECULATIVE_TASKS_TOTAL.labels(kind=kind, outcome="committed").inc()
+        return result
+
+    def discard(self, thread_id: str, kind: Optional[str] = None, keep: Iterable[str] = ()) -> int:
+        """
+        Drops the speculative tasks of a thread, of one kind if given, except
+        the kept keys. Tasks still running are undone once they finish.
+
+        Returns:
+            int: The number of tasks discarded.
+        """
+        keep = set(keep)
+        discarded = self._pop(
+            thread_id,
+            lambda task_key: (kind is None or task_key[0] == kind) and task_key[1] not in keep
+        )
+        for (task_kind, _), task in discarded.items():
+            if task.undo is not None:
+                undo = task.undo
+                task.future.add_done_callback(
+                    lambda future, undo=undo: undo(future.result())
+                    if not future.cancelled() and future.exception() is None else None
+                )
+            SPECULATIVE_TASKS_TOTAL.labels(kind=task_kind, outcome="discarded").inc()
+        return len(discarded)
+
+    def pending(self, thread_id: str) -> int:
+        """Returns the number of speculative tasks held for a thread."""
+        with self._lock:
+            return len(self._tasks.get(thread_id, ()))
+
+    def shutdown(self):
+        """Stops the speculative tasks pool without waiting for running tasks."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+            self._tasks.clear()
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+# Global instance
+speculation_manager = SpeculationManager(max_concurrency=int(settings.SPECULATION_MAX_CONCURRENCY))
@@ -0,0 +1,259 @@
+"""
+Offloading of large workflow state values out of checkpoints.
+
+Research reports, web research results, tweet search results and gathered
+sources are carried in the workflow state and written again with every
+checkpoint. Serialized values larger than `STATE_BLOB_THRESHOLD_BYTES` are
+instead stored once, compressed, in a content-addressed directory, and
+checkpoints only hold a reference to them. References are resolved when a
+checkpoint is loaded, so nodes keep reading plain values. Blobs no longer
+referenced by any checkpoint are swept along with expired threads.
+"""
+
+import hashlib
+import json
+import os
+import time
+import zlib
+from collections import OrderedDict
+from pathlib import Path
+from threading import Lock
+from typing import Any, Iterable, Optional, Set, Tuple
+
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+from ..config import settings
+from .metrics import STATE_BLOB_OPERATIONS_TOTAL
+
+from ..utils.logging_config import setup_logging, ctext
+logger = setup_logging()
+
+
+# Type of the serialized references to offloaded values
+BLOB_TYPE = "state_blob"
+# Key of the references embedded in the channel values of a checkpoint
+_MARKER = "__state_blob__"
+# Blobs written this recently are never swept, since the checkpoint that
+# references them may not be stored yet
+_GRACE_SECONDS = 600
+# Decompressed blobs kept in memory for repeated loads of the same checkpoint
+_CACHE_MAX_BYTES = 32 * 1024 * 1024
+
+
+class BlobStore:
+    """
+    A content-addressed directory of zlib-compressed blobs, with a small
+    in-memory cache of recently used ones.
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        self._lock = Lock()
+        self._files_lock = Lock()
+        self._cache: "OrderedDict[str, bytes]" = OrderedDict()
+        self._cache_size = 0
+
+    def _path(self, digest: str) -> Path:
+        return self.directory / digest[:2] / f"{digest}.z"
+
+    def _remember(self, digest: str, data: bytes):
+        if len(data) > _CACHE_MAX_BYTES:
+            return
+        with self._lock:
+            if digest in self._cache:
+                self._cache.move_to_end(digest)
+                return
+            self._cache[digest] = data
+            self._cache_size += len(data)
+            while self._cache_size > _CACHE_MAX_BYTES:
+                _, evicted = self._cache.popitem(last=False)
+                self._cache_size -= len(evicted)
+
+    def put(self, data: bytes) -> str:
+        """Stores a blob unless it already exists, and returns its digest."""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._path(digest)
+        with self._files_lock:
+            try:
+                # Refreshes an existing blob for the sweep grace period
+                os.utime(path)
+                STATE_BLOB_OPERATIONS_TOTAL.labels(operation="deduplicate").inc()
+            except FileNotFoundError:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                temporary = path.with_suffix(f".{os.getpid()}.{time.monotonic_ns()}.tmp")
+                temporary.write_bytes(zlib.compress(data))
+                os.replace(temporary, path)
+                STATE_BLOB_OPERATIONS_TOTAL.labels(operation="store").inc()
+        self._remember(digest, data)
+        return digest
+
+    def get(self, digest: str) -> bytes:
+        """Returns the content of a blob."""
+        with self._lock:
+            data = self._cache.get(digest)
+            if data is not None:
+                self._cache.move_to_end(digest)
+        if data is None:
+            data = zlib.decompress(self._path(digest).read_bytes())
+            self._remember(digest, data)
+        STATE_BLOB_OPERATIONS_TOTAL.labels(operation="load").inc()
+        return data
+
+    def sweep(self, referenced: Set[str]) -> int:
+        """
+        Deletes the blobs that are not referenced and were not written recently.
+
+        Returns:
+            int: The number of blobs deleted.
+        """
+        now = time.time()
+        swept = 0
+        for path in self.directory.glob("*/*.z"):
+            digest = path.stem
+            with self._files_lock:
+                try:
+                    if digest in referenced or now - path.stat().st_mtime < _GRACE_SECONDS:
+                        continue
+                    path.unlink()
+                except FileNotFoundError:
+                    continue
+            with self._lock:
+                data = self._cache.pop(digest, None)
+                if data is not None:
+                    self._cache_size -= len(data)
+            swept += 1
+        if swept:
+            STATE_BLOB_OPERATIONS_TOTAL.labels(operation="sweep").inc(swept)
+            logger.info(ctext(f"Swept {swept} unreferenced state blobs.", color='white'))
+        return swept
+
+
+class OffloadingSerializer:
+    """
+    A checkpoint serializer storing large values in a `BlobStore`.
+
+    Large objects serialized on their own (channel values of `MemorySaver`,
+    pending writes) become a reference of type `BLOB_TYPE`. Whole checkpoints
+    (as serialized by `SqliteCheckpointSaver`) keep their small channel values
+    inline and reference the large ones.
+
+    Args:
+        serde: The serializer of the checkpoint saver, used for the values themselves.
+        store: Where large values are stored.
+        threshold: The serialized size, in bytes, from which values are offloaded.
+    """
+
+    def __init__(self, serde, store: BlobStore, threshold: int):
+        self.serde = serde
+        self.store = store
+        self.threshold = threshold
+
+    def _offload(self, value: Any) -> Tuple[Tuple[str, bytes], Optional[str]]:
+        type_, data = self.serde.dumps_typed(value)
+        if len(data) < self.threshold:
+            return (type_, data), None
+        return (type_, data), self.store.put(data)
+
+    def _is_small(self, value: Any) -> bool:
+        if value is None or isinstance(value, (bool, int, float)):
+            return True
+        return isinstance(value, (str, bytes)) and len(value) < self.threshold
+
+    @staticmethod
+    def _is_checkpoint(obj: Any) -> bool:
+        return isinstance(obj, dict) and "channel_values" in obj and "channel_versions" in obj
+
+    @staticmethod
+    def _is_marker(value: Any) -> bool:
+        return isinstance(value, dict) and value.keys() == {_MARKER, "type"}
+
+    def dumps_typed(self, obj: Any) -> Tuple[str, bytes]:
+        """Serializes an object, offloading it or its large channel values."""
+        if self._is_checkpoint(obj):
+            channel_values = {}
+            for channel, value in obj["channel_values"].items():
+                if not self._is_small(value):
+                    (type_, _), digest = self._offload(value)
+                    if digest is not None:
+                        value = {_MARKER: digest, "type": type_}
+                channel_values[channel] = value
+            return self.serde.dumps_typed({**obj, "channel_values": channel_values})
+
+        serialized, digest = self._offload(obj)
+        if digest is None:
+            return serialized
+        return BLOB_TYPE, json.dumps({"type": serialized[0], "digest": digest}).encode("utf-8")
+
+    def loads_typed(self, data: Tuple[str, bytes]) -> Any:
+        """Deserializes an object, resolving the references to offloaded values."""
+        type_, payload = data
+        if type_ == BLOB_TYPE:
+            reference = json.loads(payload)
+            return self.serde.loads_typed((reference["type"], self.store.get(reference["digest"])))
+
+        obj = self.serde.loads_typed(data)
+        if self._is_checkpoint(obj):
+            obj["channel_values"] = {
+                channel: self.serde.loads_typed((value["type"], self.store.get(value[_MARKER])))
+                if self._is_marker(value) else value
+                for channel, value in obj["channel_values"].items()
+            }
+        return obj
+
+    def load_channel(self, data: Tuple[str, bytes], channel: str) -> Any:
+        """Deserializes one channel value of a whole checkpoint, resolving its reference only."""
+        obj = self.serde.loads_typed(data)
+        value = obj["channel_values"].get(channel) if self._is_checkpoint(obj) else None
+        if self._is_marker(value):
+            return self.serde.loads_typed((value["type"], self.store.get(value[_MARKER])))
+        return value
+
+    def references(self, data: Tuple[str, bytes], checkpoint: bool = False) -> Set[str]:
+        """
+        Returns the digests referenced by a serialized object, without
+        resolving them. Only whole checkpoints can embed references.
+        """
+        type_, payload = data
+        if type_ == BLOB_TYPE:
+            return {json.loads(payload)["digest"]}
+        if not checkpoint or type_ in ("empty", "null"):
+            return set()
+        obj = self.serde.loads_typed(data)
+        if not self._is_checkpoint(obj):
+            return set()
+        return {value[_MARKER] for value in obj["channel_values"].values() if self._is_marker(value)}
+
+
+def create_state_blob_serializer() -> Optional[OffloadingSerializer]:
+    """
+    Builds the serializer offloading values from `STATE_BLOB_THRESHOLD_BYTES`
+    to `STATE_BLOB_DIR`, or None if offloading is disabled.
+    """
+    threshold = int(settings.STATE_BLOB_THRESHOLD_BYTES)
+    if threshold <= 0:
+        return None
+    directory = settings.STATE_BLOB_DIR or Path(__file__).resolve().parents[1] / "data" / "state_blobs"
+    return OffloadingSerializer(JsonPlusSerializer(), BlobStore(directory), threshold)
+
+
+def load_checkpoint_channel(serde, data: Tuple[str, bytes], channel: str) -> Any:
+    """
+    Deserializes one channel value of a whole checkpoint, without loading the
+    values other channels offloaded when the serializer offloads them.
+    """
+    if hasattr(serde, "load_channel"):
+        return serde.load_channel(data, channel)
+    return serde.loads_typed(data)["channel_values"].get(channel)
+
+
+def sweep_state_blobs(serde, payloads: Iterable[Tuple[Tuple[str, bytes], bool]]) -> int:
+    """
+    Sweeps the blobs of an offloading serializer that none of the given
+    (serialized object, is checkpoint) pairs reference.
+    """
+    if not isinstance(serde, OffloadingSerializer):
+        return 0
+    referenced: Set[str] = set()
+    for data, checkpoint in payloads:
+        referenced |= serde.references(data, checkpoint)
+    return serde.store.sweep(referenced)
@@ -0,0 +1,166 @@
+"""
+Deterministic thread composer.
+
+Splits the final content into a `ThreadPlan` without any LLM round-trip:
+paragraphs are kept whole when they fit, otherwise they are broken on sentence
+boundaries, then on words. Lengths follow X's weighted-length rules
+(`x_utils.weighted_length`), tweets are numbered `(i/n)`, the opener ends with
+the thread emojis, and images are spread evenly across the thread.
+"""
+
+import re
+from typing import List, Optional
+
+from .schemas import ThreadPlan, TweetChunk
+from .x_utils import weighted_length, MAX_TWEET_WEIGHTED_LENGTH
+
+from ..utils.logging_config import setup_logging, ctext
+logger = setup_logging()
+
+
+THREAD_OPENER_SUFFIX = " 🧵👇"
+PARAGRAPH_SEPARATOR = "\n\n"
+SENTENCE_SEPARATOR = " "
+
+_PARAGRAPH_SPLIT_REGEX = re.compile(r"\n\s*\n")
+_SENTENCE_SPLIT_REGEX = re.compile(r"(?<=[.!?…])\s+")
+
+
+def _hard_split(word: str, budget: int) -> List[str]:
+    """Cuts a single word longer than a tweet into pieces that fit the budget."""
+    pieces: List[str] = []
+    while weighted_length(word) > budget:
+        low, high = 1, len(word)
+        while low < high:
+            middle = (low + high + 1) // 2
+            if weighted_length(word[:middle]) <= budget:
+                low = middle
+            else:
+                high = middle - 1
+        pieces.append(word[:low])
+        word = word[low:]
+    if word:
+        pieces.append(word)
+    return pieces
+
+
+def _split_words(text: str, budget: int) -> List[str]:
+    """Packs the words of a text into pieces that fit the budget."""
+    pieces: List[str] = []
+    current, current_length = "", 0
+    for word in text.split():
+        for part in _hard_split(word, budget):
+            part_length = weighted_length(part)
+            if current and current_length + 1 + part_length <= budget:
+                current += " " + part
+                current_length += 1 + part_length
+            else:
+                if current:
+                    pieces.append(current)
+                current, current_length = part, part_length
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def _paragraph_units(paragraph: str, budget: int) -> List[str]:
+    """Breaks a paragraph into units that each fit the budget, preferring sentence boundaries."""
+    if weighted_length(paragraph) <= budget:
+        return [paragraph]
+    units: List[str] = []
+    for sentence in _SENTENCE_SPLIT_REGEX.split(paragraph):
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        if weighted_length(sentence) <= budget:
+            units.append(sentence)
+        else:
+            units.extend(_split_words(sentence, budget))
+    return units
+
+
+def _pack(paragraphs: List[str], budget: int, opener_budget: int) -> List[str]:
+    """Greedily packs paragraph units into tweets, never splitting a unit."""
+    chunks: List[str] = []
+    current, current_length = "", 0
+    for paragraph in paragraphs:
+        for index, unit in enumerate(_paragraph_units(paragraph, min(budget, opener_budget))):
+            limit = opener_budget if not chunks else budget
+            unit_length = weighted_length(unit)
+            separator = SENTENCE_SEPARATOR if index > 0 else PARAGRAPH_SEPARATOR
+            if current and current_length + len(separator) + unit_length <= limit:
+                current += separator + unit
+                current_length += len(separator) + unit_length
+            else:
+                if current:
+                    chunks.append(current)
+                current, current_length = unit, unit_length
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _numbering(index: int, total: int) -> str:
+    return f" ({index}/{total})"
+
+
+def place_images(chunk_count: int, image_paths: Optional[List[str]]) -> List[Optional[str]]:
+    """
+    Spreads images evenly across the thread, starting with the opener.
+    A tweet chunk holds at most one image; extra images are dropped.
+    """
+    placement: List[Optional[str]] = [None] * chunk_count
+    image_paths = [path for path in (image_paths or []) if path]
+    if not image_paths or chunk_count == 0:
+        return placement
+    if len(image_paths) > chunk_count:
+        logger.warning(ctext(f"{len(image_paths) - chunk_count} image(s) left out of a {chunk_count}-tweet thread.", color='yellow'))
+        image_paths = image_paths[:chunk_count]
+    for i, path in enumerate(image_paths):
+        placement[i * chunk_count // len(image_paths)] = path
+    return placement
+
+
+def compose_thread(
+        content: str,
+        image_paths: Optional[List[str]] = None,
+        max_length: int = MAX_TWEET_WEIGHTED_LENGTH
+    ) -> ThreadPlan:
+    """
+    Splits content into a numbered X thread that respects the weighted length limit.
+
+    Args:
+        content: The full text to turn into a thread.
+        image_paths: Local paths of the images to attach to the thread.
+        max_length: The maximum weighted length of a tweet.
+
+    Returns:
+        ThreadPlan: The tweets of the thread, in posting order.
+    """
+    if not content or not content.strip():
+        raise ValueError("Cannot compose a thread from empty content.")
+
+    paragraphs = [p.strip() for p in _PARAGRAPH_SPLIT_REGEX.split(content.strip()) if p.strip()]
+
+    if len(paragraphs) == 1 and weighted_length(paragraphs[0]) <= max_length:
+        chunks = paragraphs
+    else:
+        opener_length = weighted_length(THREAD_OPENER_SUFFIX)
+        digits = 1
+        while True:
+            # Reserve room for the largest "(n/n)" label this number of digits allows
+            reserve = weighted_length(_numbering(10 ** digits - 1, 10 ** digits - 1))
+            chunks = _pack(paragraphs, max_length - reserve, max_length - reserve - opener_length)
+            if len(chunks) < 10 ** digits:
+                break
+            digits += 1
+
+        total = len(chunks)
+        if total > 1:
+            chunks = [
+                chunk + _numbering(i + 1, total) + (THREAD_OPENER_SUFFIX if i == 0 else "")
+                for i, chunk in enumerate(chunks)
+            ]
+
+    images = place_images(len(chunks), image_paths)
+    return ThreadPlan(thread=[TweetChunk(text=text, image_path=image) for text, image in zip(chunks, images)])
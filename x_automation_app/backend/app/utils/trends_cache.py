@@ -0,0 +1,59 @@
+"""
+Trends cache for AutoX.
+
+Trending topics change slowly compared to how often workflows fetch them, so
+the trends of each (WOEID, count) are kept for `TRENDS_CACHE_TTL` seconds.
+This also lets the scheduler fetch them a few minutes before a scheduled run,
+which then finds them already cached.
+"""
+
+import copy
+import time
+from threading import Lock
+from typing import Callable, Dict, List, Tuple
+
+from ..config import settings
+from .metrics import TRENDS_CACHE_LOOKUPS_TOTAL
+from .schemas import Trend
+
+
+class TrendsCache:
+    """
+    Caches fetched trends per (WOEID, count). A `ttl_seconds` of 0 disables
+    the cache. Failed fetches are not cached.
+    """
+
+    def __init__(self, ttl_seconds: float):
+        self._lock = Lock()
+        self._entries: Dict[Tuple[int, int], Tuple[float, List[Trend]]] = {}
+        self.ttl_seconds = ttl_seconds
+
+    def get(self, woeid: int, count: int, fetch: Callable[[], List[Trend]]) -> List[Trend]:
+        """Returns the cached trends of a location, fetching them on a miss."""
+        key = (int(woeid), int(count or 0))
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > now:
+                TRENDS_CACHE_LOOKUPS_TOTAL.labels(result="hit").inc()
+                return copy.deepcopy(entry[1])
+
+        TRENDS_CACHE_LOOKUPS_TOTAL.labels(result="miss").inc()
+        trends = fetch()
+        if self.ttl_seconds > 0:
+            with self._lock:
+                self._entries[key] = (time.monotonic() + self.ttl_seconds, copy.deepcopy(trends))
+        return trends
+
+    def clear(self):
+        """Drops every cached trend."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+# Global instance
+trends_cache = TrendsCache(ttl_seconds=float(settings.TRENDS_CACHE_TTL))
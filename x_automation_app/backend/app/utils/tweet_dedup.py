@@ -0,0 +1,243 @@
+"""
+Near-duplicate clustering of searched tweets.
+
+Trending searches return retweet-like copies, quote chains and copypasta. Each
+tweet text is normalized and reduced to the set of its word bigrams, whose
+MinHash signature estimates the Jaccard similarity between two tweets as the
+share of equal signature values. LSH banding only compares tweets sharing a
+whole band of their signature, which keeps the pass close to linear; candidate
+pairs above the similarity threshold are then clustered with a union-find.
+
+Each cluster is collapsed into its most engaging tweet, carrying the cluster
+size in `duplicateCount`. `diversity_order` then interleaves the remaining
+tweets so that the most engaging ones don't all say the same thing.
+"""
+
+import re
+from collections import defaultdict
+from typing import Dict, List, Optional, Sequence, Union
+
+import numpy as np
+
+from .schemas import TweetSearched
+from .tweet_serializer import get_field
+from .metrics import TWEETS_COLLAPSED_TOTAL
+from .x_utils import URL_REGEX, EMOJI_SEQUENCE_REGEX
+
+from ..utils.logging_config import setup_logging, ctext
+logger = setup_logging()
+
+
+SIGNATURE_SIZE = 32
+BAND_ROWS = 4  # 8 bands of 4 rows: pairs above ~0.6 similarity almost always share a band
+
+_RETWEET_PREFIX_REGEX = re.compile(r"^(rt\s+)?(@\w+:?\s+)+")
+_MENTION_REGEX = re.compile(r"@\w+")
+_NON_WORD_REGEX = re.compile(r"[^\w\s]+")
+
+# Fixed seeds keep clusters stable from one run to the next
+_SEEDS = np.random.default_rng(20250101).integers(1, 2 ** 63, size=(SIGNATURE_SIZE, 1), dtype=np.uint64)
+
+
+def normalize_text(text: str) -> str:
+    """
+    Reduces a tweet text to the words that carry its opinion: lower case,
+    without the retweet/reply prefix, URLs, mentions, emojis or punctuation.
+    """
+    text = (text or "").lower()
+    text = _RETWEET_PREFIX_REGEX.sub("", text)
+    text = URL_REGEX.sub(" ", text)
+    text = _MENTION_REGEX.sub(" ", text)
+    if not text.isascii():
+        text = EMOJI_SEQUENCE_REGEX.sub(" ", text)
+    text = _NON_WORD_REGEX.sub(" ", text)
+    return " ".join(text.split())
+
+
+def _mix64(values: np.ndarray) -> np.ndarray:
+    """SplitMix64 finalizer, used as a fast 64-bit hash of integer features."""
+    z = values + np.uint64(0x9E3779B97F4A7C15)
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+
+def minhash_signatures(texts: Sequence[str]) -> np.ndarray:
+    """
+    Computes the MinHash signature of the word bigrams of each normalized text
+    in one vectorized pass (single-word texts use the word itself).
+
+    Args:
+        texts: Normalized tweet texts.
+
+    Returns:
+        np.ndarray: A (len(texts), SIGNATURE_SIZE) uint64 array; rows of empty texts are all zeros.
+    """
+    all_words: List[str] = []
+    counts = np.zeros(len(texts), dtype=np.int64)
+    for i, text in enumerate(texts):
+        words = text.split()
+        all_words.extend(words)
+        counts[i] = len(words)
+
+    signatures = np.zeros((len(texts), SIGNATURE_SIZE), dtype=np.uint64)
+    if not all_words:
+        return signatures
+
+    ids = np.unique(np.array(all_words), return_inverse=True)[1].astype(np.uint64) + np.uint64(1)
+    word_counts = counts[counts > 0]
+    first = np.zeros(len(ids), dtype=bool)
+    first[np.concatenate(([0], np.cumsum(word_counts)[:-1]))] = True
+    # Each word is paired with the previous word of the same text; the first word
+    # of a text only stands alone when the text has a single word
+    previous = np.concatenate(([np.uint64(0)], ids[:-1]))
+    previous[first] = 0
+    features = (previous << np.uint64(32)) | ids
+    features = features[~first | np.repeat(word_counts == 1, word_counts)]
+    feature_counts = counts - (counts > 1)
+
+    non_empty = feature_counts > 0
+    starts = np.concatenate(([0], np.cumsum(feature_counts)[:-1]))[non_empty]
+    hashes = _mix64(features[None, :] ^ _SEEDS)
+    signatures[non_empty] = np.minimum.reduceat(hashes, starts, axis=1).T
+    return signatures
+
+
+def signature_similarities(signature: np.ndarray, signatures: np.ndarray) -> np.ndarray:
+    """Estimated Jaccard similarity between one signature and many."""
+    return np.mean(signatures == signature, axis=1)
+
+
+def cluster_signatures(signatures: np.ndarray, threshold: float = 0.6) -> np.ndarray:
+    """
+    Groups signatures whose estimated similarity reaches `threshold` (transitively).
+
+    Args:
+        signatures: MinHash signatures, one row per item.
+        threshold: The minimum estimated Jaccard similarity between near-duplicates.
+
+    Returns:
+        np.ndarray: The cluster label of each signature.
+    """
+    # Identical signatures (exact and normalized copies) are merged up front
+    unique, inverse = np.unique(signatures, axis=0, return_inverse=True)
+    inverse = inverse.reshape(-1)
+    parent = list(range(len(unique)))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    # Every member of an LSH bucket is compared with the bucket's first member;
+    # the other bands give the remaining members their own chance to meet
+    lefts, rights = [], []
+    multipliers = np.arange(1, BAND_ROWS * 2, 2, dtype=np.uint64)
+    for start in range(0, SIGNATURE_SIZE, BAND_ROWS):
+        band = unique[:, start:start + BAND_ROWS]
+        keys = _mix64(np.bitwise_xor.reduce(band * multipliers, axis=1))
+        order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+        is_start = np.concatenate(([True], sorted_keys[1:] != sorted_keys[:-1]))
+        bucket_first = order[np.flatnonzero(is_start)[np.cumsum(is_start) - 1]]
+        paired = ~is_start
+        lefts.append(bucket_first[paired])
+        rights.append(order[paired])
+
+    pairs = np.unique(np.stack((np.concatenate(lefts), np.concatenate(rights)), axis=1), axis=0)
+    if len(pairs):
+        similar = np.mean(unique[pairs[:, 0]] == unique[pairs[:, 1]], axis=1) >= threshold
+        for index, other in pairs[similar].tolist():
+            root, other_root = find(index), find(other)
+            if root != other_root:
+                parent[other_root] = root
+
+    roots = np.array([find(i) for i in range(len(unique))], dtype=np.int64)
+    return roots[inverse]
+
+
+def collapse_near_duplicates(
+        tweets: Sequence[Union[TweetSearched, dict]],
+        scores: np.ndarray,
+        threshold: float = 0.6
+    ) -> List[Union[TweetSearched, dict]]:
+    """
+    Keeps the best scored tweet of each near-duplicate cluster, with the
+    number of tweets it stands for in `duplicateCount`.
+
+    Args:
+        tweets: Tweets as TweetSearched objects or dictionaries.
+        scores: The engagement score of each tweet, used to pick representatives.
+        threshold: The minimum estimated Jaccard similarity between near-duplicates.
+
+    Returns:
+        List: One tweet per cluster, in input order.
+    """
+    if not tweets:
+        return []
+
+    signatures = minhash_signatures([normalize_text(get_field(t, "text")) for t in tweets])
+    labels = cluster_signatures(signatures, threshold)
+
+    best: Dict[int, int] = {}
+    totals: Dict[int, int] = defaultdict(int)
+    for index, label in enumerate(labels.tolist()):
+        totals[label] += get_field(tweets[index], "duplicateCount") or 1
+        if label not in best or scores[index] > scores[best[label]]:
+            best[label] = index
+
+    representatives = []
+    for label, index in sorted(best.items(), key=lambda item: item[1]):
+        tweet = tweets[index]
+        if isinstance(tweet, dict):
+            representatives.append({**tweet, "duplicateCount": totals[label]})
+        else:
+            representatives.append(tweet.model_copy(update={"duplicateCount": totals[label]}))
+
+    collapsed = len(tweets) - len(representatives)
+    if collapsed:
+        TWEETS_COLLAPSED_TOTAL.inc(collapsed)
+        logger.info(ctext(f"Collapsed {collapsed} near-duplicate tweets into {len(representatives)} clusters.", color='white'))
+    return representatives
+
+
+def diversity_order(
+        scores: np.ndarray,
+        signatures: np.ndarray,
+        diversity: float = 0.3,
+        limit: Optional[int] = None
+    ) -> np.ndarray:
+    """
+    Orders items by maximal marginal relevance: each pick trades its
+    (normalized) score against its similarity to the items already picked.
+
+    Args:
+        scores: The relevance score of each item.
+        signatures: The MinHash signature of each item.
+        diversity: 0 keeps the pure score order, 1 only looks for dissimilar items.
+        limit: The maximum number of items to order, defaults to all of them.
+
+    Returns:
+        np.ndarray: Item indices, in pick order.
+    """
+    count = len(scores)
+    limit = count if limit is None else min(limit, count)
+    if count == 0 or diversity <= 0:
+        return np.argsort(-scores, kind="stable")[:limit]
+
+    top = float(np.max(scores))
+    relevance = scores / top if top > 0 else np.zeros(count)
+    max_similarity = np.zeros(count)
+    available = np.ones(count, dtype=bool)
+    order = np.empty(limit, dtype=np.int64)
+
+    for position in range(limit):
+        marginal = (1 - diversity) * relevance - diversity * max_similarity
+        marginal[~available] = -np.inf
+        pick = int(np.argmax(marginal))
+        order[position] = pick
+        available[pick] = False
+        np.maximum(max_similarity, signature_similarities(signatures[pick], signatures), out=max_similarity)
+
+    return order
@@ -0,0 +1,153 @@
+"""
+Engagement ranking of searched tweets.
+
+Scores every tweet in one vectorized pass: log-scaled likes, retweets, replies
+and views, weighted by an exponential recency decay on `createdAt`. The best
+tweets are then kept while their compact lines (see `tweet_serializer`) fit the
+opinion analysis token budget, so the fetch size can grow without the prompt
+growing with it. With a `diversity` weight, tweets resembling the ones already
+kept are pushed back (see `tweet_dedup.diversity_order`).
+"""
+
+import calendar
+import time
+from datetime import datetime
+from typing import List, Optional, Sequence, Union
+
+import numpy as np
+
+from .schemas import TweetSearched
+from .tweet_serializer import MONTH_NUMBERS, get_field, compact_header, compact_line, estimate_tokens
+from .tweet_dedup import diversity_order, normalize_text, minhash_signatures
+
+from ..utils.logging_config import setup_logging, ctext
+logger = setup_logging()
+
+
+# Weights of the log-scaled engagement counts; retweets and replies signal more than likes
+ENGAGEMENT_WEIGHTS = {
+    "likeCount": 1.0,
+    "retweetCount": 2.0,
+    "replyCount": 1.5,
+    "viewCount": 0.25,
+    "duplicateCount": 1.0,
+}
+
+
+def parse_created_at(value) -> float:
+    """
+    Returns the epoch timestamp of a tweet creation date (X or ISO format),
+    or NaN when it cannot be parsed.
+    """
+    if not value:
+        return float("nan")
+    value = str(value)
+    # X format, e.g. "Tue Dec 10 07:00:30 +0000 2024", parsed by hand as strptime is slow
+    parts = value.split()
+    if len(parts) == 6 and parts[1] in MONTH_NUMBERS and parts[4] == "+0000":
+        try:
+            hours, minutes, seconds = (int(p) for p in parts[3].split(":"))
+            return float(calendar.timegm(
+                (int(parts[5]), int(MONTH_NUMBERS[parts[1]]), int(parts[2]), hours, minutes, seconds)
+            ))
+        except ValueError:
+            return float("nan")
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return float("nan")
+    if parsed.tzinfo is None:
+        return float(calendar.timegm(parsed.timetuple()))
+    return parsed.timestamp()
+
+
+def engagement_scores(
+        tweets: Sequence[Union[TweetSearched, dict]],
+        half_life_hours: float = 24,
+        now: Optional[float] = None
+    ) -> np.ndarray:
+    """
+    Computes the engagement score of every tweet.
+
+    Args:
+        tweets: Tweets as TweetSearched objects or dictionaries.
+        half_life_hours: The age after which a tweet's engagement weighs half.
+        now: The reference epoch timestamp, defaults to the current time.
+
+    Returns:
+        np.ndarray: One score per tweet, in input order.
+    """
+    if not tweets:
+        return np.zeros(0)
+    now = time.time() if now is None else now
+
+    counts = np.array(
+        [[get_field(tweet, field) or 0 for field in ENGAGEMENT_WEIGHTS] for tweet in tweets],
+        dtype=np.float64
+    )
+    weights = np.fromiter(ENGAGEMENT_WEIGHTS.values(), dtype=np.float64)
+    engagement = np.log1p(np.clip(counts, 0, None)) @ weights
+
+    created_at = np.array([parse_created_at(get_field(tweet, "createdAt")) for tweet in tweets])
+    age_hours = np.clip((now - created_at) / 3600.0, 0, None)
+    decay = np.exp2(-age_hours / max(float(half_life_hours), 1e-6))
+    # Tweets without a usable date neither win nor lose from their age
+    known = ~np.isnan(decay)
+    decay[~known] = np.median(decay[known]) if known.any() else 1.0
+
+    return engagement * decay
+
+
+def rank_tweets(
+        tweets: Sequence[Union[TweetSearched, dict]],
+        token_budget: Optional[int] = None,
+        max_text_chars: Optional[int] = 280,
+        half_life_hours: float = 24,
+        diversity: float = 0.0,
+        now: Optional[float] = None
+    ) -> List[Union[TweetSearched, dict]]:
+    """
+    Orders tweets by engagement score and keeps the top slice whose compact
+    serialization fits the token budget.
+
+    Args:
+        tweets: Tweets as TweetSearched objects or dictionaries.
+        token_budget: The maximum estimated number of tokens of the serialized slice, or None for no limit.
+        max_text_chars: The maximum number of characters kept from each tweet text.
+        half_life_hours: The age after which a tweet's engagement weighs half.
+        diversity: How much a tweet is penalized for resembling the ones kept before it (0 to 1).
+        now: The reference epoch timestamp, defaults to the current time.
+
+    Returns:
+        List: The kept tweets, best first, at least one unless none has any text.
+        Tweets without any text are dropped.
+    """
+    tweets = list(tweets)
+    if not tweets:
+        return []
+
+    scores = engagement_scores(tweets, half_life_hours=half_life_hours, now=now)
+    costs = np.array([estimate_tokens(compact_line(tweet, max_text_chars)) for tweet in tweets])
+
+    candidates = np.flatnonzero(costs > 0)
+    if diversity > 0 and len(candidates):
+        # No more tweets can be kept than the cheapest ones fitting the budget
+        limit = None
+        if token_budget is not None:
+            available = token_budget - estimate_tokens(compact_header())
+            limit = int(np.count_nonzero(np.cumsum(np.sort(costs[candidates])) <= available))
+        signatures = minhash_signatures([normalize_text(get_field(tweets[i], "text")) for i in candidates])
+        order = candidates[diversity_order(scores[candidates], signatures, diversity, limit)]
+    else:
+        order = candidates[np.argsort(-scores[candidates], kind="stable")]
+
+    if token_budget is not None:
+        available = token_budget - estimate_tokens(compact_header())
+        fits = np.cumsum(costs[order]) <= available
+        # The best tweet is kept even when it alone exceeds the budget, so the analysis has something to read
+        fits[:1] = True
+        order = order[fits]
+
+    ranked = [tweets[i] for i in order]
+    logger.info(ctext(f"Kept {len(ranked)} of {len(tweets)} tweets after engagement ranking.", color='white'))
+    return ranked
@@ -0,0 +1,175 @@
+"""
+Token-compact serialization of tweets for LLM prompts.
+
+`data_to_csv` keeps every column of every tweet, with verbose keys such as
+`author.userName` and full texts. The compact format keeps one short-coded
+line per tweet, strips URLs and emojis, truncates long texts, rounds engagement
+counts and stops once the token budget is spent, so prompt size no longer grows
+with the number of tweets retrieved.
+"""
+
+from datetime import datetime
+from typing import Any, Iterable, Iterator, List, Optional, Union
+
+from .schemas import TweetSearched
+from .x_utils import URL_REGEX, EMOJI_SEQUENCE_REGEX
+
+
+# (code, field, description) in output order; the text always comes last
+COMPACT_COLUMNS = (
+    ("u", "author.userName", "user"),
+    ("d", "createdAt", "date"),
+    ("l", "likeCount", "likes"),
+    ("r", "retweetCount", "retweets"),
+    ("c", "replyCount", "replies"),
+    ("v", "viewCount", "views"),
+    ("n", "duplicateCount", "copies"),
+    ("t", "text", "text"),
+)
+COMPACT_DELIMITER = "|"
+
+MONTH_NUMBERS = {
+    month: f"{index:02d}" for index, month in enumerate(
+        ("Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"), start=1
+    )
+}
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Roughly estimates the number of LLM tokens of a text (about 4 characters per token).
+    """
+    return (len(text) + 3) // 4
+
+
+def bucket_number(value: Any) -> str:
+    """
+    Rounds an engagement count to two significant digits with a k/M/B suffix
+    (e.g. 1234 -> "1.2k", 15432 -> "15k"); counts under 1000 are kept as is.
+    """
+    try:
+        number = int(value or 0)
+    except (TypeError, ValueError):
+        return "0"
+    if number < 1000:
+        return str(number)
+    for divisor, suffix in ((1_000_000_000, "B"), (1_000_000, "M"), (1_000, "k")):
+        if number >= divisor:
+            scaled = number / divisor
+            return f"{scaled:.1f}{suffix}".replace(".0", "") if scaled < 10 else f"{round(scaled)}{suffix}"
+    return str(number)
+
+
+def compact_date(value: Any) -> str:
+    """Shortens a tweet creation date to YYYY-MM-DD, keeping unknown formats untouched."""
+    if not value:
+        return ""
+    value = str(value)
+    # X format, e.g. "Tue Dec 10 07:00:30 +0000 2024", parsed by hand as strptime is slow
+    parts = value.split()
+    if len(parts) == 6 and parts[1] in MONTH_NUMBERS and parts[2].isdigit() and parts[5].isdigit():
+        return f"{parts[5]}-{MONTH_NUMBERS[parts[1]]}-{int(parts[2]):02d}"
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).strftime("%Y-%m-%d")
+    except ValueError:
+        return value[:10]
+
+
+def clean_text(text: str, max_chars: Optional[int] = None) -> str:
+    """
+    Strips URLs and emojis from a tweet text, collapses whitespace, escapes the
+    delimiter and truncates it to `max_chars` characters.
+    """
+    text = text or ""
+    if max_chars is not None:
+        # Bounds the cost of the regexes below on very long texts (e.g. long-form posts)
+        text = text[:max_chars * 2]
+    if "http" in text:
+        text = URL_REGEX.sub("", text)
+    if not text.isascii():
+        text = EMOJI_SEQUENCE_REGEX.sub("", text)
+    text = " ".join(text.split()).replace(COMPACT_DELIMITER, "/")
+    if max_chars is not None and len(text) > max_chars:
+        text = text[:max(max_chars - 1, 0)].rstrip() + "…"
+    return text
+
+
+def get_field(tweet: Union[TweetSearched, dict], field: str) -> Any:
+    """Reads a (dotted) field from a TweetSearched object or its dictionary dump."""
+    value: Any = tweet
+    for key in field.split("."):
+        if value is None:
+            return None
+        value = value.get(key) if isinstance(value, dict) else getattr(value, key, None)
+    return value
+
+
+def compact_header() -> str:
+    """Returns the legend line of the compact format."""
+    legend = COMPACT_DELIMITER.join(f"{code}={description}" for code, _, description in COMPACT_COLUMNS)
+    return f"{legend}\n"
+
+
+def compact_line(tweet: Union[TweetSearched, dict], max_text_chars: Optional[int] = 280) -> str:
+    """
+    Returns the compact line of a tweet, or an empty string if it has no text left after cleaning.
+    """
+    text = clean_text(get_field(tweet, "text"), max_text_chars)
+    if not text:
+        return ""
+    values = []
+    for code, field, _ in COMPACT_COLUMNS:
+        if code == "t":
+            values.append(text)
+        elif code == "d":
+            values.append(compact_date(get_field(tweet, field)))
+        elif code == "u":
+            values.append(str(get_field(tweet, field) or ""))
+        elif code == "n":
+            values.append(bucket_number(get_field(tweet, field) or 1))
+        else:
+            values.append(bucket_number(get_field(tweet, field)))
+    return COMPACT_DELIMITER.join(values) + "\n"
+
+
+def iter_compact_tweets(
+        tweets: Iterable[Union[TweetSearched, dict]],
+        max_text_chars: Optional[int] = 280
+    ) -> Iterator[str]:
+    """
+    Yields one compact line per tweet, skipping tweets left without any text.
+    """
+    for tweet in tweets:
+        line = compact_line(tweet, max_text_chars)
+        if line:
+            yield line
+
+
+def serialize_tweets_compact(
+        tweets: Iterable[Union[TweetSearched, dict]],
+        token_budget: Optional[int] = None,
+        max_text_chars: Optional[int] = 280
+    ) -> str:
+    """
+    Serializes tweets to the compact format, stopping before the token budget is exceeded.
+
+    Args:
+        tweets: Tweets as TweetSearched objects or dictionaries.
+        token_budget: The maximum estimated number of tokens of the output, or None for no limit.
+        max_text_chars: The maximum number of characters kept from each tweet text.
+
+    Returns:
+        str: The legend line followed by one line per tweet.
+    """
+    header = compact_header()
+    parts: List[str] = [header]
+    used_tokens = estimate_tokens(header)
+
+    for line in iter_compact_tweets(tweets, max_text_chars):
+        line_tokens = estimate_tokens(line)
+        if token_budget is not None and used_tokens + line_tokens > token_budget:
+            break
+        parts.append(line)
+        used_tokens += line_tokens
+
+    return "".join(parts)
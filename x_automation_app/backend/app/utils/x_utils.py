@@ -2,10 +2,13 @@
 # - refine the logic of the 'tweet_advanced_search' tool to give more autonomy to the agent 
 
 
+import os
 import requests
 from ..config import settings
 from .schemas import Trend, TweetSearched, TweetAuthor
-from typing import List, Optional
+from .image_buffers import load_image_bytes
+from .trends_cache import trends_cache
+from typing import Dict, List, Optional
 from langchain_core.tools import tool
 import re
 import unicodedata
@@ -81,6 +84,17 @@ def get_trends(
     ---
         List[Trend]: A list of trending topics.
     """
+    return trends_cache.get(woeid, count, lambda: fetch_trends(woeid, count, api_key))
+
+
+def fetch_trends(
+        woeid: int,
+        count: Optional[int]=30,
+        api_key: str = settings.X_API_KEY
+    ) -> List[Trend]:
+    """
+    Fetches trending topics from twitterapi.io, bypassing the trends cache.
+    """
     url = "https://api.twitterapi.io/twitter/trends"
     params = {"woeid": woeid, "count": count}
     headers = {"X-API-Key": api_key}
@@ -217,10 +231,16 @@ def upload_image_v2(
         login_cookies: str,
         image_path: str,
         proxy: str,
-        api_key: str = settings.X_API_KEY
+        api_key: str = settings.X_API_KEY,
+        image_bytes: Optional[bytes] = None,
+        s3_key: Optional[str] = None
     ) -> str:
     """
-    Uploads media from a URL to Twitter and returns the media_id.
+    Uploads an image to Twitter and returns the media_id.
+
+    The encoded image is taken from `image_bytes` when given, otherwise from the
+    in-memory image buffers, then from `image_path` on disk, and from its copy
+    at `s3_key` on S3 as a last resort.
     """
 
     if not login_cookies:
@@ -228,25 +248,72 @@ def upload_image_v2(
 
     url = "https://api.twitterapi.io/twitter/upload_media_v2"
 
-    with open(image_path, 'rb') as file:
-        files = {'file': file}
-        payload = {
-            "proxy": proxy,
-            "login_cookies": login_cookies,
-            "is_long_video": "false"
-        }
-        headers = {"X-API-Key": api_key}
+    if image_bytes is None:
+        image_bytes = load_image_bytes(image_path, s3_key)
+
+    files = {'file': (os.path.basename(image_path), image_bytes)}
+    payload = {
+        "proxy": proxy,
+        "login_cookies": login_cookies,
+        "is_long_video": "false"
+    }
+    headers = {"X-API-Key": api_key}
+
+    try:
+        response = requests.post(url, data=payload, files=files, headers=headers)
+        response.raise_for_status()
+        data = response.json()
+        if data.get("status") == "success" and "media_id" in data:
+            return data["media_id"]
+        else:
+            raise Exception(f"Failed to upload media: {data.get('msg', 'Unknown error')}")
+    except requests.exceptions.RequestException as e:
+        raise Exception(f"Network error during media upload: {e}")
+
+# X's weighted-length rules (twitter-text v3): code points in these ranges weigh 1,
+# any other code point weighs 2, each URL weighs 23 and each emoji sequence weighs 2.
+MAX_TWEET_WEIGHTED_LENGTH = 280
+URL_WEIGHTED_LENGTH = 23
+URL_REGEX = re.compile(r"https?://[^\s]+")
+_EMOJI_BASE = "\U0001F000-\U0001FAFF\u2300-\u23FF\u2600-\u27BF\u2B00-\u2BFF"
+_EMOJI_MODIFIERS = "\uFE0E\uFE0F\u20E3\U0001F3FB-\U0001F3FF\U000E0020-\U000E007F"
+EMOJI_SEQUENCE_REGEX = re.compile(
+    f"[\U0001F1E6-\U0001F1FF]{{2}}"
+    f"|[{_EMOJI_BASE}][{_EMOJI_MODIFIERS}]*(?:\u200D[{_EMOJI_BASE}\u2640\u2642\u2695\u2696\u2708\u2764][{_EMOJI_MODIFIERS}]*)*"
+)
+
+
+def _is_light_code_point(code_point: int) -> bool:
+    return (
+        code_point <= 4351
+        or 8192 <= code_point <= 8205
+        or 8208 <= code_point <= 8223
+        or 8242 <= code_point <= 8247
+    )
+
+
+def _plain_weighted_length(text: str) -> int:
+    if text.isascii():
+        return len(text)
+    emoji_count = 0
+    if EMOJI_SEQUENCE_REGEX.search(text):
+        text, emoji_count = EMOJI_SEQUENCE_REGEX.subn("", text)
+    return (emoji_count * 2) + sum(1 if _is_light_code_point(ord(char)) else 2 for char in text)
+
+
+def weighted_length(text: str) -> int:
+    """
+    Calculates the length of a text as counted by X: URLs count as 23 characters,
+    emojis and wide (e.g. CJK) characters count as 2, everything else as 1.
+    """
+    text = unicodedata.normalize("NFC", text)
+    length = 0
+    position = 0
+    for match in URL_REGEX.finditer(text):
+        length += _plain_weighted_length(text[position:match.start()]) + URL_WEIGHTED_LENGTH
+        position = match.end()
+    return length + _plain_weighted_length(text[position:])
 
-        try:
-            response = requests.post(url, data=payload, files=files, headers=headers)
-            response.raise_for_status()
-            data = response.json()
-            if data.get("status") == "success" and "media_id" in data:
-                return data["media_id"]
-            else:
-                raise Exception(f"Failed to upload media: {data.get('msg', 'Unknown error')}")
-        except requests.exceptions.RequestException as e:
-            raise Exception(f"Network error during media upload: {e}")
 
 @tool
 def get_char_count(text: str) -> int:
@@ -254,24 +321,7 @@ def get_char_count(text: str) -> int:
     Calculates the character count of a string for Twitter, where emojis count as 2 characters
     and URLs count as 23 characters.
     """
-    url_regex = r"https?://[^\s]+"
-    urls = re.findall(url_regex, text)
-    
-    # Replace URLs with a placeholder to not count their length
-    text_no_urls = re.sub(url_regex, "", text)
-    
-    emoji_count = 0
-    char_count = 0
-
-    for char in text_no_urls:
-        # Check if the character is an emoji
-        if unicodedata.category(char) in ('So', 'Sc'):
-            emoji_count += 1
-        else:
-            char_count += 1
-    
-    # Emojis count as 2, normal chars as 1, and each URL as 23
-    return char_count + (emoji_count * 2) + (len(urls) * 23)
+    return weighted_length(text)
 
 def post_tweet_v2(
         login_cookies: str,
@@ -279,18 +329,24 @@ def post_tweet_v2(
         proxy: str,
         image_paths: Optional[List[str]]=None,
         reply_to_tweet_id: Optional[str]=None,
-        api_key: str = settings.X_API_KEY
+        api_key: str = settings.X_API_KEY,
+        image_keys: Optional[Dict[str, str]]=None
     ):
     """
     Posts a tweet with optional media and returns the tweet ID.
     Requires a valid session from a successful login.
+    `image_keys` maps image paths to their S3 keys, to read the images back from
+    S3 when they are neither in memory nor on disk.
     """
     if not login_cookies:
         raise Exception("Cannot post tweet: User is not logged in. Call login methods first.")
 
     media_ids = None
     if image_paths:
-        media_ids = [upload_image_v2(login_cookies, image_path, proxy, api_key) for image_path in image_paths]
+        media_ids = [
+            upload_image_v2(login_cookies, image_path, proxy, api_key, s3_key=(image_keys or {}).get(image_path))
+            for image_path in image_paths
+        ]
 
     url = "https://api.twitterapi.io/twitter/create_tweet_v2"
 
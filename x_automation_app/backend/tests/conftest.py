@@ -1,8 +1,20 @@
 """Pytest fixtures and configuration for all tests."""
+import os
 import pytest
 from unittest.mock import Mock, MagicMock
 from fastapi.testclient import TestClient
+
+# Tests keep workflow checkpoints in memory
+os.environ.setdefault("CHECKPOINTER_BACKEND", "memory")
+os.environ.setdefault("STATE_BLOB_THRESHOLD_BYTES", "0")
+# Nodes and API calls stubbed by tests must not reuse each other's results
+os.environ.setdefault("MEMOIZED_NODES", "")
+os.environ.setdefault("TRENDS_CACHE_TTL", "0")
+# Schedules are not persisted
+os.environ.setdefault("SCHEDULE_SQLITE_PATH", ":memory:")
+
 from backend.app.main import app
+from backend.app.agents.engine import workflow_engine
 from backend.app.agents.state import OverallState
 from backend.app.utils.schemas import (
     Trend, TweetSearched, TweetAuthor, ValidationResult,
@@ -11,8 +23,9 @@ from backend.app.utils.schemas import (
 
 
 @pytest.fixture
-def client():
-    """FastAPI test client."""
+def client(mocker):
+    """FastAPI test client. Workflow runs are not executed in the background."""
+    mocker.patch.object(workflow_engine, "submit", return_value=True)
     return TestClient(app)
 
 
@@ -197,3 +210,27 @@ def mock_requests_get(mocker):
     """Mock requests.get for X API calls."""
     return mocker.patch("requests.get")
 
+
+
+@pytest.fixture(autouse=True)
+def clear_session_cache():
+    """Reset the session validation cache and login session store between tests."""
+    from backend.app.utils.session_cache import session_cache
+    from backend.app.utils.session_store import login_session_store
+    session_cache.clear()
+    login_session_store.clear()
+    yield
+    session_cache.clear()
+    login_session_store.clear()
+
+
+@pytest.fixture(autouse=True)
+def clear_image_cache():
+    """Reset the generated image cache and the presigned URLs between tests."""
+    from backend.app.utils.image_cache import image_cache
+    from backend.app.utils.presigned_urls import presigned_urls
+    image_cache.clear()
+    presigned_urls.clear()
+    yield
+    image_cache.clear()
+    presigned_urls.clear()
@@ -106,6 +106,30 @@ class TestDemoLogin:
         assert "userDetails" in data
         assert data["session"] == "demo_session_cookie"
 
+    def test_demo_login_reuses_stored_session(self, client, mocker):
+        """Test that consecutive demo logins run login_v2 only once."""
+        mocker.patch("backend.app.main.settings.DEMO_TOKEN", "valid_demo_token")
+        mocker.patch("backend.app.main.settings.TEST_USER_NAME", "demo_user")
+        mocker.patch("backend.app.main.settings.TEST_USER_EMAIL", "demo@example.com")
+        mocker.patch("backend.app.main.settings.TEST_USER_PASSWORD", "demo_password")
+        mocker.patch("backend.app.main.settings.TEST_USER_PROXY", "http://proxy.example.com:8080")
+        mocker.patch("backend.app.main.settings.TEST_USER_TOTP_SECRET", "DEMO1234")
+
+        mock_login = mocker.patch("backend.app.main.x_utils.login_v2")
+        mock_login.return_value = {
+            "session_cookie": "demo_session_cookie",
+            "user_details": {"user_name": "demo_user", "email": "demo@example.com"}
+        }
+
+        payload = {"token": "valid_demo_token"}
+        first = client.post("/auth/demo-login", json=payload)
+        second = client.post("/auth/demo-login", json=payload)
+
+        assert first.status_code == 200
+        assert second.status_code == 200
+        assert second.json()["session"] == "demo_session_cookie"
+        mock_login.assert_called_once()
+
     def test_demo_login_with_invalid_token(self, client, mocker):
         """Test demo login with invalid token."""
         mocker.patch("backend.app.main.settings.DEMO_TOKEN", "valid_demo_token")
@@ -186,6 +210,23 @@ class TestValidateSession:
         assert "detail" in data
         assert "Session expired" in data["detail"]
 
+    def test_validate_session_is_cached(self, client, mocker):
+        """Test that repeated validations of the same session hit X only once."""
+        mock_verify = mocker.patch("backend.app.main.x_utils.verify_session")
+        mock_verify.return_value = {"isValid": True}
+
+        payload = {
+            "session": "cached_session_cookie",
+            "proxy": "http://proxy.example.com:8080"
+        }
+
+        first = client.post("/auth/validate-session", json=payload)
+        second = client.post("/auth/validate-session", json=payload)
+
+        assert first.status_code == 200
+        assert second.status_code == 200
+        mock_verify.assert_called_once()
+
     def test_validate_session_handles_unexpected_error(self, client, mocker):
         """Test session validation handles unexpected errors."""
         mock_verify = mocker.patch("backend.app.main.x_utils.verify_session")
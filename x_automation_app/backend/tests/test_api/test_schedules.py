@@ -0,0 +1,131 @@
+"""Tests for schedule endpoints."""
+import pytest
+from unittest.mock import Mock
+from cryptography.fernet import Fernet
+from backend.app.agents.scheduler import Scheduler
+from backend.app.utils.schedule_store import ScheduleStore
+from backend.app.utils.session_store import LoginSessionStore
+
+
+def session_store(secret_key=None):
+    """A login session store, encrypting with a stable key when given one."""
+    return LoginSessionStore(ttl_seconds=3600, refresh_margin_seconds=60, secret_key=secret_key)
+
+
+@pytest.fixture
+def store(mocker):
+    """Replaces the schedule store and the scheduler with empty ones."""
+    store = ScheduleStore(":memory:")
+    mocker.patch("backend.app.main.schedule_store", store)
+    mocker.patch("backend.app.main.scheduler", Scheduler(
+        store, jitter_seconds=0, misfire_grace_seconds=300, prewarm_lead_seconds=0, warm_up=Mock()
+    ))
+    mocker.patch("backend.app.main.login_session_store", session_store(Fernet.generate_key().decode()))
+    yield store
+    store.close()
+
+
+@pytest.fixture
+def schedule_payload(mock_user_details, mock_user_config):
+    """A daily schedule of an autonomous workflow."""
+    return {
+        "name": "Morning post",
+        "cron": "0 8 * * *",
+        "workflow": {
+            "output_destination": "PUBLISH_X",
+            "has_user_provided_topic": False,
+            "x_content_type": "TWEET",
+            "content_length": "SHORT",
+            "user_config": mock_user_config.model_dump(),
+            "session": "test_session",
+            "user_details": mock_user_details.model_dump(),
+            "proxy": "http://proxy.example.com:8080",
+        },
+    }
+
+
+class TestSchedules:
+    """Tests for /schedules endpoints."""
+
+    def test_create_schedule(self, client, store, schedule_payload):
+        """Test that a schedule is stored as autonomous with its session encrypted, and returned without it."""
+        response = client.post("/schedules", json={
+            **schedule_payload, "workflow": {**schedule_payload["workflow"], "is_autonomous_mode": False}
+        })
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["enabled"] is True
+        assert data["workflow"]["is_autonomous_mode"] is True
+        assert "session" not in data["workflow"] and "encrypted_session" not in data["workflow"]
+        stored = store.get(data["schedule_id"])["payload"]
+        assert "session" not in stored
+        assert "test_session" not in stored["encrypted_session"]
+
+    def test_session_requires_a_stable_key(self, client, store, schedule_payload, mocker):
+        """Test that a session is not scheduled when it could not be decrypted after a restart."""
+        mocker.patch("backend.app.main.login_session_store", session_store())
+
+        response = client.post("/schedules", json=schedule_payload)
+
+        assert response.status_code == 400
+        assert store.list() == []
+
+    def test_invalid_cron_expression(self, client, store, schedule_payload):
+        """Test that an invalid cron expression is rejected."""
+        response = client.post("/schedules", json={**schedule_payload, "cron": "every morning"})
+
+        assert response.status_code == 400
+        assert store.list() == []
+
+    def test_list_schedules(self, client, store, schedule_payload):
+        """Test that every schedule is listed."""
+        client.post("/schedules", json=schedule_payload)
+        client.post("/schedules", json={**schedule_payload, "name": "Evening post", "cron": "0 20 * * *"})
+
+        response = client.get("/schedules")
+
+        assert response.status_code == 200
+        assert sorted(schedule["name"] for schedule in response.json()) == ["Evening post", "Morning post"]
+
+    def test_pause_schedule(self, client, store, schedule_payload):
+        """Test that a schedule can be paused."""
+        schedule_id = client.post("/schedules", json=schedule_payload).json()["schedule_id"]
+
+        response = client.patch(f"/schedules/{schedule_id}", json={"enabled": False})
+
+        assert response.status_code == 200
+        assert response.json()["enabled"] is False
+        assert store.list(enabled_only=True) == []
+
+    def test_delete_schedule(self, client, store, schedule_payload):
+        """Test that a deleted schedule is gone."""
+        schedule_id = client.post("/schedules", json=schedule_payload).json()["schedule_id"]
+
+        assert client.delete(f"/schedules/{schedule_id}").status_code == 200
+        assert client.delete(f"/schedules/{schedule_id}").status_code == 404
+        assert client.patch(f"/schedules/{schedule_id}", json={"enabled": True}).status_code == 404
+
+    async def test_scheduled_workflow_is_autonomous(self, client, store, schedule_payload, mocker):
+        """Test that scheduled runs start autonomous workflows with the decrypted session."""
+        from backend.app.main import launch_scheduled_workflow
+        launch = mocker.patch("backend.app.main.launch_workflow", return_value=("thread", {}))
+        schedule_id = client.post("/schedules", json=schedule_payload).json()["schedule_id"]
+
+        thread_id = await launch_scheduled_workflow(store.get(schedule_id)["payload"])
+
+        assert thread_id == "thread"
+        started = launch.call_args.args[0]
+        assert started.is_autonomous_mode is True
+        assert started.session == "test_session"
+
+    async def test_session_encrypted_with_another_key(self, client, store, schedule_payload, mocker):
+        """Test that a session encrypted with a former key fails the run instead of starting it without a session."""
+        from backend.app.main import launch_scheduled_workflow
+        launch = mocker.patch("backend.app.main.launch_workflow")
+        schedule_id = client.post("/schedules", json=schedule_payload).json()["schedule_id"]
+        mocker.patch("backend.app.main.login_session_store", session_store(Fernet.generate_key().decode()))
+
+        with pytest.raises(ValueError):
+            await launch_scheduled_workflow(store.get(schedule_id)["payload"])
+        launch.assert_not_called()
@@ -9,8 +9,8 @@ class TestStartWorkflow:
 
     def test_start_workflow_with_valid_payload(self, client, mocker, mock_user_details, mock_user_config):
         """Test starting workflow with valid payload."""
-        mocker.patch("backend.app.main.graph.update_state")
-        mock_get_state = mocker.patch("backend.app.main.graph.get_state")
+        mocker.patch("backend.app.main.graph.aupdate_state")
+        mock_get_state = mocker.patch("backend.app.main.graph.aget_state")
         mock_state = MagicMock()
         mock_state.values = {"is_autonomous_mode": False}
         mock_get_state.return_value = mock_state
@@ -43,10 +43,39 @@ class TestStartWorkflow:
         stop_response = client.post("/workflow/stop", json={"thread_id": data["thread_id"]})
         assert stop_response.status_code == 200
 
+    def test_start_workflow_runs_in_background(self, client, mocker, mock_user_details, mock_user_config):
+        """Test that starting a workflow submits its first run to the engine."""
+        from backend.app.agents.engine import workflow_engine
+        mocker.patch("backend.app.main.graph.aupdate_state")
+
+        payload = {
+            "is_autonomous_mode": True,
+            "output_destination": "DOWNLOAD",
+            "has_user_provided_topic": False,
+            "user_provided_topic": None,
+            "x_content_type": "TWEET",
+            "content_length": "SHORT",
+            "brand_voice": "professional",
+            "target_audience": "developers",
+            "user_config": mock_user_config.model_dump(),
+            "session": "test_session",
+            "user_details": mock_user_details.model_dump(),
+            "proxy": None
+        }
+
+        response = client.post("/workflow/start", json=payload)
+
+        assert response.status_code == 200
+        workflow_engine.submit.assert_called_once_with(response.json()["thread_id"])
+
+        # Stop the workflow to clean up resources
+        stop_response = client.post("/workflow/stop", json={"thread_id": response.json()["thread_id"]})
+        assert stop_response.status_code == 200
+
     def test_start_workflow_creates_unique_thread_id(self, client, mocker, mock_user_details, mock_user_config):
         """Test that each workflow gets a unique thread_id."""
-        mocker.patch("backend.app.main.graph.update_state")
-        mock_get_state = mocker.patch("backend.app.main.graph.get_state")
+        mocker.patch("backend.app.main.graph.aupdate_state")
+        mock_get_state = mocker.patch("backend.app.main.graph.aget_state")
         mock_state = MagicMock()
         mock_state.values = {"is_autonomous_mode": True}
         mock_get_state.return_value = mock_state
@@ -88,8 +117,8 @@ class TestStartWorkflow:
 
     def test_start_workflow_initializes_state_correctly(self, client, mocker, mock_user_details, mock_user_config):
         """Test that workflow initializes state with correct default values."""
-        mocker.patch("backend.app.main.graph.update_state")
-        mock_get_state = mocker.patch("backend.app.main.graph.get_state")
+        mocker.patch("backend.app.main.graph.aupdate_state")
+        mock_get_state = mocker.patch("backend.app.main.graph.aget_state")
         mock_state = MagicMock()
         mock_state.values = {"is_autonomous_mode": False}
         mock_get_state.return_value = mock_state
@@ -130,8 +159,8 @@ class TestStartWorkflow:
 
     def test_start_workflow_with_user_provided_topic(self, client, mocker, mock_user_details, mock_user_config):
         """Test workflow start with user-provided topic."""
-        mocker.patch("backend.app.main.graph.update_state")
-        mock_get_state = mocker.patch("backend.app.main.graph.get_state")
+        mocker.patch("backend.app.main.graph.aupdate_state")
+        mock_get_state = mocker.patch("backend.app.main.graph.aget_state")
         mock_state = MagicMock()
         mock_state.values = {"is_autonomous_mode": False}
         mock_get_state.return_value = mock_state
@@ -164,7 +193,7 @@ class TestStartWorkflow:
 
     def test_start_workflow_handles_error(self, client, mocker, mock_user_details, mock_user_config):
         """Test workflow start handles errors gracefully."""
-        mock_update = mocker.patch("backend.app.main.graph.update_state")
+        mock_update = mocker.patch("backend.app.main.graph.aupdate_state")
         mock_update.side_effect = Exception("Graph update failed")
         
         payload = {
@@ -190,6 +219,99 @@ class TestStartWorkflow:
         assert "Graph update failed" in data["detail"]
 
 
+class TestBatchWorkflow:
+    """Tests for /workflow/batch endpoint."""
+
+    @staticmethod
+    def batch_item(topic, mock_user_details, mock_user_config):
+        """The start payload of an autonomous workflow on a given topic."""
+        return {
+            "output_destination": "DOWNLOAD",
+            "has_user_provided_topic": True,
+            "user_provided_topic": topic,
+            "x_content_type": "TWEET",
+            "content_length": "SHORT",
+            "brand_voice": "professional",
+            "target_audience": "developers",
+            "user_config": mock_user_config.model_dump(),
+            "session": "test_session",
+            "user_details": mock_user_details.model_dump(),
+        }
+
+    def test_batch_streams_the_results(self, client, mocker, mock_user_details, mock_user_config):
+        """Test that a batch runs autonomous workflows and streams their results, a failure ending its item only."""
+        import asyncio
+        import json
+        from backend.app.agents.engine import workflow_engine
+        from backend.app.utils.event_broker import event_broker
+
+        mocker.patch("backend.app.main.add_file_handler")
+        mocker.patch("backend.app.main.metrics_manager.start_workflow")
+        started = []
+
+        def update_state(config, values):
+            if values["user_provided_topic"] == "broken":
+                raise RuntimeError("checkpoint unavailable")
+            started.append(values)
+
+        mocker.patch("backend.app.main.graph.aupdate_state", side_effect=update_state)
+        mock_state = MagicMock()
+        mock_state.values = {"final_content": "a post"}
+        mocker.patch("backend.app.agents.batch.graph.aget_state", return_value=mock_state)
+        # Runs end on the next turn of the event loop
+        workflow_engine.submit.side_effect = lambda thread_id: asyncio.get_running_loop().call_soon(
+            event_broker.close, thread_id
+        )
+
+        items = [self.batch_item(topic, mock_user_details, mock_user_config) for topic in ("Python", "broken", "AI")]
+        response = client.post("/workflow/batch", json={"items": items, "max_concurrency": 2})
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        updates = [json.loads(line) for line in response.text.splitlines()]
+        summary = updates[-1]
+        assert summary["event"] == "batch_finished"
+        assert (summary["completed"], summary["failed"]) == (2, 1)
+        assert summary["results"][1]["error"] == "checkpoint unavailable"
+        assert summary["results"][2]["final_content"] == "a post"
+        assert all(values["is_autonomous_mode"] for values in started)
+
+    def test_batch_forces_autonomous_mode(self, client, mocker, mock_user_details, mock_user_config):
+        """Test that items asking for human validations are run autonomously anyway."""
+        from backend.app.agents.engine import workflow_engine
+        from backend.app.utils.event_broker import event_broker
+        import asyncio
+
+        mocker.patch("backend.app.main.add_file_handler")
+        mocker.patch("backend.app.main.metrics_manager.start_workflow")
+        update_state = mocker.patch("backend.app.main.graph.aupdate_state")
+        mocker.patch("backend.app.agents.batch.graph.aget_state", return_value=None)
+        workflow_engine.submit.side_effect = lambda thread_id: asyncio.get_running_loop().call_soon(
+            event_broker.close, thread_id
+        )
+
+        item = {**self.batch_item("Python", mock_user_details, mock_user_config), "is_autonomous_mode": False}
+        response = client.post("/workflow/batch", json={"items": [item]})
+
+        assert response.status_code == 200
+        assert update_state.call_args.args[1]["is_autonomous_mode"] is True
+
+    def test_empty_batch(self, client):
+        """Test that a batch without workflows is rejected."""
+        response = client.post("/workflow/batch", json={"items": []})
+
+        assert response.status_code == 400
+
+    def test_batch_too_large(self, client, mocker, mock_user_details, mock_user_config):
+        """Test that a batch over BATCH_MAX_ITEMS is rejected."""
+        mocker.patch("backend.app.main.settings.BATCH_MAX_ITEMS", 1)
+        item = self.batch_item("Python", mock_user_details, mock_user_config)
+
+        response = client.post("/workflow/batch", json={"items": [item, item]})
+
+        assert response.status_code == 400
+
+
 class TestValidateStep:
     """Tests for /workflow/validate endpoint."""
 
@@ -202,10 +324,10 @@ class TestValidateStep:
             "trending_topics": [t.model_dump() for t in mock_trends]
         }
         
-        mock_get_state = mocker.patch("backend.app.main.graph.get_state")
+        mock_get_state = mocker.patch("backend.app.main.graph.aget_state")
         # mock_get_state.return_value = mock_state
         
-        mock_update = mocker.patch("backend.app.main.graph.update_state")
+        mock_update = mocker.patch("backend.app.main.graph.aupdate_state")
         
         # Mock the updated state after validation
         updated_mock_state = MagicMock()
@@ -247,10 +369,10 @@ class TestValidateStep:
             "final_image_prompts": ["prompt 1"]
         }
         
-        mock_get_state = mocker.patch("backend.app.main.graph.get_state")
+        mock_get_state = mocker.patch("backend.app.main.graph.aget_state")
         mock_get_state.return_value = mock_state
         
-        mock_update = mocker.patch("backend.app.main.graph.update_state")
+        mock_update = mocker.patch("backend.app.main.graph.aupdate_state")
 
         payload = {
             "thread_id": "test-thread-456",
@@ -264,6 +386,27 @@ class TestValidateStep:
         
         assert response.status_code == 200
 
+    def test_validate_resumes_the_workflow(self, client, mocker):
+        """Test that a validation submits the next run of the workflow to the engine."""
+        from backend.app.agents.engine import workflow_engine
+        mock_state = MagicMock()
+        mock_state.values = {"next_human_input_step": "await_content_validation"}
+        mocker.patch("backend.app.main.graph.aget_state", return_value=mock_state)
+        mocker.patch("backend.app.main.graph.aupdate_state")
+
+        payload = {
+            "thread_id": "test-thread-resume",
+            "validation_result": {
+                "action": "approve",
+                "data": None
+            }
+        }
+
+        response = client.post("/workflow/validate", json=payload)
+
+        assert response.status_code == 200
+        workflow_engine.submit.assert_called_once_with("test-thread-resume")
+
     def test_validate_content_with_edits(self, client, mocker):
         """Test validation with edits to content."""
         mock_state = MagicMock()
@@ -273,10 +416,10 @@ class TestValidateStep:
             "final_image_prompts": ["prompt 1"]
         }
         
-        mock_get_state = mocker.patch("backend.app.main.graph.get_state")
+        mock_get_state = mocker.patch("backend.app.main.graph.aget_state")
         mock_get_state.return_value = mock_state
         
-        mock_update = mocker.patch("backend.app.main.graph.update_state")
+        mock_update = mocker.patch("backend.app.main.graph.aupdate_state")
 
         new_content = "Edited content that is better"
         payload = {
@@ -307,10 +450,10 @@ class TestValidateStep:
             "final_content": "Draft content"
         }
         
-        mock_get_state = mocker.patch("backend.app.main.graph.get_state")
+        mock_get_state = mocker.patch("backend.app.main.graph.aget_state")
         mock_get_state.return_value = mock_state
         
-        mock_update = mocker.patch("backend.app.main.graph.update_state")
+        mock_update = mocker.patch("backend.app.main.graph.aupdate_state")
 
         payload = {
             "thread_id": "test-thread-reject",
@@ -328,7 +471,7 @@ class TestValidateStep:
 
     def test_validate_when_thread_not_found(self, client, mocker):
         """Test validation when thread doesn't exist."""
-        mock_get_state = mocker.patch("backend.app.main.graph.get_state")
+        mock_get_state = mocker.patch("backend.app.main.graph.aget_state")
         mock_get_state.return_value = None
 
         payload = {
@@ -353,7 +496,7 @@ class TestValidateStep:
             "next_human_input_step": None,  # No human input awaited
         }
         
-        mock_get_state = mocker.patch("backend.app.main.graph.get_state")
+        mock_get_state = mocker.patch("backend.app.main.graph.aget_state")
         mock_get_state.return_value = mock_state
 
         payload = {
@@ -371,9 +514,32 @@ class TestValidateStep:
         assert "detail" in data
         assert "no human input" in data["detail"].lower()
 
+    def test_validate_when_thread_is_busy(self, client, mocker):
+        """Test validation while another worker holds the workflow."""
+        from backend.app.main import graph
+        mocker.patch("backend.app.utils.checkpointer.settings.THREAD_LEASE_WAIT_SECONDS", 0)
+        mock_get_state = mocker.patch("backend.app.main.graph.aget_state")
+        graph.checkpointer.acquire_lease("test-thread-busy", "another-worker", 60)
+
+        payload = {
+            "thread_id": "test-thread-busy",
+            "validation_result": {
+                "action": "approve",
+                "data": None
+            }
+        }
+
+        try:
+            response = client.post("/workflow/validate", json=payload)
+        finally:
+            graph.checkpointer.release_lease("test-thread-busy", "another-worker")
+
+        assert response.status_code == 409
+        mock_get_state.assert_not_called()
+
     def test_validate_handles_exception(self, client, mocker):
         """Test validation endpoint handles exceptions."""
-        mock_get_state = mocker.patch("backend.app.main.graph.get_state")
+        mock_get_state = mocker.patch("backend.app.main.graph.aget_state")
         mock_get_state.side_effect = Exception("Database error")
 
         payload = {
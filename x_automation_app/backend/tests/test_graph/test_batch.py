@@ -0,0 +1,108 @@
+"""Tests for the batches of autonomous workflows."""
+import asyncio
+import pytest
+from unittest.mock import MagicMock
+from backend.app.agents import batch
+from backend.app.agents.batch import run_batch, item_result
+from backend.app.utils.event_broker import EventBroker
+
+
+def collect(updates):
+    """Runs a batch to the end and returns its updates."""
+    async def consume():
+        return [update async for update in updates]
+    return asyncio.run(consume())
+
+
+@pytest.fixture
+def final_states(mocker):
+    """Final workflow states by thread ID, returned by the patched graph."""
+    states = {}
+
+    async def aget_state(config):
+        state = MagicMock()
+        state.values = states.get(config["configurable"]["thread_id"], {})
+        return state
+
+    mocker.patch.object(batch.graph, "aget_state", side_effect=aget_state)
+    return states
+
+
+class FakeLaunch:
+    """Starts fake workflows ending on the next turn of the event loop, and records how many run at once."""
+
+    def __init__(self, broker, final_states, errors=None, fail_on=()):
+        self.broker = broker
+        self.final_states = final_states
+        self.errors = errors or {}
+        self.fail_on = fail_on
+        self.running = 0
+        self.max_running = 0
+
+    async def __call__(self, item):
+        if item in self.fail_on:
+            raise RuntimeError(f"could not start {item}")
+        thread_id = f"thread-{item}"
+        self.final_states[thread_id] = {"user_provided_topic": item, "final_content": f"post about {item}"}
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        asyncio.get_running_loop().call_later(0.01, self.finish, thread_id)
+        return thread_id, {}
+
+    def finish(self, thread_id):
+        self.running -= 1
+        self.broker.close(thread_id, error=self.errors.get(thread_id))
+
+
+class TestRunBatch:
+    """Tests for run_batch function."""
+
+    def test_every_item_is_run(self, final_states):
+        """Test that a batch runs every item and reports their results in order."""
+        broker = EventBroker()
+        launch = FakeLaunch(broker, final_states)
+
+        updates = collect(run_batch(["Python", "AI", "FastAPI"], launch, max_concurrency=3, broker=broker))
+
+        summary = updates[-1]
+        assert summary["event"] == "batch_finished"
+        assert (summary["total"], summary["completed"], summary["failed"]) == (3, 3, 0)
+        assert [result["topic"] for result in summary["results"]] == ["Python", "AI", "FastAPI"]
+        assert summary["results"][1]["final_content"] == "post about AI"
+        assert sum(update["event"] == "item_started" for update in updates) == 3
+
+    def test_concurrency_is_bounded(self, final_states):
+        """Test that no more than max_concurrency workflows run at once."""
+        broker = EventBroker()
+        launch = FakeLaunch(broker, final_states)
+
+        collect(run_batch([f"topic {i}" for i in range(6)], launch, max_concurrency=2, broker=broker))
+
+        assert launch.max_running == 2
+
+    def test_failures_are_isolated(self, final_states):
+        """Test that a failed run or launch fails its item only."""
+        broker = EventBroker()
+        launch = FakeLaunch(broker, final_states, errors={"thread-AI": "LLM unavailable"}, fail_on=("FastAPI",))
+
+        updates = collect(run_batch(["Python", "AI", "FastAPI"], launch, max_concurrency=2, broker=broker))
+
+        results = updates[-1]["results"]
+        assert [result["status"] for result in results] == ["completed", "failed", "failed"]
+        assert results[1]["error"] == "LLM unavailable"
+        assert results[2]["error"] == "could not start FastAPI"
+        assert results[2]["thread_id"] is None
+        finished = [update for update in updates if update["event"] == "item_finished"]
+        assert finished[-1]["progress"] == {"finished": 3, "failed": 2, "total": 3}
+
+
+class TestItemResult:
+    """Tests for item_result function."""
+
+    def test_error_in_state_fails_the_item(self):
+        """Test that an error recorded in the final state fails the item."""
+        result = item_result(0, "thread", {"selected_topic": {"name": "AI"}, "error_message": "no tweets"}, None)
+
+        assert result["status"] == "failed"
+        assert result["error"] == "no tweets"
+        assert result["topic"] == "AI"
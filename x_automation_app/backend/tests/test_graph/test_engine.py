@@ -0,0 +1,247 @@
+"""Tests for the workflow execution engine."""
+import asyncio
+from typing import Optional, TypedDict
+import pytest
+from langgraph.graph import StateGraph, START, END
+from backend.app.agents import engine as engine_module
+from backend.app.agents.engine import WorkflowEngine
+from backend.app.utils.checkpointer import BoundedMemorySaver, SqliteCheckpointSaver
+from backend.app.utils.event_broker import EventBroker
+
+
+class DraftState(TypedDict):
+    """A small state with a human validation step."""
+    content: Optional[str]
+    next_human_input_step: Optional[str]
+
+
+def build_graph(writer=None, checkpointer=None):
+    """Builds a writer -> validation -> publication graph, interrupted after the validation node."""
+    async def default_writer(state):
+        return {"content": "draft"}
+
+    builder = StateGraph(DraftState)
+    builder.add_node("writer", writer or default_writer)
+    builder.add_node("await_content_validation", lambda state: {"next_human_input_step": "await_content_validation"})
+    builder.add_node("publicator", lambda state: {"content": f"{state['content']} published"})
+    builder.add_edge(START, "writer")
+    builder.add_edge("writer", "await_content_validation")
+    builder.add_edge("await_content_validation", "publicator")
+    builder.add_edge("publicator", END)
+    return builder.compile(checkpointer=checkpointer or BoundedMemorySaver(), interrupt_after=["await_content_validation"])
+
+
+def start(graph, thread_id):
+    """Saves the initial state of a thread."""
+    graph.update_state({"configurable": {"thread_id": thread_id}}, {"content": None, "next_human_input_step": None})
+
+
+async def collect(queue):
+    """Reads the events of a run until its end."""
+    texts = []
+    while not (event := await queue.get()).end:
+        texts.append(event.text)
+    return texts, event
+
+
+@pytest.fixture(autouse=True)
+def no_side_effects(mocker):
+    """Keeps runs from touching the global metrics and log handlers."""
+    mocker.patch.object(engine_module, "metrics_manager")
+    mocker.patch.object(engine_module, "remove_file_handler")
+    mocker.patch.object(engine_module, "resolve_image_urls", side_effect=lambda values: values)
+
+
+class TestWorkflowEngine:
+    """Tests for WorkflowEngine class."""
+
+    async def test_runs_until_the_human_validation(self):
+        """Test that a submitted run publishes its events and final state, then stops at the interrupt."""
+        graph, broker = build_graph(), EventBroker()
+        engine = WorkflowEngine(graph, broker, max_concurrency=2)
+        start(graph, "t1")
+
+        with broker.subscription("t1") as queue:
+            assert engine.submit("t1")
+            assert not engine.submit("t1")
+            texts, end = await collect(queue)
+
+        assert end.error is None
+        assert any('"writer"' in text for text in texts)
+        assert '"next_human_input_step": "await_content_validation"' in texts[-1]
+        assert not engine.is_running("t1")
+        assert not await engine.resume("t1")
+
+    async def test_resumes_after_validation(self):
+        """Test that a validated thread resumes to the end of the graph."""
+        graph, broker = build_graph(), EventBroker()
+        engine = WorkflowEngine(graph, broker, max_concurrency=2)
+        start(graph, "t1")
+        with broker.subscription("t1") as queue:
+            engine.submit("t1")
+            await collect(queue)
+
+            graph.update_state({"configurable": {"thread_id": "t1"}}, {"next_human_input_step": None})
+            assert await engine.resume("t1")
+            texts, _ = await collect(queue)
+
+        assert '"content": "draft published"' in texts[-1]
+        assert not graph.get_state({"configurable": {"thread_id": "t1"}}).next
+
+    async def test_speculates_while_the_validation_is_pending(self, mocker):
+        """Test that an interrupted run starts speculating, and a finished one discards the speculation."""
+        speculate = mocker.patch.object(engine_module, "speculate")
+        manager = mocker.patch.object(engine_module, "speculation_manager")
+        graph, broker = build_graph(), EventBroker()
+        engine = WorkflowEngine(graph, broker, max_concurrency=1)
+        start(graph, "t1")
+        with broker.subscription("t1") as queue:
+            engine.submit("t1")
+            await collect(queue)
+
+            speculate.assert_called_once()
+            assert speculate.call_args.args[1]["next_human_input_step"] == "await_content_validation"
+
+            graph.update_state({"configurable": {"thread_id": "t1"}}, {"next_human_input_step": None})
+            await engine.resume("t1")
+            await collect(queue)
+
+        manager.discard.assert_called_once_with("t1")
+
+    async def test_concurrency_is_bounded(self):
+        """Test that runs beyond the concurrency limit wait for a free slot."""
+        release = asyncio.Event()
+        running = []
+
+        async def writer(state):
+            running.append(1)
+            await release.wait()
+            return {"content": "draft"}
+
+        graph, broker = build_graph(writer), EventBroker()
+        engine = WorkflowEngine(graph, broker, max_concurrency=1)
+        for thread_id in ("t1", "t2"):
+            start(graph, thread_id)
+
+        with broker.subscription("t1") as first, broker.subscription("t2") as second:
+            engine.submit("t1")
+            engine.submit("t2")
+            await asyncio.sleep(0.2)
+            assert len(running) == 1 and engine.is_running("t2")
+
+            release.set()
+            await collect(first)
+            await collect(second)
+        assert len(running) == 2
+
+    async def test_cancel(self):
+        """Test that a cancelled run ends for its subscribers and keeps its checkpoint."""
+        async def writer(state):
+            await asyncio.sleep(60)
+
+        graph, broker = build_graph(writer), EventBroker()
+        engine = WorkflowEngine(graph, broker, max_concurrency=1)
+        start(graph, "t1")
+
+        with broker.subscription("t1") as queue:
+            engine.submit("t1")
+            await asyncio.sleep(0.1)
+            await engine.cancel("t1")
+            _, end = await collect(queue)
+
+        assert end.error is None
+        assert not engine.is_running("t1")
+        assert graph.get_state({"configurable": {"thread_id": "t1"}}).next == ("writer",)
+
+    async def test_failed_run(self):
+        """Test that a failing run reports its error to subscribers."""
+        async def writer(state):
+            raise RuntimeError("model unavailable")
+
+        graph, broker = build_graph(writer), EventBroker()
+        engine = WorkflowEngine(graph, broker, max_concurrency=1)
+        start(graph, "t1")
+
+        with broker.subscription("t1") as queue:
+            engine.submit("t1")
+            _, end = await collect(queue)
+
+        assert "model unavailable" in end.error and not end.busy
+
+    async def test_thread_run_by_another_worker(self, mocker):
+        """Test that a thread leased by another worker is reported as busy."""
+        mocker.patch("backend.app.utils.checkpointer.settings.THREAD_LEASE_WAIT_SECONDS", 0)
+        graph, broker = build_graph(), EventBroker()
+        engine = WorkflowEngine(graph, broker, max_concurrency=1)
+        start(graph, "t1")
+        graph.checkpointer.acquire_lease("t1", "another-worker", 60)
+
+        with broker.subscription("t1") as queue:
+            engine.submit("t1")
+            _, end = await collect(queue)
+
+        assert end.busy
+        assert graph.get_state({"configurable": {"thread_id": "t1"}}).next == ("writer",)
+
+    async def test_waiting_worker_does_not_skip_the_validation(self, tmp_path, mocker):
+        """Test that a worker getting the lease after another ran the thread to its validation does not run it on."""
+        mocker.patch("backend.app.utils.checkpointer.settings.THREAD_LEASE_WAIT_SECONDS", 10)
+        release = asyncio.Event()
+
+        async def slow_writer(state):
+            await release.wait()
+            return {"content": "draft"}
+
+        path = str(tmp_path / "checkpoints.sqlite")
+        first_graph = build_graph(slow_writer, SqliteCheckpointSaver(path))
+        second_graph = build_graph(checkpointer=SqliteCheckpointSaver(path))
+        first_broker, second_broker = EventBroker(), EventBroker()
+        first = WorkflowEngine(first_graph, first_broker, max_concurrency=1)
+        second = WorkflowEngine(second_graph, second_broker, max_concurrency=1)
+        start(first_graph, "t1")
+        first_graph.checkpointer.flush()
+
+        with first_broker.subscription("t1") as first_queue, second_broker.subscription("t1") as second_queue:
+            first.submit("t1")
+            await asyncio.sleep(0.2)
+            second.submit("t1")
+            await asyncio.sleep(0.2)
+            release.set()
+            await collect(first_queue)
+            texts, end = await collect(second_queue)
+
+        assert end.error is None
+        assert not any('"publicator"' in text for text in texts)
+        assert '"next_human_input_step": "await_content_validation"' in texts[-1]
+        state = second_graph.get_state({"configurable": {"thread_id": "t1"}})
+        assert state.next == ("publicator",) and state.values["content"] == "draft"
+
+    async def test_follows_a_run_of_another_worker(self, tmp_path):
+        """Test that the checkpoints of a run leased by another worker are relayed until it releases the thread."""
+        release = asyncio.Event()
+
+        async def slow_writer(state):
+            await release.wait()
+            return {"content": "draft"}
+
+        path = str(tmp_path / "checkpoints.sqlite")
+        first_graph = build_graph(slow_writer, SqliteCheckpointSaver(path, flush_interval=0.05))
+        second_graph = build_graph(checkpointer=SqliteCheckpointSaver(path))
+        first = WorkflowEngine(first_graph, EventBroker(), max_concurrency=1)
+        second = WorkflowEngine(second_graph, EventBroker(), max_concurrency=1)
+        start(first_graph, "t1")
+        first.submit("t1")
+        await asyncio.sleep(0.2)
+
+        async def follow():
+            return [values async for values in second.follow("t1", interval=0.05)]
+
+        following = asyncio.create_task(follow())
+        await asyncio.sleep(0.2)
+        assert not following.done()
+        release.set()
+        states = await asyncio.wait_for(following, 5)
+
+        assert states[0]["content"] is None
+        assert states[-1] == {"content": "draft", "next_human_input_step": "await_content_validation"}
+        assert not await second.resume("t1")
@@ -0,0 +1,229 @@
+"""Tests for the image generator node."""
+import threading
+import time
+import pytest
+from backend.app.agents import image_generator
+from backend.app.agents.image_generator import image_generator_node, image_file_name
+from backend.app.utils.schemas import GeneratedImage
+
+
+def fake_image(prompt, image_name):
+    """Builds the output of a successful generate_and_upload_image call."""
+    return GeneratedImage(
+        is_generated=True,
+        image_name=image_name,
+        local_file_path=f"/tmp/{image_name}",
+        s3_url=f"https://bucket.s3.amazonaws.com/images/{image_name}",
+        prompt=prompt
+    )
+
+
+@pytest.fixture
+def mock_tool(mocker):
+    """Replaces the image generation tool with a fast fake."""
+    tool = mocker.patch.object(image_generator, "generate_and_upload_image")
+    tool.invoke.side_effect = lambda args: fake_image(**args)
+    return tool
+
+
+class TestImageFileName:
+    """Tests for image_file_name function."""
+
+    def test_name_is_deterministic(self):
+        """Test that the same prompt always gives the same name."""
+        assert image_file_name("A dog on a swing") == image_file_name("A dog on a swing")
+        assert image_file_name("A dog on a swing") != image_file_name("A cat on a swing")
+
+    def test_name_is_a_short_slug(self):
+        """Test that names are file-system friendly."""
+        name = image_file_name("A futuristic city, at night! With neon lights & flying cars everywhere")
+        assert name.startswith("a_futuristic_city_at_night_with_")
+        assert name.endswith(".jpeg")
+        assert " " not in name
+
+    def test_variant_changes_name(self):
+        """Test that another image of the same prompt gets another name."""
+        assert image_file_name("A dog", variant="a_dog_1.jpeg") != image_file_name("A dog")
+
+
+class TestImageGeneratorNode:
+    """Tests for image_generator_node."""
+
+    def test_direct_mode_keeps_prompt_order(self, initial_state, mock_tool):
+        """Test that every prompt gets an image, in prompt order."""
+        state = initial_state.copy()
+        state["final_image_prompts"] = ["first prompt", "second prompt", "third prompt"]
+
+        result = image_generator_node(state)
+
+        names = [image.image_name for image in result["generated_images"]]
+        assert names == [image_file_name(p) for p in state["final_image_prompts"]]
+        assert mock_tool.invoke.call_count == 3
+
+    def test_direct_mode_runs_concurrently(self, initial_state, mock_tool, mocker):
+        """Test that images are generated in parallel, within the concurrency limit."""
+        mocker.patch.object(image_generator.settings, "IMAGE_GENERATION_CONCURRENCY", 2)
+        in_flight, peak, lock = [0], [0], threading.Lock()
+
+        def slow_generation(args):
+            with lock:
+                in_flight[0] += 1
+                peak[0] = max(peak[0], in_flight[0])
+            time.sleep(0.05)
+            with lock:
+                in_flight[0] -= 1
+            return fake_image(**args)
+
+        mock_tool.invoke.side_effect = slow_generation
+        state = initial_state.copy()
+        state["final_image_prompts"] = [f"prompt {i}" for i in range(4)]
+
+        result = image_generator_node(state)
+
+        assert len(result["generated_images"]) == 4
+        assert peak[0] == 2
+
+    def test_direct_mode_skips_failed_images(self, initial_state, mock_tool):
+        """Test that failed generations are left out of the output."""
+        mock_tool.invoke.side_effect = lambda args: None if args["prompt"] == "bad" else fake_image(**args)
+        state = initial_state.copy()
+        state["final_image_prompts"] = ["good", "bad"]
+
+        result = image_generator_node(state)
+
+        assert [image.image_name for image in result["generated_images"]] == [image_file_name("good")]
+
+    def test_feedback_uses_agent(self, initial_state, mock_tool, mocker):
+        """Test that feedback on rejected images goes through the prompt-rewriting agent."""
+        agent = mocker.patch.object(image_generator, "generate_images_with_agent", return_value=[])
+        state = initial_state.copy()
+        state["final_image_prompts"] = ["a prompt"]
+        state["validation_result"] = {"action": "reject", "data": {"feedback": "Make it brighter"}}
+
+        image_generator_node(state)
+
+        agent.assert_called_once_with(["a prompt"], "Make it brighter")
+        mock_tool.invoke.assert_not_called()
+
+    def test_no_prompts(self, initial_state, mock_tool):
+        """Test that no prompts means no images."""
+        assert image_generator_node(initial_state) == {"generated_images": []}
+
+
+class TestSelectiveRegeneration:
+    """Tests for the regeneration of the images marked for change only."""
+
+    @pytest.fixture
+    def rejected_state(self, initial_state):
+        """A state with three images, two of them marked for change."""
+        prompts = ["first prompt", "second prompt", "third prompt"]
+        state = initial_state.copy()
+        state["final_image_prompts"] = prompts
+        state["generated_images"] = [fake_image(p, image_file_name(p)) for p in prompts]
+        state["validation_result"] = {
+            "action": "reject",
+            "validated_step": "await_image_validation",
+            "data": {"image_decisions": [
+                {"image_name": image_file_name("first prompt"), "action": "keep"},
+                {"image_name": image_file_name("second prompt"), "action": "regenerate"},
+                {"image_name": image_file_name("third prompt"), "action": "edit_prompt", "prompt": "new third prompt"},
+            ]}
+        }
+        return state
+
+    def test_only_changed_images_are_generated(self, rejected_state, mock_tool):
+        """Test that kept images are merged back unchanged, in their original order."""
+        result = image_generator_node(rejected_state)
+
+        prompts = [call.args[0]["prompt"] for call in mock_tool.invoke.call_args_list]
+        assert sorted(prompts) == ["new third prompt", "second prompt"]
+        images = result["generated_images"]
+        assert images[0] == rejected_state["generated_images"][0]
+        assert images[1].prompt == "second prompt"
+        assert images[1].image_name != rejected_state["generated_images"][1].image_name
+        assert images[2].prompt == "new third prompt"
+        assert result["final_image_prompts"] == ["first prompt", "second prompt", "new third prompt"]
+
+    def test_rejected_images_are_invalidated(self, rejected_state, mock_tool, mocker):
+        """Test that the cached copies of rejected images are dropped."""
+        invalidate = mocker.patch.object(image_generator.image_cache, "invalidate")
+
+        image_generator_node(rejected_state)
+
+        assert sorted(call.args[0] for call in invalidate.call_args_list) == ["second prompt", "third prompt"]
+
+    def test_failed_regeneration_keeps_previous_image(self, rejected_state, mock_tool):
+        """Test that an image that cannot be regenerated is kept."""
+        mock_tool.invoke.side_effect = lambda args: None
+
+        result = image_generator_node(rejected_state)
+
+        assert result["generated_images"] == rejected_state["generated_images"]
+
+    def test_agent_not_used(self, rejected_state, mock_tool, mocker):
+        """Test that per-image decisions take precedence over the prompt-rewriting agent."""
+        agent = mocker.patch.object(image_generator, "generate_images_with_agent")
+        rejected_state["validation_result"]["data"]["feedback"] = "Make them brighter"
+
+        image_generator_node(rejected_state)
+
+        agent.assert_not_called()
+
+
+class TestFeedbackEdits:
+    """Tests for image edits driven by the user's feedback."""
+
+    @pytest.fixture
+    def feedback_state(self, initial_state):
+        """A state with two images rejected with free-text feedback."""
+        prompts = ["first prompt", "second prompt"]
+        state = initial_state.copy()
+        state["final_image_prompts"] = prompts
+        state["generated_images"] = [fake_image(p, image_file_name(p)) for p in prompts]
+        state["validation_result"] = {"action": "reject", "data": {"feedback": "Make it brighter"}}
+        return state
+
+    @pytest.fixture
+    def mock_edit(self, mocker):
+        """Replaces image edits with a fast fake."""
+        return mocker.patch.object(
+            image_generator, "edit_and_upload_image",
+            side_effect=lambda image, feedback, image_name: fake_image(image.prompt, image_name)
+        )
+
+    def test_feedback_edits_every_image(self, feedback_state, mock_tool, mock_edit, mocker):
+        """Test that free-text feedback edits the previous images instead of regenerating them."""
+        agent = mocker.patch.object(image_generator, "generate_images_with_agent")
+
+        result = image_generator_node(feedback_state)
+
+        assert mock_edit.call_count == 2
+        assert {call.args[1] for call in mock_edit.call_args_list} == {"Make it brighter"}
+        assert [image.prompt for image in result["generated_images"]] == ["first prompt", "second prompt"]
+        assert result["final_image_prompts"] == ["first prompt", "second prompt"]
+        agent.assert_not_called()
+        mock_tool.invoke.assert_not_called()
+
+    def test_regenerate_mode_uses_agent(self, feedback_state, mock_tool, mock_edit, mocker):
+        """Test that the prompt-rewriting agent handles feedback in regenerate mode."""
+        mocker.patch.object(image_generator.settings, "IMAGE_FEEDBACK_MODE", "regenerate")
+        agent = mocker.patch.object(image_generator, "generate_images_with_agent", return_value=[])
+
+        image_generator_node(feedback_state)
+
+        agent.assert_called_once()
+        mock_edit.assert_not_called()
+
+    def test_edit_decision(self, feedback_state, mock_tool, mock_edit):
+        """Test that only the image with an edit decision is edited."""
+        target = feedback_state["generated_images"][1]
+        feedback_state["validation_result"]["data"] = {"image_decisions": [
+            {"image_name": target.image_name, "action": "edit", "feedback": "Add a sun"}
+        ]}
+
+        result = image_generator_node(feedback_state)
+
+        mock_edit.assert_called_once()
+        assert mock_edit.call_args.args[:2] == (target, "Add a sun")
+        assert result["generated_images"][0] == feedback_state["generated_images"][0]
+        assert result["generated_images"][1].image_name != target.image_name
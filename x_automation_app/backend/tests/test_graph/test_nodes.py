@@ -4,6 +4,8 @@ from backend.app.agents.graph import (
     await_topic_selection, await_content_validation,
     await_image_validation, auto_select_topic
 )
+from backend.app.agents.tweet_ranking import tweet_ranking_node
+from backend.app.utils.schemas import TweetSearched
 
 
 class TestAwaitTopicSelection:
@@ -113,3 +115,58 @@ class TestAutoSelectTopic:
         assert selected.rank == first_trend.rank
         assert selected.tweet_count == first_trend.tweet_count
 
+
+
+class TestTweetRankingNode:
+    """Tests for tweet_ranking_node."""
+
+    def test_tweet_ranking_node_orders_tweets(self, initial_state, mock_tweet_author):
+        """Test that the node puts the most engaging tweet first."""
+        state = initial_state.copy()
+        state["tweet_search_results"] = [
+            TweetSearched(
+                text="Quiet take", retweetCount=0, replyCount=0, likeCount=1, viewCount=0,
+                createdAt="2025-01-01T12:00:00Z", author=mock_tweet_author
+            ),
+            TweetSearched(
+                text="Viral take", retweetCount=0, replyCount=0, likeCount=9000, viewCount=0,
+                createdAt="2025-01-01T12:00:00Z", author=mock_tweet_author
+            ),
+        ]
+
+        result = tweet_ranking_node(state)
+
+        assert [t.text for t in result["tweet_search_results"]] == ["Viral take", "Quiet take"]
+
+    def test_tweet_ranking_node_without_tweets(self, initial_state):
+        """Test that the node leaves the state untouched without tweets."""
+        assert tweet_ranking_node(initial_state) == {}
+
+    def test_tweet_ranking_node_keeps_unrankable_tweets(self, initial_state, mock_tweet_author):
+        """Test that tweets are passed on as fetched when ranking keeps none of them."""
+        state = initial_state.copy()
+        state["tweet_search_results"] = [
+            TweetSearched(
+                text="https://example.com", retweetCount=0, replyCount=0, likeCount=1, viewCount=0,
+                createdAt="2025-01-01T12:00:00Z", author=mock_tweet_author
+            )
+        ]
+
+        assert tweet_ranking_node(state) == {}
+
+    def test_tweet_ranking_node_collapses_copies(self, initial_state, mock_tweet_author):
+        """Test that copies of the same tweet reach the opinion analysis once, with their count."""
+        text = "The new release finally fixes the memory leaks everyone complained about"
+        state = initial_state.copy()
+        state["tweet_search_results"] = [
+            TweetSearched(
+                text=prefix + text, retweetCount=0, replyCount=0, likeCount=1, viewCount=0,
+                createdAt="2025-01-01T12:00:00Z", author=mock_tweet_author
+            )
+            for prefix in ("", "RT @dev: ", "RT @fan: ")
+        ]
+
+        result = tweet_ranking_node(state)
+
+        assert len(result["tweet_search_results"]) == 1
+        assert result["tweet_search_results"][0].duplicateCount == 3
@@ -0,0 +1,183 @@
+"""Tests for the scheduler of recurring autonomous workflows."""
+import threading
+import time
+from datetime import datetime, timezone
+import pytest
+from unittest.mock import AsyncMock, Mock
+from backend.app.agents import scheduler as scheduler_module
+from backend.app.agents.scheduler import Scheduler, prewarm
+from backend.app.utils.cron import CronExpression
+from backend.app.utils.schedule_store import ScheduleStore
+from backend.app.utils.trends_cache import TrendsCache
+from backend.app.utils.schemas import Trend
+
+
+@pytest.fixture
+def store():
+    """A schedule store in memory."""
+    store = ScheduleStore(":memory:")
+    yield store
+    store.close()
+
+
+@pytest.fixture
+def launch():
+    """Starts fake workflows, returning their thread IDs."""
+    launch = AsyncMock()
+    launch.side_effect = lambda payload: f"thread-{launch.call_count}"
+    return launch
+
+
+def make_scheduler(store, launch, **kwargs):
+    """A scheduler without jitter nor warm-ups, unless given."""
+    options = {"jitter_seconds": 0, "misfire_grace_seconds": 300, "prewarm_lead_seconds": 0, "warm_up": Mock()}
+    scheduler = Scheduler(store, **{**options, **kwargs})
+    scheduler.launch = launch
+    return scheduler
+
+
+class TestScheduler:
+    """Tests for Scheduler class."""
+
+    async def test_due_run_is_started_once(self, store, launch):
+        """Test that a due run is started, and the schedule moved to its next run."""
+        scheduler = make_scheduler(store, launch)
+        schedule = scheduler.add("Hourly", "@hourly", {"x_content_type": "TWEET"})
+        due_at = schedule["next_run_at"]
+
+        assert await scheduler.tick(now=due_at - 1) == []
+        assert await scheduler.tick(now=due_at + 1) == ["thread-1"]
+        assert await scheduler.tick(now=due_at + 2) == []
+
+        launch.assert_awaited_once_with({"x_content_type": "TWEET"})
+        updated = store.get(schedule["schedule_id"])
+        assert updated["next_run_at"] == due_at + 3600
+        assert updated["last_thread_id"] == "thread-1"
+
+    def test_jitter_delays_runs(self, store, launch):
+        """Test that runs are delayed by up to the jitter, never run early."""
+        scheduler = make_scheduler(store, launch, jitter_seconds=30)
+        now = time.time()
+        cron_time = CronExpression("@hourly").next_after(datetime.fromtimestamp(now, timezone.utc)).timestamp()
+
+        for _ in range(20):
+            next_run_at = scheduler.next_run_at("@hourly", now)
+            assert cron_time <= next_run_at <= cron_time + 30
+
+    async def test_misfired_run_is_skipped(self, store, launch):
+        """Test that a run later than the grace period is skipped, not started."""
+        scheduler = make_scheduler(store, launch, misfire_grace_seconds=60)
+        schedule = scheduler.add("Hourly", "@hourly", {})
+        due_at = schedule["next_run_at"]
+
+        assert await scheduler.tick(now=due_at + 3 * 3600 + 600) == []
+
+        launch.assert_not_called()
+        updated = store.get(schedule["schedule_id"])
+        assert updated["next_run_at"] == due_at + 4 * 3600
+        assert "late" in updated["last_error"]
+
+    async def test_failed_launch_is_recorded(self, store):
+        """Test that a failed start is recorded and the schedule keeps its next runs."""
+        scheduler = make_scheduler(store, AsyncMock(side_effect=RuntimeError("checkpoint unavailable")))
+        schedule = scheduler.add("Hourly", "@hourly", {})
+
+        assert await scheduler.tick(now=schedule["next_run_at"] + 1) == []
+
+        updated = store.get(schedule["schedule_id"])
+        assert updated["last_error"] == "checkpoint unavailable"
+        assert updated["next_run_at"] > schedule["next_run_at"]
+
+    async def test_workers_start_each_run_once(self, store, launch):
+        """Test that schedulers sharing a store do not start the same run twice."""
+        first, second = make_scheduler(store, launch), make_scheduler(store, launch)
+        schedule = first.add("Hourly", "@hourly", {})
+
+        assert await first.tick(now=schedule["next_run_at"] + 1) == ["thread-1"]
+        assert await second.tick(now=schedule["next_run_at"] + 1) == []
+        launch.assert_called_once()
+
+    def test_resumed_schedule_skips_missed_runs(self, store, launch):
+        """Test that resuming a paused schedule moves it to its next run."""
+        scheduler = make_scheduler(store, launch)
+        schedule = scheduler.add("Hourly", "@hourly", {})
+        store.set_enabled(schedule["schedule_id"], False, next_run_at=1000.0)
+
+        resumed = scheduler.set_enabled(schedule["schedule_id"], True)
+
+        assert resumed["enabled"] is True
+        assert resumed["next_run_at"] > time.time()
+        assert scheduler.set_enabled("unknown", True) is None
+
+    async def test_store_is_used_off_the_event_loop(self, store, launch, mocker):
+        """Test that the schedules are read, claimed and recorded in worker threads."""
+        scheduler = make_scheduler(store, launch)
+        schedule = scheduler.add("Hourly", "@hourly", {})
+        threads = set()
+        for name in ("list", "claim", "record_run"):
+            method = getattr(store, name)
+            mocker.patch.object(store, name, side_effect=lambda *args, method=method, **kwargs: (
+                threads.add(threading.current_thread()), method(*args, **kwargs)
+            )[1])
+
+        assert await scheduler.tick(now=schedule["next_run_at"] + 1) == ["thread-1"]
+
+        assert threads and threading.main_thread() not in threads
+
+    async def test_upcoming_run_is_warmed_up_once(self, store, launch):
+        """Test that a run is warmed up once, within the lead time before it."""
+        warm_up = Mock()
+        scheduler = make_scheduler(store, launch, prewarm_lead_seconds=300, warm_up=warm_up)
+        schedule = scheduler.add("Hourly", "@hourly", {"has_user_provided_topic": False})
+        due_at = schedule["next_run_at"]
+
+        await scheduler.tick(now=due_at - 600)
+        await scheduler.tick(now=due_at - 200)
+        await scheduler.tick(now=due_at - 100)
+        await scheduler.stop()
+
+        warm_up.assert_called_once_with({"has_user_provided_topic": False})
+
+
+class TestPrewarm:
+    """Tests for prewarm function."""
+
+    @pytest.fixture
+    def clients(self, mocker):
+        """Replaces the SDK client getters."""
+        return [
+            mocker.patch.object(scheduler_module, name)
+            for name in ("get_genai_client", "get_openai_client", "get_s3_client")
+        ]
+
+    def test_trends_are_cached(self, clients, mocker):
+        """Test that the trends of the workflow location are put in the trends cache."""
+        cache = TrendsCache(ttl_seconds=600)
+        mocker.patch.object(scheduler_module, "trends_cache", cache)
+        fetch = mocker.patch.object(scheduler_module, "fetch_trends", return_value=[Trend(name="Python", rank=1, tweet_count="")])
+
+        prewarm({"has_user_provided_topic": False, "user_config": {"trends_woeid": 1, "trends_count": 10}})
+
+        fetch.assert_called_once_with(1, 10)
+        assert len(cache) == 1
+        clients[0].assert_called_once()
+        clients[2].assert_called_once()
+
+    def test_user_topic_skips_trends(self, clients, mocker):
+        """Test that trends are not fetched for a workflow bringing its own topic."""
+        fetch = mocker.patch.object(scheduler_module, "fetch_trends")
+
+        prewarm({"has_user_provided_topic": True, "user_provided_topic": "Python"})
+
+        fetch.assert_not_called()
+
+    def test_failed_step_does_not_stop_the_others(self, clients, mocker):
+        """Test that a failing warm-up step is reported without stopping the others."""
+        clients[0].side_effect = Exception("no credentials")
+        fetch = mocker.patch.object(scheduler_module, "fetch_trends", return_value=[])
+        mocker.patch.object(scheduler_module, "trends_cache", TrendsCache(ttl_seconds=600))
+
+        prewarm({"has_user_provided_topic": False})
+
+        clients[2].assert_called_once()
+        fetch.assert_called_once()
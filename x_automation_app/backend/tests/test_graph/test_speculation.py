@@ -0,0 +1,165 @@
+"""Tests for the speculation of workflows awaiting a human validation."""
+import threading
+import pytest
+from backend.app.agents import speculation, tweet_search, image_generator
+from backend.app.agents.speculation import speculate, settle
+from backend.app.agents.tweet_search import tweet_search_node
+from backend.app.agents.image_generator import image_generator_node
+from backend.app.utils.speculation import SpeculationManager
+from backend.app.utils.schemas import GeneratedImage
+
+
+CONFIG = {"configurable": {"thread_id": "thread"}}
+
+
+def wait_for_tasks():
+    """Gives the fake speculative tasks the time to finish."""
+    threading.Event().wait(0.05)
+
+
+@pytest.fixture
+def manager(mocker):
+    """Replaces the global speculation manager with one running two tasks at most."""
+    manager = SpeculationManager(max_concurrency=2)
+    for module in (speculation, tweet_search, image_generator):
+        mocker.patch.object(module, "speculation_manager", manager)
+    yield manager
+    manager.shutdown()
+
+
+@pytest.fixture
+def searches(mocker):
+    """Replaces the tweet search with a fake recording the searched topics."""
+    topics = []
+
+    def search(state):
+        topic = state["selected_topic"].name
+        topics.append(topic)
+        return {"tweet_search_results": [f"tweet about {topic}"]}
+
+    mocker.patch.object(speculation, "search_tweets", side_effect=search)
+    mocker.patch.object(tweet_search, "search_tweets", side_effect=search)
+    return topics
+
+
+@pytest.fixture
+def prefetches(mocker):
+    """Replaces the image prefetch with a fake recording the prompts."""
+    prompts = []
+
+    def prefetch(prompt):
+        prompts.append(prompt)
+        return True
+
+    mocker.patch.object(speculation, "prefetch_image", side_effect=prefetch)
+    return prompts
+
+
+class TestTopicSelectionSpeculation:
+    """Tests for the tweet searches run while the topic selection is pending."""
+
+    def test_top_topics_are_searched(self, initial_state, mock_trends, manager, searches, mocker):
+        """Test that tweets are searched for the top trending topics only."""
+        mocker.patch.object(speculation.settings, "SPECULATION_TOPIC_COUNT", 2)
+        state = {**initial_state, "trending_topics": mock_trends, "next_human_input_step": "await_topic_selection"}
+
+        assert speculate("thread", state) == 2
+        assert manager.pending("thread") == 2
+
+    def test_selected_topic_uses_the_speculated_search(self, initial_state, mock_trends, manager, searches, mocker):
+        """Test that the tweet searcher takes the speculated search of the selected topic."""
+        mocker.patch.object(speculation.settings, "SPECULATION_TOPIC_COUNT", 2)
+        state = {**initial_state, "trending_topics": mock_trends, "next_human_input_step": "await_topic_selection"}
+        speculate("thread", state)
+
+        selected = {
+            **state,
+            "selected_topic": mock_trends[1],
+            "validation_result": {"action": "approve", "validated_step": "await_topic_selection"},
+        }
+        assert settle("thread", selected) == 1
+        result = tweet_search_node(selected, CONFIG)
+
+        assert result == {"tweet_search_results": ["tweet about AI"]}
+        assert sorted(searches) == ["AI", "Python"]
+        assert manager.pending("thread") == 0
+
+    def test_other_topic_is_searched_again(self, initial_state, mock_trends, manager, searches):
+        """Test that a topic that was not speculated on is searched by the tweet searcher."""
+        state = {**initial_state, "trending_topics": mock_trends[:1], "next_human_input_step": "await_topic_selection"}
+        speculate("thread", state)
+
+        selected = {
+            **state,
+            "selected_topic": mock_trends[2],
+            "validation_result": {"action": "approve", "validated_step": "await_topic_selection"},
+        }
+        settle("thread", selected)
+        result = tweet_search_node(selected, CONFIG)
+
+        assert result == {"tweet_search_results": ["tweet about FastAPI"]}
+        assert manager.pending("thread") == 0
+
+    def test_disabled_speculation(self, initial_state, mock_trends, searches, mocker):
+        """Test that nothing is speculated on without a concurrency budget."""
+        mocker.patch.object(speculation, "speculation_manager", SpeculationManager(max_concurrency=0))
+        state = {**initial_state, "trending_topics": mock_trends, "next_human_input_step": "await_topic_selection"}
+
+        assert speculate("thread", state) == 0
+        assert searches == []
+
+
+class TestContentValidationSpeculation:
+    """Tests for the images generated while the content validation is pending."""
+
+    @pytest.fixture
+    def pending_state(self, initial_state):
+        """A workflow awaiting the validation of content with two image prompts."""
+        return {
+            **initial_state,
+            "final_image_prompts": ["first prompt", "second prompt"],
+            "next_human_input_step": "await_content_validation",
+        }
+
+    def test_approved_images_are_kept(self, pending_state, manager, prefetches, mocker):
+        """Test that the prefetched images stay cached and are claimed by the image generator."""
+        invalidate = mocker.patch.object(speculation.image_cache, "invalidate")
+        mocker.patch.object(image_generator, "generate_images_directly", return_value=[
+            GeneratedImage(is_generated=True, image_name="first.jpeg", local_file_path="", s3_url="", prompt="first prompt")
+        ])
+        assert speculate("thread", pending_state) == 2
+
+        approved = {**pending_state, "validation_result": {"action": "approve", "validated_step": "await_content_validation"}}
+        assert settle("thread", approved) == 0
+        image_generator_node(approved, CONFIG)
+
+        assert sorted(prefetches) == ["first prompt", "second prompt"]
+        assert manager.pending("thread") == 0
+        invalidate.assert_not_called()
+
+    def test_edited_out_prompts_are_discarded(self, pending_state, manager, prefetches, mocker):
+        """Test that the images of prompts removed by the user are dropped from the cache."""
+        invalidate = mocker.patch.object(speculation.image_cache, "invalidate")
+        speculate("thread", pending_state)
+        wait_for_tasks()
+
+        edited = {
+            **pending_state,
+            "final_image_prompts": ["first prompt"],
+            "validation_result": {"action": "edit", "validated_step": "await_content_validation"},
+        }
+        assert settle("thread", edited) == 1
+
+        invalidate.assert_called_once_with("second prompt")
+        assert manager.pending("thread") == 1
+
+    def test_rejected_content_discards_every_image(self, pending_state, manager, prefetches, mocker):
+        """Test that rejecting the content drops every prefetched image."""
+        invalidate = mocker.patch.object(speculation.image_cache, "invalidate")
+        speculate("thread", pending_state)
+        wait_for_tasks()
+
+        rejected = {**pending_state, "validation_result": {"action": "reject", "validated_step": "await_content_validation"}}
+        assert settle("thread", rejected) == 2
+
+        assert sorted(call.args[0] for call in invalidate.call_args_list) == ["first prompt", "second prompt"]
@@ -0,0 +1,148 @@
+"""Tests for the sequential and parallel deep research topologies."""
+import pytest
+from langgraph.checkpoint.memory import MemorySaver
+from backend.app.agents import graph as graph_module
+from backend.app.agents.graph import build_workflow, with_initial_research, initial_routing
+from backend.app.agents.deep_research_nodes import get_raw_topic
+from backend.app.utils.schemas import Trend, ValidationAction
+
+
+@pytest.fixture
+def calls(mocker):
+    """Replaces the workflow nodes with stubs recording their calls, and returns the records."""
+    records = []
+
+    def stub(name, output):
+        def node(state):
+            records.append((name, dict(state)))
+            return output(state) if callable(output) else output
+        return node
+
+    mocker.patch.object(graph_module, "tweet_search_node", stub("tweet_searcher", {"tweet_search_results": []}))
+    mocker.patch.object(graph_module, "tweet_ranking_node", stub("tweet_ranker", {}))
+    mocker.patch.object(graph_module, "opinion_analysis_node", stub(
+        "opinion_analyzer", {"topic_from_opinion_analysis": "Refined topic"}
+    ))
+    mocker.patch.object(graph_module, "generate_initial_query", stub(
+        "initial_query_generator", lambda state: {"query_list": [get_raw_topic(state), "second query"]}
+    ))
+    mocker.patch.object(graph_module, "generate_query", stub("query_generator", {"query_list": ["query"]}))
+    mocker.patch.object(graph_module, "web_research", stub(
+        "web_research", lambda state: {"search_query": [state["search_query"]], "web_research_result": ["result"]}
+    ))
+    mocker.patch.object(graph_module, "reflection", stub(
+        "reflection", {"is_sufficient": True, "research_loop_count": 1, "follow_up_queries": [], "number_of_ran_queries": 2}
+    ))
+    mocker.patch.object(graph_module, "finalize_answer", stub("finalize_answer", {"final_deep_research_report": "report"}))
+    return records
+
+
+def compile_workflow(parallel_research):
+    """Compiles the workflow, interrupted before the writer."""
+    return build_workflow(parallel_research=parallel_research).compile(
+        checkpointer=MemorySaver(),
+        interrupt_before=["writer"],
+    )
+
+
+def names(calls):
+    """Returns the names of the recorded nodes, in call order."""
+    return [name for name, _ in calls]
+
+
+class TestWithInitialResearch:
+    """Tests for with_initial_research function."""
+
+    def test_tweet_search_also_starts_the_initial_research(self, initial_state):
+        """Test that routing to the tweet search also routes to the initial query generator."""
+        state = initial_state.copy()
+        state["has_user_provided_topic"] = True
+
+        route = with_initial_research(initial_routing)(state)
+        assert route == ["tweet_searcher", "initial_query_generator"]
+
+    def test_other_routes_are_unchanged(self, initial_state):
+        """Test that routes to other nodes are left as they are."""
+        state = initial_state.copy()
+        state["has_user_provided_topic"] = False
+
+        assert with_initial_research(initial_routing)(state) == "trend_harvester"
+
+
+class TestGetRawTopic:
+    """Tests for get_raw_topic function."""
+
+    def test_selected_topic_comes_first(self, initial_state):
+        """Test that the selected trend is preferred to the user-provided topic."""
+        state = initial_state.copy()
+        state["selected_topic"] = {"name": "Trending topic", "tweet_count": "10K"}
+        state["user_provided_topic"] = "User topic"
+
+        assert get_raw_topic(state) == "Trending topic"
+
+    def test_user_provided_topic(self, initial_state):
+        """Test that the user-provided topic is used without a selected trend."""
+        state = initial_state.copy()
+        state["user_provided_topic"] = "User topic"
+
+        assert get_raw_topic(state) == "User topic"
+
+
+class TestResearchTopology:
+    """Tests for the deep research topologies of the workflow graph."""
+
+    def test_sequential_research_starts_after_opinion_analysis(self, initial_state, calls):
+        """Test that the default topology generates queries from the refined topic only."""
+        graph = compile_workflow(parallel_research=False)
+        state = initial_state.copy()
+        state.update(has_user_provided_topic=True, user_provided_topic="User topic")
+
+        graph.invoke(state, {"configurable": {"thread_id": "sequential"}})
+
+        assert names(calls) == [
+            "tweet_searcher", "tweet_ranker", "opinion_analyzer", "query_generator",
+            "web_research", "reflection", "finalize_answer",
+        ]
+        assert "initial_query_generator" not in graph.nodes
+
+    def test_parallel_research_starts_with_tweet_search(self, initial_state, calls):
+        """Test that the initial research wave runs from the raw topic alongside tweet search."""
+        graph = compile_workflow(parallel_research=True)
+        state = initial_state.copy()
+        state.update(has_user_provided_topic=True, user_provided_topic="User topic")
+
+        graph.invoke(state, {"configurable": {"thread_id": "parallel"}})
+
+        order = names(calls)
+        assert set(order[:2]) == {"tweet_searcher", "initial_query_generator"}
+        assert order.count("web_research") == 2
+        assert order.count("reflection") == 1
+        assert order[-2:] == ["reflection", "finalize_answer"]
+        assert "query_generator" not in order
+
+        # The queries did not wait for the opinion analysis
+        generator_input = dict(calls)["initial_query_generator"]
+        assert generator_input["topic_from_opinion_analysis"] is None
+
+        # Reflection sees both the initial research wave and the refined topic
+        reflection_input = dict(calls)["reflection"]
+        assert reflection_input["topic_from_opinion_analysis"] == "Refined topic"
+        assert reflection_input["search_query"] == ["User topic", "second query"]
+
+    def test_parallel_research_after_topic_selection(self, initial_state, calls):
+        """Test that a validated trend starts both the tweet search and the initial research wave."""
+        graph = compile_workflow(parallel_research=True)
+        config = {"configurable": {"thread_id": "selection"}}
+
+        state = initial_state.copy()
+        state.update(
+            selected_topic=Trend(name="Trending topic", tweet_count="10K"),
+            validation_result={"action": ValidationAction.APPROVE.value, "validated_step": "await_topic_selection"},
+        )
+
+        graph.update_state(config, state, as_node="await_topic_selection")
+        graph.invoke(None, config)
+
+        order = names(calls)
+        assert set(order[:2]) == {"tweet_searcher", "initial_query_generator"}
+        assert dict(calls)["reflection"]["search_query"] == ["Trending topic", "second query"]
@@ -0,0 +1,391 @@
+"""Tests for the SQLite checkpointer."""
+import operator
+import os
+import sqlite3
+import subprocess
+import sys
+from pathlib import Path
+from typing import Annotated, List, TypedDict
+import pytest
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.graph import StateGraph, START, END
+from backend.app.utils import checkpointer as checkpointer_module
+from backend.app.utils.checkpointer import (
+    BoundedMemorySaver, SqliteCheckpointSaver, ThreadBusyError, create_checkpointer, purge_expired_threads, thread_lease,
+    unfinished_thread_ids
+)
+
+
+class CounterState(TypedDict):
+    """A small state with a reducer, like the workflow's messages."""
+    count: int
+    steps: Annotated[List[str], operator.add]
+
+
+def build_graph(saver, interrupt=False):
+    """Builds a three-step graph, optionally interrupted after the second step."""
+    builder = StateGraph(CounterState)
+    for name in ("first", "second", "third"):
+        builder.add_node(name, lambda state, name=name: {"count": state["count"] + 1, "steps": [name]})
+    builder.add_edge(START, "first")
+    builder.add_edge("first", "second")
+    builder.add_edge("second", "third")
+    builder.add_edge("third", END)
+    return builder.compile(checkpointer=saver, interrupt_after=["second"] if interrupt else None)
+
+
+def count_rows(path, table):
+    """Counts the committed rows of a table."""
+    with sqlite3.connect(path) as conn:
+        return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    """A fresh database file."""
+    return str(tmp_path / "checkpoints.sqlite")
+
+
+class TestSqliteCheckpointSaver:
+    """Tests for SqliteCheckpointSaver."""
+
+    def test_runs_and_resumes_a_graph(self, db_path):
+        """Test that an interrupted run resumes from its checkpoint."""
+        graph = build_graph(SqliteCheckpointSaver(db_path, retention=0), interrupt=True)
+        config = {"configurable": {"thread_id": "t1"}}
+
+        graph.invoke({"count": 0, "steps": []}, config)
+        assert graph.get_state(config).next == ("third",)
+
+        result = graph.invoke(None, config)
+        assert result == {"count": 3, "steps": ["first", "second", "third"]}
+        assert len(list(graph.get_state_history(config))) == 5
+
+    def test_state_survives_a_restart(self, db_path):
+        """Test that a new saver on the same file sees the interrupted thread."""
+        saver = SqliteCheckpointSaver(db_path)
+        build_graph(saver, interrupt=True).invoke({"count": 0, "steps": []}, {"configurable": {"thread_id": "t1"}})
+        saver.close()
+
+        graph = build_graph(SqliteCheckpointSaver(db_path), interrupt=True)
+        result = graph.invoke(None, {"configurable": {"thread_id": "t1"}})
+        assert result["steps"] == ["first", "second", "third"]
+
+    async def test_async_run(self, db_path):
+        """Test that the async API used by the WebSocket stream works."""
+        graph = build_graph(SqliteCheckpointSaver(db_path))
+        result = await graph.ainvoke({"count": 0, "steps": []}, {"configurable": {"thread_id": "t1"}})
+        assert result["count"] == 3
+
+    def test_retention_keeps_last_checkpoints(self, db_path):
+        """Test that only the last N checkpoints of a thread are kept, along with their writes."""
+        saver = SqliteCheckpointSaver(db_path, retention=2)
+        graph = build_graph(saver)
+        config = {"configurable": {"thread_id": "t1"}}
+        graph.invoke({"count": 0, "steps": []}, config)
+
+        assert len(list(saver.list(config))) == 2
+        assert graph.get_state(config).values["steps"] == ["first", "second", "third"]
+        with sqlite3.connect(db_path) as conn:
+            orphans = conn.execute(
+                "SELECT COUNT(*) FROM writes WHERE checkpoint_id NOT IN (SELECT checkpoint_id FROM checkpoints)"
+            ).fetchone()[0]
+        assert orphans == 0
+
+    def test_writes_are_batched(self, db_path):
+        """Test that writes are committed together, and before any read."""
+        saver = SqliteCheckpointSaver(db_path, batch_size=1000, flush_interval=60)
+        graph = build_graph(saver)
+        config = {"configurable": {"thread_id": "t1"}}
+        graph.invoke({"count": 0, "steps": []}, config)
+        latest = saver.get_tuple(config).config
+        committed = count_rows(db_path, "writes")
+        saver.put_writes(latest, [("steps", ["extra"])], "task")
+
+        assert saver._pending and count_rows(db_path, "writes") == committed
+        assert saver.get_tuple(config).pending_writes == [("task", "steps", ["extra"])]
+        assert not saver._pending
+
+    def test_failed_commit_keeps_the_writes(self, db_path):
+        """Test that writes whose commit failed, e.g. on a database locked by another worker, are kept for the next flush."""
+        saver = SqliteCheckpointSaver(db_path, batch_size=1000, flush_interval=60)
+        graph = build_graph(saver)
+        config = {"configurable": {"thread_id": "t1"}}
+        graph.invoke({"count": 0, "steps": []}, config)
+        latest = saver.get_tuple(config).config
+        saver.put_writes(latest, [("steps", ["extra"])], "task")
+
+        saver._conn.execute("PRAGMA busy_timeout=0")
+        other = sqlite3.connect(db_path, isolation_level=None)
+        other.execute("BEGIN IMMEDIATE")
+        with pytest.raises(sqlite3.OperationalError, match="locked"):
+            saver.flush()
+        other.execute("ROLLBACK")
+        other.close()
+        assert saver._pending and not saver._conn.in_transaction
+
+        saver.flush()
+        assert not saver._pending
+        assert saver.get_tuple(config).pending_writes == [("task", "steps", ["extra"])]
+
+    def test_background_commit_failure_is_retried(self, db_path, mocker):
+        """Test that a failed timed commit is logged and scheduled again instead of raising."""
+        saver = SqliteCheckpointSaver(db_path, flush_interval=60)
+        mocker.patch.object(saver, "flush", side_effect=sqlite3.OperationalError("database is locked"))
+
+        saver._flush_in_background()
+
+        assert saver._flush_timer is not None
+        saver._flush_timer.cancel()
+
+    def test_purge_expired_threads(self, db_path, mocker):
+        """Test that finished threads expire after their TTL and idle threads after theirs."""
+        saver = SqliteCheckpointSaver(db_path)
+        graph = build_graph(saver)
+        for thread_id in ("finished", "idle", "active"):
+            graph.invoke({"count": 0, "steps": []}, {"configurable": {"thread_id": thread_id}})
+        saver.mark_finished("finished")
+
+        now = checkpointer_module.time.time()
+        with saver._lock:
+            saver._conn.execute("UPDATE threads SET updated_at = ? WHERE thread_id = 'idle'", (now - 10 * 3600,))
+        mocker.patch.object(checkpointer_module.time, "time", return_value=now + 2 * 3600)
+
+        assert saver.purge_expired(finished_ttl=3600, idle_ttl=8 * 3600) == 2
+        remaining = {c.config["configurable"]["thread_id"] for c in saver.list(None)}
+        assert remaining == {"active"}
+
+    def test_new_activity_resets_finished_ttl(self, db_path):
+        """Test that a finished thread updated again is no longer considered finished."""
+        saver = SqliteCheckpointSaver(db_path)
+        graph = build_graph(saver)
+        config = {"configurable": {"thread_id": "t1"}}
+        graph.invoke({"count": 0, "steps": []}, config)
+        saver.mark_finished("t1")
+        graph.update_state(config, {"count": 10})
+
+        assert saver.purge_expired(finished_ttl=1e-9, idle_ttl=0) == 0
+
+    def test_unfinished_threads(self, db_path):
+        """Test that threads are listed until marked finished, including writes not committed yet."""
+        saver = SqliteCheckpointSaver(db_path, batch_size=1000)
+        graph = build_graph(saver)
+        for thread_id in ("finished", "running"):
+            graph.invoke({"count": 0, "steps": []}, {"configurable": {"thread_id": thread_id}})
+        saver.mark_finished("finished")
+
+        assert unfinished_thread_ids(saver) == ["running"]
+
+
+class TestBoundedMemorySaver:
+    """Tests for BoundedMemorySaver."""
+
+    def test_history_is_compacted(self):
+        """Test that only the latest checkpoint and the channel values it references are kept."""
+        saver = BoundedMemorySaver(retention=1)
+        graph = build_graph(saver)
+        config = {"configurable": {"thread_id": "t1"}}
+        graph.invoke({"count": 0, "steps": []}, config)
+
+        latest = saver.get_tuple(config).checkpoint
+        assert len(saver.storage["t1"][""]) == 1
+        assert set(saver.blobs) == {("t1", "", channel, version) for channel, version in latest["channel_versions"].items()}
+        assert graph.get_state(config).values == {"count": 3, "steps": ["first", "second", "third"]}
+
+    def test_compacted_thread_resumes_after_interrupt(self):
+        """Test that an interrupted run resumes from its compacted history."""
+        graph = build_graph(BoundedMemorySaver(retention=1), interrupt=True)
+        config = {"configurable": {"thread_id": "t1"}}
+
+        graph.invoke({"count": 0, "steps": []}, config)
+        graph.update_state(config, {"count": 10})
+        result = graph.invoke(None, config)
+
+        assert result == {"count": 11, "steps": ["first", "second", "third"]}
+
+    def test_retention_zero_keeps_history(self):
+        """Test that a retention of 0 behaves like MemorySaver."""
+        saver = BoundedMemorySaver(retention=0)
+        graph = build_graph(saver)
+        config = {"configurable": {"thread_id": "t1"}}
+        graph.invoke({"count": 0, "steps": []}, config)
+
+        assert len(list(graph.get_state_history(config))) == 5
+
+    def test_thread_sizes(self):
+        """Test that the bytes held are reported per thread and shrink with compaction."""
+        bounded, unbounded = BoundedMemorySaver(retention=1), BoundedMemorySaver(retention=0)
+        for saver in (bounded, unbounded):
+            build_graph(saver).invoke({"count": 0, "steps": []}, {"configurable": {"thread_id": "t1"}})
+        build_graph(bounded).invoke({"count": 0, "steps": ["x"] * 100}, {"configurable": {"thread_id": "t2"}})
+
+        sizes = bounded.thread_sizes()
+        assert set(sizes) == {"t1", "t2"}
+        assert 0 < sizes["t1"] < sizes["t2"]
+        assert sizes["t1"] < unbounded.thread_size("t1")
+        assert bounded.thread_size("unknown") == 0
+
+    def test_purge_expired_threads(self, mocker):
+        """Test that finished threads are evicted after their TTL, and idle ones after theirs."""
+        saver = BoundedMemorySaver()
+        graph = build_graph(saver)
+        for thread_id in ("finished", "running"):
+            graph.invoke({"count": 0, "steps": []}, {"configurable": {"thread_id": thread_id}})
+        saver.mark_finished("finished")
+        now = checkpointer_module.time.time()
+
+        mocker.patch.object(checkpointer_module.time, "time", return_value=now + 2 * 3600)
+        assert saver.purge_expired(finished_ttl=3600, idle_ttl=8 * 3600) == 1
+        assert "finished" not in saver.thread_sizes()
+        assert not [key for key in saver.blobs if key[0] == "finished"]
+
+        mocker.patch.object(checkpointer_module.time, "time", return_value=now + 9 * 3600)
+        assert saver.purge_expired(finished_ttl=3600, idle_ttl=8 * 3600) == 1
+        assert saver.thread_sizes() == {}
+
+    def test_unfinished_threads(self):
+        """Test that finished threads are not listed, and savers without lifecycles list every thread."""
+        bounded, plain = BoundedMemorySaver(), MemorySaver()
+        for saver in (bounded, plain):
+            graph = build_graph(saver)
+            for thread_id in ("finished", "running"):
+                graph.invoke({"count": 0, "steps": []}, {"configurable": {"thread_id": thread_id}})
+        bounded.mark_finished("finished")
+
+        assert unfinished_thread_ids(bounded) == ["running"]
+        assert sorted(unfinished_thread_ids(plain)) == ["finished", "running"]
+
+
+class TestSharedCheckpoints:
+    """Tests for workers sharing a SQLite checkpoint database."""
+
+    def test_any_worker_resumes_a_thread(self, db_path):
+        """Test that a thread interrupted on one worker resumes on another."""
+        first = SqliteCheckpointSaver(db_path, flush_interval=60)
+        second = SqliteCheckpointSaver(db_path, flush_interval=60)
+        config = {"configurable": {"thread_id": "t1"}}
+
+        build_graph(first, interrupt=True).invoke({"count": 0, "steps": []}, config)
+        first.acquire_lease("t1", "first", 60)
+        first.release_lease("t1", "first")
+
+        graph = build_graph(second, interrupt=True)
+        assert graph.get_state(config).next == ("third",)
+        assert graph.invoke(None, config)["steps"] == ["first", "second", "third"]
+
+    @pytest.mark.parametrize("backend", ["memory", "sqlite"])
+    def test_leases(self, backend, db_path, mocker):
+        """Test that a lease excludes other owners until released or expired."""
+        if backend == "memory":
+            first = second = BoundedMemorySaver()
+        else:
+            first, second = SqliteCheckpointSaver(db_path), SqliteCheckpointSaver(db_path)
+
+        assert not second.is_leased("t1")
+        assert first.acquire_lease("t1", "a", 60)
+        assert first.acquire_lease("t1", "a", 60)
+        assert second.is_leased("t1")
+        assert not second.acquire_lease("t1", "b", 60)
+        assert second.acquire_lease("t2", "b", 60)
+        assert sorted(first.leased_threads()) == ["t1", "t2"]
+
+        second.release_lease("t1", "b")
+        assert not second.acquire_lease("t1", "b", 60)
+        first.release_lease("t1", "a")
+        assert second.acquire_lease("t1", "b", 60)
+
+        now = checkpointer_module.time.time()
+        mocker.patch.object(checkpointer_module.time, "time", return_value=now + 61)
+        assert not first.is_leased("t1")
+        assert first.acquire_lease("t1", "a", 60)
+
+    async def test_thread_lease_excludes_other_holders(self, db_path, mocker):
+        """Test that a held thread raises ThreadBusyError once the wait is over."""
+        mocker.patch.object(checkpointer_module.settings, "THREAD_LEASE_TTL_SECONDS", 60)
+        first, second = SqliteCheckpointSaver(db_path), SqliteCheckpointSaver(db_path)
+
+        async with thread_lease(first, "t1"):
+            with pytest.raises(ThreadBusyError):
+                async with thread_lease(second, "t1", wait=0.1):
+                    pass
+        async with thread_lease(second, "t1", wait=0):
+            pass
+
+    async def test_thread_is_resumed_by_another_process(self, db_path):
+        """Test that a thread run by another process is locked until released, then resumes from its checkpoint."""
+        worker = (
+            "import sys, time\n"
+            "from backend.app.utils.checkpointer import SqliteCheckpointSaver\n"
+            "from backend.tests.test_utils.test_checkpointer import build_graph\n"
+            "saver = SqliteCheckpointSaver(sys.argv[1], flush_interval=60)\n"
+            "assert saver.acquire_lease('t1', 'other-process', 60)\n"
+            "build_graph(saver, interrupt=True).invoke({'count': 0, 'steps': []}, {'configurable': {'thread_id': 't1'}})\n"
+            "print('running', flush=True)\n"
+            "time.sleep(0.5)\n"
+            "saver.release_lease('t1', 'other-process')\n"
+        )
+        env = {**os.environ, "PYTHONPATH": str(Path(checkpointer_module.__file__).resolve().parents[3])}
+        process = subprocess.Popen([sys.executable, "-c", worker, db_path], stdout=subprocess.PIPE, text=True, env=env)
+        try:
+            assert process.stdout.readline().strip() == "running"
+            saver = SqliteCheckpointSaver(db_path)
+            assert saver.is_leased("t1")
+
+            async with thread_lease(saver, "t1", wait=10):
+                graph = build_graph(saver, interrupt=True)
+                config = {"configurable": {"thread_id": "t1"}}
+                assert graph.get_state(config).next == ("third",)
+                assert graph.invoke(None, config)["steps"] == ["first", "second", "third"]
+        finally:
+            assert process.wait(timeout=10) == 0
+
+    async def test_thread_lease_is_renewed(self, mocker):
+        """Test that a lease held longer than its TTL is renewed."""
+        mocker.patch.object(checkpointer_module.settings, "THREAD_LEASE_TTL_SECONDS", 0.15)
+        saver = BoundedMemorySaver()
+
+        async with thread_lease(saver, "t1"):
+            await checkpointer_module.asyncio.sleep(0.4)
+            assert not saver.acquire_lease("t1", "other", 60)
+        assert saver.acquire_lease("t1", "other", 60)
+
+    async def test_thread_lease_without_lease_support(self):
+        """Test that savers without leases are not locked."""
+        async with thread_lease(MemorySaver(), "t1"):
+            pass
+
+
+class TestCreateCheckpointer:
+    """Tests for create_checkpointer function."""
+
+    def test_backends(self, mocker, db_path):
+        """Test that the backend is selected by settings."""
+        mocker.patch.object(checkpointer_module.settings, "CHECKPOINTER_BACKEND", "memory")
+        assert isinstance(create_checkpointer(), BoundedMemorySaver)
+
+        mocker.patch.object(checkpointer_module.settings, "CHECKPOINTER_BACKEND", "sqlite")
+        mocker.patch.object(checkpointer_module.settings, "CHECKPOINT_SQLITE_PATH", db_path)
+        assert isinstance(create_checkpointer(), SqliteCheckpointSaver)
+
+        mocker.patch.object(checkpointer_module.settings, "CHECKPOINTER_BACKEND", "redis")
+        with pytest.raises(ValueError):
+            create_checkpointer()
+
+    def test_network_filesystem_is_refused(self, mocker, tmp_path):
+        """Test that a database on an NFS mount, such as EFS, is refused."""
+        mounts = f"/dev/root / ext4 rw 0 0\nfs-1.efs:/ {tmp_path} nfs4 rw 0 0\n"
+        mocker.patch.object(checkpointer_module, "open", mocker.mock_open(read_data=mounts), create=True)
+
+        with pytest.raises(ValueError, match="network filesystem"):
+            SqliteCheckpointSaver(str(tmp_path / "checkpoints.sqlite"))
+
+    def test_local_filesystem_is_accepted(self, mocker, tmp_path):
+        """Test that the innermost mount decides, so a local disk under a network mount is accepted."""
+        mounts = f"fs-1.efs:/ / nfs4 rw 0 0\n/dev/sda1 {tmp_path} ext4 rw 0 0\n"
+        mocker.patch.object(checkpointer_module, "open", mocker.mock_open(read_data=mounts), create=True)
+
+        assert checkpointer_module.network_filesystem(str(tmp_path / "checkpoints.sqlite")) is None
+
+    def test_purge_ignores_memory_saver(self):
+        """Test that purging is a no-op for savers without thread lifecycles."""
+        assert purge_expired_threads(MemorySaver()) == 0
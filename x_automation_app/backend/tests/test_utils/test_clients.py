@@ -0,0 +1,58 @@
+"""Tests for the shared SDK clients."""
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from backend.app.utils import clients
+
+
+@pytest.fixture(autouse=True)
+def fresh_clients():
+    """Start and end every test without shared clients."""
+    clients.reset_clients()
+    yield
+    clients.reset_clients()
+
+
+class TestSharedClients:
+    """Tests for the lazily created, process-wide clients."""
+
+    def test_s3_client_is_created_once(self, mocker):
+        """Test that the S3 client is built on first use and reused afterwards."""
+        boto3_client = mocker.patch("backend.app.utils.clients.boto3.client")
+
+        first = clients.get_s3_client()
+        second = clients.get_s3_client()
+
+        assert first is second
+        boto3_client.assert_called_once()
+        config = boto3_client.call_args.kwargs["config"]
+        assert config.max_pool_connections == int(clients.settings.SDK_MAX_POOL_CONNECTIONS)
+
+    def test_concurrent_first_use_creates_one_client(self, mocker):
+        """Test that threads racing on first use share a single client."""
+        boto3_client = mocker.patch("backend.app.utils.clients.boto3.client", side_effect=lambda *a, **k: object())
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(lambda _: clients.get_s3_client(), range(32)))
+
+        assert boto3_client.call_count == 1
+        assert all(result is results[0] for result in results)
+
+    def test_genai_and_openai_clients_are_shared(self, mocker):
+        """Test that the Gemini and OpenAI clients are built once each."""
+        genai_client = mocker.patch("backend.app.utils.clients.genai.Client")
+        openai_client = mocker.patch("backend.app.utils.clients.OpenAI")
+
+        assert clients.get_genai_client() is clients.get_genai_client()
+        assert clients.get_openai_client() is clients.get_openai_client()
+        genai_client.assert_called_once()
+        openai_client.assert_called_once()
+
+    def test_reset_clients(self, mocker):
+        """Test that a reset forces the next call to build a new client."""
+        boto3_client = mocker.patch("backend.app.utils.clients.boto3.client", side_effect=lambda *a, **k: object())
+
+        first = clients.get_s3_client()
+        clients.reset_clients()
+
+        assert clients.get_s3_client() is not first
+        assert boto3_client.call_count == 2
@@ -0,0 +1,79 @@
+"""Tests for the cron expressions of scheduled workflows."""
+from datetime import datetime, timezone
+import pytest
+from backend.app.utils.cron import CronExpression
+
+
+def utc(*args):
+    """A UTC datetime."""
+    return datetime(*args, tzinfo=timezone.utc)
+
+
+class TestCronExpression:
+    """Tests for CronExpression class."""
+
+    def test_every_minute(self):
+        """Test that the next run is strictly after the given time."""
+        assert CronExpression("* * * * *").next_after(utc(2025, 1, 1, 10, 30, 15)) == utc(2025, 1, 1, 10, 31)
+
+    def test_fixed_time(self):
+        """Test that a daily time rolls over to the next day once passed."""
+        cron = CronExpression("30 9 * * *")
+
+        assert cron.next_after(utc(2025, 1, 1, 8, 0)) == utc(2025, 1, 1, 9, 30)
+        assert cron.next_after(utc(2025, 1, 1, 9, 30)) == utc(2025, 1, 2, 9, 30)
+
+    def test_lists_ranges_and_steps(self):
+        """Test that lists, ranges and steps are expanded."""
+        cron = CronExpression("0,30 9-17/4 * * *")
+
+        assert cron.hours == {9, 13, 17}
+        assert cron.minutes == {0, 30}
+        assert CronExpression("*/15 * * * *").minutes == {0, 15, 30, 45}
+        assert CronExpression("5/20 * * * *").minutes == {5, 25, 45}
+
+    def test_names_and_sunday_as_seven(self):
+        """Test that month and day names are accepted, and 7 is Sunday."""
+        cron = CronExpression("0 8 * jan-mar mon-fri")
+
+        assert cron.months == {1, 2, 3}
+        assert cron.weekdays == {1, 2, 3, 4, 5}
+        assert CronExpression("0 0 * * 7").weekdays == {0}
+
+    def test_weekdays(self):
+        """Test that a weekly run skips to the right day of the week."""
+        # January 1st, 2025 is a Wednesday
+        assert CronExpression("0 8 * * mon").next_after(utc(2025, 1, 1)) == utc(2025, 1, 6, 8, 0)
+
+    def test_day_of_month_or_day_of_week(self):
+        """Test that either day field matches when both are restricted."""
+        cron = CronExpression("0 0 15 * fri")
+
+        assert cron.next_after(utc(2025, 1, 1)) == utc(2025, 1, 3)
+        assert cron.next_after(utc(2025, 1, 13)) == utc(2025, 1, 15)
+
+    def test_aliases(self):
+        """Test that the @ shortcuts are expanded."""
+        assert CronExpression("@hourly").next_after(utc(2025, 1, 1, 10, 5)) == utc(2025, 1, 1, 11, 0)
+        assert CronExpression("@monthly").next_after(utc(2025, 1, 15)) == utc(2025, 2, 1)
+
+    def test_month_rollover(self):
+        """Test that a run on the 31st skips the months without one."""
+        assert CronExpression("0 0 31 * *").next_after(utc(2025, 4, 1)) == utc(2025, 5, 31)
+
+    def test_naive_datetimes_are_utc(self):
+        """Test that a naive datetime is read as UTC."""
+        assert CronExpression("0 12 * * *").next_after(datetime(2025, 1, 1, 11, 0)) == utc(2025, 1, 1, 12, 0)
+
+    @pytest.mark.parametrize("expression", [
+        "* * * *", "60 * * * *", "* 24 * * *", "0 0 0 * *", "*/0 * * * *", "5-1 * * * *", "0 0 * foo *",
+    ])
+    def test_invalid_expressions(self, expression):
+        """Test that invalid expressions are rejected."""
+        with pytest.raises(ValueError):
+            CronExpression(expression)
+
+    def test_expression_never_matching(self):
+        """Test that an impossible date is reported instead of searched forever."""
+        with pytest.raises(ValueError):
+            CronExpression("0 0 30 2 *").next_after(utc(2025, 1, 1))
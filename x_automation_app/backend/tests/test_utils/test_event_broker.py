@@ -0,0 +1,38 @@
+"""Tests for the workflow event broker."""
+from backend.app.utils.event_broker import EventBroker
+
+
+class TestEventBroker:
+    """Tests for EventBroker class."""
+
+    async def test_events_fan_out_to_subscribers_of_the_thread(self):
+        """Test that every subscriber of a thread, and only them, receives its events."""
+        broker = EventBroker()
+        with broker.subscription("t1") as first, broker.subscription("t1") as second, broker.subscription("t2") as other:
+            broker.publish("t1", "event")
+            broker.close("t1", error="boom")
+
+            for queue in (first, second):
+                assert (await queue.get()).text == "event"
+                end = await queue.get()
+                assert end.end and end.error == "boom" and not end.busy
+            assert other.empty()
+
+    async def test_unsubscribe_on_exit(self):
+        """Test that exiting a subscription stops delivery."""
+        broker = EventBroker()
+        with broker.subscription("t1"):
+            assert broker.subscriber_count("t1") == 1
+        assert broker.subscriber_count("t1") == 0
+        broker.publish("t1", "nobody listens")
+
+    async def test_slow_subscriber_loses_oldest_events(self):
+        """Test that a full queue drops its oldest event, so the end of the run is always delivered."""
+        broker = EventBroker(max_pending=2)
+        with broker.subscription("t1") as queue:
+            for index in range(3):
+                broker.publish("t1", f"event {index}")
+            broker.close("t1")
+
+            assert (await queue.get()).text == "event 2"
+            assert (await queue.get()).end
@@ -0,0 +1,144 @@
+"""Tests for the in-memory image buffers and the memory-first upload path."""
+from io import BytesIO
+from unittest.mock import Mock
+import pytest
+from PIL import Image
+from backend.app.utils import image as image_module
+from backend.app.utils import image_buffers as image_buffers_module
+from backend.app.utils import presigned_urls as presigned_urls_module
+from backend.app.utils.image import generate_and_upload_image
+from backend.app.utils.image_buffers import ImageBufferRegistry, image_buffers, load_image_bytes
+from backend.app.utils.x_utils import post_tweet_v2, upload_image_v2
+
+
+@pytest.fixture(autouse=True)
+def clear_image_buffers():
+    """Start and end every test without buffered images."""
+    image_buffers.clear()
+    yield
+    image_buffers.clear()
+
+
+def png_bytes():
+    """A small PNG, as returned by the image models."""
+    buffer = BytesIO()
+    Image.new("RGBA", (8, 8), (255, 0, 0, 255)).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+class TestImageBufferRegistry:
+    """Tests for ImageBufferRegistry."""
+
+    def test_put_and_get(self):
+        """Test that buffers are returned by path."""
+        registry = ImageBufferRegistry(max_bytes=100)
+        registry.put("/images/a.jpeg", b"abc")
+
+        assert registry.get("/images/a.jpeg") == b"abc"
+        assert registry.get("/images/b.jpeg") is None
+
+    def test_evicts_least_recently_used(self):
+        """Test that the total size stays under the limit, oldest first."""
+        registry = ImageBufferRegistry(max_bytes=10)
+        registry.put("a", b"12345")
+        registry.put("b", b"12345")
+        registry.get("a")
+        registry.put("c", b"12345")
+
+        assert registry.get("b") is None
+        assert registry.get("a") == b"12345"
+        assert registry.size == 10
+
+    def test_load_image_bytes_falls_back_to_disk(self, tmp_path):
+        """Test that images missing from memory are read from disk."""
+        path = tmp_path / "image.jpeg"
+        path.write_bytes(b"on disk")
+        assert load_image_bytes(str(path)) == b"on disk"
+
+        image_buffers.put(str(path), b"in memory")
+        assert load_image_bytes(str(path)) == b"in memory"
+
+    def test_load_image_bytes_falls_back_to_s3(self, tmp_path, mocker):
+        """Test that images neither in memory nor on disk are read back from S3, once."""
+        s3_client = Mock()
+        s3_client.get_object.return_value = {"Body": Mock(read=Mock(return_value=b"on s3"))}
+        mocker.patch.object(image_buffers_module, "get_s3_client", return_value=s3_client)
+        path = str(tmp_path / "image.jpeg")
+
+        assert load_image_bytes(path, "images/image.jpeg") == b"on s3"
+        assert load_image_bytes(path, "images/image.jpeg") == b"on s3"
+
+        s3_client.get_object.assert_called_once_with(Bucket=image_buffers_module.settings.BUCKET_NAME, Key="images/image.jpeg")
+        with pytest.raises(FileNotFoundError):
+            load_image_bytes(str(tmp_path / "other.jpeg"))
+
+
+class TestMemoryUploadPath:
+    """Tests for the upload path that avoids the disk."""
+
+    @pytest.fixture
+    def mock_clients(self, mocker):
+        """Gemini returns a PNG and S3 accepts any upload."""
+        part = Mock(inline_data=Mock(data=png_bytes()))
+        genai_client = Mock()
+        genai_client.models.generate_content.return_value = Mock(candidates=[Mock(content=Mock(parts=[part]))])
+        s3_client = Mock()
+        s3_client.generate_presigned_url.return_value = "https://bucket.s3.amazonaws.com/images/test.jpeg?sig"
+        mocker.patch.object(image_module, "get_genai_client", return_value=genai_client)
+        mocker.patch.object(image_module, "get_s3_client", return_value=s3_client)
+        mocker.patch.object(presigned_urls_module, "get_s3_client", return_value=s3_client)
+        for name in ("AWS_ACCESS_KEY_ID", "AWS_SECRET_ACCESS_KEY", "AWS_DEFAULT_REGION", "BUCKET_NAME"):
+            mocker.patch.object(image_module.settings, name, "value")
+        return s3_client
+
+    def test_upload_from_memory_without_disk(self, mocker, mock_clients):
+        """Test that the image is uploaded from memory and not written to disk."""
+        mocker.patch.object(image_module.settings, "IMAGE_LOCAL_PERSISTENCE", "false")
+        mocker.patch.object(image_module.settings, "IMAGE_ENCODING_WORKERS", 0)
+
+        result = generate_and_upload_image.invoke({"prompt": "a red square", "image_name": "memory_only_test.jpeg"})
+
+        assert result.is_generated
+        assert result.s3_url.startswith("https://")
+        uploaded = mock_clients.upload_fileobj.call_args.args[0]
+        assert uploaded.getvalue() == image_buffers.get(result.local_file_path)
+        assert uploaded.getvalue().startswith(b"\xff\xd8")  # JPEG
+        mock_clients.upload_file.assert_not_called()
+        assert not image_module.Path(result.local_file_path).exists()
+
+    def test_images_are_kept_on_disk_without_s3(self, mocker, mock_clients):
+        """Test that disabling local persistence is ignored when S3 is not configured."""
+        mocker.patch.object(image_module.settings, "IMAGE_LOCAL_PERSISTENCE", "false")
+        mocker.patch.object(image_module.settings, "IMAGE_ENCODING_WORKERS", 0)
+        mocker.patch.object(image_module.settings, "BUCKET_NAME", None)
+
+        result = generate_and_upload_image.invoke({"prompt": "a red square", "image_name": "no_s3_test.jpeg"})
+
+        path = image_module.Path(result.local_file_path)
+        assert path.exists()
+        path.unlink()
+
+    def test_x_upload_reuses_buffer(self, mocker):
+        """Test that the X media upload sends the buffered bytes without opening the file."""
+        image_buffers.put("/images/buffered.jpeg", b"jpeg bytes")
+        mock_post = mocker.patch("backend.app.utils.x_utils.requests.post")
+        mock_post.return_value.json.return_value = {"status": "success", "media_id": "media_1"}
+        mock_open = mocker.patch("builtins.open")
+
+        assert upload_image_v2("cookie", "/images/buffered.jpeg", "proxy") == "media_1"
+        assert mock_post.call_args.kwargs["files"]["file"] == ("buffered.jpeg", b"jpeg bytes")
+        mock_open.assert_not_called()
+
+    def test_x_upload_reads_missing_images_from_s3(self, mocker, tmp_path):
+        """Test that a tweet image neither in memory nor on disk is read back from its S3 key."""
+        s3_client = Mock()
+        s3_client.get_object.return_value = {"Body": Mock(read=Mock(return_value=b"on s3"))}
+        mocker.patch.object(image_buffers_module, "get_s3_client", return_value=s3_client)
+        mock_post = mocker.patch("backend.app.utils.x_utils.requests.post")
+        mock_post.return_value.json.return_value = {"status": "success", "media_id": "media_1", "tweet_id": "tweet_1"}
+        path = str(tmp_path / "gone.jpeg")
+
+        post_tweet_v2("cookie", "A post", "proxy", image_paths=[path], image_keys={path: "images/gone.jpeg"})
+
+        assert mock_post.call_args_list[0].kwargs["files"]["file"] == ("gone.jpeg", b"on s3")
+        assert s3_client.get_object.call_args.kwargs["Key"] == "images/gone.jpeg"
@@ -0,0 +1,122 @@
+"""Tests for the generated image cache and its use by generate_and_upload_image."""
+from io import BytesIO
+from unittest.mock import Mock
+import pytest
+from PIL import Image
+from backend.app.utils import image as image_module
+from backend.app.utils import presigned_urls as presigned_urls_module
+from backend.app.utils.image import generate_and_upload_image
+from backend.app.utils.image_cache import CachedImage, GeneratedImageCache, image_cache, normalize_prompt
+
+
+def cached_image(data=b"12345", model="model-a", size="native", s3_key=None):
+    """Builds a cache entry."""
+    return CachedImage(data, "image/jpeg", ".jpeg", model, size, s3_key)
+
+
+def png_bytes():
+    """A small PNG, as returned by the image models."""
+    buffer = BytesIO()
+    Image.new("RGB", (8, 8), (0, 0, 255)).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+class TestGeneratedImageCache:
+    """Tests for GeneratedImageCache."""
+
+    def test_prompt_normalization(self):
+        """Test that case and whitespace differences share a key."""
+        assert normalize_prompt("  A Red\n  Square ") == "a red square"
+        assert GeneratedImageCache.make_key("A red  square", "m", "s") == GeneratedImageCache.make_key("a red square", "m", "s")
+        assert GeneratedImageCache.make_key("a red square", "m", "s") != GeneratedImageCache.make_key("a red square", "m2", "s")
+
+    def test_get_prefers_first_model(self):
+        """Test that lookups follow the given model order."""
+        cache = GeneratedImageCache(max_bytes=100)
+        cache.put("prompt", cached_image(b"b", model="model-b"))
+        cache.put("prompt", cached_image(b"a", model="model-a"))
+
+        assert cache.get("prompt", [("model-a", "native"), ("model-b", "native")]).data == b"a"
+        assert cache.get("prompt", [("model-b", "native")]).data == b"b"
+        assert cache.get("prompt", [("model-c", "native")]) is None
+
+    def test_evicts_least_recently_used(self):
+        """Test that the total size stays under the limit, oldest first."""
+        cache = GeneratedImageCache(max_bytes=10)
+        models = [("model-a", "native")]
+        cache.put("a", cached_image())
+        cache.put("b", cached_image())
+        cache.get("a", models)
+        cache.put("c", cached_image())
+
+        assert cache.get("b", models) is None
+        assert cache.get("a", models) is not None
+        assert cache.size == 10
+
+    def test_disabled_and_oversized(self):
+        """Test that a zero budget disables the cache and oversized images are not kept."""
+        disabled = GeneratedImageCache(max_bytes=0)
+        disabled.put("a", cached_image())
+        assert len(disabled) == 0
+
+        cache = GeneratedImageCache(max_bytes=4)
+        cache.put("a", cached_image(b"12345"))
+        assert len(cache) == 0
+
+    def test_invalidate(self, mocker):
+        """Test that invalidating a prompt drops it for every image model."""
+        mocker.patch.object(image_module.settings, "GEMINI_IMAGE_MODEL", "gemini")
+        mocker.patch.object(image_module.settings, "OPENAI_IMAGE_MODEL", "openai")
+        cache = GeneratedImageCache(max_bytes=100)
+        cache.put("prompt", cached_image(model="gemini", size="native"))
+        cache.put("prompt", cached_image(model="openai", size="1024x1024"))
+        cache.put("other", cached_image(model="gemini", size="native"))
+
+        assert cache.invalidate("Prompt") == 2
+        assert len(cache) == 1
+        assert cache.size == 5
+
+
+class TestCachedGeneration:
+    """Tests for cache reuse in generate_and_upload_image."""
+
+    @pytest.fixture
+    def mock_clients(self, mocker):
+        """Gemini returns a PNG and S3 accepts any upload."""
+        part = Mock(inline_data=Mock(data=png_bytes()))
+        genai_client = Mock()
+        genai_client.models.generate_content.return_value = Mock(candidates=[Mock(content=Mock(parts=[part]))])
+        s3_client = Mock()
+        s3_client.generate_presigned_url.return_value = "https://bucket.s3.amazonaws.com/images/test.jpeg?sig"
+        mocker.patch.object(image_module, "get_genai_client", return_value=genai_client)
+        mocker.patch.object(image_module, "get_s3_client", return_value=s3_client)
+        mocker.patch.object(presigned_urls_module, "get_s3_client", return_value=s3_client)
+        for name in ("AWS_ACCESS_KEY_ID", "AWS_SECRET_ACCESS_KEY", "AWS_DEFAULT_REGION", "BUCKET_NAME"):
+            mocker.patch.object(image_module.settings, name, "value")
+        mocker.patch.object(image_module.settings, "IMAGE_LOCAL_PERSISTENCE", "false")
+        mocker.patch.object(image_module.settings, "IMAGE_ENCODING_WORKERS", 0)
+        return genai_client, s3_client
+
+    def test_hit_skips_generation_and_upload(self, mock_clients):
+        """Test that the same prompt is generated and uploaded once."""
+        genai_client, s3_client = mock_clients
+
+        first = generate_and_upload_image.invoke({"prompt": "a blue square", "image_name": "first.jpeg"})
+        second = generate_and_upload_image.invoke({"prompt": "A blue  square", "image_name": "second.jpeg"})
+
+        assert first.is_generated and second.is_generated
+        assert genai_client.models.generate_content.call_count == 1
+        assert s3_client.upload_fileobj.call_count == 1
+        assert s3_client.generate_presigned_url.call_args.kwargs["Params"]["Key"] == "images/first.jpeg"
+        assert second.s3_key == first.s3_key == "images/first.jpeg"
+        assert second.image_name == "second.jpeg"
+
+    def test_invalidated_prompt_is_regenerated(self, mock_clients):
+        """Test that an invalidated prompt goes back to the image model."""
+        genai_client, _ = mock_clients
+
+        generate_and_upload_image.invoke({"prompt": "a blue square", "image_name": "first.jpeg"})
+        image_cache.invalidate("a blue square")
+        generate_and_upload_image.invoke({"prompt": "a blue square", "image_name": "first.jpeg"})
+
+        assert genai_client.models.generate_content.call_count == 2
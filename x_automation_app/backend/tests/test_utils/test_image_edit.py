@@ -0,0 +1,104 @@
+"""Tests for feedback-driven image edits."""
+import base64
+from io import BytesIO
+from unittest.mock import Mock
+import pytest
+from PIL import Image
+from backend.app.utils import image as image_module
+from backend.app.utils.image import edit_and_upload_image
+from backend.app.utils.image_buffers import image_buffers
+from backend.app.utils.schemas import GeneratedImage
+
+
+def png_bytes(color=(0, 128, 0)):
+    """A small PNG, as returned by the image models."""
+    buffer = BytesIO()
+    Image.new("RGB", (8, 8), color).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def gemini_response(data):
+    """A Gemini response carrying one image."""
+    part = Mock(inline_data=Mock(data=data))
+    return Mock(candidates=[Mock(content=Mock(parts=[part]))])
+
+
+@pytest.fixture
+def previous_image():
+    """A previously generated image still held in memory."""
+    image = GeneratedImage(
+        is_generated=True,
+        image_name="green_square.jpeg",
+        local_file_path="/images/green_square.jpeg",
+        s3_url="",
+        prompt="a green square"
+    )
+    image_buffers.put(image.local_file_path, png_bytes())
+    yield image
+    image_buffers.clear()
+
+
+@pytest.fixture
+def genai_client(mocker):
+    """A Gemini client; uploads are skipped without AWS credentials."""
+    client = Mock()
+    mocker.patch.object(image_module, "get_genai_client", return_value=client)
+    mocker.patch.object(image_module.settings, "AWS_ACCESS_KEY_ID", None)
+    mocker.patch.object(image_module.settings, "IMAGE_LOCAL_PERSISTENCE", "false")
+    mocker.patch.object(image_module.settings, "IMAGE_ENCODING_WORKERS", 0)
+    return client
+
+
+class TestEditAndUploadImage:
+    """Tests for edit_and_upload_image."""
+
+    def test_sends_previous_image_with_feedback(self, previous_image, genai_client):
+        """Test that the previous image bytes and the feedback go to the edit call."""
+        genai_client.models.generate_content.return_value = gemini_response(png_bytes((0, 255, 0)))
+
+        result = edit_and_upload_image(previous_image, "make it brighter", "edited.jpeg")
+
+        contents = genai_client.models.generate_content.call_args.kwargs["contents"]
+        assert "make it brighter" in contents[0]
+        assert contents[1].inline_data.data == png_bytes()
+        assert contents[1].inline_data.mime_type == "image/png"
+        assert result.is_generated
+        assert result.image_name == "edited.jpeg"
+        assert result.prompt == "a green square"
+
+    def test_falls_back_to_openai_edit(self, previous_image, genai_client, mocker):
+        """Test that OpenAI's image edits are used when Gemini fails."""
+        genai_client.models.generate_content.side_effect = Exception("unsupported")
+        openai_client = Mock()
+        openai_client.images.edit.return_value = Mock(data=[Mock(b64_json=base64.b64encode(png_bytes()).decode())])
+        mocker.patch.object(image_module, "get_openai_client", return_value=openai_client)
+
+        result = edit_and_upload_image(previous_image, "make it brighter", "edited.jpeg")
+
+        assert result.is_generated
+        assert openai_client.images.edit.call_args.kwargs["image"][1] == png_bytes()
+
+    def test_regenerates_when_edit_fails(self, previous_image, genai_client, mocker):
+        """Test that a failed edit falls back to generating from the revised prompt."""
+        mocker.patch.object(image_module, "_edit_image", return_value=None)
+        genai_client.models.generate_content.return_value = gemini_response(png_bytes())
+
+        result = edit_and_upload_image(previous_image, "make it brighter", "edited.jpeg")
+
+        prompt = genai_client.models.generate_content.call_args.kwargs["contents"][0]
+        assert prompt.startswith("a green square")
+        assert "make it brighter" in prompt
+        assert result.is_generated
+
+    def test_regenerates_when_previous_image_is_gone(self, genai_client, mocker):
+        """Test that an image no longer in memory or on disk is regenerated instead."""
+        edit = mocker.patch.object(image_module, "_edit_image")
+        genai_client.models.generate_content.return_value = gemini_response(png_bytes())
+        image = GeneratedImage(
+            is_generated=True, image_name="gone.jpeg", local_file_path="/nowhere/gone.jpeg", s3_url="", prompt="a square"
+        )
+
+        result = edit_and_upload_image(image, "make it round", "edited.jpeg")
+
+        edit.assert_not_called()
+        assert result.is_generated
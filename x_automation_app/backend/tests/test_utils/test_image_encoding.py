@@ -0,0 +1,98 @@
+"""Tests for the image encoding stage."""
+import os
+from io import BytesIO
+import pytest
+from PIL import Image
+from backend.app.utils import image_encoding
+from backend.app.utils.image_encoding import encode_image, encode_image_for_x, shutdown_encoding_pool
+
+
+def make_image(fmt="PNG", size=(1024, 1024), noisy=False):
+    """Builds an encoded test image; noisy images compress badly."""
+    if noisy:
+        image = Image.frombytes("RGB", size, os.urandom(size[0] * size[1] * 3))
+    else:
+        image = Image.new("RGBA" if fmt == "PNG" else "RGB", size, (30, 120, 200))
+    buffer = BytesIO()
+    image.save(buffer, fmt)
+    return buffer.getvalue()
+
+
+class TestEncodeImage:
+    """Tests for encode_image function."""
+
+    def test_png_is_encoded_as_progressive_jpeg(self):
+        """Test that PNG input becomes a progressive JPEG."""
+        encoded = encode_image(make_image("PNG"))
+
+        assert encoded.content_type == "image/jpeg"
+        assert not encoded.passthrough
+        output = Image.open(BytesIO(encoded.data))
+        assert output.format == "JPEG"
+        assert output.info.get("progressive") or output.info.get("progression")
+
+    def test_fitting_jpeg_is_passed_through(self):
+        """Test that an already compressed JPEG within the limits is left untouched."""
+        data = make_image("JPEG")
+        encoded = encode_image(data)
+
+        assert encoded.passthrough
+        assert encoded.data == data
+
+    def test_large_image_is_downscaled(self):
+        """Test that the longest side is brought down to the maximum dimension."""
+        encoded = encode_image(make_image("JPEG", size=(3000, 1500)), max_dimension=1000)
+
+        assert (encoded.width, encoded.height) == (1000, 500)
+        assert Image.open(BytesIO(encoded.data)).size == (1000, 500)
+
+    def test_output_fits_byte_limit(self):
+        """Test that quality and size are reduced until the output fits."""
+        encoded = encode_image(make_image("PNG", size=(512, 512), noisy=True), max_bytes=60_000)
+        assert len(encoded.data) <= 60_000
+
+    def test_webp_output(self):
+        """Test WebP output."""
+        encoded = encode_image(make_image("PNG"), output_format="webp")
+
+        assert encoded.extension == ".webp"
+        assert Image.open(BytesIO(encoded.data)).format == "WEBP"
+
+    def test_unsupported_format(self):
+        """Test that unknown output formats are rejected."""
+        with pytest.raises(ValueError):
+            encode_image(make_image("PNG"), output_format="gif")
+
+
+class TestEncodeImageForX:
+    """Tests for encode_image_for_x function."""
+
+    def test_encodes_in_process_pool(self, mocker):
+        """Test encoding through the worker processes."""
+        mocker.patch.object(image_encoding.settings, "IMAGE_ENCODING_WORKERS", 1)
+        try:
+            encoded = encode_image_for_x(make_image("PNG", size=(256, 256)))
+        finally:
+            shutdown_encoding_pool()
+
+        assert Image.open(BytesIO(encoded.data)).format == "JPEG"
+
+    def test_encodes_inline_without_workers(self, mocker):
+        """Test that zero workers encodes in the calling thread."""
+        mocker.patch.object(image_encoding.settings, "IMAGE_ENCODING_WORKERS", 0)
+        pool = mocker.patch.object(image_encoding, "ProcessPoolExecutor")
+
+        encode_image_for_x(make_image("PNG", size=(64, 64)))
+
+        pool.assert_not_called()
+
+    def test_workers_are_not_forked(self, mocker):
+        """Test that the worker processes are started from a fork server, not forked from this process."""
+        mocker.patch.object(image_encoding.settings, "IMAGE_ENCODING_WORKERS", 1)
+        pool = mocker.patch.object(image_encoding, "ProcessPoolExecutor")
+        try:
+            image_encoding._get_pool()
+        finally:
+            image_encoding._pool = None
+
+        assert pool.call_args.kwargs["mp_context"].get_start_method() == "forkserver"
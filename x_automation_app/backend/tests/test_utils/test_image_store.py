@@ -0,0 +1,89 @@
+"""Tests for the size-capped local image store."""
+import os
+import time
+from unittest.mock import MagicMock
+from backend.app import main
+from backend.app.utils.image_store import LocalImageStore
+from backend.app.utils.schemas import GeneratedImage
+
+
+def write_image(store, name, size, age_seconds):
+    """Writes an image to the store, last modified `age_seconds` ago."""
+    path = store.write(name, b"x" * size)
+    modified = time.time() - age_seconds
+    os.utime(path, (modified, modified))
+    store._last_used.pop(str(path), None)
+    return str(path)
+
+
+class TestLocalImageStore:
+    """Tests for LocalImageStore."""
+
+    def test_evicts_least_recently_used_over_size(self, tmp_path):
+        """Test that the oldest images go first until the directory fits the cap."""
+        store = LocalImageStore(tmp_path, max_bytes=250, max_age_seconds=0)
+        oldest = write_image(store, "a.jpeg", 100, age_seconds=3000)
+        used = write_image(store, "b.jpeg", 100, age_seconds=2000)
+        newer = write_image(store, "c.jpeg", 100, age_seconds=1000)
+        store.touch(used)
+
+        assert store.compact() == 1
+        assert not os.path.exists(oldest)
+        assert os.path.exists(used) and os.path.exists(newer)
+
+    def test_evicts_expired_images(self, tmp_path):
+        """Test that images unused for longer than the max age are deleted."""
+        store = LocalImageStore(tmp_path, max_bytes=0, max_age_seconds=3600)
+        expired = write_image(store, "old.jpeg", 10, age_seconds=7200)
+        recent = write_image(store, "recent.jpeg", 10, age_seconds=600)
+
+        assert store.compact() == 1
+        assert not os.path.exists(expired)
+        assert os.path.exists(recent)
+
+    def test_keeps_pinned_and_fresh_images(self, tmp_path):
+        """Test that images of workflows in progress and just-written images are never evicted."""
+        store = LocalImageStore(tmp_path, max_bytes=1, max_age_seconds=60)
+        pinned = write_image(store, "pinned.jpeg", 10, age_seconds=7200)
+        fresh = store.write("fresh.jpeg", b"x" * 10)
+        store.add_pin_source(lambda: [pinned])
+
+        assert store.compact() == 0
+        assert os.path.exists(pinned) and os.path.exists(fresh)
+
+    def test_failing_pin_source_skips_eviction(self, tmp_path):
+        """Test that nothing is evicted when the images in use are unknown."""
+        store = LocalImageStore(tmp_path, max_bytes=1, max_age_seconds=60)
+        path = write_image(store, "a.jpeg", 10, age_seconds=7200)
+
+        def broken():
+            raise RuntimeError("checkpointer unavailable")
+
+        store.add_pin_source(broken)
+
+        assert store.compact() == 0
+        assert os.path.exists(path)
+
+    def test_missing_directory(self, tmp_path):
+        """Test that compacting a directory that does not exist yet is a no-op."""
+        assert LocalImageStore(tmp_path / "missing", max_bytes=1, max_age_seconds=1).compact() == 0
+
+
+class TestWorkflowImagePaths:
+    """Tests for the pin source of the images of workflows in progress."""
+
+    def test_only_unfinished_or_leased_workflows(self, mocker):
+        """Test that images of finished workflows are not pinned, unless a worker holds their thread."""
+        image = GeneratedImage(is_generated=True, image_name="a.jpeg", local_file_path="/images/a.jpeg", s3_url="")
+        images = {
+            "waiting": [image],
+            "running": [{"local_file_path": "/images/b.jpeg"}],
+            "done": [{"local_file_path": "/images/c.jpeg"}],
+        }
+        mocker.patch.object(main.graph, "checkpointer", MagicMock(
+            unfinished_threads=MagicMock(return_value=["waiting"]),
+            leased_threads=MagicMock(return_value=["running"]),
+            latest_channel_value=MagicMock(side_effect=lambda thread_id, channel: images[thread_id]),
+        ))
+
+        assert list(main.workflow_image_paths()) == ["/images/a.jpeg", "/images/b.jpeg"]
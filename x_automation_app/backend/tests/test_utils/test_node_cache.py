@@ -0,0 +1,123 @@
+"""Tests for the memoization of graph nodes."""
+import pytest
+from backend.app.utils import node_cache as node_cache_module
+from backend.app.utils.node_cache import NodeCache, memoize_node, memoized_nodes
+from backend.app.utils.metrics import NODE_CACHE_LOOKUPS_TOTAL
+
+
+@pytest.fixture
+def memoized(mocker):
+    """Memoizes the opinion analyzer and the quality assurer."""
+    mocker.patch.object(node_cache_module.settings, "MEMOIZED_NODES", "opinion_analyzer, quality_assurer")
+
+
+@pytest.fixture
+def counting_node():
+    """A node counting its calls and echoing the draft it reads."""
+    calls = []
+
+    def node(state):
+        calls.append(state)
+        return {"final_content": state["content_draft"].upper()}
+
+    node.calls = calls
+    return node
+
+
+def lookups(node, result):
+    """Returns the number of lookups of a node with a given result."""
+    return NODE_CACHE_LOOKUPS_TOTAL.labels(node=node, result=result)._value.get()
+
+
+class TestMemoizeNode:
+    """Tests for memoize_node function."""
+
+    def test_unchanged_inputs_reuse_the_update(self, memoized, counting_node):
+        """Test that a node is not called again while the keys it reads are unchanged."""
+        node = memoize_node("quality_assurer", counting_node, reads=["content_draft"], cache=NodeCache(8))
+        hits = lookups("quality_assurer", "hit")
+
+        assert node({"content_draft": "draft", "current_step": "writer"}) == {"final_content": "DRAFT"}
+        assert node({"content_draft": "draft", "current_step": "quality_assurer"}) == {"final_content": "DRAFT"}
+
+        assert len(counting_node.calls) == 1
+        assert lookups("quality_assurer", "hit") == hits + 1
+
+    def test_changed_inputs_call_the_node(self, memoized, counting_node):
+        """Test that a change in a key the node reads calls it again."""
+        node = memoize_node("quality_assurer", counting_node, reads=["content_draft"], cache=NodeCache(8))
+
+        node({"content_draft": "draft"})
+        assert node({"content_draft": "new draft"}) == {"final_content": "NEW DRAFT"}
+
+        assert len(counting_node.calls) == 2
+
+    def test_disabled_nodes_are_not_wrapped(self, memoized, counting_node):
+        """Test that nodes missing from MEMOIZED_NODES are returned as is."""
+        assert memoize_node("writer", counting_node, reads=["content_draft"]) is counting_node
+        assert memoized_nodes() == {"opinion_analyzer", "quality_assurer"}
+
+    def test_errors_are_not_cached(self, memoized):
+        """Test that an update reporting an error is computed again."""
+        calls = []
+
+        def failing(state):
+            calls.append(state)
+            return {"error_message": "LLM unavailable"}
+
+        node = memoize_node("opinion_analyzer", failing, reads=["tweet_search_results"], cache=NodeCache(8))
+        node({"tweet_search_results": []})
+        node({"tweet_search_results": []})
+
+        assert len(calls) == 2
+
+    def test_cached_updates_are_copies(self, memoized):
+        """Test that a caller mutating a returned update does not alter the cache."""
+        node = memoize_node(
+            "opinion_analyzer", lambda state: {"opinion_summary": ["a"]},
+            reads=["tweet_search_results"], cache=NodeCache(8)
+        )
+
+        node({"tweet_search_results": [1]})["opinion_summary"].append("b")
+
+        assert node({"tweet_search_results": [1]}) == {"opinion_summary": ["a"]}
+
+    def test_run_configuration_is_passed_through(self, memoized):
+        """Test that a node taking the run configuration still receives it."""
+        def node(state, config):
+            return {"final_content": config["configurable"]["thread_id"]}
+
+        wrapped = memoize_node("quality_assurer", node, reads=["content_draft"], cache=NodeCache(8))
+
+        assert wrapped({"content_draft": "x"}, {"configurable": {"thread_id": "t1"}}) == {"final_content": "t1"}
+
+
+class TestNodeCache:
+    """Tests for NodeCache class."""
+
+    def test_least_recently_used_entries_are_evicted(self):
+        """Test that the cache keeps its most recently used entries."""
+        cache = NodeCache(max_entries=2)
+        cache.put("a", {"value": 1})
+        cache.put("b", {"value": 2})
+        cache.get("a")
+        cache.put("c", {"value": 3})
+
+        assert len(cache) == 2
+        assert cache.get("b") is None
+        assert cache.get("a") == {"value": 1}
+
+    def test_key_covers_the_declared_keys_only(self, mock_trends):
+        """Test that keys ignore the state keys a node does not read, and handle models."""
+        first = NodeCache.make_key("writer", {"trending_topics": mock_trends, "current_step": "a"}, ["trending_topics"])
+        second = NodeCache.make_key("writer", {"trending_topics": mock_trends, "current_step": "b"}, ["trending_topics"])
+
+        assert first == second
+        assert first != NodeCache.make_key("publicator", {"trending_topics": mock_trends}, ["trending_topics"])
+
+    def test_zero_entries_disables_the_cache(self):
+        """Test that a cache without room keeps nothing."""
+        cache = NodeCache(max_entries=0)
+        cache.put("a", {"value": 1})
+
+        assert cache.get("a") is None
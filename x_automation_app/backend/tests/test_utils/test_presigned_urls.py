@@ -0,0 +1,71 @@
+"""Tests for the presigned URL service."""
+from unittest.mock import Mock
+import pytest
+from backend.app.utils import presigned_urls as presigned_urls_module
+from backend.app.utils.presigned_urls import PresignedUrlService, resolve_image_urls
+from backend.app.utils.schemas import GeneratedImage
+
+
+@pytest.fixture
+def s3_client(mocker):
+    """An S3 client minting numbered URLs."""
+    client = Mock()
+    client.generate_presigned_url.side_effect = (f"https://bucket/url-{i}" for i in range(100))
+    mocker.patch.object(presigned_urls_module, "get_s3_client", return_value=client)
+    return client
+
+
+@pytest.fixture
+def clock(mocker):
+    """A controllable clock."""
+    now = [1_000_000.0]
+    mocker.patch.object(presigned_urls_module.time, "time", side_effect=lambda: now[0])
+    return now
+
+
+class TestPresignedUrlService:
+    """Tests for PresignedUrlService."""
+
+    def test_urls_are_cached_per_key(self, s3_client, clock):
+        """Test that a key is signed once while its URL is fresh."""
+        service = PresignedUrlService(expires_in=3600, renew_before=600)
+
+        assert service.get("images/a.jpeg", "bucket") == "https://bucket/url-0"
+        assert service.get("images/a.jpeg", "bucket") == "https://bucket/url-0"
+        assert service.get("images/b.jpeg", "bucket") == "https://bucket/url-1"
+        assert s3_client.generate_presigned_url.call_count == 2
+        assert s3_client.generate_presigned_url.call_args.kwargs["ExpiresIn"] == 3600
+
+    def test_urls_are_renewed_before_expiry(self, s3_client, clock):
+        """Test that a URL close to expiry is replaced by a new one."""
+        service = PresignedUrlService(expires_in=3600, renew_before=600)
+        service.get("images/a.jpeg", "bucket")
+
+        clock[0] += 2900
+        assert service.get("images/a.jpeg", "bucket") == "https://bucket/url-0"
+        clock[0] += 200
+        assert service.get("images/a.jpeg", "bucket") == "https://bucket/url-1"
+
+
+class TestResolveImageUrls:
+    """Tests for resolve_image_urls function."""
+
+    def test_uploaded_images_get_a_fresh_url(self, s3_client, clock):
+        """Test that images with an S3 key get their URL from the service, without touching the state."""
+        uploaded = GeneratedImage(
+            is_generated=True, image_name="a.jpeg", local_file_path="/a.jpeg", s3_url="https://bucket/expired", s3_key="images/a.jpeg"
+        )
+        local = {"is_generated": True, "image_name": "b.jpeg", "local_file_path": "/b.jpeg", "s3_url": ""}
+        values = {"generated_images": [uploaded, local], "final_content": "content"}
+
+        resolved = resolve_image_urls(values)
+
+        assert resolved["generated_images"][0].s3_url == "https://bucket/url-0"
+        assert resolved["generated_images"][1].s3_url == ""
+        assert resolved["final_content"] == "content"
+        assert values["generated_images"][0].s3_url == "https://bucket/expired"
+
+    def test_state_without_images(self):
+        """Test that states without images are returned as is."""
+        values = {"generated_images": None}
+        assert resolve_image_urls(values) is values
@@ -0,0 +1,70 @@
+"""Tests for the store of workflow schedules."""
+import pytest
+from backend.app.utils.schedule_store import ScheduleStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    """A schedule store in a temporary database."""
+    store = ScheduleStore(str(tmp_path / "schedules.sqlite"))
+    yield store
+    store.close()
+
+
+class TestScheduleStore:
+    """Tests for ScheduleStore class."""
+
+    def test_add_and_list(self, store):
+        """Test that schedules are stored with their payload, soonest run first."""
+        later = store.add("Weekly", "0 9 * * mon", {"x_content_type": "THREAD"}, next_run_at=2000.0)
+        sooner = store.add("Daily", "0 9 * * *", {"x_content_type": "TWEET"}, next_run_at=1000.0)
+
+        assert [schedule["schedule_id"] for schedule in store.list()] == [sooner["schedule_id"], later["schedule_id"]]
+        assert sooner["payload"] == {"x_content_type": "TWEET"}
+        assert sooner["enabled"] is True
+
+    def test_schedules_survive_a_restart(self, tmp_path):
+        """Test that schedules are read back from the database file."""
+        path = str(tmp_path / "schedules.sqlite")
+        first = ScheduleStore(path)
+        schedule = first.add("Daily", "@daily", {}, next_run_at=1000.0)
+        first.close()
+
+        second = ScheduleStore(path)
+        assert second.get(schedule["schedule_id"])["cron"] == "@daily"
+        second.close()
+
+    def test_run_is_claimed_once(self, store):
+        """Test that only the first claim of a run moves the schedule forward."""
+        schedule = store.add("Daily", "@daily", {}, next_run_at=1000.0)
+
+        assert store.claim(schedule["schedule_id"], 1000.0, 2000.0)
+        assert not store.claim(schedule["schedule_id"], 1000.0, 3000.0)
+        assert store.get(schedule["schedule_id"])["next_run_at"] == 2000.0
+
+    def test_paused_schedule_is_not_claimed(self, store):
+        """Test that a paused schedule is not run, and is listed apart."""
+        schedule = store.add("Daily", "@daily", {}, next_run_at=1000.0)
+
+        assert store.set_enabled(schedule["schedule_id"], False)
+
+        assert not store.claim(schedule["schedule_id"], 1000.0, 2000.0)
+        assert store.list(enabled_only=True) == []
+
+    def test_record_run(self, store):
+        """Test that the outcome of the last run is recorded."""
+        schedule = store.add("Daily", "@daily", {}, next_run_at=1000.0)
+
+        store.record_run(schedule["schedule_id"], None, "Workflow could not start")
+
+        recorded = store.get(schedule["schedule_id"])
+        assert recorded["last_error"] == "Workflow could not start"
+        assert recorded["last_run_at"] is not None
+
+    def test_remove(self, store):
+        """Test that a removed schedule is gone, and removing it again reports it."""
+        schedule = store.add("Daily", "@daily", {}, next_run_at=1000.0)
+
+        assert store.remove(schedule["schedule_id"])
+        assert not store.remove(schedule["schedule_id"])
+        assert store.get(schedule["schedule_id"]) is None
@@ -4,7 +4,7 @@ from pydantic import ValidationError
 from backend.app.utils.schemas import (
     Trend, TweetSearched, TweetAuthor, ValidationResult, ValidationAction,
     ValidationData, UserConfigSchema, OpinionAnalysisOutput, WriterOutput,
-    QAOutput, GeneratedImage, UserDetails
+    QAOutput, GeneratedImage, UserDetails, ImageDecisionAction
 )
 
 
@@ -146,6 +146,20 @@ class TestValidationResult:
         assert data["action"] == "approve"
         assert data["data"]["feedback"] == "Looks good"
 
+    def test_validation_result_with_image_decisions(self):
+        """Test ValidationResult with per-image decisions."""
+        result = ValidationResult.model_validate({
+            "action": "reject",
+            "data": {"image_decisions": [
+                {"image_name": "a.jpeg", "action": "keep"},
+                {"image_name": "b.jpeg", "action": "edit_prompt", "prompt": "A brighter sky"}
+            ]}
+        })
+        decisions = result.data.image_decisions
+        assert decisions[0].action == ImageDecisionAction.KEEP
+        assert decisions[1].action == ImageDecisionAction.EDIT_PROMPT
+        assert decisions[1].prompt == "A brighter sky"
+
 
 class TestUserConfigSchema:
     """Tests for UserConfigSchema."""
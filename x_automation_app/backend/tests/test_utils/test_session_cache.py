@@ -0,0 +1,122 @@
+"""Tests for the session validation cache."""
+import base64
+import json
+import pytest
+from unittest.mock import Mock
+from backend.app.utils.session_cache import (
+    SessionValidationCache, local_cookie_probe
+)
+from backend.app.utils.x_utils import InvalidSessionError
+
+
+class TestSessionValidationCache:
+    """Tests for SessionValidationCache."""
+
+    def test_valid_session_is_cached(self):
+        """Test that a valid session is probed only once within the TTL."""
+        probe = Mock(return_value={"isValid": True})
+        cache = SessionValidationCache(ttl_seconds=60, negative_ttl_seconds=10, probe=probe)
+
+        assert cache.validate("cookie", "proxy") == {"isValid": True}
+        assert cache.validate("cookie", "proxy") == {"isValid": True}
+
+        probe.assert_called_once_with("cookie", "proxy")
+
+    def test_invalid_session_is_negatively_cached(self):
+        """Test that an invalid session keeps raising without probing again."""
+        probe = Mock(side_effect=InvalidSessionError("Session expired"))
+        cache = SessionValidationCache(ttl_seconds=60, negative_ttl_seconds=10, probe=probe)
+
+        for _ in range(2):
+            with pytest.raises(InvalidSessionError) as excinfo:
+                cache.validate("cookie", "proxy")
+            assert "Session expired" in str(excinfo.value)
+
+        probe.assert_called_once()
+
+    def test_unexpected_errors_are_not_cached(self):
+        """Test that errors other than InvalidSessionError are not cached."""
+        probe = Mock(side_effect=[Exception("Boom"), {"isValid": True}])
+        cache = SessionValidationCache(ttl_seconds=60, negative_ttl_seconds=10, probe=probe)
+
+        with pytest.raises(Exception):
+            cache.validate("cookie", "proxy")
+        assert cache.validate("cookie", "proxy") == {"isValid": True}
+        assert probe.call_count == 2
+
+    def test_expired_entries_are_probed_again(self, mocker):
+        """Test that entries are re-validated once the TTL has elapsed."""
+        clock = mocker.patch("backend.app.utils.session_cache.time.monotonic")
+        clock.return_value = 1000.0
+        probe = Mock(return_value={"isValid": True})
+        cache = SessionValidationCache(ttl_seconds=60, negative_ttl_seconds=10, probe=probe)
+
+        cache.validate("cookie", "proxy")
+        clock.return_value = 1061.0
+        cache.validate("cookie", "proxy")
+
+        assert probe.call_count == 2
+
+    def test_key_depends_on_cookie_and_proxy(self):
+        """Test that the same cookie behind another proxy is a different entry."""
+        probe = Mock(return_value={"isValid": True})
+        cache = SessionValidationCache(ttl_seconds=60, negative_ttl_seconds=10, probe=probe)
+
+        cache.validate("cookie", "proxy_a")
+        cache.validate("cookie", "proxy_b")
+
+        assert probe.call_count == 2
+        assert "cookie" not in SessionValidationCache.make_key("cookie", "proxy_a")
+
+    def test_invalidate_forces_new_probe(self):
+        """Test that invalidate drops the cached result."""
+        probe = Mock(return_value={"isValid": True})
+        cache = SessionValidationCache(ttl_seconds=60, negative_ttl_seconds=10, probe=probe)
+
+        cache.validate("cookie", "proxy")
+        cache.invalidate("cookie", "proxy")
+        cache.validate("cookie", "proxy")
+
+        assert probe.call_count == 2
+
+    def test_default_probe_follows_settings(self, mocker):
+        """Test that the probe is selected from settings when none is given."""
+        mocker.patch("backend.app.utils.session_cache.settings.SESSION_VALIDATION_PROBE", "like")
+        mock_verify = mocker.patch("backend.app.utils.session_cache.x_utils.verify_session")
+        mock_verify.return_value = {"isValid": True}
+        cache = SessionValidationCache(ttl_seconds=60, negative_ttl_seconds=10)
+
+        cache.validate("cookie", "proxy")
+
+        mock_verify.assert_called_once_with(login_cookies="cookie", proxy="proxy")
+
+
+class TestLocalCookieProbe:
+    """Tests for local_cookie_probe."""
+
+    def test_empty_cookie_is_invalid(self):
+        """Test that an empty cookie is rejected."""
+        with pytest.raises(InvalidSessionError):
+            local_cookie_probe("", "proxy")
+
+    def test_encoded_cookie_with_auth_token_is_valid(self):
+        """Test that a decodable cookie jar with an auth token is accepted."""
+        cookie = base64.b64encode(json.dumps({"auth_token": "abc", "ct0": "def"}).encode()).decode()
+        assert local_cookie_probe(cookie, "proxy") == {"isValid": True}
+
+    def test_encoded_cookie_without_auth_token_is_invalid(self):
+        """Test that a decodable cookie jar without an auth token is rejected."""
+        cookie = base64.b64encode(json.dumps({"ct0": "def"}).encode()).decode()
+        with pytest.raises(InvalidSessionError):
+            local_cookie_probe(cookie, "proxy")
+
+    def test_undecodable_cookie_is_invalid(self):
+        """Test that a cookie that is no cookie jar is rejected rather than trusted."""
+        with pytest.raises(InvalidSessionError):
+            local_cookie_probe("abc", "proxy")
+
+    def test_cookie_header_needs_auth_token(self):
+        """Test that a cookie header is accepted with an auth token only."""
+        assert local_cookie_probe("auth_token=abc; ct0=def", "proxy") == {"isValid": True}
+        with pytest.raises(InvalidSessionError):
+            local_cookie_probe("ct0=def", "proxy")
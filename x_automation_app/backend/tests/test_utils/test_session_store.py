@@ -0,0 +1,109 @@
+"""Tests for the encrypted login session store."""
+import json
+import pytest
+from unittest.mock import Mock
+from cryptography.fernet import Fernet
+from backend.app.utils.session_store import LoginSessionStore
+
+
+@pytest.fixture
+def session_details():
+    """Session details as returned by login_v2."""
+    return {
+        "session_cookie": "session_cookie_12345",
+        "user_details": {"user_name": "demo_user", "email": "demo@example.com"}
+    }
+
+
+class TestLoginSessionStore:
+    """Tests for LoginSessionStore."""
+
+    def test_put_then_get(self, session_details):
+        """Test that a stored session is returned for the same account."""
+        store = LoginSessionStore(ttl_seconds=3600, refresh_margin_seconds=60)
+        store.put("demo_user", "proxy", session_details)
+
+        assert store.get("demo_user", "proxy") == session_details
+        assert store.get("demo_user", "other_proxy") is None
+        assert store.get("other_user", "proxy") is None
+
+    def test_expired_session_is_dropped(self, mocker, session_details):
+        """Test that sessions expire after the TTL."""
+        clock = mocker.patch("backend.app.utils.session_store.time.time")
+        clock.return_value = 1_000_000.0
+        store = LoginSessionStore(ttl_seconds=3600, refresh_margin_seconds=60)
+        store.put("demo_user", "proxy", session_details)
+
+        clock.return_value = 1_000_000.0 + 3601
+        assert store.get("demo_user", "proxy") is None
+        assert len(store) == 0
+
+    def test_needs_refresh_near_expiry(self, mocker, session_details):
+        """Test that a session is flagged for refresh within the margin."""
+        clock = mocker.patch("backend.app.utils.session_store.time.time")
+        clock.return_value = 1_000_000.0
+        store = LoginSessionStore(ttl_seconds=3600, refresh_margin_seconds=600)
+        store.put("demo_user", "proxy", session_details)
+
+        assert store.needs_refresh("demo_user", "proxy") is False
+        clock.return_value = 1_000_000.0 + 3100
+        assert store.needs_refresh("demo_user", "proxy") is True
+
+    def test_refresh_replaces_session(self, session_details):
+        """Test that refresh stores the result of the login callable."""
+        store = LoginSessionStore(ttl_seconds=3600, refresh_margin_seconds=60)
+        store.put("demo_user", "proxy", session_details)
+        new_details = {**session_details, "session_cookie": "new_cookie"}
+
+        store.refresh("demo_user", "proxy", Mock(return_value=new_details))
+
+        assert store.get("demo_user", "proxy")["session_cookie"] == "new_cookie"
+
+    def test_failed_refresh_keeps_session(self, session_details):
+        """Test that a failing refresh keeps the current session."""
+        store = LoginSessionStore(ttl_seconds=3600, refresh_margin_seconds=60)
+        store.put("demo_user", "proxy", session_details)
+
+        store.refresh("demo_user", "proxy", Mock(side_effect=Exception("Login failed")))
+
+        assert store.get("demo_user", "proxy") == session_details
+
+    def test_discard_session_by_cookie(self, session_details):
+        """Test that a session can be dropped by its cookie."""
+        store = LoginSessionStore(ttl_seconds=3600, refresh_margin_seconds=60)
+        store.put("demo_user", "proxy", session_details)
+
+        assert store.discard_session("session_cookie_12345") is True
+        assert store.get("demo_user", "proxy") is None
+
+    def test_entries_are_encrypted_at_rest(self, tmp_path, session_details):
+        """Test that the persisted file holds no clear-text session data."""
+        path = tmp_path / "sessions.json"
+        key = Fernet.generate_key().decode()
+        store = LoginSessionStore(ttl_seconds=3600, refresh_margin_seconds=60, secret_key=key, path=str(path))
+        store.put("demo_user", "proxy", session_details)
+
+        raw = path.read_text()
+        assert "session_cookie_12345" not in raw
+        assert "demo_user" not in raw
+
+        reloaded = LoginSessionStore(ttl_seconds=3600, refresh_margin_seconds=60, secret_key=key, path=str(path))
+        assert reloaded.get("demo_user", "proxy") == session_details
+
+    def test_wrong_key_cannot_read_entries(self, tmp_path, session_details):
+        """Test that entries written with another key are discarded."""
+        path = tmp_path / "sessions.json"
+        store = LoginSessionStore(ttl_seconds=3600, refresh_margin_seconds=60, secret_key=Fernet.generate_key().decode(), path=str(path))
+        store.put("demo_user", "proxy", session_details)
+
+        other = LoginSessionStore(ttl_seconds=3600, refresh_margin_seconds=60, secret_key=Fernet.generate_key().decode(), path=str(path))
+        assert other.get("demo_user", "proxy") is None
+
+    def test_no_persistence_without_key(self, tmp_path, session_details):
+        """Test that nothing is written to disk without a stable key."""
+        path = tmp_path / "sessions.json"
+        store = LoginSessionStore(ttl_seconds=3600, refresh_margin_seconds=60, path=str(path))
+        store.put("demo_user", "proxy", session_details)
+
+        assert not path.exists()
+        assert store.get("demo_user", "proxy") == session_details
@@ -0,0 +1,95 @@
+"""Tests for the speculative tasks manager."""
+import threading
+import pytest
+from backend.app.utils.speculation import SpeculationManager
+
+
+@pytest.fixture
+def manager():
+    """A manager running two speculative tasks at most."""
+    manager = SpeculationManager(max_concurrency=2)
+    yield manager
+    manager.shutdown()
+
+
+class TestSpeculationManager:
+    """Tests for SpeculationManager class."""
+
+    def test_claim_returns_the_result(self, manager):
+        """Test that a claimed task gives its result once, then is forgotten."""
+        assert manager.submit("thread", "tweets", "Python", lambda: {"tweet_search_results": [1]})
+
+        assert manager.claim("thread", "tweets", "Python") == {"tweet_search_results": [1]}
+        assert manager.claim("thread", "tweets", "Python") is None
+        assert manager.pending("thread") == 0
+
+    def test_claim_waits_for_a_running_task(self, manager):
+        """Test that claiming a task still running waits for its result."""
+        release = threading.Event()
+        manager.submit("thread", "images", "a prompt", lambda: release.wait(5))
+
+        timer = threading.Timer(0.05, release.set)
+        timer.start()
+        assert manager.claim("thread", "images", "a prompt") is True
+        timer.join()
+
+    def test_failed_task_is_not_claimed(self, manager):
+        """Test that the failure of a task gives no result."""
+        def fail():
+            raise RuntimeError("search failed")
+
+        manager.submit("thread", "tweets", "Python", fail)
+
+        assert manager.claim("thread", "tweets", "Python") is None
+
+    def test_budget_skips_extra_tasks(self, manager):
+        """Test that tasks beyond the concurrency budget are skipped, not queued."""
+        release = threading.Event()
+        assert manager.submit("thread", "tweets", "Python", lambda: release.wait(5))
+        assert manager.submit("thread", "tweets", "AI", lambda: release.wait(5))
+        assert not manager.submit("thread", "tweets", "FastAPI", lambda: "never run")
+        release.set()
+
+        manager.claim("thread", "tweets", "Python")
+        threading.Event().wait(0.05)
+        assert manager.submit("thread", "tweets", "FastAPI", lambda: "run")
+
+    def test_duplicate_tasks_are_not_started(self, manager):
+        """Test that a task is started once per thread, kind and key."""
+        assert manager.submit("thread", "tweets", "Python", lambda: 1)
+        assert not manager.submit("thread", "tweets", "Python", lambda: 2)
+        assert manager.submit("other thread", "tweets", "Python", lambda: 3)
+
+    def test_disabled_manager_runs_nothing(self):
+        """Test that a budget of 0 disables speculation."""
+        manager = SpeculationManager(max_concurrency=0)
+
+        assert not manager.enabled
+        assert not manager.submit("thread", "tweets", "Python", lambda: 1)
+
+    def test_discard_undoes_finished_and_running_tasks(self, manager):
+        """Test that discarded tasks are undone with their result, even when they finish later."""
+        undone = []
+        release = threading.Event()
+        manager.submit("thread", "images", "finished", lambda: True, undo=undone.append)
+        threading.Event().wait(0.05)
+        manager.submit("thread", "images", "running", lambda: release.wait(5), undo=undone.append)
+        manager.submit("thread", "images", "kept", lambda: True, undo=undone.append)
+
+        assert manager.discard("thread", "images", keep=["kept"]) == 2
+        assert undone == [True]
+        release.set()
+        threading.Event().wait(0.05)
+
+        assert undone == [True, True]
+        assert manager.pending("thread") == 1
+        assert manager.claim("thread", "images", "kept") is True
+
+    def test_discard_by_kind(self, manager):
+        """Test that discarding one kind of task leaves the others."""
+        manager.submit("thread", "tweets", "Python", lambda: 1)
+        manager.submit("thread", "images", "a prompt", lambda: True)
+
+        assert manager.discard("thread", "tweets") == 1
+        assert manager.claim("thread", "images", "a prompt") is True
+        assert manager.discard("thread") == 0
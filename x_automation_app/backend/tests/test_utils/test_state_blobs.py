@@ -0,0 +1,167 @@
+"""Tests for the offloading of large state values."""
+import os
+import operator
+from typing import Annotated, List, TypedDict
+import pytest
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from langgraph.graph import StateGraph, START, END
+from backend.app.utils import state_blobs as state_blobs_module
+from backend.app.utils.checkpointer import BoundedMemorySaver, SqliteCheckpointSaver
+from backend.app.utils.schemas import GeneratedImage
+from backend.app.utils.state_blobs import BLOB_TYPE, BlobStore, OffloadingSerializer, create_state_blob_serializer
+
+
+REPORT = "A long research report paragraph. " * 2000
+
+
+class ReportState(TypedDict):
+    """A state with a large report, like the deep research output."""
+    report: str
+    sources: Annotated[List[str], operator.add]
+    step: int
+
+
+def build_graph(saver):
+    """Builds a graph writing the report once, then only small values."""
+    builder = StateGraph(ReportState)
+    builder.add_node("research", lambda state: {"report": REPORT, "sources": ["a"], "step": 1})
+    builder.add_node("draft", lambda state: {"step": 2})
+    builder.add_node("publish", lambda state: {"step": 3})
+    builder.add_edge(START, "research")
+    builder.add_edge("research", "draft")
+    builder.add_edge("draft", "publish")
+    builder.add_edge("publish", END)
+    return builder.compile(checkpointer=saver)
+
+
+@pytest.fixture
+def serializer(tmp_path):
+    """An offloading serializer with a 1 KB threshold."""
+    return OffloadingSerializer(JsonPlusSerializer(), BlobStore(tmp_path / "blobs"), threshold=1024)
+
+
+def blob_files(serializer):
+    """Lists the blobs stored on disk."""
+    return sorted(serializer.store.directory.glob("*/*.z"))
+
+
+class TestOffloadingSerializer:
+    """Tests for OffloadingSerializer."""
+
+    def test_large_values_are_offloaded_once(self, serializer):
+        """Test that a large value is stored once, compressed, and round-trips."""
+        first = serializer.dumps_typed(REPORT)
+        second = serializer.dumps_typed(REPORT)
+
+        assert first[0] == BLOB_TYPE and first == second
+        assert len(first[1]) < 200
+        files = blob_files(serializer)
+        assert len(files) == 1 and files[0].stat().st_size < len(REPORT) / 10
+        assert serializer.loads_typed(first) == REPORT
+
+    def test_small_values_stay_inline(self, serializer):
+        """Test that values below the threshold are serialized as usual."""
+        assert serializer.dumps_typed({"step": 1}) == JsonPlusSerializer().dumps_typed({"step": 1})
+        assert blob_files(serializer) == []
+
+    def test_checkpoint_channel_values(self, serializer):
+        """Test that whole checkpoints keep small channels inline and reference large ones."""
+        image = GeneratedImage(image_name="a.png", local_file_path="/tmp/a.png", s3_url="https://x/a.png", is_generated=True)
+        checkpoint = {
+            "id": "1", "channel_versions": {"report": 1, "step": 1, "images": 1},
+            "channel_values": {"report": REPORT, "step": 3, "images": [image]}
+        }
+        serialized = serializer.dumps_typed(checkpoint)
+
+        assert len(serialized[1]) < 1024
+        assert serializer.references(serialized, checkpoint=True) == {blob_files(serializer)[0].stem}
+        assert serializer.loads_typed(serialized)["channel_values"] == checkpoint["channel_values"]
+
+    def test_loads_use_the_cache(self, serializer, mocker):
+        """Test that recently used blobs are not read from disk again."""
+        serialized = serializer.dumps_typed(REPORT)
+        read_bytes = mocker.spy(type(blob_files(serializer)[0]), "read_bytes")
+
+        assert serializer.loads_typed(serialized) == REPORT
+        read_bytes.assert_not_called()
+
+        serializer.store._cache.clear()
+        serializer.store._cache_size = 0
+        assert serializer.loads_typed(serialized) == REPORT
+        read_bytes.assert_called_once()
+
+    def test_disabled_by_threshold(self, mocker):
+        """Test that a threshold of 0 disables offloading."""
+        mocker.patch.object(state_blobs_module.settings, "STATE_BLOB_THRESHOLD_BYTES", 0)
+        assert create_state_blob_serializer() is None
+
+
+class TestCheckpointerOffloading:
+    """Tests for the checkpointers with an offloading serializer."""
+
+    @pytest.mark.parametrize("backend", ["memory", "sqlite"])
+    def test_report_is_stored_once(self, backend, serializer, tmp_path):
+        """Test that a large value is stored once across checkpoints and the graph still sees it."""
+        if backend == "memory":
+            saver = BoundedMemorySaver(retention=0, serde=serializer)
+        else:
+            saver = SqliteCheckpointSaver(str(tmp_path / "checkpoints.sqlite"), retention=0, serde=serializer)
+        graph = build_graph(saver)
+        config = {"configurable": {"thread_id": "t1"}}
+
+        result = graph.invoke({"report": "", "sources": [], "step": 0}, config)
+
+        assert result["report"] == REPORT
+        assert len(blob_files(serializer)) == 1
+        assert all(state.values.get("report") in (None, "", REPORT) for state in graph.get_state_history(config))
+
+    @pytest.mark.parametrize("backend", ["memory", "sqlite"])
+    def test_latest_channel_value(self, backend, serializer, tmp_path, mocker):
+        """Test that one channel of the latest checkpoint is read without loading the other offloaded values."""
+        if backend == "memory":
+            saver = BoundedMemorySaver(serde=serializer)
+        else:
+            saver = SqliteCheckpointSaver(str(tmp_path / "checkpoints.sqlite"), serde=serializer)
+        build_graph(saver).invoke({"report": "", "sources": [], "step": 0}, {"configurable": {"thread_id": "t1"}})
+        blob_reads = mocker.spy(serializer.store, "get")
+
+        assert saver.latest_channel_value("t1", "step") == 3
+        blob_reads.assert_not_called()
+        assert saver.latest_channel_value("t1", "report") == REPORT
+        assert saver.latest_channel_value("unknown", "step") is None
+
+    def test_memory_per_thread_drops(self, serializer):
+        """Test that a thread holds an order of magnitude fewer bytes with offloading."""
+        sizes = []
+        for serde in (None, serializer):
+            saver = BoundedMemorySaver(retention=0, serde=serde)
+            build_graph(saver).invoke({"report": "", "sources": [], "step": 0}, {"configurable": {"thread_id": "t1"}})
+            sizes.append(saver.thread_size("t1"))
+
+        assert sizes[1] * 10 < sizes[0]
+
+    @pytest.mark.parametrize("backend", ["memory", "sqlite"])
+    def test_sweep_keeps_referenced_blobs(self, backend, serializer, tmp_path, mocker):
+        """Test that only the blobs of deleted threads are swept."""
+        if backend == "memory":
+            saver = BoundedMemorySaver(serde=serializer)
+        else:
+            saver = SqliteCheckpointSaver(str(tmp_path / "checkpoints.sqlite"), serde=serializer)
+        build_graph(saver).invoke({"report": "", "sources": [], "step": 0}, {"configurable": {"thread_id": "t1"}})
+        orphan = serializer.dumps_typed("An unrelated value. " * 500)
+        for path in blob_files(serializer):
+            os.utime(path, (0, 0))
+
+        assert saver.sweep_blobs() == 1
+        assert serializer.references(orphan).isdisjoint(path.stem for path in blob_files(serializer))
+        assert len(blob_files(serializer)) == 1
+
+        saver.delete_thread("t1")
+        assert saver.sweep_blobs() == 1
+        assert blob_files(serializer) == []
+
+    def test_sweep_keeps_recent_blobs(self, serializer):
+        """Test that blobs written within the grace period are never swept."""
+        serializer.dumps_typed(REPORT)
+        assert serializer.store.sweep(set()) == 0
+        assert len(blob_files(serializer)) == 1
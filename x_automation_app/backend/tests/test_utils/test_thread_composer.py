@@ -0,0 +1,127 @@
+"""Tests for the deterministic thread composer."""
+import pytest
+from backend.app.utils.thread_composer import compose_thread, place_images, THREAD_OPENER_SUFFIX
+from backend.app.utils.x_utils import weighted_length
+from backend.app.utils.schemas import ThreadPlan
+
+
+LONG_CONTENT = "\n\n".join(
+    " ".join(f"Sentence number {p}.{s} explains one more point about the topic." for s in range(6))
+    for p in range(5)
+)
+
+
+class TestComposeThread:
+    """Tests for compose_thread function."""
+
+    def test_short_content_is_a_single_tweet(self):
+        """Test that content under the limit is kept as a single, unnumbered tweet."""
+        plan = compose_thread("Short and sweet.")
+
+        assert isinstance(plan, ThreadPlan)
+        assert len(plan.thread) == 1
+        assert plan.thread[0].text == "Short and sweet."
+
+    def test_every_tweet_fits_the_limit(self):
+        """Test that every tweet respects the weighted length limit."""
+        plan = compose_thread(LONG_CONTENT)
+
+        assert len(plan.thread) > 1
+        for chunk in plan.thread:
+            assert weighted_length(chunk.text) <= 280
+
+    def test_tweets_are_numbered_and_opener_is_marked(self):
+        """Test the (i/n) numbering and the thread opener emojis."""
+        plan = compose_thread(LONG_CONTENT)
+        total = len(plan.thread)
+
+        assert plan.thread[0].text.endswith(f"(1/{total}){THREAD_OPENER_SUFFIX}")
+        for i, chunk in enumerate(plan.thread[1:], start=2):
+            assert chunk.text.endswith(f"({i}/{total})")
+
+    def test_sentences_are_not_split(self):
+        """Test that tweets break on sentence boundaries."""
+        plan = compose_thread(LONG_CONTENT)
+
+        for chunk in plan.thread:
+            body = chunk.text.replace(THREAD_OPENER_SUFFIX, "").rsplit(" (", 1)[0]
+            assert body.endswith("topic.")
+
+    def test_no_text_is_lost(self):
+        """Test that all words of the content end up in the thread."""
+        plan = compose_thread(LONG_CONTENT)
+        joined = " ".join(chunk.text for chunk in plan.thread)
+
+        for word in set(LONG_CONTENT.split()):
+            assert word in joined
+
+    def test_oversized_word_is_hard_split(self):
+        """Test that a single word longer than a tweet is cut."""
+        plan = compose_thread("a" * 700)
+
+        assert len(plan.thread) == 3
+        for chunk in plan.thread:
+            assert weighted_length(chunk.text) <= 280
+
+    def test_wide_characters_count_double(self):
+        """Test that CJK text is split using its weighted length."""
+        plan = compose_thread("字" * 200)
+
+        assert len(plan.thread) == 2
+        for chunk in plan.thread:
+            assert weighted_length(chunk.text) <= 280
+
+    def test_images_are_attached(self):
+        """Test that images are placed on the thread's tweets."""
+        plan = compose_thread(LONG_CONTENT, image_paths=["a.jpeg", "b.jpeg"])
+
+        assert plan.thread[0].image_path == "a.jpeg"
+        assert [c.image_path for c in plan.thread if c.image_path] == ["a.jpeg", "b.jpeg"]
+
+    def test_empty_content_raises(self):
+        """Test that empty content cannot be composed."""
+        with pytest.raises(ValueError):
+            compose_thread("   ")
+
+
+class TestPlaceImages:
+    """Tests for place_images function."""
+
+    def test_images_are_spread_evenly(self):
+        """Test that images are spread across the thread."""
+        assert place_images(4, ["a", "b"]) == ["a", None, "b", None]
+
+    def test_extra_images_are_dropped(self):
+        """Test that a chunk never holds more than one image."""
+        assert place_images(2, ["a", "b", "c"]) == ["a", "b"]
+
+    def test_no_images(self):
+        """Test placement without images."""
+        assert place_images(3, None) == [None, None, None]
+
+
+class TestPlanThread:
+    """Tests for the publicator's thread planning."""
+
+    def test_local_composer_is_used_by_default(self, mocker):
+        """Test that the local composer runs without any LLM call."""
+        from backend.app.agents import publicator
+        mocker.patch("backend.app.agents.publicator.settings.THREAD_COMPOSER", "local")
+        mock_llm = mocker.patch("backend.app.agents.publicator.compose_thread_with_llm")
+
+        plan = publicator.plan_thread(LONG_CONTENT, [])
+
+        assert len(plan.thread) > 1
+        mock_llm.assert_not_called()
+
+    def test_falls_back_to_llm_composer(self, mocker):
+        """Test that the LLM composer is used when the local one fails."""
+        from backend.app.agents import publicator
+        mocker.patch("backend.app.agents.publicator.settings.THREAD_COMPOSER", "local")
+        mocker.patch("backend.app.agents.publicator.compose_thread", side_effect=ValueError("boom"))
+        mock_llm = mocker.patch("backend.app.agents.publicator.compose_thread_with_llm")
+        mock_llm.return_value = ThreadPlan(thread=[])
+
+        publicator.plan_thread("content", [])
+
+        mock_llm.assert_called_once_with("content", [])
@@ -0,0 +1,56 @@
+"""Tests for the trends cache."""
+from unittest.mock import Mock
+from backend.app.utils.trends_cache import TrendsCache
+from backend.app.utils.schemas import Trend
+
+
+class TestTrendsCache:
+    """Tests for TrendsCache class."""
+
+    def test_trends_are_fetched_once(self):
+        """Test that the trends of a location are fetched once within the TTL."""
+        fetch = Mock(return_value=[Trend(name="Python", rank=1, tweet_count="10K")])
+        cache = TrendsCache(ttl_seconds=60)
+
+        first = cache.get(23424819, 30, fetch)
+        second = cache.get(23424819, 30, fetch)
+
+        fetch.assert_called_once()
+        assert first == second
+        assert first[0] is not second[0]
+
+    def test_locations_are_cached_apart(self):
+        """Test that other locations or counts are fetched on their own."""
+        fetch = Mock(return_value=[])
+        cache = TrendsCache(ttl_seconds=60)
+
+        cache.get(1, 30, fetch)
+        cache.get(2, 30, fetch)
+        cache.get(1, 10, fetch)
+
+        assert fetch.call_count == 3
+        assert len(cache) == 3
+
+    def test_failures_are_not_cached(self):
+        """Test that a failed fetch is retried on the next lookup."""
+        fetch = Mock(side_effect=[Exception("Network error"), []])
+        cache = TrendsCache(ttl_seconds=60)
+
+        try:
+            cache.get(1, 30, fetch)
+        except Exception:
+            pass
+
+        assert cache.get(1, 30, fetch) == []
+        assert fetch.call_count == 2
+
+    def test_disabled_cache(self):
+        """Test that a TTL of 0 fetches the trends every time."""
+        fetch = Mock(return_value=[])
+        cache = TrendsCache(ttl_seconds=0)
+
+        cache.get(1, 30, fetch)
+        cache.get(1, 30, fetch)
+
+        assert fetch.call_count == 2
+        assert len(cache) == 0
@@ -0,0 +1,139 @@
+"""Tests for the near-duplicate clustering of searched tweets."""
+import random
+import time
+import numpy as np
+import pytest
+from backend.app.utils.tweet_dedup import (
+    normalize_text, minhash_signatures, cluster_signatures,
+    collapse_near_duplicates, diversity_order
+)
+from backend.app.utils.tweet_ranking import engagement_scores
+from backend.app.utils.schemas import TweetSearched, TweetAuthor
+
+
+def make_tweet(text, likes=0, name="user"):
+    """Builds a tweet with the given text and likes."""
+    return TweetSearched(
+        text=text,
+        retweetCount=0,
+        replyCount=0,
+        likeCount=likes,
+        viewCount=0,
+        createdAt="2025-01-01T12:00:00Z",
+        author=TweetAuthor(userName=name, name=name.title()),
+    )
+
+
+OPINION = "the new framework release finally fixes the memory leaks everyone complained about for months"
+OTHER_OPINION = "honestly the pricing change makes this product unusable for small teams and students"
+
+
+class TestNormalizeText:
+    """Tests for normalize_text function."""
+
+    def test_strips_noise(self):
+        """Test that retweet prefixes, mentions, URLs, emojis and punctuation are removed."""
+        text = "RT @someone: Big NEWS 🚀 from @team, read https://t.co/abc!"
+        assert normalize_text(text) == "big news from read"
+
+    def test_empty_text(self):
+        """Test that missing texts normalize to an empty string."""
+        assert normalize_text(None) == ""
+
+
+class TestClustering:
+    """Tests for MinHash signatures and clustering."""
+
+    def test_near_duplicates_share_a_cluster(self):
+        """Test that copies with a changed word, a prefix or a link are clustered together."""
+        texts = [
+            OPINION,
+            f"RT @fan: {OPINION} https://t.co/xyz",
+            OPINION.replace("finally", "really"),
+            OTHER_OPINION,
+        ]
+        labels = cluster_signatures(minhash_signatures([normalize_text(t) for t in texts]))
+
+        assert labels[0] == labels[1] == labels[2]
+        assert labels[3] != labels[0]
+
+    def test_identical_texts_share_a_signature(self):
+        """Test that identical texts get identical signatures within a batch."""
+        signatures = minhash_signatures([OPINION, OTHER_OPINION, OPINION])
+        assert np.array_equal(signatures[0], signatures[2])
+        assert not np.array_equal(signatures[0], signatures[1])
+
+    def test_empty_texts(self):
+        """Test that empty texts get an all-zero signature."""
+        signatures = minhash_signatures(["", OPINION])
+        assert not signatures[0].any()
+        assert signatures[1].any()
+
+
+class TestCollapseNearDuplicates:
+    """Tests for collapse_near_duplicates function."""
+
+    def test_keeps_most_engaging_copy_with_count(self):
+        """Test that a cluster is represented by its best tweet with the cluster size."""
+        tweets = [
+            make_tweet(OPINION, likes=5, name="first"),
+            make_tweet(f"RT @first: {OPINION}", likes=500, name="copy"),
+            make_tweet(OTHER_OPINION, likes=1, name="other"),
+        ]
+        collapsed = collapse_near_duplicates(tweets, engagement_scores(tweets))
+
+        assert [(t.author.userName, t.duplicateCount) for t in collapsed] == [("copy", 2), ("other", 1)]
+
+    def test_counts_accumulate_over_passes(self):
+        """Test that already collapsed tweets carry their count into new clusters."""
+        tweets = [make_tweet(OPINION).model_copy(update={"duplicateCount": 3}), make_tweet(OPINION)]
+        collapsed = collapse_near_duplicates(tweets, engagement_scores(tweets))
+        assert collapsed[0].duplicateCount == 4
+
+    def test_accepts_dictionaries(self):
+        """Test that model dumps are collapsed like models."""
+        tweets = [make_tweet(OPINION).model_dump(), make_tweet(OPINION).model_dump()]
+        collapsed = collapse_near_duplicates(tweets, np.zeros(2))
+        assert collapsed == [{**tweets[0], "duplicateCount": 2}]
+
+
+class TestDiversityOrder:
+    """Tests for diversity_order function."""
+
+    def test_similar_items_are_pushed_back(self):
+        """Test that a distinct opinion is picked before a second take on the first one."""
+        texts = [OPINION, OPINION.replace("months", "years"), OTHER_OPINION]
+        signatures = minhash_signatures(texts)
+        scores = np.array([10.0, 9.0, 8.0])
+
+        assert diversity_order(scores, signatures, diversity=0).tolist() == [0, 1, 2]
+        assert diversity_order(scores, signatures, diversity=0.5).tolist() == [0, 2, 1]
+
+    def test_limit(self):
+        """Test that only `limit` items are ordered."""
+        signatures = minhash_signatures([OPINION, OTHER_OPINION])
+        assert len(diversity_order(np.array([1.0, 2.0]), signatures, limit=1)) == 1
+
+
+@pytest.mark.slow
+class TestDedupBenchmark:
+    """Benchmarks clustering at a large fetch size."""
+
+    def test_five_thousand_tweets_under_a_second(self):
+        """Collapse 5000 tweets made of 1000 opinions with noisy copies."""
+        rng = random.Random(0)
+        vocabulary = [f"word{i}" for i in range(3000)]
+        opinions = [rng.choices(vocabulary, k=30) for _ in range(1000)]
+        tweets = []
+        for i in range(5000):
+            words = list(opinions[i % 1000])
+            if i >= 1000:
+                words[rng.randrange(30)] = rng.choice(vocabulary)
+            tweets.append(make_tweet(f"RT @user{i}: " + " ".join(words) + f" https://t.co/{i}", likes=i % 300))
+
+        start = time.perf_counter()
+        collapsed = collapse_near_duplicates(tweets, engagement_scores(tweets))
+        elapsed = time.perf_counter() - start
+
+        assert len(collapsed) < 1100
+        assert elapsed < 1.0
@@ -0,0 +1,105 @@
+"""Tests for the engagement ranking of searched tweets."""
+import calendar
+import math
+from backend.app.utils.tweet_ranking import rank_tweets, engagement_scores, parse_created_at
+from backend.app.utils.tweet_serializer import serialize_tweets_compact, estimate_tokens
+from backend.app.utils.schemas import TweetSearched, TweetAuthor
+
+
+NOW = float(calendar.timegm((2025, 1, 2, 12, 0, 0)))
+
+
+def make_tweet(name, likes=0, retweets=0, replies=0, views=0, created_at="2025-01-02T12:00:00Z", text=None):
+    """Builds a tweet with the given engagement counts."""
+    return TweetSearched(
+        text=text if text is not None else f"Opinion of {name} about the topic",
+        retweetCount=retweets,
+        replyCount=replies,
+        likeCount=likes,
+        viewCount=views,
+        createdAt=created_at,
+        author=TweetAuthor(userName=name, name=name.title()),
+    )
+
+
+class TestParseCreatedAt:
+    """Tests for parse_created_at function."""
+
+    def test_parses_x_and_iso_dates(self):
+        """Test that both date formats give the same timestamp."""
+        x_date = parse_created_at("Thu Jan 02 12:00:00 +0000 2025")
+        iso_date = parse_created_at("2025-01-02T12:00:00Z")
+        assert x_date == iso_date == NOW
+
+    def test_unknown_date_is_nan(self):
+        """Test that missing or malformed dates give NaN."""
+        assert math.isnan(parse_created_at(""))
+        assert math.isnan(parse_created_at("yesterday"))
+
+
+class TestEngagementScores:
+    """Tests for engagement_scores function."""
+
+    def test_more_engagement_scores_higher(self):
+        """Test that engagement raises the score."""
+        scores = engagement_scores([make_tweet("low", likes=1), make_tweet("high", likes=1000, retweets=50)], now=NOW)
+        assert scores[1] > scores[0]
+
+    def test_recency_decay(self):
+        """Test that a tweet one half-life old scores half as much."""
+        fresh = make_tweet("fresh", likes=100)
+        old = make_tweet("old", likes=100, created_at="2025-01-01T12:00:00Z")
+        scores = engagement_scores([fresh, old], half_life_hours=24, now=NOW)
+        assert math.isclose(scores[1], scores[0] / 2)
+
+    def test_undated_tweets_get_median_decay(self):
+        """Test that tweets without a date are neither favoured nor penalized."""
+        tweets = [
+            make_tweet("a", likes=100),
+            make_tweet("b", likes=100, created_at="2025-01-01T12:00:00Z"),
+            make_tweet("c", likes=100, created_at="2024-12-31T12:00:00Z"),
+            make_tweet("undated", likes=100, created_at=""),
+        ]
+        scores = engagement_scores(tweets, half_life_hours=24, now=NOW)
+        assert math.isclose(scores[3], scores[1])
+
+
+class TestRankTweets:
+    """Tests for rank_tweets function."""
+
+    def test_orders_by_score(self):
+        """Test that the most engaging tweets come first."""
+        tweets = [make_tweet("low", likes=1), make_tweet("high", likes=5000), make_tweet("mid", likes=200)]
+        ranked = rank_tweets(tweets, now=NOW)
+        assert [t.author.userName for t in ranked] == ["high", "mid", "low"]
+
+    def test_keeps_slice_within_budget(self):
+        """Test that the serialized slice fits the token budget."""
+        tweets = [make_tweet(f"user_{i}", likes=i, text="word " * 50) for i in range(100)]
+        ranked = rank_tweets(tweets, token_budget=500, now=NOW)
+
+        assert 0 < len(ranked) < 100
+        assert ranked[0].author.userName == "user_99"
+        assert estimate_tokens(serialize_tweets_compact(ranked)) <= 500
+
+    def test_keeps_best_tweet_over_budget(self):
+        """Test that the best tweet is kept even when it alone exceeds the budget."""
+        tweets = [make_tweet("low", likes=1, text="word " * 50), make_tweet("high", likes=5000, text="word " * 50)]
+        ranked = rank_tweets(tweets, token_budget=10, now=NOW)
+        assert [t.author.userName for t in ranked] == ["high"]
+
+    def test_drops_tweets_without_text(self):
+        """Test that tweets with nothing left to analyze are dropped."""
+        tweets = [make_tweet("empty", likes=1000, text="https://example.com"), make_tweet("kept")]
+        ranked = rank_tweets(tweets, now=NOW)
+        assert [t.author.userName for t in ranked] == ["kept"]
+
+    def test_accepts_dictionaries(self):
+        """Test that model dumps are ranked like models."""
+        tweets = [make_tweet("low", likes=1).model_dump(), make_tweet("high", likes=5000).model_dump()]
+        ranked = rank_tweets(tweets, now=NOW)
+        assert ranked[0]["author"]["userName"] == "high"
+
+    def test_empty_input(self):
+        """Test that no tweets give an empty ranking."""
+        assert rank_tweets([], token_budget=100) == []
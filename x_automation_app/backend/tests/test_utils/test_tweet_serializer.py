@@ -0,0 +1,122 @@
+"""Tests for the token-compact tweet serializer."""
+import time
+import pytest
+from backend.app.utils.tweet_serializer import (
+    serialize_tweets_compact, iter_compact_tweets, bucket_number,
+    compact_date, clean_text, estimate_tokens, compact_header
+)
+from backend.app.utils.x_utils import data_to_csv
+from backend.app.utils.schemas import TweetSearched, TweetAuthor
+
+
+def make_tweets(count):
+    """Builds realistic tweets with URLs, emojis and large engagement counts."""
+    return [
+        TweetSearched(
+            text=(
+                f"Tweet {i}: the new release changes everything for developers 🚀🔥 "
+                f"Read the full breakdown here https://example.com/articles/{i}?ref=x "
+                "and tell me what you think. Long threads like this one tend to repeat "
+                "the same arguments over and over, which is exactly why we trim them."
+            ),
+            retweetCount=i * 13,
+            replyCount=i * 7,
+            likeCount=i * 101,
+            viewCount=i * 10_007,
+            createdAt="Tue Dec 10 07:00:30 +0000 2024",
+            author=TweetAuthor(userName=f"user_{i}", name=f"User Number {i}"),
+        )
+        for i in range(count)
+    ]
+
+
+class TestHelpers:
+    """Tests for the serializer helpers."""
+
+    def test_bucket_number(self):
+        """Test numeric bucketing."""
+        assert bucket_number(0) == "0"
+        assert bucket_number(999) == "999"
+        assert bucket_number(1234) == "1.2k"
+        assert bucket_number(15432) == "15k"
+        assert bucket_number(2_500_000) == "2.5M"
+        assert bucket_number(3_100_000_000) == "3.1B"
+        assert bucket_number(None) == "0"
+
+    def test_compact_date(self):
+        """Test that both X and ISO dates are shortened."""
+        assert compact_date("Tue Dec 10 07:00:30 +0000 2024") == "2024-12-10"
+        assert compact_date("2025-01-01T12:00:00Z") == "2025-01-01"
+        assert compact_date("") == ""
+
+    def test_clean_text_strips_urls_and_emojis(self):
+        """Test that URLs and emojis are removed and whitespace collapsed."""
+        text = "Big news 🚀  check https://example.com/x\nnow | ok"
+        assert clean_text(text) == "Big news check now / ok"
+
+    def test_clean_text_truncates(self):
+        """Test per-tweet truncation."""
+        assert clean_text("a" * 50, max_chars=10) == "a" * 9 + "…"
+
+
+class TestSerializeTweetsCompact:
+    """Tests for serialize_tweets_compact function."""
+
+    def test_output_format(self, mock_tweet_author):
+        """Test the legend line and one line per tweet."""
+        tweet = TweetSearched(
+            text="This is a test tweet about Python",
+            retweetCount=10,
+            replyCount=5,
+            likeCount=20,
+            viewCount=12_345,
+            createdAt="2025-01-01T12:00:00Z",
+            author=mock_tweet_author
+        )
+        output = serialize_tweets_compact([tweet, tweet])
+        lines = output.strip().split("\n")
+
+        assert lines[0] == compact_header().strip()
+        assert len(lines) == 3
+        assert lines[1] == "testuser|2025-01-01|20|10|5|12k|1|This is a test tweet about Python"
+
+    def test_accepts_dictionaries(self):
+        """Test that model dumps are serialized like models."""
+        tweets = make_tweets(5)
+        as_models = serialize_tweets_compact(tweets)
+        as_dicts = serialize_tweets_compact([t.model_dump() for t in tweets])
+        assert as_models == as_dicts
+
+    def test_respects_token_budget(self):
+        """Test that the output stops before exceeding the budget."""
+        output = serialize_tweets_compact(make_tweets(200), token_budget=500)
+
+        assert estimate_tokens(output) <= 500
+        assert 1 < len(output.strip().split("\n")) < 201
+
+    def test_streams_lazily(self):
+        """Test that lines are produced from a generator without materializing the input."""
+        tweets = iter(make_tweets(3))
+        lines = iter_compact_tweets(tweets)
+        assert next(lines).startswith("user_0|")
+
+
+@pytest.mark.slow
+class TestCompactSerializerBenchmark:
+    """Benchmarks the compact serializer against data_to_csv."""
+
+    @pytest.mark.parametrize("count", [15, 500, 5000])
+    def test_footprint_and_build_time(self, count):
+        """Check the token footprint against data_to_csv, and the build time, at several fetch sizes."""
+        tweets = make_tweets(count)
+
+        csv_tokens = estimate_tokens(data_to_csv([tweet.model_dump() for tweet in tweets]))
+
+        start = time.perf_counter()
+        compact_tokens = estimate_tokens(serialize_tweets_compact(tweets))
+        budgeted_tokens = estimate_tokens(serialize_tweets_compact(tweets, token_budget=8000))
+        elapsed = time.perf_counter() - start
+
+        assert elapsed < 1.0
+        assert compact_tokens < csv_tokens
+        assert budgeted_tokens <= 8000
@@ -2,7 +2,7 @@
 import pytest
 from unittest.mock import Mock, mock_open
 from backend.app.utils.x_utils import (
-    login_v2, verify_session, get_char_count,
+    login_v2, verify_session, get_char_count, weighted_length,
     upload_image_v2, post_tweet_v2, InvalidSessionError,
     data_to_csv
 )
@@ -173,6 +173,24 @@ class TestGetCharCount:
         assert count == 0
 
 
+class TestWeightedLength:
+    """Tests for weighted_length function."""
+
+    def test_wide_characters_count_as_two(self):
+        """Test that CJK characters count as 2."""
+        assert weighted_length("日本語") == 6
+
+    def test_emoji_sequences_count_as_two(self):
+        """Test that ZWJ, skin tone and flag sequences count as a single emoji."""
+        assert weighted_length("👨\u200d👩\u200d👧") == 2
+        assert weighted_length("👍🏽") == 2
+        assert weighted_length("🇫🇷") == 2
+
+    def test_latin_accents_count_as_one(self):
+        """Test that accented latin characters count as 1."""
+        assert weighted_length("café") == 4
+
+
 class TestUploadImageV2:
     """Tests for upload_image_v2 function."""
 
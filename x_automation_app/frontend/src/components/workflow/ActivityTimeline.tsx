@@ -66,6 +66,7 @@ const getStepConfig = (
       }
       break
     case "query_generator":
+    case "initial_query_generator":
       icon = ListFilter
       title = "Generating Search Queries"
       if (status === "completed") {
@@ -74,6 +75,7 @@ const getStepConfig = (
       }
       break
     case "web_research":
+    case "initial_web_research":
       icon = Search
       title = "Web Research"
       if (status === "completed") {
@@ -39,6 +39,8 @@ export const WorkflowProvider = ({ children }: { children: ReactNode }) => {
       "await_topic_selection",
       "auto_select_topic",
       "tweet_searcher",
+      "initial_query_generator",
+      "initial_web_research",
       "opinion_analyzer",
       "query_generator",
       "web_research",
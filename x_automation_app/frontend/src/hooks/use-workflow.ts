@@ -7,6 +7,11 @@ import { OverallState, StreamEvent } from "@/types"
 
 const API_BASE_URL = process.env.NEXT_PUBLIC_API_URL || "http://localhost:8000"
 
+// Close code of a server that cannot serve the workflow right now, e.g. while
+// another worker holds it: the client retries with an exponential backoff
+const TRY_AGAIN_LATER = 1013
+const MAX_RECONNECT_DELAY_MS = 30000
+
 function isStreamEvent(data: any): data is StreamEvent {
   return "event" in data && "run_id" in data
 }
@@ -23,6 +28,9 @@ const nodeStateMapping: Record<string, (data: any) => Partial<OverallState>> = {
   query_generator: (output) => ({
     search_query: output?.query_list?.map((q: any) => q.query) || [],
   }),
+  initial_query_generator: (output) => ({
+    search_query: output?.query_list?.map((q: any) => q.query) || [],
+  }),
   finalize_answer: (output) => ({
     final_deep_research_report: output?.final_deep_research_report,
   }),
@@ -64,8 +72,12 @@ export function useWorkflow(threadId: string | null) {
       setIsConnected(true)
       setError(null)
     },
-    onClose: () => {
-      console.log("WebSocket connection closed.")
+    onClose: (event) => {
+      if (event.code === TRY_AGAIN_LATER) {
+        console.log("Workflow is busy on the server, reconnecting shortly.")
+      } else {
+        console.log("WebSocket connection closed.")
+      }
       setIsConnected(false)
     },
     onError: (event) => {
@@ -81,6 +93,9 @@ export function useWorkflow(threadId: string | null) {
       // Allow reconnection as default behavior.
       return true
     },
+    reconnectAttempts: 20,
+    reconnectInterval: (attemptNumber) =>
+      Math.min(1000 * 2 ** attemptNumber, MAX_RECONNECT_DELAY_MS),
   })
 
   const forceReconnect = () => {